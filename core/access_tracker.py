@@ -0,0 +1,204 @@
+"""
+Access Tracker — recall/list 访问计数的批量落库
+
+recall / list 是高频读路径，逐次改写 payload_json 里的 metadata.access_count 代价太高。
+本模块：
+- record(ids)：读路径只在进程内 Counter 上累加，不触碰数据库
+- flush(c)：周期性把计数 upsert 进紧凑表 `memory_access_stats(id, count, last_access_at)`
+- 衰减在 flush 时施加：旧 count 按 decay_per_day^(距上次访问天数) 折算后再加上本批命中
+- 读侧（TTL 淘汰 / temporal governance）用同一公式折算到 now，见 effective_access_sql / read_access_counts
+- decay 默认取 TTL 配置（ttl_policy.json 的 decay_factor），写侧与读侧始终一致
+
+memory_access_stats 不在 table_generations 触发器范围内，flush 不会使 recall 缓存失效。
+未 flush 的计数只存在于进程内存，进程退出前应调用 flush。
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Iterable
+
+DEFAULT_FLUSH_INTERVAL_SEC = 30.0
+DEFAULT_MAX_PENDING = 5000
+
+_UPSERT_SQL = """
+INSERT INTO memory_access_stats(id, count, last_access_at) VALUES (:id, :hits, :now)
+ON CONFLICT(id) DO UPDATE SET
+    count = memory_access_stats.count * power(
+        :decay,
+        MAX(0.0, julianday(excluded.last_access_at) - julianday(memory_access_stats.last_access_at))
+    ) + excluded.count,
+    last_access_at = MAX(memory_access_stats.last_access_at, excluded.last_access_at)
+"""
+
+
+def _now_iso(now: datetime | None = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def configured_decay() -> float:
+    """TTL 配置中的 decay_factor；flush 时写入的折算与 TTL 读侧打分必须用同一个值。"""
+    from core.ttl_strategy import DEFAULT_CONFIG, load_config  # 延迟导入：ttl_strategy 依赖本模块
+
+    try:
+        return float(load_config().get("decay_factor", DEFAULT_CONFIG["decay_factor"]))
+    except (OSError, ValueError, TypeError):
+        return float(DEFAULT_CONFIG["decay_factor"])
+
+
+def ensure_sql_functions(c: sqlite3.Connection):
+    """未编译 math 扩展的 SQLite 没有 power()，按连接注册 Python 实现兜底。"""
+    try:
+        c.execute("SELECT power(2, 1)").fetchone()
+    except sqlite3.OperationalError:
+        c.create_function("power", 2, math.pow, deterministic=True)
+
+
+def init_access_db(c: sqlite3.Connection):
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS memory_access_stats (
+          id TEXT PRIMARY KEY,
+          count REAL NOT NULL,
+          last_access_at TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    ensure_sql_functions(c)
+
+
+def effective_access_sql(stats_alias: str = "s") -> str:
+    """读侧折算表达式：count * decay^(now - last_access_at)；需绑定 :decay 与 :now_jd，无记录时为 0。"""
+    a = stats_alias
+    return (
+        f"COALESCE({a}.count * power(:decay, MAX(0.0, :now_jd - julianday({a}.last_access_at))), 0.0)"
+    )
+
+
+def read_access_counts(
+    c: sqlite3.Connection,
+    ids: Iterable[str],
+    *,
+    now: datetime | None = None,
+    decay_per_day: float | None = None,
+) -> dict[str, dict]:
+    """返回 {id: {"count": 折算到 now 的访问数, "last_access_at": ...}}；无访问记录的 id 不出现。decay 缺省取 TTL 配置。"""
+    ids = [str(x) for x in ids]
+    if not ids:
+        return {}
+    if decay_per_day is None:
+        decay_per_day = configured_decay()
+    init_access_db(c)
+    now = now or datetime.now(timezone.utc)
+    now_jd = now.timestamp() / 86400.0 + 2440587.5
+    out: dict[str, dict] = {}
+    for start in range(0, len(ids), 900):
+        part = ids[start : start + 900]
+        marks = ",".join("?" * len(part))
+        rows = c.execute(
+            f"""SELECT id, count * power(?, MAX(0.0, ? - julianday(last_access_at))) AS eff, last_access_at
+                FROM memory_access_stats WHERE id IN ({marks})""",
+            (decay_per_day, now_jd, *part),
+        ).fetchall()
+        for r in rows:
+            out[r[0]] = {"count": float(r[1]), "last_access_at": r[2]}
+    return out
+
+
+class AccessTracker:
+    def __init__(
+        self,
+        flush_interval_sec: float = DEFAULT_FLUSH_INTERVAL_SEC,
+        max_pending: int = DEFAULT_MAX_PENDING,
+        decay_per_day: float | None = None,
+    ):
+        self.flush_interval_sec = float(flush_interval_sec)
+        self.max_pending = max(1, int(max_pending))
+        # None：每次 flush 时读 TTL 配置，改配置后无需重启即可与读侧对齐
+        self.decay_per_day = None if decay_per_day is None else float(decay_per_day)
+        self._pending: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def record(self, ids: Iterable[str]):
+        ids = [str(x) for x in ids if x]
+        if not ids:
+            return
+        with self._lock:
+            self._pending.update(ids)
+            self.recorded += len(ids)
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def maybe_flush(self, c: sqlite3.Connection) -> int:
+        """到达 flush 间隔或积压 id 数超过 max_pending 时 flush，否则立即返回 0。
+
+        供读路径顺手调用：flush 失败（如库被锁）不向上抛，计数已回灌，下次再试。
+        """
+        with self._lock:
+            due = (
+                time.monotonic() - self._last_flush >= self.flush_interval_sec
+                or len(self._pending) >= self.max_pending
+            )
+        if not due:
+            return 0
+        try:
+            return self.flush(c)
+        except sqlite3.Error:
+            return 0
+
+    def flush(self, c: sqlite3.Connection, now: datetime | None = None) -> int:
+        """把积压计数 upsert 进 memory_access_stats 并提交；失败时计数回灌，不丢失。返回写入的 id 数。"""
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._last_flush = time.monotonic()
+        if not batch:
+            return 0
+
+        ts = _now_iso(now)
+        try:
+            decay = self.decay_per_day if self.decay_per_day is not None else configured_decay()
+            init_access_db(c)
+            c.executemany(
+                _UPSERT_SQL,
+                [{"id": k, "hits": float(v), "now": ts, "decay": decay} for k, v in batch.items()],
+            )
+            c.commit()
+        except Exception:
+            c.rollback()
+            with self._lock:
+                self._pending.update(batch)
+                self.flush_errors += 1
+            raise
+
+        with self._lock:
+            self.flushed += len(batch)
+            self.flushes += 1
+        return len(batch)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pending": len(self._pending),
+                "recorded": self.recorded,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+                "flush_interval_sec": self.flush_interval_sec,
+            }
+
+
+# 进程级共享实例（API server / MCP server 各自进程内复用）
+ACCESS_TRACKER = AccessTracker()
@@ -27,6 +27,13 @@ _impact_tier 推导：
   - otherwise        → low
 
 Decision mode if uncertain → explore（低风险默认探索）
+
+去重：cognition_sources(experience_id, cognition_id) 链接表（主键即唯一索引），
+同一 experience 已有 cognition 则跳过；批量模式一次查询预取整批已有链接。
+
+批量模式：按 (created_at, id) 键集分页流式读取全部候选 experience，不再限 100 条；
+每 chunk_size 条一个事务，cognition / 链接 / 审计均以 executemany 写入，
+水位线与数据同事务提交，中断后下次运行从水位线继续。
 """
 
 from __future__ import annotations
@@ -46,6 +53,8 @@ if str(TOOLS_ROOT) not in sys.path:
 from schema_runtime import SchemaValidationError, validate_payload
 
 DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
+DEFAULT_CHUNK_SIZE = 500
+WATERMARK_KEY = "batch_watermark"
 
 
 def now_iso() -> str:
@@ -62,6 +71,97 @@ def conn(db_path: Path) -> sqlite3.Connection:
     return c
 
 
+def init_cognition_db(c: sqlite3.Connection):
+    """建表（幂等）；cognition_sources 首次创建时从已有 cognition 回填链接。"""
+    created = not _table_exists(c, "cognition_sources")
+    c.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS cognition_rules (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS audit_events (
+            id TEXT PRIMARY KEY,
+            event_type TEXT NOT NULL,
+            object_type TEXT NOT NULL,
+            object_id TEXT NOT NULL,
+            correlation_id TEXT,
+            timestamp TEXT NOT NULL,
+            payload_json TEXT NOT NULL
+        );
+
+        -- experience → cognition 链接；主键 (experience_id, cognition_id) 兼作按 experience 去重的唯一索引
+        CREATE TABLE IF NOT EXISTS cognition_sources (
+            experience_id TEXT NOT NULL,
+            cognition_id TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            PRIMARY KEY (experience_id, cognition_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_cognition_sources_cognition ON cognition_sources(cognition_id);
+
+        CREATE TABLE IF NOT EXISTS cognition_engine_state (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """
+    )
+    if _table_exists(c, "experience_records"):
+        # 批量晋升按 (created_at, id) 键集分页
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_experience_records_created ON experience_records(created_at, id)"
+        )
+    if created:
+        _backfill_cognition_sources(c)
+    c.commit()
+
+
+def _table_exists(c: sqlite3.Connection, name: str) -> bool:
+    return c.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+
+def _backfill_cognition_sources(c: sqlite3.Connection) -> int:
+    """
+    从旧数据回填链接（与旧版 LIKE 去重能命中的来源一致）：
+    - cognition 创建审计的 metadata.experience_id
+    - cognition payload evidence_refs 中指向 experience_records 的条目
+    """
+    before = c.total_changes
+    c.execute(
+        """
+        INSERT OR IGNORE INTO cognition_sources(experience_id, cognition_id, created_at)
+        SELECT json_extract(a.payload_json, '$.metadata.experience_id'), a.object_id, a.timestamp
+        FROM audit_events a
+        JOIN cognition_rules r ON r.id = a.object_id
+        WHERE a.object_type = 'cognition'
+          AND json_extract(a.payload_json, '$.metadata.experience_id') IS NOT NULL
+        """
+    )
+    if not _table_exists(c, "experience_records"):
+        return c.total_changes - before
+    c.execute(
+        """
+        INSERT OR IGNORE INTO cognition_sources(experience_id, cognition_id, created_at)
+        SELECT e.id, r.id, r.created_at
+        FROM cognition_rules r, json_each(r.payload_json, '$.evidence_refs') j
+        JOIN experience_records e ON e.id = j.value
+        """
+    )
+    return c.total_changes - before
+
+
+def _duplicate_result(experience_id: str, cognition_id: str) -> dict:
+    return {
+        "cognition_id": cognition_id,
+        "status": "duplicate",
+        "skipped": True,
+        "experience_id": experience_id,
+    }
+
+
 def _derive_epistemic_state(outcome: str, confidence: float) -> str:
     if outcome == "positive" and confidence >= 0.6:
         return "supported"
@@ -137,38 +237,12 @@ def _derive_scope(experience_payload: dict) -> dict:
     }
 
 
-def experience_to_cognition(
-    c: sqlite3.Connection,
-    experience_id: str,
-    actor_id: str = "mk-cognition-engine",
-) -> dict:
-    """
-    将一条 experience 晋升为 cognition 写入 cognition_rules 表。
-
-    Returns:
-        {"cognition_id": str, "status": str, "epistemic_state": str, "confidence": float}
-    """
-    row = c.execute(
-        "SELECT payload_json FROM experience_records WHERE id=?",
-        (experience_id,),
-    ).fetchone()
-    if not row:
-        raise ValueError(f"experience not found: {experience_id}")
-
-    exp_payload = json.loads(row["payload_json"])
-
+def _build_cognition(experience_id: str, exp_payload: dict, ts: str) -> dict:
+    """由 experience payload 推导 cognition payload 并做 schema 校验；失败抛 ValueError。"""
     outcome = exp_payload.get("outcome", "neutral")
     confidence = float(exp_payload.get("confidence", 0.5))
     epistemic_state = _derive_epistemic_state(outcome, confidence)
 
-    unknown_type = "multipath"
-    decision_mode_if_uncertain = "explore"
-    auto_verify_budget = 3
-    if epistemic_state != "uncertain":
-        unknown_type = None
-        decision_mode_if_uncertain = None
-        auto_verify_budget = None
-
     cognition_id = f"cog_{uuid.uuid4().hex[:12]}"
     risk_tier = _derive_risk_tier(outcome, confidence, exp_payload.get("episode_summary", ""))
     impact_tier = _derive_impact_tier(outcome)
@@ -179,9 +253,6 @@ def experience_to_cognition(
     if not evidence_refs:
         evidence_refs = [experience_id]
 
-    review_due_at_val = in_days_iso(14)
-    next_action_at_val = in_days_iso(7)
-
     cognition_payload: dict = {
         "id": cognition_id,
         "rule": rule_text,
@@ -194,10 +265,10 @@ def experience_to_cognition(
         "impact_tier": impact_tier,
         "status": "candidate",
         "evidence_refs": evidence_refs,
-        "created_at": now_iso(),
-        "review_due_at": review_due_at_val,
-        "next_action_at": next_action_at_val,
-        "updated_at": now_iso(),
+        "created_at": ts,
+        "review_due_at": in_days_iso(14),
+        "next_action_at": in_days_iso(7),
+        "updated_at": ts,
     }
 
     # uncertain 时才加入这几个字段（schema allOf if-then 要求）
@@ -211,6 +282,67 @@ def experience_to_cognition(
         validate_payload("cognition.schema.json", cognition_payload)
     except SchemaValidationError as e:
         raise ValueError(f"cognition schema validation failed: {e}") from e
+    return cognition_payload
+
+
+def _cognition_result(experience_id: str, payload: dict) -> dict:
+    return {
+        "cognition_id": payload["id"],
+        "status": payload["status"],
+        "epistemic_state": payload["epistemic_state"],
+        "confidence": payload["confidence"],
+        "risk_tier": payload["risk_tier"],
+        "impact_tier": payload["impact_tier"],
+        "experience_id": experience_id,
+    }
+
+
+def _promotion_audit_row(experience_id: str, payload: dict, actor_id: str, ts: str) -> tuple:
+    return _audit_row(
+        event_type="state_transition",
+        actor_type="system",
+        actor_id=actor_id,
+        object_type="cognition",
+        object_id=payload["id"],
+        before={"status": None},
+        after={"status": "candidate", "epistemic_state": payload["epistemic_state"]},
+        reason="Experience promoted to cognition via cognition_engine.",
+        evidence_refs=payload["evidence_refs"],
+        metadata={"experience_id": experience_id},
+        ts=ts,
+    )
+
+
+def experience_to_cognition(
+    c: sqlite3.Connection,
+    experience_id: str,
+    actor_id: str = "mk-cognition-engine",
+) -> dict:
+    """
+    将一条 experience 晋升为 cognition 写入 cognition_rules 表，并写入 cognition_sources 链接。
+    调用前需对连接执行过 init_cognition_db。
+
+    Returns:
+        {"cognition_id": str, "status": str, "epistemic_state": str, "confidence": float}
+    """
+    row = c.execute(
+        "SELECT payload_json FROM experience_records WHERE id=?",
+        (experience_id,),
+    ).fetchone()
+    if not row:
+        raise ValueError(f"experience not found: {experience_id}")
+
+    # 去重：同一 experience 已有 cognition 则跳过（cognition_sources 主键查找）
+    existing = c.execute(
+        "SELECT cognition_id FROM cognition_sources WHERE experience_id=? LIMIT 1",
+        (experience_id,),
+    ).fetchone()
+    if existing:
+        return _duplicate_result(experience_id, existing[0])
+
+    t = now_iso()
+    cognition_payload = _build_cognition(experience_id, json.loads(row["payload_json"]), t)
+    cognition_id = cognition_payload["id"]
 
     # 检查是否已存在
     exists = c.execute(
@@ -220,24 +352,6 @@ def experience_to_cognition(
     if exists:
         raise ValueError(f"cognition already exists: {cognition_id}")
 
-    # 去重：同一 experience 已有 cognition 则跳过（查 payload_json 中的 evidence_refs）
-    existing = c.execute(
-        """
-        SELECT id FROM cognition_rules
-        WHERE payload_json LIKE ?
-        LIMIT 1
-        """,
-        (f"%{experience_id}%",),
-    ).fetchone()
-    if existing:
-        return {
-            "cognition_id": existing["id"],
-            "status": "duplicate",
-            "skipped": True,
-            "experience_id": experience_id,
-        }
-
-    t = now_iso()
     c.execute(
         "INSERT INTO cognition_rules(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
         (
@@ -248,88 +362,209 @@ def experience_to_cognition(
             t,
         ),
     )
-
-    # 写入 audit
-    _write_audit(
-        c,
-        event_type="state_transition",
-        actor_type="system",
-        actor_id=actor_id,
-        object_type="cognition",
-        object_id=cognition_id,
-        before={"status": None},
-        after={"status": "candidate", "epistemic_state": epistemic_state},
-        reason="Experience promoted to cognition via cognition_engine.",
-        evidence_refs=evidence_refs,
-        metadata={"experience_id": experience_id},
+    c.execute(
+        "INSERT INTO cognition_sources(experience_id, cognition_id, created_at) VALUES (?, ?, ?)",
+        (experience_id, cognition_id, t),
     )
+    c.execute(_AUDIT_INSERT_SQL, _promotion_audit_row(experience_id, cognition_payload, actor_id, t))
 
     c.commit()
 
-    return {
-        "cognition_id": cognition_id,
-        "status": cognition_payload["status"],
-        "epistemic_state": epistemic_state,
-        "confidence": cognition_payload["confidence"],
-        "risk_tier": risk_tier,
-        "impact_tier": impact_tier,
-        "experience_id": experience_id,
-    }
+    return _cognition_result(experience_id, cognition_payload)
 
 
-def batch_experience_to_cognition(
+_CANDIDATE_COLUMNS = """
+    e.id, e.payload_json, e.created_at,
+    (SELECT s.cognition_id FROM cognition_sources s WHERE s.experience_id = e.id LIMIT 1) AS linked_cognition_id
+"""
+
+
+def _iter_candidate_chunks(
+    c: sqlite3.Connection,
+    experience_ids: list[str] | None,
+    cutoff: str,
+    watermark: tuple[str, str],
+    chunk_size: int,
+):
+    """按块产出候选 experience 行（附带已链接的 cognition_id）。"""
+    if experience_ids is not None:
+        ids = list(dict.fromkeys(experience_ids))
+        for start in range(0, len(ids), chunk_size):
+            rows = c.execute(
+                f"SELECT {_CANDIDATE_COLUMNS} FROM experience_records e "
+                "WHERE e.id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids[start : start + chunk_size], ensure_ascii=False),),
+            ).fetchall()
+            if rows:
+                yield rows
+        return
+
+    # 键集分页：每块一次独立查询，块间提交不受未完成游标影响；+status 避免规划器改走 status 索引再排序
+    wm_created, wm_id = watermark
+    while True:
+        rows = c.execute(
+            f"""
+            SELECT {_CANDIDATE_COLUMNS} FROM experience_records e
+            WHERE e.created_at >= ? AND (e.created_at, e.id) > (?, ?) AND +e.status = 'active'
+            ORDER BY e.created_at, e.id
+            LIMIT ?
+            """,
+            (cutoff, wm_created, wm_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            return
+        yield rows
+        wm_created, wm_id = rows[-1]["created_at"], rows[-1]["id"]
+        if len(rows) < chunk_size:
+            return
+
+
+def _get_watermark(c: sqlite3.Connection) -> tuple[str, str] | None:
+    row = c.execute("SELECT value FROM cognition_engine_state WHERE key=?", (WATERMARK_KEY,)).fetchone()
+    if not row:
+        return None
+    wm = json.loads(row[0])
+    return wm["created_at"], wm["id"]
+
+
+def _set_watermark(c: sqlite3.Connection, created_at: str, experience_id: str):
+    c.execute(
+        "INSERT OR REPLACE INTO cognition_engine_state(key, value) VALUES (?, ?)",
+        (WATERMARK_KEY, json.dumps({"created_at": created_at, "id": experience_id})),
+    )
+
+
+def iter_experience_to_cognition(
     c: sqlite3.Connection,
     experience_ids: list[str] | None = None,
     since_days: int = 30,
     actor_id: str = "mk-cognition-engine",
-) -> dict:
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    resume: bool = True,
+    stats: dict | None = None,
+):
     """
-    批量将 experience 晋升为 cognition。
+    流式批量晋升：每个 chunk 提交后逐条产出结果（新建 / duplicate / error），
+    下游（如 C→D）可在后续 chunk 推导期间处理已提交的 cognition。
 
     Args:
-        experience_ids: 指定 ID 列表；为 None 则查询最近 since_days 的 candidate/experience 记录
+        experience_ids: 指定 ID 列表；为 None 则流式处理最近 since_days 的全部 active experience
+        chunk_size: 每个事务处理的 experience 数
+        limit: 本次最多检查的 experience 数；None 为不限（未处理完时保留水位线，下次续跑）
+        resume: 从上次中断/截断留下的水位线继续（仅 since_days 模式）
+        stats: 可选，运行中就地更新的计数（total/applied/skipped/failed/chunks/resumed_from/exhausted）
     """
-    if experience_ids:
-        placeholders = ",".join("?" * len(experience_ids))
-        rows = c.execute(
-            f"SELECT id, payload_json FROM experience_records WHERE id IN ({placeholders})",
-            experience_ids,
-        ).fetchall()
-    else:
-        cutoff = in_days_iso(-since_days)
-        rows = c.execute(
-            """
-            SELECT id, payload_json FROM experience_records
-            WHERE created_at >= ? AND status = 'active'
-            ORDER BY created_at DESC
-            LIMIT 100
-            """,
-            (cutoff,),
-        ).fetchall()
+    init_cognition_db(c)
+    chunk_size = max(1, int(chunk_size))
+    cutoff = in_days_iso(-since_days)
+    resumed_from = _get_watermark(c) if (resume and experience_ids is None) else None
+    watermark = resumed_from or ("", "")
+
+    stats = stats if stats is not None else {}
+    stats.update(
+        total=0,
+        applied=0,
+        skipped=0,
+        failed=0,
+        chunks=0,
+        resumed_from=list(resumed_from) if resumed_from else None,
+        exhausted=True,
+    )
+    for rows in _iter_candidate_chunks(c, experience_ids, cutoff, watermark, chunk_size):
+        if limit is not None and stats["total"] + len(rows) > limit:
+            rows = rows[: limit - stats["total"]]
+            stats["exhausted"] = False
+        if not rows:
+            break
+
+        ts = now_iso()
+        cognition_rows, source_rows, audit_rows, chunk_results = [], [], [], []
+        for row in rows:
+            if row["linked_cognition_id"]:
+                chunk_results.append(_duplicate_result(row["id"], row["linked_cognition_id"]))
+                continue
+            try:
+                payload = _build_cognition(row["id"], json.loads(row["payload_json"]), ts)
+            except Exception as e:
+                chunk_results.append({"experience_id": row["id"], "error": str(e)})
+                continue
+            cognition_rows.append(
+                (payload["id"], payload["status"], json.dumps(payload, ensure_ascii=False), ts, ts)
+            )
+            source_rows.append((row["id"], payload["id"], ts))
+            audit_rows.append(_promotion_audit_row(row["id"], payload, actor_id, ts))
+            chunk_results.append(_cognition_result(row["id"], payload))
 
-    results = []
-    skipped = 0
-    for row in rows:
         try:
-            result = experience_to_cognition(c, row["id"], actor_id)
-            if result.get("skipped"):
-                skipped += 1
-            results.append(result)
-        except Exception as e:
-            results.append({"experience_id": row["id"], "error": str(e)})
-
-    applied = [r for r in results if not r.get("error") and not r.get("skipped")]
-    return {
-        "total": len(rows),
-        "applied": len(applied),
-        "skipped": skipped,
-        "failed": sum(1 for r in results if r.get("error")),
-        "results": results,
-    }
+            c.executemany(
+                "INSERT INTO cognition_rules(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                cognition_rows,
+            )
+            c.executemany(
+                "INSERT INTO cognition_sources(experience_id, cognition_id, created_at) VALUES (?, ?, ?)",
+                source_rows,
+            )
+            c.executemany(_AUDIT_INSERT_SQL, audit_rows)
+            if experience_ids is None:
+                _set_watermark(c, rows[-1]["created_at"], rows[-1]["id"])
+            c.commit()
+        except Exception:
+            c.rollback()
+            raise
+
+        stats["total"] += len(rows)
+        stats["chunks"] += 1
+        for r in chunk_results:
+            if r.get("error"):
+                stats["failed"] += 1
+            elif r.get("skipped"):
+                stats["skipped"] += 1
+            else:
+                stats["applied"] += 1
+        yield from chunk_results
+        if not stats["exhausted"]:
+            break
+
+    if experience_ids is None and stats["exhausted"]:
+        # 已处理到末尾：清除水位线，下次从 since_days 窗口重新扫描
+        c.execute("DELETE FROM cognition_engine_state WHERE key=?", (WATERMARK_KEY,))
+        c.commit()
 
 
-def _write_audit(
+def batch_experience_to_cognition(
     c: sqlite3.Connection,
+    experience_ids: list[str] | None = None,
+    since_days: int = 30,
+    actor_id: str = "mk-cognition-engine",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    resume: bool = True,
+) -> dict:
+    """批量将 experience 晋升为 cognition；参数见 iter_experience_to_cognition。"""
+    stats: dict = {}
+    results = list(
+        iter_experience_to_cognition(
+            c,
+            experience_ids=experience_ids,
+            since_days=since_days,
+            actor_id=actor_id,
+            chunk_size=chunk_size,
+            limit=limit,
+            resume=resume,
+            stats=stats,
+        )
+    )
+    return {**stats, "results": results}
+
+
+_AUDIT_INSERT_SQL = """
+INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _audit_row(
     *,
     event_type: str,
     actor_type: str,
@@ -342,8 +577,9 @@ def _write_audit(
     evidence_refs: list[str],
     correlation_id: str | None = None,
     metadata: dict | None = None,
-):
-    ts = now_iso()
+    ts: str | None = None,
+) -> tuple:
+    ts = ts or now_iso()
     event_id = f"aud_{uuid.uuid4().hex[:12]}"
     payload = {
         "id": event_id,
@@ -361,14 +597,7 @@ def _write_audit(
         payload["correlation_id"] = correlation_id
     if metadata:
         payload["metadata"] = metadata
-
-    c.execute(
-        """
-        INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (event_id, event_type, object_type, object_id, correlation_id, ts, json.dumps(payload, ensure_ascii=False)),
-    )
+    return (event_id, event_type, object_type, object_id, correlation_id, ts, json.dumps(payload, ensure_ascii=False))
 
 
 if __name__ == "__main__":
@@ -379,17 +608,27 @@ if __name__ == "__main__":
     p.add_argument("--experience-id", help="Process single experience")
     p.add_argument("--batch", action="store_true")
     p.add_argument("--since-days", type=int, default=30)
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    p.add_argument("--limit", type=int, default=None)
+    p.add_argument("--no-resume", action="store_true", help="忽略上次留下的水位线，从窗口起点扫描")
     p.add_argument("--dry-run", action="store_true")
     args = p.parse_args()
 
     db = Path(args.db)
     c = conn(db)
+    init_cognition_db(c)
 
     if args.experience_id:
         result = experience_to_cognition(c, args.experience_id)
         print(json.dumps(result, ensure_ascii=False, indent=2))
     elif args.batch:
-        result = batch_experience_to_cognition(c, since_days=args.since_days)
+        result = batch_experience_to_cognition(
+            c,
+            since_days=args.since_days,
+            chunk_size=args.chunk_size,
+            limit=args.limit,
+            resume=not args.no_resume,
+        )
         print(json.dumps(result, ensure_ascii=False, indent=2))
     else:
         print("Specify --experience-id or --batch")
@@ -11,19 +11,32 @@ DialogueContextResolver — 对话流语义闭环合并
   - 自然日存续，当日有效，跨日关闭未完成任务
   - importance 继承提案方，不被确认词拉低
   - 保守匹配：宁可漏掉，不要误报
+
+增量模式（resolve_session_incremental / resolve_transcript_incremental）：
+  - 每个 session 的 TaskItem 状态与处理进度（last_index、transcript inode/offset）存 SQLite
+  - 只解析上次之后的新消息，过期按截止时间最小堆弹出，成本与新消息数相关
 """
 
 from __future__ import annotations
 
 import hashlib
+import heapq
 import json
+import os
 import re
+import sqlite3
+import sys
 from dataclasses import dataclass, field
-from datetime import date, datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional
 
 ROOT = Path(__file__).resolve().parents[1]
+DB_PATH = ROOT / "data" / "mindkernel_v0_1.sqlite"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.transcript_reader import read_complete_lines, tail_lines  # noqa: E402
 
 # ── 关键词定义（保守策略）────────────────────────────────────────────────────
 
@@ -104,6 +117,26 @@ class ResolvedMessage:
     task_id: Optional[str] = None
 
 
+def _utc_iso(ts: Optional[str]) -> Optional[str]:
+    """统一成 YYYY-MM-DDTHH:MM:SSZ，便于与截止时间按字符串比较；无法解析返回 None"""
+    if not ts:
+        return None
+    try:
+        dt = datetime.fromisoformat(str(ts).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _task_deadline(proposal_ts: str, today: date) -> str:
+    """任务在提案所在自然日（UTC）结束时过期；提案时间缺失时按 today 计"""
+    ts = _utc_iso(proposal_ts)
+    day = date.fromisoformat(ts[:10]) if ts else today
+    return f"{(day + timedelta(days=1)).isoformat()}T00:00:00Z"
+
+
 # ── 核心解析器 ──────────────────────────────────────────────────────────────
 
 class DialogueContextResolver:
@@ -123,6 +156,8 @@ class DialogueContextResolver:
         self.today = today or date.today()
         self.active_tasks: list[TaskItem] = []   # 有序，最近的在后面
         self.consumed: set[int] = set()          # 已合并的消息索引
+        self.task_count = 0                      # 本会话创建过的任务数（含已关闭）
+        self._deadlines: list[tuple[str, int, TaskItem]] = []  # (自然日截止, 序号, task) 最小堆
 
     # ── 基础判断 ───────────────────────────────────────────────────────────
 
@@ -157,7 +192,7 @@ class DialogueContextResolver:
 
     def _is_completion(self, text: str) -> bool:
         """完成确认：必须有 active_task；单独的好/收到不算"""
-        if not self.active_tasks:
+        if not self.task_count:
             return False
         text = self._strip_reply_marker(text.strip())
         return any(text.startswith(p) for p in COMPLETION_PREFIXES) or text in {"好", "好的", "收到", "OK", "ok"}
@@ -186,172 +221,453 @@ class DialogueContextResolver:
         """
         输入：[{role, content, timestamp, index}, ...]
         输出：[ResolvedMessage, ...]
+
+        一次性解析：结束时关闭全部未完成任务。
         """
         resolved = []
-        n = len(messages)
 
         for i, msg in enumerate(messages):
             if i in self.consumed:
                 continue
-
-            text = self._extract_text(msg.get("content", ""))
-            role = msg.get("role", "")
-            ts = msg.get("timestamp", "")
-
-            if not text.strip() or role not in ("user", "assistant"):
-                continue
-
-            # ── 1. 提案检测（assistant）─────────────────────────────────
-            # 关键约束：同 segment 内，只创建第一个未批准的提案；
-            # 后续含提案关键词的 assistant 消息视为执行进展，不重复提案
-            if role == "assistant" and self._is_proposal(text):
-                # 检查是否已有未批准的 active task
-                existing_unapproved = any(
-                    t.status == "active" and not t.approved
-                    for t in self.active_tasks
-                )
-                if existing_unapproved:
-                    # 同 topic 已有提案，后续执行消息不重复创建
-                    pass
-                else:
-                    task_id = self._gen_task_id(text, ts)
-                    task = TaskItem(
-                        task_id=task_id,
-                        proposal_text=self._clean_proposal_text(text),
-                        proposal_ts=ts,
-                        proposal_index=i,
-                    )
-                    self.active_tasks.append(task)
-                    self.consumed.add(i)
-                    resolved.append(ResolvedMessage(
-                        content=f"[任务提案] {task.proposal_text}",
-                        importance=0.8,
-                        timestamp=ts,
-                        role="assistant",
-                        sources=[i],
-                        task_id=task_id,
-                    ))
-
-            # ── 2. User 消息处理 ────────────────────────────────────────
-            elif role == "user":
-                cleaned = self._strip_reply_marker(text)
-
-                # 2a. 取消
-                if self._is_cancel(cleaned):
-                    self.consumed.add(i)
-                    # 关闭最近一个未完成的 task
-                    for task in reversed(self.active_tasks):
-                        if task.status == "active":
-                            task.close("cancelled", ts=ts)
-                            resolved.append(ResolvedMessage(
-                                content=f"「{task.proposal_text}」已取消",
-                                importance=0.6,
-                                timestamp=ts,
-                                role="user",
-                                sources=[i],
-                                task_id=task.task_id,
-                            ))
-                            break
-
-                # 2b. 完成确认（有 active_task）
-                elif self._is_completion(cleaned):
-                    self.consumed.add(i)
-                    # 关闭最近一个未完成 task
-                    for task in reversed(self.active_tasks):
-                        if task.status == "active":
-                            task.close("completed", ts=ts)
-                            resolved.append(ResolvedMessage(
-                                content=f"「{task.proposal_text}」已完成",
-                                importance=0.9,
-                                timestamp=ts,
-                                role="user",
-                                sources=[i],
-                                task_id=task.task_id,
-                            ))
-                            break
-
-                # 2c. 确认批准（有 active_task 且尚未 approved）
-                elif self._is_approval(cleaned):
-                    self.consumed.add(i)
-                    for task in reversed(self.active_tasks):
-                        if task.status == "active" and not task.approved:
-                            task.approved = True
-                            task.approved_ts = ts
-                            resolved.append(ResolvedMessage(
-                                content=f"「{task.proposal_text}」已获批待执行",
-                                importance=0.85,
-                                timestamp=ts,
-                                role="user",
-                                sources=[i],
-                                task_id=task.task_id,
-                            ))
-                            break
+            self._process(i, msg, resolved)
 
         # ── 3. 自然日边界：关闭未完成任务 ────────────────────────────────
         resolved.extend(self._expire_stale())
 
         return resolved
 
-    def _expire_stale(self) -> list[ResolvedMessage]:
-        """自然日边界：所有未完成任务输出『状态未知』"""
+    def resolve_new(self, messages: list[dict], now: Optional[str] = None) -> list[ResolvedMessage]:
+        """
+        增量解析：只处理新消息（sources 取消息自带的 index），任务跨自然日才过期。
+
+        每条消息处理前先关闭截止时间（提案次日 0 点 UTC）已过的任务，最后按 now 再检查一次；
+        当日任务保持 active，下次调用可继续确认/完成。
+        """
         resolved = []
-        now = datetime.now(timezone.utc).isoformat()
-        for task in self.active_tasks:
-            if task.status == "active":
-                task.close("expired", ts=now)
+        for pos, msg in enumerate(messages):
+            ts = _utc_iso(msg.get("timestamp", ""))
+            if ts:
+                resolved.extend(self._expire_stale(until=ts))
+            self._process(int(msg.get("index", pos)), msg, resolved)
+        resolved.extend(self._expire_stale(until=now or _utc_iso(datetime.now(timezone.utc).isoformat())))
+        return resolved
+
+    def _track(self, task: TaskItem, deadline: Optional[str] = None):
+        self.active_tasks.append(task)
+        self.task_count += 1
+        deadline = deadline or _task_deadline(task.proposal_ts, self.today)
+        heapq.heappush(self._deadlines, (deadline, self.task_count, task))
+
+    def _process(self, i: int, msg: dict, resolved: list[ResolvedMessage]):
+        text = self._extract_text(msg.get("content", ""))
+        role = msg.get("role", "")
+        ts = msg.get("timestamp", "")
+
+        if not text.strip() or role not in ("user", "assistant"):
+            return
+
+        # ── 1. 提案检测（assistant）─────────────────────────────────
+        # 关键约束：同 segment 内，只创建第一个未批准的提案；
+        # 后续含提案关键词的 assistant 消息视为执行进展，不重复提案
+        if role == "assistant" and self._is_proposal(text):
+            # 检查是否已有未批准的 active task
+            existing_unapproved = any(
+                t.status == "active" and not t.approved
+                for t in self.active_tasks
+            )
+            if existing_unapproved:
+                # 同 topic 已有提案，后续执行消息不重复创建
+                pass
+            else:
+                task_id = self._gen_task_id(text, ts)
+                task = TaskItem(
+                    task_id=task_id,
+                    proposal_text=self._clean_proposal_text(text),
+                    proposal_ts=ts,
+                    proposal_index=i,
+                )
+                self._track(task)
+                self.consumed.add(i)
                 resolved.append(ResolvedMessage(
-                    content=task.closure_summary(),
-                    importance=0.7,
-                    timestamp=now,
-                    role="system",
-                    sources=[],
-                    task_id=task.task_id,
+                    content=f"[任务提案] {task.proposal_text}",
+                    importance=0.8,
+                    timestamp=ts,
+                    role="assistant",
+                    sources=[i],
+                    task_id=task_id,
                 ))
+
+        # ── 2. User 消息处理 ────────────────────────────────────────
+        elif role == "user":
+            cleaned = self._strip_reply_marker(text)
+
+            # 2a. 取消
+            if self._is_cancel(cleaned):
+                self.consumed.add(i)
+                # 关闭最近一个未完成的 task
+                for task in reversed(self.active_tasks):
+                    if task.status == "active":
+                        task.close("cancelled", ts=ts)
+                        resolved.append(ResolvedMessage(
+                            content=f"「{task.proposal_text}」已取消",
+                            importance=0.6,
+                            timestamp=ts,
+                            role="user",
+                            sources=[i],
+                            task_id=task.task_id,
+                        ))
+                        break
+
+            # 2b. 完成确认（有 active_task）
+            elif self._is_completion(cleaned):
+                self.consumed.add(i)
+                # 关闭最近一个未完成 task
+                for task in reversed(self.active_tasks):
+                    if task.status == "active":
+                        task.close("completed", ts=ts)
+                        resolved.append(ResolvedMessage(
+                            content=f"「{task.proposal_text}」已完成",
+                            importance=0.9,
+                            timestamp=ts,
+                            role="user",
+                            sources=[i],
+                            task_id=task.task_id,
+                        ))
+                        break
+
+            # 2c. 确认批准（有 active_task 且尚未 approved）
+            elif self._is_approval(cleaned):
+                self.consumed.add(i)
+                for task in reversed(self.active_tasks):
+                    if task.status == "active" and not task.approved:
+                        task.approved = True
+                        task.approved_ts = ts
+                        resolved.append(ResolvedMessage(
+                            content=f"「{task.proposal_text}」已获批待执行",
+                            importance=0.85,
+                            timestamp=ts,
+                            role="user",
+                            sources=[i],
+                            task_id=task.task_id,
+                        ))
+                        break
+
+    def _expire_stale(self, until: Optional[str] = None) -> list[ResolvedMessage]:
+        """
+        自然日边界：未完成任务输出『状态未知』
+
+        按截止时间从堆顶弹出；until 为空时关闭全部（一次性解析），否则只关闭截止时间 <= until 的任务。
+        """
+        resolved = []
+        now = datetime.now(timezone.utc).isoformat()
+        if until is None:
+            due = [(now, t) for t in self.active_tasks]
+            self._deadlines.clear()
+        else:
+            due = []
+            while self._deadlines and self._deadlines[0][0] <= until:
+                deadline, _, task = heapq.heappop(self._deadlines)
+                due.append((deadline, task))
+        for ts, task in due:
+            if task.status != "active":
+                continue
+            task.close("expired", ts=ts)
+            resolved.append(ResolvedMessage(
+                content=task.closure_summary(),
+                importance=0.7,
+                timestamp=ts,
+                role="system",
+                sources=[],
+                task_id=task.task_id,
+            ))
         return resolved
 
 
+# ── 会话任务状态持久化 ─────────────────────────────────────────────────────
+
+_TASK_ICONS = {"completed": "✅", "cancelled": "❌", "expired": "❔"}
+
+_UPSERT_TASK_SQL = """
+INSERT INTO dialogue_tasks(
+    session_id, task_id, proposal_text, proposal_ts, proposal_index,
+    approved, approved_ts, completed_ts, status, deadline, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(session_id, task_id) DO UPDATE SET
+    approved = excluded.approved,
+    approved_ts = excluded.approved_ts,
+    completed_ts = excluded.completed_ts,
+    status = excluded.status,
+    updated_at = excluded.updated_at
+"""
+
+
+def init_dialogue_state_db(c: sqlite3.Connection):
+    c.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS dialogue_sessions (
+            session_id        TEXT PRIMARY KEY,
+            last_index        INTEGER NOT NULL DEFAULT -1,
+            task_count        INTEGER NOT NULL DEFAULT 0,
+            transcript_inode  INTEGER,
+            transcript_offset INTEGER NOT NULL DEFAULT 0,
+            updated_at        TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS dialogue_tasks (
+            session_id     TEXT NOT NULL,
+            task_id        TEXT NOT NULL,
+            proposal_text  TEXT NOT NULL,
+            proposal_ts    TEXT,
+            proposal_index INTEGER NOT NULL,
+            approved       INTEGER NOT NULL DEFAULT 0,
+            approved_ts    TEXT,
+            completed_ts   TEXT,
+            status         TEXT NOT NULL,
+            deadline       TEXT NOT NULL,
+            updated_at     TEXT NOT NULL,
+            PRIMARY KEY (session_id, task_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_dialogue_tasks_active
+            ON dialogue_tasks(session_id, deadline) WHERE status = 'active';
+        CREATE INDEX IF NOT EXISTS idx_dialogue_tasks_updated ON dialogue_tasks(updated_at);
+        """
+    )
+
+
+def load_session_resolver(
+    c: sqlite3.Connection, session_id: str, today: Optional[date] = None
+) -> tuple[DialogueContextResolver, dict]:
+    """恢复会话的解析器：只加载 active 任务（按截止时间入堆），返回 (resolver, 会话进度)"""
+    resolver = DialogueContextResolver(today=today)
+    row = c.execute(
+        "SELECT last_index, task_count, transcript_inode, transcript_offset FROM dialogue_sessions WHERE session_id=?",
+        (session_id,),
+    ).fetchone()
+    state = {"last_index": -1, "task_count": 0, "transcript_inode": None, "transcript_offset": 0}
+    if row:
+        state = dict(zip(state, tuple(row)))
+    for r in c.execute(
+        "SELECT task_id, proposal_text, proposal_ts, proposal_index, approved, approved_ts, deadline "
+        "FROM dialogue_tasks WHERE session_id=? AND status='active' ORDER BY proposal_index",
+        (session_id,),
+    ):
+        task = TaskItem(
+            task_id=r[0],
+            proposal_text=r[1],
+            proposal_ts=r[2] or "",
+            proposal_index=r[3],
+            approved=bool(r[4]),
+            approved_ts=r[5],
+        )
+        resolver._track(task, deadline=r[6])
+    resolver.task_count = max(resolver.task_count, int(state["task_count"]))
+    return resolver, state
+
+
+def save_session_resolver(
+    c: sqlite3.Connection,
+    session_id: str,
+    resolver: DialogueContextResolver,
+    *,
+    last_index: int,
+    transcript_inode: Optional[int] = None,
+    transcript_offset: int = 0,
+):
+    """写回本次涉及的任务（已加载的 active + 新建）与会话进度；已关闭的任务随后移出内存"""
+    now = _utc_iso(datetime.now(timezone.utc).isoformat())
+    with c:
+        c.executemany(
+            _UPSERT_TASK_SQL,
+            [
+                (
+                    session_id, t.task_id, t.proposal_text, t.proposal_ts, t.proposal_index,
+                    int(t.approved), t.approved_ts, t.completed_ts, t.status,
+                    _task_deadline(t.proposal_ts, resolver.today), now,
+                )
+                for t in resolver.active_tasks
+            ],
+        )
+        c.execute(
+            """
+            INSERT INTO dialogue_sessions(session_id, last_index, task_count, transcript_inode, transcript_offset, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(session_id) DO UPDATE SET
+                last_index = excluded.last_index,
+                task_count = excluded.task_count,
+                transcript_inode = excluded.transcript_inode,
+                transcript_offset = excluded.transcript_offset,
+                updated_at = excluded.updated_at
+            """,
+            (session_id, last_index, resolver.task_count, transcript_inode, transcript_offset, now),
+        )
+    resolver.active_tasks = [t for t in resolver.active_tasks if t.status == "active"]
+
+
+def resolve_session_incremental(
+    c: sqlite3.Connection,
+    session_id: str,
+    messages: list[dict],
+    now: Optional[str] = None,
+    today: Optional[date] = None,
+) -> list[ResolvedMessage]:
+    """只解析 index 大于上次进度的消息，任务状态从 SQLite 恢复并写回"""
+    resolver, state = load_session_resolver(c, session_id, today=today)
+    last_index = int(state["last_index"])
+    new = [m for pos, m in enumerate(messages) if int(m.get("index", pos)) > last_index]
+    resolved = resolver.resolve_new(new, now=now)
+    for pos, m in enumerate(new):
+        last_index = max(last_index, int(m.get("index", pos)))
+    save_session_resolver(
+        c,
+        session_id,
+        resolver,
+        last_index=last_index,
+        transcript_inode=state["transcript_inode"],
+        transcript_offset=int(state["transcript_offset"]),
+    )
+    return resolved
+
+
+def resolve_transcript_incremental(
+    transcript_path: str,
+    db_path: Optional[Path] = None,
+    session_id: Optional[str] = None,
+    now: Optional[str] = None,
+) -> list[ResolvedMessage]:
+    """
+    从上次的 (inode, offset) 继续读取 transcript 追加的完整行并增量解析；
+    文件轮转/截断时从头读取（已持久化的任务状态保留）。
+    """
+    path = Path(transcript_path).expanduser().resolve()
+    session_id = session_id or path.stem
+    c = sqlite3.connect(str(db_path or DB_PATH))
+    try:
+        init_dialogue_state_db(c)
+        resolver, state = load_session_resolver(c, session_id)
+        st = os.stat(path)
+        offset, line_no = int(state["transcript_offset"]), int(state["last_index"]) + 1
+        if state["transcript_inode"] != st.st_ino or offset > st.st_size:
+            offset, line_no = 0, 0
+
+        messages = []
+        for line in read_complete_lines(path, offset, line_no):
+            offset, line_no = line.end, line.line_no
+            try:
+                obj = json.loads(line.text)
+            except json.JSONDecodeError:
+                continue
+            m = _to_message(obj, line.line_no - 1)
+            if m:
+                messages.append(m)
+
+        resolved = resolver.resolve_new(messages, now=now)
+        save_session_resolver(
+            c,
+            session_id,
+            resolver,
+            last_index=line_no - 1,
+            transcript_inode=st.st_ino,
+            transcript_offset=offset,
+        )
+        return resolved
+    finally:
+        c.close()
+
+
+def task_closure_summary(c: sqlite3.Connection, since: Optional[str] = None, limit: int = 15) -> str:
+    """做梦输入用：active 任务 + 窗口内（默认 7 天）关闭的任务，只读索引覆盖的行"""
+    since = since or _utc_iso((datetime.now(timezone.utc) - timedelta(days=7)).isoformat())
+    active_count = c.execute("SELECT COUNT(*) FROM dialogue_tasks WHERE status='active'").fetchone()[0]
+    active = c.execute(
+        "SELECT proposal_text, approved FROM dialogue_tasks WHERE status='active' "
+        "ORDER BY deadline DESC, proposal_index DESC LIMIT ?",
+        (limit,),
+    ).fetchall()
+    closed = c.execute(
+        "SELECT status, proposal_text FROM dialogue_tasks WHERE updated_at >= ? AND status != 'active' "
+        "ORDER BY updated_at DESC LIMIT ?",
+        (since, limit),
+    ).fetchall()
+    if not active and not closed:
+        return "（无活跃任务数据）"
+
+    lines = []
+    if active:
+        lines.append(f"⏳ 活跃任务（{active_count}个）:")
+        lines.extend(f"  - {text[:100]}{'（已批准）' if approved else ''}" for text, approved in active)
+    for status, text in closed:
+        task = TaskItem(task_id="", proposal_text=text[:100], proposal_ts="", proposal_index=0, status=status)
+        lines.append(f"{_TASK_ICONS.get(status, '·')} {task.closure_summary()}")
+    return "\n".join(lines)
+
+
 # ── 工具函数 ───────────────────────────────────────────────────────────────
 
-def read_session_messages(transcript_path: str, limit: int = 200) -> list[dict]:
-    """从 transcript JSONL 读取消息列表"""
+def _to_message(obj: dict, idx: int) -> Optional[dict]:
+    if obj.get("type") != "message":
+        return None
+    msg = obj.get("message", {})
+    role = msg.get("role", "")
+    if role not in ("user", "assistant"):
+        return None
+    content = msg.get("content", [])
+    text = ""
+    if isinstance(content, list):
+        text = "".join(
+            c.get("text", "") for c in content
+            if isinstance(c, dict) and c.get("type") == "text"
+        )
+    elif isinstance(content, str):
+        text = content
+    if len(text.strip()) < 2:
+        return None
+    return {
+        "role": role,
+        "content": content,
+        "timestamp": obj.get("timestamp", ""),
+        "index": idx,
+    }
+
+
+def read_session_messages(transcript_path: str, limit: int = 200, from_end: bool = False) -> list[dict]:
+    """
+    从 transcript JSONL 读取消息列表
+
+    默认读取前 limit 行；from_end=True 时从文件尾反向读取最后 limit 行（长会话取最近消息），
+    此时 index 为倒数行号（-1 为最后一行），无法解析的行跳过。
+    """
     messages = []
+    if from_end:
+        try:
+            lines = tail_lines(transcript_path, limit)
+        except FileNotFoundError:
+            return []
+        for idx, line in enumerate(lines, start=-len(lines)):
+            try:
+                obj = json.loads(line.strip())
+            except json.JSONDecodeError:
+                continue
+            m = _to_message(obj, idx)
+            if m:
+                messages.append(m)
+        return messages
+
     try:
         with open(transcript_path) as f:
             for idx, line in enumerate(f):
                 if idx >= limit:
                     break
-                obj = json.loads(line.strip())
-                if obj.get("type") != "message":
-                    continue
-                msg = obj.get("message", {})
-                role = msg.get("role", "")
-                if role not in ("user", "assistant"):
-                    continue
-                content = msg.get("content", [])
-                text = ""
-                if isinstance(content, list):
-                    text = "".join(
-                        c.get("text", "") for c in content
-                        if isinstance(c, dict) and c.get("type") == "text"
-                    )
-                elif isinstance(content, str):
-                    text = content
-                if len(text.strip()) < 2:
-                    continue
-                messages.append({
-                    "role": role,
-                    "content": content,
-                    "timestamp": obj.get("timestamp", ""),
-                    "index": idx,
-                })
+                m = _to_message(json.loads(line.strip()), idx)
+                if m:
+                    messages.append(m)
     except (FileNotFoundError, json.JSONDecodeError):
         pass
     return messages
 
 
-def resolve_transcript(transcript_path: str, limit: int = 200) -> list[ResolvedMessage]:
+def resolve_transcript(transcript_path: str, limit: int = 200, from_end: bool = False) -> list[ResolvedMessage]:
     """对单个 transcript 进行语义闭环解析"""
-    messages = read_session_messages(transcript_path, limit=limit)
+    messages = read_session_messages(transcript_path, limit=limit, from_end=from_end)
     resolver = DialogueContextResolver()
     return resolver.resolve(messages)
 
@@ -363,10 +679,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="DialogueContextResolver")
     parser.add_argument("--transcript", help="transcript JSONL 路径")
     parser.add_argument("--json", action="store_true", help="JSON 输出")
+    parser.add_argument("--limit", type=int, default=200, help="读取行数")
+    parser.add_argument("--from-end", action="store_true", help="读取文件最后 limit 行（最近消息）")
+    parser.add_argument("--incremental", action="store_true", help="从上次进度继续解析，任务状态存 SQLite")
+    parser.add_argument("--db", default=str(DB_PATH), help="增量模式的 SQLite 路径")
     args = parser.parse_args()
 
     if args.transcript:
-        results = resolve_transcript(args.transcript)
+        if args.incremental:
+            results = resolve_transcript_incremental(args.transcript, db_path=Path(args.db))
+        else:
+            results = resolve_transcript(args.transcript, limit=args.limit, from_end=args.from_end)
         for r in results:
             if args.json:
                 print(json.dumps({
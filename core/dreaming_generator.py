@@ -67,38 +67,25 @@ def _load_api_key() -> str:
 
 
 def _call_llm(system: str, user: str, temperature: float = 0.7) -> str:
-    import urllib.request
+    from core.llm_client import get_client
 
     api_key = _load_api_key()
     if not api_key:
         raise RuntimeError("未找到 BIGMODEL_API_KEY")
 
-    payload = {
-        "model": GLM_MODEL,
-        "messages": [
+    return get_client().chat(
+        f"{GLM_API_BASE}/chat/completions",
+        model=GLM_MODEL,
+        messages=[
             {"role": "system", "content": system},
             {"role": "user", "content": user},
         ],
-        "temperature": temperature,
-        "max_tokens": 2048,
-    }
-
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        f"{GLM_API_BASE}/chat/completions",
-        data=data,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
+        api_key=api_key,
+        temperature=temperature,
+        max_tokens=2048,
+        timeout=120,
     )
 
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        result = json.loads(resp.read().decode("utf-8"))
-
-    return result["choices"][0]["message"]["content"]
-
 
 SYSTEM_PROMPT = """你是一个 AI 伙伴的「梦境引擎」。
 你的任务不是记录，而是改善。
@@ -8,19 +8,39 @@ Dreaming Preprocessor — 做梦输入预处理
 - 最近 30 天经验摘要
 - 话题分割单元
 - 任务闭环状态
+- 图谱核心实体（kg_analytics 预计算的 PageRank 排名）
+
+build_dreaming_input() 走增量快照（DreamingSnapshotBuilder）：
+- 单个读事务内取全部输入，各部分看到同一时刻的数据
+- 只读取上次做梦以来 updated_at 变化的行；表写代数未变时连这一步也跳过
+- 窗口内条目按内容 hash 缓存摘要行，话题分割按消息序列 hash 缓存
+- 以上状态以 JSON memo 落盘，跨进程/跨次运行复用；成本只与窗口内变化量相关，与历史总量无关
 """
 
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import os
 import sqlite3
+import sys
+import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 from typing import Optional
 
 ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.dialogue_context_resolver import init_dialogue_state_db  # noqa: E402
+from core.memory_experience_core_v0_1 import init_db as init_me_db  # noqa: E402
+from core.recall_cache import RECALL_CACHE, current_generation  # noqa: E402
+
 DB_PATH = ROOT / "data" / "mindkernel_v0_1.sqlite"
+SNAPSHOT_MEMO_PATH = ROOT / "data" / "dreaming_snapshot_memo.json"
+SNAPSHOT_MEMO_VERSION = 1
 
 logger = logging.getLogger("dreaming.preprocessor")
 
@@ -31,9 +51,23 @@ MAX_EXPERIENCE_SUMMARY_LEN = 2000
 MAX_SEGMENT_SUMMARY_LEN = 1000
 
 
-def conn() -> sqlite3.Connection:
-    c = sqlite3.connect(str(DB_PATH))
+_schema_ready: set[str] = set()
+
+
+def _payload_field(path: str) -> str:
+    """payload_json 字段抽取；坏 JSON 行得 NULL（由外层 COALESCE 给默认值），不让整条查询报错。"""
+    return f"CASE WHEN json_valid(payload_json) THEN json_extract(payload_json, '{path}') END"
+
+
+def conn(db_path: Path | None = None) -> sqlite3.Connection:
+    path = str(db_path or DB_PATH)
+    c = sqlite3.connect(path)
     c.row_factory = sqlite3.Row
+    if path not in _schema_ready:
+        # 确保反范式列已迁移、任务状态表存在（每进程每库一次）
+        init_me_db(c)
+        init_dialogue_state_db(c)
+        _schema_ready.add(path)
     return c
 
 
@@ -52,99 +86,123 @@ def get_memory_summaries() -> tuple[list[dict], str]:
     返回 (raw_items, summary_text)
     raw_items: [{id, content, created_at, importance}]
     summary_text: 合并的摘要字符串（供 LLM 使用）
+
+    结果经 RECALL_CACHE 缓存，memory_items 有写入即失效。
     """
+    with conn() as c:
+        return RECALL_CACHE.get_or_compute(
+            c,
+            query="dreaming:memory_summaries",
+            table="memory_items",
+            top_k=200,
+            filters={"days": MEMORY_DAYS},
+            compute=lambda: _build_memory_summaries(c),
+        )
+
+
+def _build_memory_summaries(c: sqlite3.Connection) -> tuple[list[dict], str]:
     since = days_ago_iso(MEMORY_DAYS)
     items = []
 
-    with conn() as c:
-        rows = c.execute(
-            """SELECT id, payload_json, created_at FROM memory_items
-               WHERE status IN ('active', 'candidate')
-                 AND created_at >= ?
-               ORDER BY created_at DESC
-               LIMIT 200""",
-            (since,),
-        ).fetchall()
-
-        for r in rows:
-            try:
-                payload = json.loads(r["payload_json"])
-                content = payload.get("content", payload.get("text", ""))
-                importance = payload.get("importance", 0.5)
-            except Exception:
-                content = str(r["payload_json"])
-                importance = 0.5
-
-            items.append({
-                "id": r["id"],
-                "content": content[:500],  # 截断
-                "created_at": r["created_at"],
-                "importance": importance,
-            })
+    rows = c.execute(
+        f"""SELECT id, created_at,
+                  COALESCE(content, {_payload_field('$.text')}, '') AS content,
+                  COALESCE({_payload_field('$.importance')}, 0.5) AS importance
+           FROM memory_items
+           WHERE status IN ('active', 'candidate')
+             AND created_at >= ?
+           ORDER BY created_at DESC
+           LIMIT 200""",
+        (since,),
+    ).fetchall()
 
-    # 生成摘要文本
-    if not items:
-        summary = "（近 7 天无记忆数据）"
-    else:
-        lines = []
-        for item in items[:50]:  # 最多 50 条
-            ts = item["created_at"][:10]
-            lines.append(f"[{ts}] {item['content'][:200]}")
-        summary = "\n".join(lines)
-        if len(summary) > MAX_MEMORY_SUMMARY_LEN:
-            summary = summary[:MAX_MEMORY_SUMMARY_LEN] + "\n...（以上为前50条，共" + str(len(items)) + "条记忆）"
+    for r in rows:
+        items.append(_memory_item(r))
+    return items, _memory_summary_text(items, [_memory_line(item) for item in items[:50]])
 
-    return items, summary
+
+def _memory_item(r) -> dict:
+    return {
+        "id": r["id"],
+        "content": str(r["content"])[:500],  # 截断
+        "created_at": r["created_at"],
+        "importance": r["importance"],
+    }
+
+
+def _memory_line(item: dict) -> str:
+    return f"[{item['created_at'][:10]}] {item['content'][:200]}"
+
+
+def _memory_summary_text(items: list[dict], lines: list[str]) -> str:
+    """lines 为前 50 条的摘要行。"""
+    if not items:
+        return "（近 7 天无记忆数据）"
+    summary = "\n".join(lines)
+    if len(summary) > MAX_MEMORY_SUMMARY_LEN:
+        summary = summary[:MAX_MEMORY_SUMMARY_LEN] + "\n...（以上为前50条，共" + str(len(items)) + "条记忆）"
+    return summary
 
 
 # ── 经验摘要 ────────────────────────────────────────────────────────────────
 
 def get_experience_summaries() -> tuple[list[dict], str]:
-    """返回 (raw_items, summary_text)"""
+    """返回 (raw_items, summary_text)，经 RECALL_CACHE 缓存。"""
+    with conn() as c:
+        return RECALL_CACHE.get_or_compute(
+            c,
+            query="dreaming:experience_summaries",
+            table="experience_records",
+            top_k=100,
+            filters={"days": EXPERIENCE_DAYS},
+            compute=lambda: _build_experience_summaries(c),
+        )
+
+
+def _build_experience_summaries(c: sqlite3.Connection) -> tuple[list[dict], str]:
     since = days_ago_iso(EXPERIENCE_DAYS)
     items = []
 
-    with conn() as c:
-        rows = c.execute(
-            """SELECT id, payload_json, created_at FROM experience_records
-               WHERE status IN ('active')
-                 AND created_at >= ?
-               ORDER BY created_at DESC
-               LIMIT 100""",
-            (since,),
-        ).fetchall()
-
-        for r in rows:
-            try:
-                payload = json.loads(r["payload_json"])
-                content = payload.get("episode_summary", payload.get("content", ""))
-                outcome = payload.get("outcome", "")
-                confidence = payload.get("confidence", 0.5)
-            except Exception:
-                content = str(r["payload_json"])
-                outcome = ""
-                confidence = 0.5
-
-            items.append({
-                "id": r["id"],
-                "content": content[:500],
-                "outcome": outcome,
-                "confidence": confidence,
-                "created_at": r["created_at"],
-            })
+    rows = c.execute(
+        f"""SELECT id, created_at,
+                  COALESCE(content, {_payload_field('$.content')}, '') AS content,
+                  COALESCE({_payload_field('$.outcome')}, '') AS outcome,
+                  COALESCE(confidence, 0.5) AS confidence
+           FROM experience_records
+           WHERE status IN ('active')
+             AND created_at >= ?
+           ORDER BY created_at DESC
+           LIMIT 100""",
+        (since,),
+    ).fetchall()
+
+    for r in rows:
+        items.append(_experience_item(r))
+    return items, _experience_summary_text(items, [_experience_line(item) for item in items])
+
+
+def _experience_item(r) -> dict:
+    return {
+        "id": r["id"],
+        "content": str(r["content"])[:500],
+        "outcome": r["outcome"],
+        "confidence": r["confidence"],
+        "created_at": r["created_at"],
+    }
 
-    if not items:
-        summary = "（近 30 天无经验数据）"
-    else:
-        lines = []
-        for item in items:
-            outcome_tag = f"[{item['outcome']}]" if item['outcome'] else ""
-            lines.append(f"- {outcome_tag} {item['content'][:200]}")
-        summary = "\n".join(lines)
-        if len(summary) > MAX_EXPERIENCE_SUMMARY_LEN:
-            summary = summary[:MAX_EXPERIENCE_SUMMARY_LEN] + f"\n...（以上共{len(items)}条经验）"
 
-    return items, summary
+def _experience_line(item: dict) -> str:
+    outcome_tag = f"[{item['outcome']}]" if item["outcome"] else ""
+    return f"- {outcome_tag} {item['content'][:200]}"
+
+
+def _experience_summary_text(items: list[dict], lines: list[str]) -> str:
+    if not items:
+        return "（近 30 天无经验数据）"
+    summary = "\n".join(lines)
+    if len(summary) > MAX_EXPERIENCE_SUMMARY_LEN:
+        summary = summary[:MAX_EXPERIENCE_SUMMARY_LEN] + f"\n...（以上共{len(items)}条经验）"
+    return summary
 
 
 # ── 话题分割 ────────────────────────────────────────────────────────────────
@@ -164,20 +222,18 @@ def get_topic_segments() -> str:
         messages = []
         with conn() as c:
             rows = c.execute(
-                """SELECT payload_json, created_at FROM memory_items
+                f"""SELECT created_at,
+                          COALESCE(content, {_payload_field('$.text')}, '') AS content,
+                          COALESCE({_payload_field('$.role')}, 'user') AS role
+                   FROM memory_items
                    WHERE status IN ('active', 'candidate')
                      AND created_at >= ?
                    ORDER BY created_at ASC""",
                 (since,),
             ).fetchall()
             for r in rows:
-                try:
-                    payload = json.loads(r["payload_json"])
-                    text = payload.get("content", payload.get("text", ""))
-                    role = payload.get("role", "user")
-                except Exception:
-                    text = str(r["payload_json"])
-                    role = "user"
+                text = str(r["content"])
+                role = r["role"]
                 if text.strip():
                     messages.append({
                         "role": role,
@@ -185,71 +241,278 @@ def get_topic_segments() -> str:
                         "timestamp": r["created_at"],
                     })
 
-        if not messages:
-            return "（无话题数据）"
-
-        segments = segmenter.segment(messages)
-        lines = []
-        for seg in segments[:20]:  # 最多 20 个话题
-            # TopicSegment 是 dataclass，用属性访问
-            seg_type = getattr(seg, "type", "unknown")
-            summary = getattr(seg, "summary", getattr(seg, "description", ""))[:150]
-            lines.append(f"[{seg_type}] {summary}")
-        return "\n".join(lines) if lines else "（无话题数据）"
+        return _segment_text(segmenter, messages)
 
     except Exception as e:
         logger.warning(f"[DreamingPreprocessor] 话题分割失败: {e}")
         return f"（话题分割暂不可用: {e}）"
 
 
+def _segment_text(segmenter, messages: list[dict]) -> str:
+    if not messages:
+        return "（无话题数据）"
+    segments = segmenter.segment(messages)
+    lines = []
+    for seg in segments[:20]:  # 最多 20 个话题
+        # TopicSegment 是 dataclass，用属性访问
+        seg_type = getattr(seg, "type", "unknown")
+        summary = getattr(seg, "summary", getattr(seg, "description", ""))[:150]
+        lines.append(f"[{seg_type}] {summary}")
+    return "\n".join(lines) if lines else "（无话题数据）"
+
+
 # ── 任务闭环状态 ────────────────────────────────────────────────────────────
 
-def get_task_closure_summary() -> str:
+def get_task_closure_summary(c: sqlite3.Connection | None = None) -> str:
     """
-    通过 DialogueContextResolver.active_tasks 获取活跃任务摘要。
+    读取 DialogueContextResolver 增量模式持久化的任务状态：active 任务 + 近 7 天关闭的任务。
+    c 给定时在调用方的读事务内查询（与其他输入同一快照）。
     """
     try:
-        from core.dialogue_context_resolver import DialogueContextResolver
-        resolver = DialogueContextResolver()
-
-        active = resolver.active_tasks or []
+        from core.dialogue_context_resolver import task_closure_summary
 
-        if not active:
-            return "（无活跃任务数据）"
-
-        lines = [f"⏳ 活跃任务（{len(active)}个）:"]
-        for task in active[:15]:
-            desc = task.get("description", str(task))[:100]
-            lines.append(f"  - {desc}")
-        return "\n".join(lines)
+        if c is not None:
+            return task_closure_summary(c)
+        own = conn()
+        try:
+            return task_closure_summary(own)
+        finally:
+            own.close()
 
     except Exception as e:
         logger.warning(f"[DreamingPreprocessor] 任务闭环检测失败: {e}")
         return f"（任务闭环检测暂不可用: {e}）"
 
 
-# ── 打包全部输入 ─────────────────────────────────────────────────────────────
+# ── 图谱核心实体 ────────────────────────────────────────────────────────────
+
+HUB_ENTITY_LIMIT = 15
+
+
+def get_hub_entities(limit: int = HUB_ENTITY_LIMIT) -> list[dict]:
+    """读取 kg_entity_metrics 中 PageRank 最高的实体（不扫描图谱；未跑过分析时为空）。"""
+    from core.kg_analytics import top_entities
 
-def build_dreaming_input() -> dict:
+    c = conn()
+    try:
+        return top_entities(c, limit=limit)
+    finally:
+        c.close()
+
+
+# ── 增量快照 ────────────────────────────────────────────────────────────────
+
+_SNAPSHOT_SOURCES = {
+    "memory": {
+        "table": "memory_items",
+        "days": MEMORY_DAYS,
+        "statuses": ("active", "candidate"),
+        "limit": 200,
+        "columns": f"""id, status, created_at, updated_at,
+                      COALESCE(content, {_payload_field('$.text')}, '') AS content,
+                      COALESCE({_payload_field('$.importance')}, 0.5) AS importance,
+                      COALESCE({_payload_field('$.role')}, 'user') AS role""",
+    },
+    "experience": {
+        "table": "experience_records",
+        "days": EXPERIENCE_DAYS,
+        "statuses": ("active",),
+        "limit": 100,
+        "columns": f"""id, status, created_at, updated_at,
+                      COALESCE(content, {_payload_field('$.content')}, '') AS content,
+                      COALESCE({_payload_field('$.outcome')}, '') AS outcome,
+                      COALESCE(confidence, 0.5) AS confidence""",
+    },
+}
+
+
+def _hash(*parts) -> str:
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+class DreamingSnapshotBuilder:
     """
-    构建完整的做梦 LLM 输入数据。
+    做梦输入的增量快照。memo 结构（JSON 落盘）：
+      {"version", "sources": {name: {"generation", "watermark", "items": {id: entry}}}, "topics": {"key", "text"}}
+    entry = {"hash", "created_at", "item", "line", ["role", "text"]}，只保留窗口内的条目。
     """
-    memory_items, memory_summary = get_memory_summaries()
-    exp_items, exp_summary = get_experience_summaries()
-    topic_segments = get_topic_segments()
-    task_summary = get_task_closure_summary()
 
-    return {
-        "memory_count": len(memory_items),
-        "memory_items": memory_items,
-        "memory_summary": memory_summary,
-        "experience_count": len(exp_items),
-        "experience_items": exp_items,
-        "experience_summary": exp_summary,
-        "topic_segments": topic_segments,
-        "task_closure_summary": task_summary,
-        "generated_at": now_iso(),
-    }
+    def __init__(self, db_path: Path | None = None, memo_path: Path | None = None):
+        self.db_path = Path(db_path or DB_PATH)
+        self.memo_path = Path(memo_path or SNAPSHOT_MEMO_PATH)
+        self.stats: dict = {}
+
+    def _load_memo(self) -> dict:
+        try:
+            memo = json.loads(self.memo_path.read_text(encoding="utf-8"))
+            if memo.get("version") == SNAPSHOT_MEMO_VERSION and memo.get("db") == str(self.db_path):
+                return memo
+        except (OSError, ValueError):
+            pass
+        return {"version": SNAPSHOT_MEMO_VERSION, "db": str(self.db_path), "sources": {}, "topics": {}}
+
+    def _save_memo(self, memo: dict):
+        self.memo_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.memo_path.with_name(self.memo_path.name + ".tmp")
+        tmp.write_text(json.dumps(memo, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.memo_path)
+
+    def _refresh_source(self, c: sqlite3.Connection, name: str, state: dict) -> dict:
+        spec = _SNAPSHOT_SOURCES[name]
+        table = spec["table"]
+        since = days_ago_iso(spec["days"])
+        items: dict = state.setdefault("items", {})
+        changed = 0
+        rows_read = 0
+
+        generation = current_generation(c, table)
+        if generation is None or generation != state.get("generation"):
+            # 1) 上次以来有改动的行（updated_at 索引范围扫描；窗口内新建的行 updated_at 必 >= since）
+            lower = max(state.get("watermark") or "", since)
+            placeholders = ",".join("?" * len(spec["statuses"]))
+            rows = c.execute(
+                f"SELECT {spec['columns']}, status IN ({placeholders}) AS eligible "
+                f"FROM {table} WHERE updated_at >= ?",
+                (*spec["statuses"], lower),
+            ).fetchall()
+            rows_read = len(rows)
+            watermark = state.get("watermark") or ""
+            for r in rows:
+                watermark = max(watermark, r["updated_at"])
+                if not r["eligible"] or r["created_at"] < since:
+                    items.pop(r["id"], None)
+                    continue
+                h = _hash(*(r[k] for k in r.keys() if k not in ("updated_at", "eligible")))
+                cached = items.get(r["id"])
+                if cached and cached["hash"] == h:
+                    continue
+                items[r["id"]] = self._entry(name, r, h)
+                changed += 1
+
+            # 2) 未改 updated_at 的删除 / 状态变化：只核对 memo 内（窗口大小）的 id
+            if items:
+                alive = {
+                    r[0]
+                    for r in c.execute(
+                        f"SELECT id FROM {table} WHERE id IN (SELECT value FROM json_each(?)) "
+                        f"AND status IN ({placeholders})",
+                        (json.dumps(list(items)), *spec["statuses"]),
+                    )
+                }
+                for item_id in [i for i in items if i not in alive]:
+                    del items[item_id]
+                    changed += 1
+            state["generation"] = generation
+            state["watermark"] = watermark
+
+        # 3) 窗口滑动：移出过期条目
+        for item_id in [i for i, e in items.items() if e["created_at"] < since]:
+            del items[item_id]
+            changed += 1
+
+        self.stats[f"{name}_rows_read"] = rows_read
+        self.stats[f"{name}_changed"] = changed
+        return state
+
+    @staticmethod
+    def _entry(name: str, r, h: str) -> dict:
+        if name == "memory":
+            item = _memory_item(r)
+            return {
+                "hash": h,
+                "created_at": r["created_at"],
+                "item": item,
+                "line": _memory_line(item),
+                "role": r["role"],
+                "text": str(r["content"]),
+            }
+        item = _experience_item(r)
+        return {"hash": h, "created_at": r["created_at"], "item": item, "line": _experience_line(item)}
+
+    @staticmethod
+    def _newest(state: dict, limit: int) -> list[dict]:
+        entries = sorted(state["items"].values(), key=lambda e: e["created_at"], reverse=True)
+        return entries[:limit]
+
+    def _topic_segments(self, memo: dict, memory_state: dict) -> str:
+        entries = sorted(memory_state["items"].items(), key=lambda kv: (kv[1]["created_at"], kv[0]))
+        messages = [
+            {"role": e["role"], "content": e["text"], "timestamp": e["created_at"]}
+            for _, e in entries
+            if e["text"].strip()
+        ]
+        key = _hash(*((i, e["hash"]) for i, e in entries if e["text"].strip()))
+        cached = memo.get("topics") or {}
+        if cached.get("key") == key:
+            self.stats["topics_cached"] = True
+            return cached["text"]
+        self.stats["topics_cached"] = False
+        try:
+            from core.topic_segmenter import TopicSegmenter
+
+            text = _segment_text(TopicSegmenter(), messages)
+        except Exception as e:
+            logger.warning(f"[DreamingPreprocessor] 话题分割失败: {e}")
+            return f"（话题分割暂不可用: {e}）"
+        memo["topics"] = {"key": key, "text": text}
+        return text
+
+    def build(self) -> dict:
+        started = time.perf_counter()
+        self.stats = {}
+        memo = self._load_memo()
+        sources = memo.setdefault("sources", {})
+
+        c = conn(self.db_path)
+        try:
+            # 单个读事务：memory / experience / 图谱实体 / 任务状态读取同一快照
+            c.execute("BEGIN")
+            try:
+                memory_state = self._refresh_source(c, "memory", sources.setdefault("memory", {}))
+                exp_state = self._refresh_source(c, "experience", sources.setdefault("experience", {}))
+                from core.kg_analytics import top_entities
+
+                hub_entities = top_entities(c, limit=HUB_ENTITY_LIMIT)
+                task_summary = get_task_closure_summary(c)
+            finally:
+                c.rollback()
+        finally:
+            c.close()
+
+        memory_entries = self._newest(memory_state, _SNAPSHOT_SOURCES["memory"]["limit"])
+        exp_entries = self._newest(exp_state, _SNAPSHOT_SOURCES["experience"]["limit"])
+        memory_items = [e["item"] for e in memory_entries]
+        exp_items = [e["item"] for e in exp_entries]
+        topic_segments = self._topic_segments(memo, memory_state)
+
+        try:
+            self._save_memo(memo)
+        except OSError as e:
+            logger.warning(f"[DreamingPreprocessor] 快照 memo 写入失败: {e}")
+
+        self.stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return {
+            "memory_count": len(memory_items),
+            "memory_items": memory_items,
+            "memory_summary": _memory_summary_text(memory_items, [e["line"] for e in memory_entries[:50]]),
+            "experience_count": len(exp_items),
+            "experience_items": exp_items,
+            "experience_summary": _experience_summary_text(exp_items, [e["line"] for e in exp_entries]),
+            "topic_segments": topic_segments,
+            "task_closure_summary": task_summary,
+            "hub_entities": [h["entity"] for h in hub_entities],
+            "snapshot_stats": dict(self.stats),
+            "generated_at": now_iso(),
+        }
+
+
+# ── 打包全部输入 ─────────────────────────────────────────────────────────────
+
+def build_dreaming_input(db_path: Path | None = None, memo_path: Path | None = None) -> dict:
+    """
+    构建完整的做梦 LLM 输入数据（增量快照，见 DreamingSnapshotBuilder）。
+    """
+    return DreamingSnapshotBuilder(db_path=db_path, memo_path=memo_path).build()
 
 
 if __name__ == "__main__":
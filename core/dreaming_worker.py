@@ -56,39 +56,26 @@ GLM_MODEL = "glm-4-flash"  # 速度快，成本低
 
 
 def _call_glm(system: str, user: str, temperature: float = 0.7) -> str:
-    """调用 GLM-4 API"""
-    import urllib.request
-
-    payload = {
-        "model": GLM_MODEL,
-        "messages": [
-            {"role": "system", "content": system},
-            {"role": "user", "content": user},
-        ],
-        "temperature": temperature,
-        "max_tokens": 4096,
-    }
+    """调用 GLM-4 API（共享 LLMClient：长连接 + 并发上限 + 响应缓存）"""
+    from core.llm_client import get_client
 
     api_key = _load_api_key()
     if not api_key:
         raise RuntimeError("未找到 GLM API Key，请在 environment 或 ~/.env 中设置 BIGMODEL_API_KEY")
 
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
+    return get_client().chat(
         f"{GLM_API_BASE}/chat/completions",
-        data=data,
-        headers={
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        },
-        method="POST",
+        model=GLM_MODEL,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        api_key=api_key,
+        temperature=temperature,
+        max_tokens=4096,
+        timeout=120,
     )
 
-    with urllib.request.urlopen(req, timeout=120) as resp:
-        result = json.loads(resp.read().decode("utf-8"))
-
-    return result["choices"][0]["message"]["content"]
-
 
 def _load_api_key() -> str:
     """尝试从多处加载 API Key"""
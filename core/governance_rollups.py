@@ -0,0 +1,294 @@
+"""
+Governance Daily Rollups — 审计事件的按日（UTC）预聚合
+
+周报原先对窗口内每条 audit_events 读 payload_json 并在 Python 里逐条解析。本模块把每个自然日
+聚合成一行 `governance_daily_rollups`：
+- events：当日事件数（含无法解析的 payload）
+- event_type / object_type / actor 计数
+- transitions：state_transition 的状态迁移矩阵 {object_type: {before: {after: n}}}
+- counters：rollback / decision_gate / blocked / escalated / state_transition
+- pickup_lag：scheduler_job queued→running 的领取延迟（秒，event 时间 - run_at）t-digest
+
+已结束的日子才落盘；窗口两端不满一天的部分现场扫描，与中间的日汇总合并，结果与逐条扫描一致。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+from core.quantile_sketch import TDigest
+
+ROLLUP_VERSION = 1
+COUNTERS = ("rollback", "decision_gate", "blocked", "escalated", "state_transition")
+
+
+def _iso(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _parse_iso(v) -> Optional[datetime]:
+    s = str(v or "").strip()
+    if not s:
+        return None
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def init_rollup_db(c: sqlite3.Connection):
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS governance_daily_rollups (
+            day          TEXT PRIMARY KEY,
+            version      INTEGER NOT NULL,
+            events       INTEGER NOT NULL,
+            payload_json TEXT NOT NULL,
+            computed_at  TEXT NOT NULL
+        )
+        """
+    )
+
+
+def empty_rollup() -> dict:
+    return {
+        "events": 0,
+        "unparsed": 0,
+        "event_type": {},
+        "object_type": {},
+        "actor": {},
+        "transitions": {},
+        "counters": {k: 0 for k in COUNTERS},
+        "pickup_lag": TDigest(),
+    }
+
+
+def _bump(d: dict, key: str, n: int = 1):
+    d[key] = d.get(key, 0) + n
+
+
+def _add_event(agg: dict, payload: dict, ts: str):
+    et = str(payload.get("event_type") or "unknown")
+    ot = str(payload.get("object_type") or "unknown")
+    actor = payload.get("actor") if isinstance(payload.get("actor"), dict) else {}
+    _bump(agg["event_type"], et)
+    _bump(agg["object_type"], ot)
+    _bump(agg["actor"], f"{actor.get('type') or 'unknown'}:{actor.get('id') or 'unknown'}")
+
+    counters = agg["counters"]
+    if et in ("rollback", "decision_gate"):
+        counters[et] += 1
+
+    before = payload.get("before") if isinstance(payload.get("before"), dict) else {}
+    after = payload.get("after") if isinstance(payload.get("after"), dict) else {}
+    outcome = str(after.get("final_outcome") or "").lower()
+    gate = str(after.get("persona_conflict_gate") or "").lower()
+    if outcome == "blocked" or gate == "block":
+        counters["blocked"] += 1
+    if outcome == "escalated":
+        counters["escalated"] += 1
+
+    if et == "state_transition":
+        counters["state_transition"] += 1
+        row = agg["transitions"].setdefault(ot, {}).setdefault(str(before.get("status") or ""), {})
+        _bump(row, str(after.get("status") or ""))
+
+    if et == "scheduler_job" and before.get("status") == "queued" and after.get("status") == "running":
+        run_at, at = _parse_iso(before.get("run_at")), _parse_iso(payload.get("timestamp") or ts)
+        if run_at and at:
+            agg["pickup_lag"].add(max(0.0, (at - run_at).total_seconds()))
+
+
+def aggregate_range(c: sqlite3.Connection, lo: str, hi: str, include_hi: bool = False) -> dict:
+    """现场扫描 [lo, hi)（include_hi 时为 [lo, hi]）内的审计事件"""
+    op = "<=" if include_hi else "<"
+    agg = empty_rollup()
+    for ts, raw in c.execute(
+        f"SELECT timestamp, payload_json FROM audit_events WHERE timestamp >= ? AND timestamp {op} ?", (lo, hi)
+    ):
+        agg["events"] += 1
+        try:
+            payload = json.loads(raw)
+        except (TypeError, ValueError):
+            agg["unparsed"] += 1
+            continue
+        if not isinstance(payload, dict):
+            agg["unparsed"] += 1
+            continue
+        _add_event(agg, payload, ts)
+    return agg
+
+
+def merge_rollups(parts: list[dict]) -> dict:
+    out = empty_rollup()
+    for p in parts:
+        out["events"] += p["events"]
+        out["unparsed"] += p["unparsed"]
+        for dim in ("event_type", "object_type", "actor"):
+            for k, n in p[dim].items():
+                _bump(out[dim], k, n)
+        for k in COUNTERS:
+            out["counters"][k] += p["counters"].get(k, 0)
+        for ot, rows in p["transitions"].items():
+            for b, cols in rows.items():
+                row = out["transitions"].setdefault(ot, {}).setdefault(b, {})
+                for a, n in cols.items():
+                    _bump(row, a, n)
+        out["pickup_lag"].merge(p["pickup_lag"])
+    return out
+
+
+def _dump(agg: dict) -> str:
+    return json.dumps({**agg, "pickup_lag": agg["pickup_lag"].to_dict()}, ensure_ascii=False, sort_keys=True)
+
+
+def _load(raw: str) -> dict:
+    obj = json.loads(raw)
+    obj["pickup_lag"] = TDigest.from_dict(obj.get("pickup_lag"))
+    return obj
+
+
+def compute_day(c: sqlite3.Connection, day: date) -> dict:
+    start = day_start(day)
+    return aggregate_range(c, _iso(start), _iso(start + timedelta(days=1)))
+
+
+def store_day(c: sqlite3.Connection, day: date, agg: dict, now: Optional[datetime] = None):
+    c.execute(
+        """
+        INSERT INTO governance_daily_rollups(day, version, events, payload_json, computed_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(day) DO UPDATE SET
+            version = excluded.version, events = excluded.events,
+            payload_json = excluded.payload_json, computed_at = excluded.computed_at
+        """,
+        (day.isoformat(), ROLLUP_VERSION, agg["events"], _dump(agg), _iso(now or datetime.now(timezone.utc))),
+    )
+
+
+def load_days(c: sqlite3.Connection, days: list[date]) -> dict[date, dict]:
+    if not days:
+        return {}
+    rows = c.execute(
+        "SELECT day, version, payload_json FROM governance_daily_rollups WHERE day >= ? AND day <= ?",
+        (min(days).isoformat(), max(days).isoformat()),
+    ).fetchall()
+    wanted = set(days)
+    out = {}
+    for day_s, version, raw in rows:
+        d = date.fromisoformat(day_s)
+        if d in wanted and version == ROLLUP_VERSION:
+            out[d] = _load(raw)
+    return out
+
+
+def _indexed_count(c: sqlite3.Connection, day: date) -> int:
+    start = day_start(day)
+    return int(
+        c.execute(
+            "SELECT COUNT(*) FROM audit_events WHERE timestamp >= ? AND timestamp < ?",
+            (_iso(start), _iso(start + timedelta(days=1))),
+        ).fetchone()[0]
+    )
+
+
+def _ensure_days(
+    c: sqlite3.Connection, days: list[date], now: datetime, rebuild: bool = False, verify: bool = False
+) -> tuple[dict[date, dict], list[dict]]:
+    init_rollup_db(c)
+    closed = sorted(d for d in set(days) if day_start(d) + timedelta(days=1) <= now)
+    aggs = {} if rebuild else load_days(c, closed)
+    status = []
+    for d in closed:
+        action = "kept"
+        if d in aggs and verify and _indexed_count(c, d) != aggs[d]["events"]:
+            del aggs[d]
+            action = "refreshed"
+        if d not in aggs:
+            if action == "kept":
+                action = "rebuilt" if rebuild else "computed"
+            aggs[d] = compute_day(c, d)
+            store_day(c, d, aggs[d], now)
+        status.append({"day": d.isoformat(), "events": aggs[d]["events"], "action": action})
+    c.commit()
+    return aggs, status
+
+
+def build_daily_rollups(
+    c: sqlite3.Connection,
+    days: list[date],
+    now: Optional[datetime] = None,
+    rebuild: bool = False,
+    verify: bool = False,
+) -> list[dict]:
+    """
+    为已结束的日子补齐（rebuild 时重算）日汇总，返回每天的处理结果（kept / computed / refreshed / rebuilt）。
+    verify：已有汇总的事件数与索引 COUNT 不一致（迟到写入 / 删除）时重算。
+    """
+    return _ensure_days(c, days, now or datetime.now(timezone.utc), rebuild=rebuild, verify=verify)[1]
+
+
+def rollup_window(c: sqlite3.Connection, start: datetime, end: datetime, persist: bool = True) -> tuple[dict, dict]:
+    """
+    合并 [start, end] 内的审计聚合：整天取日汇总（缺失则计算，persist 时落盘），两端不满一天的部分现场扫描。
+    返回 (聚合, {"rollup_days", "computed_days", "live_ranges"})。
+    """
+    first = day_start(start.date())
+    if first < start:
+        first += timedelta(days=1)
+    full_days = []
+    while first + timedelta(days=len(full_days) + 1) <= end:
+        full_days.append((first + timedelta(days=len(full_days))).date())
+
+    if not full_days:
+        agg = aggregate_range(c, _iso(start), _iso(end), include_hi=True)
+        return agg, {"rollup_days": 0, "computed_days": 0, "live_ranges": [[_iso(start), _iso(end)]]}
+
+    parts: list[dict] = []
+    live: list[list[str]] = []
+    if start < first:
+        parts.append(aggregate_range(c, _iso(start), _iso(first)))
+        live.append([_iso(start), _iso(first)])
+
+    aggs: dict[date, dict] = {}
+    computed = 0
+    if persist:
+        try:
+            aggs, status = _ensure_days(c, full_days, end)
+            computed = sum(1 for x in status if x["action"] != "kept")
+        except sqlite3.OperationalError:  # 只读库：退化为内存计算
+            c.rollback()
+            aggs = {}
+    for day in full_days:
+        if day not in aggs:
+            aggs[day] = compute_day(c, day)
+            computed += 1
+        parts.append(aggs[day])
+
+    tail = day_start(full_days[-1]) + timedelta(days=1)
+    parts.append(aggregate_range(c, _iso(tail), _iso(end), include_hi=True))
+    live.append([_iso(tail), _iso(end)])
+    return merge_rollups(parts), {"rollup_days": len(full_days), "computed_days": computed, "live_ranges": live}
+
+
+def transition_totals(transitions: dict) -> dict:
+    """从迁移矩阵导出 activation（迁入 active）与 archive（迁入 archived）计数"""
+    activation = archive = 0
+    for rows in transitions.values():
+        for before, cols in rows.items():
+            for after, n in cols.items():
+                if after == "active" and before != "active":
+                    activation += n
+                if after == "archived":
+                    archive += n
+    return {"activation": activation, "archive": archive}
@@ -0,0 +1,341 @@
+"""
+KG Analytics — knowledge_relations 的实体级图分析批处理
+
+计算并落库到 `kg_entity_metrics`：
+- 加权 PageRank（边 subject → object，权重为 confidence；悬挂节点均匀分配）
+- 弱连通分量（并查集），记录 component_id / component_size
+- 度统计：出度 / 入度 / 加权度
+
+稀疏矩阵以 CSR（array 模块）存放，power iteration 纯 Python 实现，不引入 NumPy 依赖。
+
+增量重算：
+- knowledge_relations 写代数（table_generations）未变化时直接跳过
+- 变化时以上次的 PageRank 作为初值热启动，收敛所需迭代数显著减少
+- 只回写数值有变化的实体行，删除已不存在的实体
+
+MECD 面板 / dreaming 预处理通过 top_entities() 读取排名，无需扫描全图。
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import time
+from array import array
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from core.knowledge_graph import DB_PATH, init_graph_db
+from core.memory_experience_core_v0_1 import conn, now_iso
+from core.recall_cache import current_generation
+
+DAMPING = 0.85
+TOLERANCE = 1e-8
+MAX_ITER = 100
+# 回写时 pagerank 相对变化小于该值视为未变化（排名用途，无需逐次全量回写）
+WRITE_RTOL = 1e-4
+
+
+def init_metrics_db(c: sqlite3.Connection):
+    c.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS kg_entity_metrics (
+            entity          TEXT PRIMARY KEY,
+            pagerank        REAL NOT NULL,
+            component_id    INTEGER NOT NULL,
+            component_size  INTEGER NOT NULL,
+            out_degree      INTEGER NOT NULL,
+            in_degree       INTEGER NOT NULL,
+            weighted_degree REAL NOT NULL,
+            computed_at     TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_kg_entity_metrics_pagerank ON kg_entity_metrics(pagerank DESC);
+        CREATE INDEX IF NOT EXISTS idx_kg_entity_metrics_component ON kg_entity_metrics(component_id, pagerank DESC);
+
+        CREATE TABLE IF NOT EXISTS kg_analytics_state (
+            key   TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        """
+    )
+
+
+class RelationMatrix:
+    """加权有向图的 CSR 表示：按 subject 分行，targets / weights 为列与值。"""
+
+    def __init__(self, names: list[str], offsets: array, targets: array, weights: array):
+        self.names = names
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def load(cls, c: sqlite3.Connection) -> "RelationMatrix":
+        index: dict[str, int] = {}
+        src = array("l")
+        dst = array("l")
+        wts = array("d")
+        for subject, obj, conf in c.execute(
+            "SELECT subject, object, confidence FROM knowledge_relations"
+        ):
+            src.append(index.setdefault(subject, len(index)))
+            dst.append(index.setdefault(obj, len(index)))
+            wts.append(max(0.0, float(conf if conf is not None else 0.0)))
+
+        n = len(index)
+        offsets = array("l", [0]) * (n + 1)
+        for s in src:
+            offsets[s + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        # 按行填充（计数排序），同一 subject 的边连续存放
+        cursor = array("l", offsets[:n])
+        targets = array("l", [0]) * len(src)
+        weights = array("d", [0.0]) * len(src)
+        for e in range(len(src)):
+            pos = cursor[src[e]]
+            targets[pos] = dst[e]
+            weights[pos] = wts[e]
+            cursor[src[e]] = pos + 1
+
+        names = [""] * n
+        for name, i in index.items():
+            names[i] = name
+        return cls(names, offsets, targets, weights)
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+    def pagerank(
+        self,
+        damping: float = DAMPING,
+        tol: float = TOLERANCE,
+        max_iter: int = MAX_ITER,
+        init: dict[str, float] | None = None,
+    ) -> tuple[array, int]:
+        """加权 PageRank power iteration；init 为热启动初值（按实体名）。返回 (ranks, 迭代次数)。"""
+        n = self.size
+        if n == 0:
+            return array("d"), 0
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+
+        out_w = array("d", [0.0]) * n
+        for i in range(n):
+            out_w[i] = sum(weights[offsets[i] : offsets[i + 1]])
+        dangling = [i for i in range(n) if out_w[i] <= 0.0]
+
+        rank = array("d", [1.0 / n]) * n
+        if init:
+            seeded = [max(0.0, init.get(name, 0.0)) for name in self.names]
+            total = sum(seeded)
+            if total > 0:
+                # 新实体给 1/n，再整体归一化
+                rank = array("d", (v / total if v > 0 else 1.0 / n for v in seeded))
+                s = sum(rank)
+                rank = array("d", (v / s for v in rank))
+
+        base = (1.0 - damping) / n
+        iterations = 0
+        for iterations in range(1, max_iter + 1):
+            leak = damping * sum(rank[i] for i in dangling) / n
+            nxt = array("d", [base + leak]) * n
+            for i in range(n):
+                ow = out_w[i]
+                if ow <= 0.0:
+                    continue
+                share = damping * rank[i] / ow
+                for e in range(offsets[i], offsets[i + 1]):
+                    nxt[targets[e]] += share * weights[e]
+            delta = sum(abs(a - b) for a, b in zip(nxt, rank))
+            rank = nxt
+            if delta < tol:
+                break
+        return rank, iterations
+
+    def components(self) -> array:
+        """弱连通分量（并查集，忽略边方向）：返回每个实体的分量根编号。"""
+        n = self.size
+        parent = array("l", range(n))
+
+        def find(x: int) -> int:
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        for i in range(n):
+            for e in range(self.offsets[i], self.offsets[i + 1]):
+                a, b = find(i), find(self.targets[e])
+                if a != b:
+                    parent[max(a, b)] = min(a, b)
+        return array("l", (find(i) for i in range(n)))
+
+    def degrees(self) -> tuple[array, array, array]:
+        """返回 (out_degree, in_degree, weighted_degree)；加权度为出入边 confidence 之和。"""
+        n = self.size
+        out_deg = array("l", [0]) * n
+        in_deg = array("l", [0]) * n
+        w_deg = array("d", [0.0]) * n
+        for i in range(n):
+            for e in range(self.offsets[i], self.offsets[i + 1]):
+                t, w = self.targets[e], self.weights[e]
+                out_deg[i] += 1
+                in_deg[t] += 1
+                w_deg[i] += w
+                w_deg[t] += w
+        return out_deg, in_deg, w_deg
+
+
+def _get_state(c: sqlite3.Connection, key: str) -> str | None:
+    row = c.execute("SELECT value FROM kg_analytics_state WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def compute_entity_metrics(c: sqlite3.Connection, force: bool = False) -> dict:
+    """重算 kg_entity_metrics；knowledge_relations 未变化且非 force 时跳过。返回运行统计。"""
+    started = time.monotonic()
+    init_graph_db(c)
+    init_metrics_db(c)
+    c.commit()
+
+    generation = current_generation(c, "knowledge_relations")
+    last = _get_state(c, "relations_generation")
+    if not force and generation is not None and last == str(generation):
+        return {"skipped": True, "generation": generation, "elapsed_sec": round(time.monotonic() - started, 3)}
+
+    matrix = RelationMatrix.load(c)
+    previous = {
+        r[0]: (r[1], r[2], r[3], r[4], r[5], r[6])
+        for r in c.execute(
+            "SELECT entity, pagerank, component_id, component_size, out_degree, in_degree, weighted_degree "
+            "FROM kg_entity_metrics"
+        )
+    }
+    ranks, iterations = matrix.pagerank(init={k: v[0] for k, v in previous.items()} if previous else None)
+    roots = matrix.components()
+    out_deg, in_deg, w_deg = matrix.degrees()
+
+    # 分量编号：按分量大小降序、根节点序号稳定排序，0 为最大分量
+    sizes: dict[int, int] = {}
+    for r in roots:
+        sizes[r] = sizes.get(r, 0) + 1
+    comp_ids = {root: i for i, root in enumerate(sorted(sizes, key=lambda r: (-sizes[r], matrix.names[r])))}
+
+    ts = now_iso()
+    changed = []
+    current = set()
+    for i, name in enumerate(matrix.names):
+        current.add(name)
+        row = (
+            ranks[i],
+            comp_ids[roots[i]],
+            sizes[roots[i]],
+            out_deg[i],
+            in_deg[i],
+            round(w_deg[i], 6),
+        )
+        old = previous.get(name)
+        if old is None or abs(old[0] - row[0]) > WRITE_RTOL * max(old[0], row[0]) or old[1:] != row[1:]:
+            changed.append((name, *row, ts))
+    removed = [name for name in previous if name not in current]
+
+    try:
+        c.executemany(
+            """
+            INSERT INTO kg_entity_metrics
+                (entity, pagerank, component_id, component_size, out_degree, in_degree, weighted_degree, computed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(entity) DO UPDATE SET
+                pagerank = excluded.pagerank,
+                component_id = excluded.component_id,
+                component_size = excluded.component_size,
+                out_degree = excluded.out_degree,
+                in_degree = excluded.in_degree,
+                weighted_degree = excluded.weighted_degree,
+                computed_at = excluded.computed_at
+            """,
+            changed,
+        )
+        c.executemany("DELETE FROM kg_entity_metrics WHERE entity = ?", [(name,) for name in removed])
+        c.executemany(
+            "INSERT OR REPLACE INTO kg_analytics_state(key, value) VALUES (?, ?)",
+            [("relations_generation", str(generation)), ("computed_at", ts)],
+        )
+        c.commit()
+    except Exception:
+        c.rollback()
+        raise
+
+    return {
+        "skipped": False,
+        "generation": generation,
+        "entities": matrix.size,
+        "relations": len(matrix.targets),
+        "components": len(sizes),
+        "largest_component": max(sizes.values()) if sizes else 0,
+        "iterations": iterations,
+        "warm_start": bool(previous),
+        "rows_written": len(changed),
+        "rows_deleted": len(removed),
+        "elapsed_sec": round(time.monotonic() - started, 3),
+    }
+
+
+def top_entities(c: sqlite3.Connection, limit: int = 20, component_id: int | None = None) -> list[dict]:
+    """按 PageRank 降序读取核心实体；表不存在（尚未跑过分析）时返回空列表。"""
+    sql = (
+        "SELECT entity, pagerank, component_id, component_size, out_degree, in_degree, weighted_degree "
+        "FROM kg_entity_metrics"
+    )
+    params: tuple = ()
+    if component_id is not None:
+        sql += " WHERE component_id = ?"
+        params = (int(component_id),)
+    sql += " ORDER BY pagerank DESC LIMIT ?"
+    try:
+        rows = c.execute(sql, (*params, max(1, int(limit)))).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    return [
+        {
+            "entity": r[0],
+            "pagerank": r[1],
+            "component_id": r[2],
+            "component_size": r[3],
+            "out_degree": r[4],
+            "in_degree": r[5],
+            "weighted_degree": r[6],
+        }
+        for r in rows
+    ]
+
+
+def run_analytics(db_path: Path | None = None, force: bool = False) -> dict:
+    c = conn(db_path or DB_PATH)
+    try:
+        return compute_entity_metrics(c, force=force)
+    finally:
+        c.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Knowledge graph entity analytics (PageRank / components / degree)")
+    parser.add_argument("--db", default=str(DB_PATH), help="sqlite path")
+    parser.add_argument("--force", action="store_true", help="忽略写代数，强制重算")
+    parser.add_argument("--top", type=int, default=0, help="输出 PageRank 前 N 个实体")
+    args = parser.parse_args()
+
+    out = run_analytics(Path(args.db).expanduser().resolve(), force=args.force)
+    if args.top:
+        c = conn(Path(args.db).expanduser().resolve())
+        try:
+            out["top_entities"] = top_entities(c, limit=args.top)
+        finally:
+            c.close()
+    print(json.dumps(out, ensure_ascii=False, indent=2))
@@ -2,10 +2,13 @@
 Knowledge Graph — 实体关系图谱模块。
 
 存储 (subject, predicate, object) 三元组，支持：
+- KnowledgeGraphStore — 长连接存储；(subject, predicate, object) 唯一，重复写入合并 confidence/来源
 - add_relation()    — 写入一条关系
+- add_relations_bulk() — executemany 批量写入（整库语料抽取见 extract_corpus()）
 - get_relations()  — 查询某实体的所有关系
+- traverse()       — WITH RECURSIVE 任意深度遍历（环检测、fan-out 限制、路径置信度乘积剪枝）
+- GraphSnapshot    — 内存 CSR 邻接快照：邻居 / 最短路径 / 遍历
 - extract_relations() — 从文本内容中 LLM 抽取关系
-- query_graph()    — 图遍历查询（2度关联）
 """
 
 from __future__ import annotations
@@ -13,20 +16,92 @@ from __future__ import annotations
 import json
 import sqlite3
 import sys
+import threading
 import uuid
-from datetime import datetime, timezone
+from array import array
+from collections import deque
 from pathlib import Path
+from typing import Iterable
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from core.memory_experience_core_v0_1 import conn as _conn, now_iso
+from core.memory_experience_core_v0_1 import conn as _conn, ensure_generation_triggers, init_db as init_me_db, now_iso
+from core.recall_cache import current_generation
 
 DB_PATH = ROOT / "data" / "mindkernel_v0_1.sqlite"
 
+# 每条关系最多保留的来源数，防止高频三元组的 sources_json 无限增长
+MAX_SOURCES = 50
+
+_RELATION_COLUMNS = "id, subject, predicate, object, confidence, source, sources_json, created_at"
+
+# (subject, predicate, object) 唯一：重复写入时 confidence 取较大值，新来源追加进 sources_json
+_UPSERT_SQL = f"""
+    INSERT INTO knowledge_relations
+        (id, subject, predicate, object, confidence, source, sources_json, created_at, updated_at)
+    VALUES
+        (:id, :subject, :predicate, :object, :confidence, :source,
+         CASE WHEN :source IS NULL THEN '[]' ELSE json_array(:source) END, :now, :now)
+    ON CONFLICT(subject, predicate, object) DO UPDATE SET
+        confidence = MAX(knowledge_relations.confidence, excluded.confidence),
+        source = COALESCE(knowledge_relations.source, excluded.source),
+        sources_json = CASE
+            WHEN excluded.source IS NULL
+              OR json_array_length(knowledge_relations.sources_json) >= {MAX_SOURCES}
+              OR EXISTS (SELECT 1 FROM json_each(knowledge_relations.sources_json) WHERE value = excluded.source)
+            THEN knowledge_relations.sources_json
+            ELSE json_insert(knowledge_relations.sources_json, '$[#]', excluded.source)
+        END,
+        updated_at = excluded.updated_at
+"""
+
+
+# 遍历默认限制：每个实体最多展开的边数、路径置信度乘积下限、递归产生的路径总数上限
+DEFAULT_MAX_DEPTH = 3
+DEFAULT_MAX_FANOUT = 50
+DEFAULT_MIN_PATH_CONFIDENCE = 0.1
+MAX_TRAVERSE_DEPTH = 8
+MAX_PATHS = 20000
+
+_SEP = "\x1f"
+
+# 多跳遍历：每步从当前实体取置信度最高的 :fanout 条边（正反向合并），
+# 路径以 \x1f 分隔拼接用于环检测，路径置信度为沿途 confidence 乘积，低于 :min_conf 即剪枝。
+# 同一实体按最高路径置信度聚合（SQLite 的 MAX() 聚合使裸列 depth/path 取自该行）。
+_OTHER_SQL = "(CASE WHEN r.subject = w.entity THEN r.object ELSE r.subject END)"
+_TRAVERSE_SQL = f"""
+WITH RECURSIVE walk(entity, depth, conf, path) AS (
+    SELECT :start, 0, 1.0, char(31) || :start || char(31)
+    UNION ALL
+    SELECT {_OTHER_SQL}, w.depth + 1, w.conf * r.confidence, w.path || {_OTHER_SQL} || char(31)
+    FROM walk w
+    JOIN knowledge_relations r ON r.rowid IN (
+        SELECT rid FROM (
+            SELECT rowid AS rid, confidence FROM knowledge_relations WHERE subject = w.entity
+            UNION ALL
+            SELECT rowid, confidence FROM knowledge_relations WHERE object = w.entity
+        ) ORDER BY confidence DESC LIMIT :fanout
+    )
+    WHERE w.depth < :max_depth
+      AND w.conf * r.confidence >= :min_conf
+      AND instr(w.path, char(31) || {_OTHER_SQL} || char(31)) = 0
+    LIMIT :max_paths
+)
+SELECT entity, MAX(conf) AS path_confidence, depth, path
+FROM walk WHERE depth > 0
+GROUP BY entity
+ORDER BY path_confidence DESC, depth, entity
+LIMIT :limit
+"""
+
+
+def _clamp_traverse_args(max_depth: int, max_fanout: int) -> tuple[int, int]:
+    return max(1, min(int(max_depth), MAX_TRAVERSE_DEPTH)), max(1, int(max_fanout))
+
 
 def init_graph_db(c: sqlite3.Connection):
-    """初始化关系图谱表。"""
+    """初始化关系图谱表（幂等；旧库会补 sources_json 列并合并重复三元组）。"""
     c.execute("""
         CREATE TABLE IF NOT EXISTS knowledge_relations (
             id          TEXT PRIMARY KEY,
@@ -35,16 +110,64 @@ def init_graph_db(c: sqlite3.Connection):
             object      TEXT NOT NULL,
             confidence  REAL    DEFAULT 0.8,
             source      TEXT,
+            sources_json TEXT   NOT NULL DEFAULT '[]',
             created_at  TEXT    NOT NULL,
             updated_at  TEXT    NOT NULL
         )
     """)
+    _ensure_relation_dedup(c)
+    # 遍历按实体取置信度最高的 fan-out 条边：(entity, confidence DESC) 覆盖旧的单列索引
+    c.execute("DROP INDEX IF EXISTS idx_kg_subject")
+    c.execute("DROP INDEX IF EXISTS idx_kg_object")
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_kg_subject_conf ON knowledge_relations(subject, confidence DESC)
+    """)
+    c.execute("""
+        CREATE INDEX IF NOT EXISTS idx_kg_object_conf ON knowledge_relations(object, confidence DESC)
+    """)
+    # 写代数：adjacency 快照据此判断是否需要重建
+    ensure_generation_triggers(c, "knowledge_relations")
+
+
+def _ensure_relation_dedup(c: sqlite3.Connection):
+    """迁移：补 sources_json 列；合并已有重复三元组后建 UNIQUE(subject, predicate, object)。"""
+    cols = {r[1] for r in c.execute("PRAGMA table_xinfo(knowledge_relations)").fetchall()}
+    if "sources_json" not in cols:
+        c.execute("ALTER TABLE knowledge_relations ADD COLUMN sources_json TEXT NOT NULL DEFAULT '[]'")
+        c.execute("UPDATE knowledge_relations SET sources_json = json_array(source) WHERE source IS NOT NULL")
+
+    if c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='index' AND name='uq_kg_spo'"
+    ).fetchone():
+        return
+
+    # 每组保留 rowid 最小的一条：confidence 取组内最大值，来源去重合并
     c.execute("""
-        CREATE INDEX IF NOT EXISTS idx_kg_subject ON knowledge_relations(subject)
+        UPDATE knowledge_relations AS k SET
+            confidence = g.max_conf,
+            sources_json = g.sources,
+            updated_at = g.max_updated
+        FROM (
+            SELECT subject, predicate, object,
+                   MIN(rowid) AS keep_rowid,
+                   MAX(confidence) AS max_conf,
+                   MAX(updated_at) AS max_updated,
+                   (SELECT json_group_array(DISTINCT value) FROM knowledge_relations r2, json_each(r2.sources_json)
+                     WHERE r2.subject = r.subject AND r2.predicate = r.predicate AND r2.object = r.object) AS sources
+            FROM knowledge_relations r
+            GROUP BY subject, predicate, object
+            HAVING COUNT(*) > 1
+        ) AS g
+        WHERE k.rowid = g.keep_rowid
     """)
     c.execute("""
-        CREATE INDEX IF NOT EXISTS idx_kg_object ON knowledge_relations(object)
+        DELETE FROM knowledge_relations WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM knowledge_relations GROUP BY subject, predicate, object
+        )
     """)
+    c.execute(
+        "CREATE UNIQUE INDEX uq_kg_spo ON knowledge_relations(subject, predicate, object)"
+    )
 
 
 def ensure_graph_db():
@@ -54,51 +177,237 @@ def ensure_graph_db():
     c.close()
 
 
-def add_relation(
-    subject: str,
-    predicate: str,
-    obj: str,
-    confidence: float = 0.8,
-    source: str | None = None,
-) -> str:
-    """
-    写入一条知识关系。
-    返回 relation id。
+def _relation_row(d: dict) -> dict:
+    d["sources"] = json.loads(d.pop("sources_json", None) or "[]")
+    return d
+
+
+class GraphSnapshot:
     """
-    rel_id = f"rel_{uuid.uuid4().hex[:12]}"
-    now = now_iso()
-    c = _conn(DB_PATH)
-    init_graph_db(c)
-    try:
-        c.execute(
-            """
-            INSERT INTO knowledge_relations
-                (id, subject, predicate, object, confidence, source, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (rel_id, subject, predicate, obj, confidence, source, now, now),
-        )
-        c.commit()
-    finally:
-        c.close()
-    return rel_id
+    knowledge_relations 的内存邻接快照（CSR：offsets / targets / weights 三个 array）。
 
+    边按无向处理；每个实体的邻居按 confidence 降序排列，fan-out 取前 k 条与 SQL 遍历口径一致。
+    """
 
-def get_relations(entity: str, depth: int = 1) -> list[dict]:
+    def __init__(self, names: list[str], offsets: array, targets: array, weights: array, generation: int | None = None):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.generation = generation
+
+    @classmethod
+    def load(cls, c: sqlite3.Connection) -> "GraphSnapshot":
+        generation = current_generation(c, "knowledge_relations")
+        index: dict[str, int] = {}
+        src = array("l")
+        dst = array("l")
+        wts = array("d")
+        for subject, obj, conf in c.execute("SELECT subject, object, confidence FROM knowledge_relations"):
+            s_i = index.setdefault(subject, len(index))
+            o_i = index.setdefault(obj, len(index))
+            w = float(conf if conf is not None else 0.0)
+            src.extend((s_i, o_i))
+            dst.extend((o_i, s_i))
+            wts.extend((w, w))
+
+        n = len(index)
+        offsets = array("l", bytes(8 * (n + 1))) if n else array("l", [0])
+        for s_i in src:
+            offsets[s_i + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+
+        order = sorted(range(len(src)), key=lambda e: (src[e], -wts[e]))
+        targets = array("l", (dst[e] for e in order))
+        weights = array("d", (wts[e] for e in order))
+        names = [""] * n
+        for name, i in index.items():
+            names[i] = name
+        return cls(names, offsets, targets, weights, generation)
+
+    @property
+    def entity_count(self) -> int:
+        return len(self.names)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.targets) // 2
+
+    def _adj(self, i: int, limit: int | None = None):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        if limit is not None:
+            end = min(end, start + limit)
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def neighbors(self, entity: str, limit: int | None = None) -> list[dict]:
+        i = self.index.get(entity)
+        if i is None:
+            return []
+        return [{"entity": self.names[t], "confidence": w} for t, w in self._adj(i, limit)]
+
+    def traverse(
+        self,
+        entity: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_fanout: int = DEFAULT_MAX_FANOUT,
+        min_path_confidence: float = DEFAULT_MIN_PATH_CONFIDENCE,
+        limit: int = 200,
+    ) -> list[dict]:
+        """与 KnowledgeGraphStore.traverse 同口径：每个可达实体的最高路径置信度及其路径。
+
+        按跳数分层做最大乘积松弛；confidence <= 1 时带环的游走不会优于去环后的简单路径。
+        """
+        start = self.index.get(entity)
+        if start is None:
+            return []
+        max_depth, max_fanout = _clamp_traverse_args(max_depth, max_fanout)
+        best: dict[int, tuple[float, int, tuple[int, ...]]] = {}
+        layer: dict[int, tuple[float, tuple[int, ...]]] = {start: (1.0, (start,))}
+        for depth in range(1, max_depth + 1):
+            nxt: dict[int, tuple[float, tuple[int, ...]]] = {}
+            for node, (conf, path) in layer.items():
+                for t, w in self._adj(node, max_fanout):
+                    pc = conf * w
+                    if pc < min_path_confidence or t in path:
+                        continue
+                    if t not in nxt or pc > nxt[t][0]:
+                        nxt[t] = (pc, path + (t,))
+            for node, (conf, path) in nxt.items():
+                if node not in best or conf > best[node][0]:
+                    best[node] = (conf, depth, path)
+            layer = nxt
+            if not layer:
+                break
+        ranked = sorted(best.items(), key=lambda kv: (-kv[1][0], kv[1][1], self.names[kv[0]]))
+        return [
+            {
+                "entity": self.names[node],
+                "path_confidence": round(conf, 6),
+                "depth": depth,
+                "path": [self.names[p] for p in path],
+            }
+            for node, (conf, depth, path) in ranked[: max(1, int(limit))]
+        ]
+
+    def shortest_path(self, src: str, dst: str, max_depth: int = 6) -> dict | None:
+        """BFS 最少跳数路径；同跳数下优先高置信度邻居。不可达返回 None。"""
+        s_i, d_i = self.index.get(src), self.index.get(dst)
+        if s_i is None or d_i is None:
+            return None
+        parent: dict[int, tuple[int, float]] = {s_i: (-1, 1.0)}
+        queue = deque([(s_i, 0)])
+        while queue and d_i not in parent:
+            node, depth = queue.popleft()
+            if depth >= max_depth:
+                continue
+            for t, w in self._adj(node):
+                if t not in parent:
+                    parent[t] = (node, w)
+                    queue.append((t, depth + 1))
+        if d_i not in parent:
+            return None
+        path, conf, node = [], 1.0, d_i
+        while node != -1:
+            path.append(self.names[node])
+            node, w = parent[node]
+            conf *= w
+        path.reverse()
+        return {"path": path, "hops": len(path) - 1, "path_confidence": round(conf, 6)}
+
+
+class KnowledgeGraphStore:
     """
-    查询某实体的所有关系（正向+反向）。
-    depth=1：直接关系
-    depth=2：2度关联（朋友的友人）
+    持有一条长连接的图谱存储；init_graph_db 只在打开时执行一次。
+
+    sqlite3 连接不能跨线程使用：每个线程各自持有实例（见 get_store()）。
     """
-    c = _conn(DB_PATH)
-    init_graph_db(c)
-    results = []
 
-    try:
+    def __init__(self, db_path: Path | None = None, c: sqlite3.Connection | None = None):
+        self.c = c or _conn(db_path or DB_PATH)
+        init_graph_db(self.c)
+        self.c.commit()
+        self._snapshot: GraphSnapshot | None = None
+
+    def close(self):
+        self.c.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @staticmethod
+    def _params(rel: dict, now: str) -> dict:
+        subject = str(rel.get("subject") or "").strip()
+        predicate = str(rel.get("predicate") or "").strip()
+        obj = str(rel.get("object") or "").strip()
+        if not subject or not predicate or not obj:
+            raise ValueError(f"relation requires subject/predicate/object: {rel}")
+        return {
+            "id": f"rel_{uuid.uuid4().hex[:12]}",
+            "subject": subject,
+            "predicate": predicate,
+            "object": obj,
+            "confidence": float(rel.get("confidence", 0.8)),
+            "source": rel.get("source"),
+            "now": now,
+        }
+
+    def relation_id(self, subject: str, predicate: str, obj: str) -> str | None:
+        row = self.c.execute(
+            "SELECT id FROM knowledge_relations WHERE subject = ? AND predicate = ? AND object = ?",
+            (subject, predicate, obj),
+        ).fetchone()
+        return row[0] if row else None
+
+    def add_relation(
+        self,
+        subject: str,
+        predicate: str,
+        obj: str,
+        confidence: float = 0.8,
+        source: str | None = None,
+    ) -> str:
+        """写入（或合并）一条关系，返回 relation id；已存在的三元组返回原 id。"""
+        params = self._params(
+            {"subject": subject, "predicate": predicate, "object": obj, "confidence": confidence, "source": source},
+            now_iso(),
+        )
+        self.c.execute(_UPSERT_SQL, params)
+        self.c.commit()
+        return self.relation_id(params["subject"], params["predicate"], params["object"])
+
+    def add_relations_bulk(self, relations: Iterable[dict]) -> int:
+        """executemany 批量 upsert，单事务提交（失败整批回滚）。返回处理的关系条数（含合并）。"""
+        now = now_iso()
+        rows = [self._params(rel, now) for rel in relations]
+        if not rows:
+            return 0
+        try:
+            self.c.executemany(_UPSERT_SQL, rows)
+            self.c.commit()
+        except Exception:
+            self.c.rollback()
+            raise
+        return len(rows)
+
+    def get_relations(self, entity: str, depth: int = 1) -> list[dict]:
+        """
+        查询某实体的所有关系（正向+反向）。
+        depth=1：直接关系
+        depth>=2：再取 depth-1 跳内可达实体各自的关系（每个实体最多 20 条，不含与 entity 直连的边），
+        一次遍历 + 一条查询完成，标注 via_entity
+        """
+        c = self.c
+        results = []
+
         # 1度：entity 作为 subject 或 object
         rows = c.execute(
-            """
-            SELECT id, subject, predicate, object, confidence, source, created_at
+            f"""
+            SELECT {_RELATION_COLUMNS}
             FROM knowledge_relations
             WHERE subject = ? OR object = ?
             ORDER BY confidence DESC
@@ -107,38 +416,145 @@ def get_relations(entity: str, depth: int = 1) -> list[dict]:
         ).fetchall()
 
         for row in rows:
-            d = dict(row)
+            d = _relation_row(dict(row))
             d["direction"] = "outgoing" if d["subject"] == entity else "incoming"
             results.append(d)
 
         if depth >= 2:
-            # 找关联实体
-            related_entities = set()
-            for r in results:
-                related_entities.add(r["object"] if r["subject"] == entity else r["subject"])
-            related_entities.discard(entity)
-
-            for rel_entity in related_entities:
-                rows2 = c.execute(
-                    """
-                    SELECT id, subject, predicate, object, confidence, source, created_at
-                    FROM knowledge_relations
-                    WHERE (subject = ? OR object = ?)
-                      AND subject != ? AND object != ?
-                    ORDER BY confidence DESC
-                    LIMIT 20
-                    """,
-                    (rel_entity, rel_entity, entity, entity),
-                ).fetchall()
-                for row in rows2:
-                    d = dict(row)
-                    d["direction"] = "outgoing" if d["subject"] == rel_entity else "incoming"
-                    d["via_entity"] = rel_entity
-                    results.append(d)
-    finally:
-        c.close()
-
-    return results
+            reached = self.traverse(
+                entity,
+                max_depth=depth - 1,
+                max_fanout=MAX_PATHS,
+                min_path_confidence=0.0,
+                limit=MAX_PATHS,
+            )
+            if not reached:
+                return results
+            rows2 = c.execute(
+                f"""
+                WITH via(name) AS (SELECT value FROM json_each(:via))
+                SELECT * FROM (
+                    SELECT *, ROW_NUMBER() OVER (PARTITION BY via_entity ORDER BY confidence DESC) AS rn
+                    FROM (
+                        SELECT {_RELATION_COLUMNS}, via.name AS via_entity
+                        FROM via JOIN knowledge_relations r ON r.subject = via.name
+                        UNION ALL
+                        SELECT {_RELATION_COLUMNS}, via.name
+                        FROM via JOIN knowledge_relations r ON r.object = via.name
+                    )
+                    WHERE subject != :entity AND object != :entity
+                )
+                WHERE rn <= 20
+                ORDER BY via_entity, confidence DESC
+                """,
+                {"via": json.dumps([n["entity"] for n in reached], ensure_ascii=False), "entity": entity},
+            ).fetchall()
+            for row in rows2:
+                d = _relation_row(dict(row))
+                d.pop("rn", None)
+                d["direction"] = "outgoing" if d["subject"] == d["via_entity"] else "incoming"
+                results.append(d)
+
+        return results
+
+    def traverse(
+        self,
+        entity: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        max_fanout: int = DEFAULT_MAX_FANOUT,
+        min_path_confidence: float = DEFAULT_MIN_PATH_CONFIDENCE,
+        limit: int = 200,
+    ) -> list[dict]:
+        """
+        WITH RECURSIVE 多跳遍历（正反向边均可走，路径内不重复实体）。
+        返回 [{"entity", "path_confidence", "depth", "path"}]，按路径置信度降序；不含起点。
+        """
+        max_depth, max_fanout = _clamp_traverse_args(max_depth, max_fanout)
+        rows = self.c.execute(
+            _TRAVERSE_SQL,
+            {
+                "start": entity,
+                "max_depth": max_depth,
+                "fanout": max_fanout,
+                "min_conf": float(min_path_confidence),
+                "max_paths": MAX_PATHS,
+                "limit": max(1, int(limit)),
+            },
+        ).fetchall()
+        return [
+            {
+                "entity": r["entity"],
+                "path_confidence": round(r["path_confidence"], 6),
+                "depth": r["depth"],
+                "path": r["path"].strip(_SEP).split(_SEP),
+            }
+            for r in rows
+        ]
+
+    def snapshot(self) -> GraphSnapshot:
+        """返回内存邻接快照；knowledge_relations 写代数变化后自动重建。"""
+        generation = current_generation(self.c, "knowledge_relations")
+        if self._snapshot is None or generation is None or self._snapshot.generation != generation:
+            self._snapshot = GraphSnapshot.load(self.c)
+        return self._snapshot
+
+    def extract_corpus(self, table: str = "memory_items", batch_size: int = 1000) -> dict:
+        """对整个记忆/经验语料抽取关系：按 rowid 分块读 content 反范式列，每块一次 add_relations_bulk。"""
+        prefix = {"memory_items": "memory", "experience_records": "experience"}.get(table)
+        if prefix is None:
+            raise ValueError(f"invalid table: {table}")
+        init_me_db(self.c)
+        scanned = 0
+        stored = 0
+        last_rowid = 0
+        while True:
+            rows = self.c.execute(
+                f"SELECT rowid, id, content FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (last_rowid, max(1, int(batch_size))),
+            ).fetchall()
+            if not rows:
+                break
+            last_rowid = rows[-1][0]
+            scanned += len(rows)
+            batch = []
+            for r in rows:
+                if not r["content"]:
+                    continue
+                for rel in extract_relations_from_text(r["content"]):
+                    rel["source"] = f"{prefix}:{r['id']}"
+                    batch.append(rel)
+            stored += self.add_relations_bulk(batch)
+        return {"table": table, "scanned": scanned, "relations": stored}
+
+
+_local = threading.local()
+
+
+def get_store() -> KnowledgeGraphStore:
+    """当前线程复用的默认库存储（长连接，进程退出时随之关闭）。"""
+    store = getattr(_local, "store", None)
+    if store is None:
+        store = _local.store = KnowledgeGraphStore()
+    return store
+
+
+def add_relation(
+    subject: str,
+    predicate: str,
+    obj: str,
+    confidence: float = 0.8,
+    source: str | None = None,
+) -> str:
+    """
+    写入一条知识关系（重复三元组合并到已有记录）。
+    返回 relation id。
+    """
+    return get_store().add_relation(subject, predicate, obj, confidence=confidence, source=source)
+
+
+def get_relations(entity: str, depth: int = 1) -> list[dict]:
+    """查询某实体的所有关系，见 KnowledgeGraphStore.get_relations。"""
+    return get_store().get_relations(entity, depth=depth)
 
 
 def extract_relations_from_text(content: str, source: str | None = None) -> list[dict]:
@@ -174,22 +590,22 @@ def extract_relations_from_text(content: str, source: str | None = None) -> list
     return results[:5]  # 最多 5 条
 
 
-def auto_extract_and_store(content: str, memory_id: str | None = None, source: str | None = None):
+def auto_extract_and_store(
+    content: str,
+    memory_id: str | None = None,
+    source: str | None = None,
+    store: KnowledgeGraphStore | None = None,
+):
     """
-    从文本中抽取关系并自动写入图谱。
+    从文本中抽取关系并自动写入图谱（一次批量 upsert）。
+    返回 relation id 列表（重复三元组为已有 id）。
     """
+    store = store or get_store()
     relations = extract_relations_from_text(content, source)
-    stored = []
     for rel in relations:
-        rel_id = add_relation(
-            subject=rel["subject"],
-            predicate=rel["predicate"],
-            obj=rel["object"],
-            confidence=rel["confidence"],
-            source=rel.get("source") or f"memory:{memory_id}",
-        )
-        stored.append(rel_id)
-    return stored
+        rel["source"] = rel.get("source") or f"memory:{memory_id}"
+    store.add_relations_bulk(relations)
+    return [store.relation_id(r["subject"], r["predicate"], r["object"]) for r in relations]
 
 
 if __name__ == "__main__":
@@ -199,6 +615,18 @@ if __name__ == "__main__":
     parser.add_argument("--add", nargs=3, metavar=("SUBJECT", "PREDICATE", "OBJECT"), help="添加关系")
     parser.add_argument("--query", metavar="ENTITY", help="查询实体关系")
     parser.add_argument("--extract", metavar="FILE", help="从文件抽取关系")
+    parser.add_argument(
+        "--extract-corpus",
+        choices=["memory_items", "experience_records"],
+        help="对整个语料批量抽取关系并写入图谱",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000, help="--extract-corpus 每批行数")
+    parser.add_argument("--traverse", metavar="ENTITY", help="多跳遍历（WITH RECURSIVE）")
+    parser.add_argument("--path", nargs=2, metavar=("SRC", "DST"), help="最少跳数路径（内存邻接快照）")
+    parser.add_argument("--max-depth", type=int, default=DEFAULT_MAX_DEPTH)
+    parser.add_argument("--max-fanout", type=int, default=DEFAULT_MAX_FANOUT)
+    parser.add_argument("--min-confidence", type=float, default=DEFAULT_MIN_PATH_CONFIDENCE)
+    parser.add_argument("--snapshot", action="store_true", help="--traverse 使用内存邻接快照")
     args = parser.parse_args()
 
     if args.init:
@@ -217,6 +645,30 @@ if __name__ == "__main__":
             via = r.get("via_entity", "")
             print(f"  [{direction}] {r['subject']} --{r['predicate']}--> {r['object']} (conf={r['confidence']}, via={via})")
 
+    elif args.traverse:
+        store = get_store()
+        target = store.snapshot() if args.snapshot else store
+        nodes = target.traverse(
+            args.traverse,
+            max_depth=args.max_depth,
+            max_fanout=args.max_fanout,
+            min_path_confidence=args.min_confidence,
+        )
+        print(f"Reached {len(nodes)} entities from '{args.traverse}':")
+        for n in nodes:
+            print(f"  [d={n['depth']}] {n['entity']} (path_conf={n['path_confidence']}) via {' -> '.join(n['path'])}")
+
+    elif args.path:
+        found = get_store().snapshot().shortest_path(args.path[0], args.path[1], max_depth=args.max_depth)
+        if found is None:
+            print(f"No path within {args.max_depth} hops.")
+        else:
+            print(f"{' -> '.join(found['path'])} (hops={found['hops']}, path_conf={found['path_confidence']})")
+
+    elif args.extract_corpus:
+        with KnowledgeGraphStore() as store:
+            print(json.dumps(store.extract_corpus(args.extract_corpus, batch_size=args.batch_size), ensure_ascii=False))
+
     elif args.extract:
         content = Path(args.extract).read_text()
         relations = extract_relations_from_text(content)
@@ -0,0 +1,355 @@
+"""
+LLM Client — 进程内共享的 LLM HTTP 客户端
+
+dreaming / topic segmenter / 记忆抽取原先各自 urllib.urlopen，每次新建 TCP/TLS 连接。本模块统一提供：
+- 连接池：按 (scheme, host, port) 复用 http.client 长连接（keep-alive），复用连接失效时自动换新连接重试一次
+- 并发上限：全局信号量 + 每个 backend（默认按 host）信号量
+- 请求合并：相同请求同时在途时只发一次，其余调用方等待同一结果
+- 磁盘响应缓存：按 (model, prompt hash, temperature) 内容寻址；只缓存成功响应，
+  temperature 高于 cache_max_temperature 的采样请求默认不缓存（采样本身要求多样性）
+- 熔断：可挂接 LLMResilienceController，熔断打开（或半开探测名额已被占用）时直接拒绝（缓存命中仍返回），成功/失败计入熔断状态
+
+get_client() 返回进程级默认实例（缓存目录 data/llm_cache）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import http.client
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.llm_resilience_v0_2 import LLMResilienceController  # noqa: E402
+
+DEFAULT_CACHE_DIR = ROOT / "data" / "llm_cache"
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_PER_BACKEND_CONCURRENCY = 4
+DEFAULT_MAX_IDLE_PER_HOST = 4
+DEFAULT_TIMEOUT_SEC = 120.0
+DEFAULT_CACHE_MAX_TEMPERATURE = 0.5
+
+
+class LLMClientError(RuntimeError):
+    pass
+
+
+class LLMHTTPError(LLMClientError):
+    def __init__(self, status: int, body: str):
+        super().__init__(f"LLM API error {status}: {body[:500]}")
+        self.status = status
+        self.body = body
+
+
+class CircuitOpenError(LLMClientError):
+    pass
+
+
+def _canonical(obj: Any) -> str:
+    return json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def cache_key(url: str, payload: dict) -> str:
+    """(model, prompt hash, temperature) → 内容地址；prompt hash 覆盖 endpoint 与除 model/temperature 外的全部请求体。"""
+    body = {k: v for k, v in payload.items() if k not in ("model", "temperature")}
+    prompt_hash = hashlib.sha256(_canonical([url, body]).encode("utf-8")).hexdigest()
+    return hashlib.sha256(
+        _canonical([payload.get("model"), prompt_hash, payload.get("temperature")]).encode("utf-8")
+    ).hexdigest()
+
+
+class ResponseCache:
+    """内容寻址的磁盘缓存：<dir>/<key[:2]>/<key>.json，临时文件 + os.replace 原子写入。"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> dict | None:
+        try:
+            return json.loads(self._path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def discard(self, key: str):
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def put(self, key: str, response: dict):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(response, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+class ConnectionPool:
+    """按 (scheme, host, port) 保存空闲 keep-alive 连接（LIFO，最近用过的连接最可能仍存活）。"""
+
+    def __init__(self, max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST):
+        self.max_idle_per_host = max(0, int(max_idle_per_host))
+        self._idle: dict[tuple, list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def acquire(self, scheme: str, host: str, port: int | None, timeout: float) -> tuple[http.client.HTTPConnection, bool]:
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                c = idle.pop()
+                self.reused += 1
+                c.timeout = timeout
+                if c.sock is not None:
+                    c.sock.settimeout(timeout)
+                return c, True
+            self.opened += 1
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def release(self, scheme: str, host: str, port: int | None, c: http.client.HTTPConnection):
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(c)
+                return
+        c.close()
+
+    def close(self):
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for c in conns:
+            c.close()
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: dict | None = None
+        self.error: BaseException | None = None
+
+
+class LLMClient:
+    def __init__(
+        self,
+        *,
+        cache_dir: Path | None = DEFAULT_CACHE_DIR,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_backend_concurrency: int = DEFAULT_PER_BACKEND_CONCURRENCY,
+        max_idle_per_host: int = DEFAULT_MAX_IDLE_PER_HOST,
+        cache_max_temperature: float = DEFAULT_CACHE_MAX_TEMPERATURE,
+        resilience: LLMResilienceController | None = None,
+    ):
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.cache_max_temperature = float(cache_max_temperature)
+        self.resilience = resilience
+        self.pool = ConnectionPool(max_idle_per_host)
+        self.per_backend_concurrency = max(1, int(per_backend_concurrency))
+        self._global_sem = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._backend_sems: dict[str, threading.BoundedSemaphore] = {}
+        self._inflight: dict[str, _InFlight] = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+
+    def _backend_sem(self, backend: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._backend_sems.get(backend)
+            if sem is None:
+                sem = self._backend_sems[backend] = threading.BoundedSemaphore(self.per_backend_concurrency)
+            return sem
+
+    def _cacheable(self, payload: dict, use_cache: bool) -> bool:
+        return bool(use_cache and self.cache) and float(payload.get("temperature") or 0.0) <= self.cache_max_temperature
+
+    def post_json(
+        self,
+        url: str,
+        payload: dict,
+        *,
+        headers: dict | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SEC,
+        backend: str | None = None,
+        use_cache: bool = True,
+    ) -> dict:
+        """POST JSON 并返回解析后的响应体；失败抛 LLMClientError 及其子类。"""
+        key = cache_key(url, payload)
+        cacheable = self._cacheable(payload, use_cache)
+        if cacheable:
+            hit = self.cache.get(key)
+            if hit is not None:
+                with self._lock:
+                    self.cache_hits += 1
+                return hit
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._send(url, payload, headers or {}, timeout, backend)
+            if cacheable:
+                try:
+                    self.cache.put(key, flight.result)
+                except OSError:
+                    pass
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def invalidate(self, url: str, payload: dict):
+        """删除某请求的缓存响应（调用方发现缓存内容不可用时）。"""
+        if self.cache:
+            self.cache.discard(cache_key(url, payload))
+
+    def _send(self, url: str, payload: dict, headers: dict, timeout: float, backend: str | None) -> dict:
+        if self.resilience is not None and not self.resilience.allow_request():
+            raise CircuitOpenError("LLM circuit breaker open")
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        send_headers = {"Content-Type": "application/json", **headers, "Content-Length": str(len(body))}
+
+        sem = self._backend_sem(backend or parts.netloc)
+        with sem, self._global_sem:
+            with self._lock:
+                self.requests += 1
+            try:
+                status, raw = self._roundtrip(parts.scheme, parts.hostname, parts.port, path, body, send_headers, timeout)
+                if status >= 400:
+                    raise LLMHTTPError(status, raw.decode("utf-8", errors="ignore"))
+                try:
+                    data = json.loads(raw)
+                except ValueError as e:
+                    raise LLMClientError(f"invalid LLM response: {e}") from e
+            except LLMClientError as e:
+                if self.resilience is not None:
+                    self.resilience.record_failure(str(e))
+                raise
+            except (OSError, http.client.HTTPException) as e:
+                if self.resilience is not None:
+                    self.resilience.record_failure(f"{type(e).__name__}: {e}")
+                raise LLMClientError(f"LLM request failed: {type(e).__name__}: {e}") from e
+        if self.resilience is not None:
+            self.resilience.record_success()
+        return data
+
+    def _roundtrip(self, scheme, host, port, path, body, headers, timeout) -> tuple[int, bytes]:
+        for attempt in range(2):
+            c, reused = self.pool.acquire(scheme, host, port, timeout)
+            try:
+                c.request("POST", path, body=body, headers=headers)
+                resp = c.getresponse()
+                raw = resp.read()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.BadStatusLine):
+                c.close()
+                # 复用的空闲连接可能已被服务端关闭：换新连接重试一次
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                c.close()
+                raise
+            if resp.will_close:
+                c.close()
+            else:
+                self.pool.release(scheme, host, port, c)
+            return resp.status, raw
+        raise LLMClientError("unreachable")
+
+    def chat(
+        self,
+        url: str,
+        *,
+        model: str,
+        messages: list[dict],
+        api_key: str = "",
+        temperature: float = 0.7,
+        max_tokens: int = 4096,
+        extra: dict | None = None,
+        headers: dict | None = None,
+        timeout: float = DEFAULT_TIMEOUT_SEC,
+        backend: str | None = None,
+        use_cache: bool = True,
+    ) -> str:
+        """OpenAI-compatible chat/completions，返回首个 choice 的文本。"""
+        payload = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens, **(extra or {})}
+        send_headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        send_headers.update(headers or {})
+        data = self.post_json(url, payload, headers=send_headers, timeout=timeout, backend=backend, use_cache=use_cache)
+        return response_text(data)
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "connections_opened": self.pool.opened,
+            "connections_reused": self.pool.reused,
+        }
+
+    def close(self):
+        self.pool.close()
+
+
+def response_text(data: dict) -> str:
+    """从 OpenAI (choices) 或 Anthropic (content blocks) 格式响应中取文本。"""
+    try:
+        if "choices" in data:
+            content = data["choices"][0]["message"]["content"]
+            if isinstance(content, list):
+                return "\n".join(str(p.get("text", "")) for p in content if isinstance(p, dict) and p.get("type") == "text")
+            return content
+        if isinstance(data.get("content"), list):
+            for block in data["content"]:
+                if isinstance(block, dict) and block.get("type") == "text":
+                    return block["text"]
+    except (KeyError, IndexError, TypeError) as e:
+        raise LLMClientError(f"invalid LLM response: {e}") from e
+    return str(data)
+
+
+_default_client: LLMClient | None = None
+_default_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    global _default_client
+    with _default_lock:
+        if _default_client is None:
+            _default_client = LLMClient()
+        return _default_client
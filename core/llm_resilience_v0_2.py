@@ -1,14 +1,27 @@
 """v0.2 external LLM resilience controller.
 
-Provides a lightweight circuit-breaker state persisted on disk.
+Circuit breaker with closed → open → half_open states:
+- 熔断条件：连续失败数达到 error_threshold，或滚动窗口（window_sec）内请求数 >= min_window_requests 且失败率 >= failure_rate_threshold
+- open 冷却期结束后进入 half_open，只放行一个探测请求（probe_timeout_sec 内未回报则可被其他调用方重新领取）；
+  探测成功 → closed，失败 → 重新 open
+- 状态存 SQLite 一行（`<state_file>.sqlite` 的 llm_breaker_state），只在状态迁移时以 version 比较交换写入，多进程间原子可见
+- 读取走进程内快照（无锁），最多每 refresh_sec 从 SQLite 刷新一次；滚动窗口与连续失败数为进程内计数
+- 同一进程内相同 (state_file, name) 的控制器共享同一份熔断状态
+
+旧版 JSON state_file 若存在，首次建表时导入其 circuit_open_until / consecutive_failures。
 """
 
 from __future__ import annotations
 
 import json
+import sqlite3
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import NamedTuple
 
 
 def now_iso() -> str:
@@ -30,71 +43,263 @@ def parse_dt(v: str | None) -> datetime | None:
         return None
 
 
+def _iso_at(ts: float | None) -> str | None:
+    if ts is None:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
 @dataclass
 class LLMResilienceConfig:
     state_file: str
     error_threshold: int = 3
     cooldown_sec: int = 300
+    window_sec: int = 60
+    min_window_requests: int = 10
+    failure_rate_threshold: float = 0.5
+    probe_timeout_sec: int = 60
+    refresh_sec: float = 1.0
+    name: str = "default"
+
+
+class _Snapshot(NamedTuple):
+    state: str  # closed | open | half_open
+    open_until: float | None
+    probe_until: float | None
+    consecutive_failures: int
+    last_error: str | None
+    version: int
+    updated_at: str
+
+
+_CLOSED = _Snapshot("closed", None, None, 0, None, 0, "")
+
+
+class _SharedBreaker:
+    def __init__(self, db_path: Path, name: str, legacy_file: Path):
+        self.db_path = db_path
+        self.name = name
+        self.lock = threading.Lock()
+        self.window: deque[tuple[float, bool]] = deque()
+        self.consecutive = 0
+        self.snapshot = _CLOSED
+        self.refreshed_at = float("-inf")
+        self._init_db(legacy_file)
+
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.db_path), timeout=5)
+
+    def _init_db(self, legacy_file: Path):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        c = self._conn()
+        try:
+            c.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_breaker_state (
+                    name                 TEXT PRIMARY KEY,
+                    state                TEXT NOT NULL,
+                    open_until           REAL,
+                    probe_until          REAL,
+                    consecutive_failures INTEGER NOT NULL DEFAULT 0,
+                    last_error           TEXT,
+                    version              INTEGER NOT NULL DEFAULT 0,
+                    updated_at           TEXT NOT NULL
+                )
+                """
+            )
+            row = (self.name, "closed", None, 0, None)
+            legacy = _load_legacy(legacy_file)
+            if legacy:
+                open_until = parse_dt(legacy.get("circuit_open_until"))
+                if open_until and open_until > datetime.now(timezone.utc):
+                    row = (self.name, "open", open_until.timestamp(), 0, legacy.get("last_error"))
+                row = (*row[:3], int(legacy.get("consecutive_failures") or 0), row[4])
+            c.execute(
+                "INSERT OR IGNORE INTO llm_breaker_state"
+                "(name, state, open_until, consecutive_failures, last_error, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (*row, now_iso()),
+            )
+            c.commit()
+        finally:
+            c.close()
+
+    def reload(self) -> _Snapshot:
+        c = self._conn()
+        try:
+            r = c.execute(
+                "SELECT state, open_until, probe_until, consecutive_failures, last_error, version, updated_at "
+                "FROM llm_breaker_state WHERE name=?",
+                (self.name,),
+            ).fetchone()
+        finally:
+            c.close()
+        self.snapshot = _Snapshot(*r) if r else _CLOSED
+        self.refreshed_at = time.monotonic()
+        return self.snapshot
+
+    def current(self, refresh_sec: float) -> _Snapshot:
+        if time.monotonic() - self.refreshed_at > refresh_sec:
+            return self.reload()
+        return self.snapshot
+
+    def transition(self, expected: _Snapshot, state: str, **fields) -> bool:
+        """version 比较交换：只有库内仍是 expected 版本时才写入；失败时刷新快照。"""
+        values = {
+            "open_until": None,
+            "probe_until": None,
+            "consecutive_failures": expected.consecutive_failures,
+            "last_error": expected.last_error,
+            **fields,
+        }
+        ts = now_iso()
+        c = self._conn()
+        try:
+            cur = c.execute(
+                "UPDATE llm_breaker_state SET state=?, open_until=?, probe_until=?, consecutive_failures=?, "
+                "last_error=?, version=version+1, updated_at=? WHERE name=? AND version=?",
+                (
+                    state,
+                    values["open_until"],
+                    values["probe_until"],
+                    values["consecutive_failures"],
+                    values["last_error"],
+                    ts,
+                    self.name,
+                    expected.version,
+                ),
+            )
+            c.commit()
+            won = cur.rowcount == 1
+        finally:
+            c.close()
+        if won:
+            self.snapshot = _Snapshot(
+                state,
+                values["open_until"],
+                values["probe_until"],
+                values["consecutive_failures"],
+                values["last_error"],
+                expected.version + 1,
+                ts,
+            )
+            self.refreshed_at = time.monotonic()
+        else:
+            self.reload()
+        return won
+
+
+def _load_legacy(path: Path) -> dict | None:
+    if path.suffix != ".json" or not path.exists():
+        return None
+    try:
+        raw = json.loads(path.read_text(encoding="utf-8"))
+    except Exception:  # noqa: BLE001
+        return None
+    return raw if isinstance(raw, dict) else None
+
+
+_registry: dict[tuple[str, str], _SharedBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def _shared(state_file: Path, name: str) -> _SharedBreaker:
+    db_path = state_file.with_suffix(".sqlite")
+    key = (str(db_path), name)
+    with _registry_lock:
+        breaker = _registry.get(key)
+        if breaker is None:
+            breaker = _registry[key] = _SharedBreaker(db_path, name, state_file)
+        return breaker
 
 
 class LLMResilienceController:
     def __init__(self, cfg: LLMResilienceConfig):
         self.cfg = cfg
         self.path = Path(cfg.state_file).expanduser().resolve()
+        self._breaker = _shared(self.path, cfg.name)
+
+    @property
+    def db_path(self) -> Path:
+        return self._breaker.db_path
 
-    def _default(self) -> dict:
+    def _state_dict(self, snap: _Snapshot) -> dict:
+        b = self._breaker
+        total = len(b.window)
+        failures = sum(1 for _, ok in b.window if not ok)
         return {
-            "consecutive_failures": 0,
-            "circuit_open_until": None,
-            "last_error": None,
-            "updated_at": now_iso(),
+            "state": snap.state,
+            "consecutive_failures": max(b.consecutive, snap.consecutive_failures if snap.state != "closed" else 0),
+            "circuit_open_until": _iso_at(snap.open_until) if snap.state != "closed" else None,
+            "last_error": snap.last_error,
+            "window_requests": total,
+            "window_failure_rate": round(failures / total, 4) if total else 0.0,
+            "updated_at": snap.updated_at or now_iso(),
         }
 
     def load_state(self) -> dict:
-        if not self.path.exists():
-            return self._default()
-        try:
-            raw = json.loads(self.path.read_text(encoding="utf-8"))
-            if not isinstance(raw, dict):
-                return self._default()
-            out = self._default()
-            out.update(raw)
-            return out
-        except Exception:  # noqa: BLE001
-            return self._default()
-
-    def save_state(self, state: dict):
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        state = dict(state)
-        state["updated_at"] = now_iso()
-        self.path.write_text(json.dumps(state, ensure_ascii=False, indent=2), encoding="utf-8")
+        return self._state_dict(self._breaker.reload())
 
     def is_open(self, state: dict | None = None) -> bool:
-        st = state or self.load_state()
-        open_until = parse_dt(st.get("circuit_open_until"))
-        if not open_until:
+        """state 为 load_state / record_* 返回的字典时按其判断；否则读进程内快照（不领取探测名额）。"""
+        if state is not None:
+            open_until = parse_dt(state.get("circuit_open_until"))
+            return bool(open_until and datetime.now(timezone.utc) < open_until)
+        snap = self._breaker.current(self.cfg.refresh_sec)
+        if snap.state == "closed":
             return False
-        return datetime.now(timezone.utc) < open_until
+        now = time.time()
+        if snap.state == "open":
+            return bool(snap.open_until and now < snap.open_until)
+        return bool(snap.probe_until and now < snap.probe_until)
 
-    def record_success(self) -> dict:
-        st = self.load_state()
-        st["consecutive_failures"] = 0
-        st["circuit_open_until"] = None
-        st["last_error"] = None
-        self.save_state(st)
-        return st
+    def allow_request(self) -> bool:
+        """调用前的闸门：closed 放行；冷却结束后由首个调用方领取 half_open 探测名额，其余调用方拒绝。"""
+        b = self._breaker
+        snap = b.current(self.cfg.refresh_sec)
+        if snap.state == "closed":
+            return True
+        now = time.time()
+        if snap.state == "open" and snap.open_until and now < snap.open_until:
+            return False
+        if snap.state == "half_open" and snap.probe_until and now < snap.probe_until:
+            return False
+        with b.lock:
+            return b.transition(snap, "half_open", probe_until=now + max(1, int(self.cfg.probe_timeout_sec)))
 
-    def record_failure(self, err: str) -> dict:
-        st = self.load_state()
-        failures = int(st.get("consecutive_failures") or 0) + 1
-        st["consecutive_failures"] = failures
-        st["last_error"] = str(err)
+    def _record(self, ok: bool, err: str | None = None) -> dict:
+        b = self._breaker
+        now = time.time()
+        with b.lock:
+            b.window.append((now, ok))
+            while b.window and b.window[0][0] < now - max(1, int(self.cfg.window_sec)):
+                b.window.popleft()
+            b.consecutive = 0 if ok else b.consecutive + 1
 
-        if failures >= max(1, int(self.cfg.error_threshold)):
-            st["circuit_open_until"] = (
-                datetime.now(timezone.utc) + timedelta(seconds=max(1, int(self.cfg.cooldown_sec)))
-            ).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+            snap = b.current(self.cfg.refresh_sec)
+            if ok:
+                if snap.state != "closed":
+                    b.window.clear()
+                    b.transition(snap, "closed", consecutive_failures=0, last_error=None)
+            else:
+                total = len(b.window)
+                failures = sum(1 for _, x in b.window if not x)
+                tripped = snap.state == "half_open" or b.consecutive >= max(1, int(self.cfg.error_threshold)) or (
+                    total >= max(1, int(self.cfg.min_window_requests))
+                    and failures / total >= float(self.cfg.failure_rate_threshold)
+                )
+                # 已 open 的失败不再写入，只有迁移才落库
+                if tripped and snap.state != "open":
+                    b.transition(
+                        snap,
+                        "open",
+                        open_until=now + max(1, int(self.cfg.cooldown_sec)),
+                        consecutive_failures=b.consecutive,
+                        last_error=str(err),
+                    )
+            return self._state_dict(b.snapshot)
 
-        self.save_state(st)
-        return st
+    def record_success(self) -> dict:
+        return self._record(True)
 
+    def record_failure(self, err: str) -> dict:
+        return self._record(False, err)
@@ -0,0 +1,215 @@
+"""
+MECD Metrics — M→E→C→D 面板计数的物化表
+
+面板 / 导出 / 健康检查原先每次都对 memory_items、experience_records、knowledge_relations、
+decision_traces、audit_events 做全表 COUNT(*) / GROUP BY。本模块把这些聚合物化到
+`mecd_metrics(table_name, dim, key, value)`，由触发器随写入增量维护，读侧 O(1)：
+- dim='total'：总行数（key 为空串）
+- dim='status' / 'outcome' / 'event'：按状态、决策结果、审计 event_type|object_type 分组计数
+
+ensure_mecd_metrics() 幂等：对已存在但尚未挂触发器的源表，在同一写事务内建触发器并全量回填一次。
+check_mecd_metrics() 为一致性检查：与实时全量聚合逐项比对，可选从头重建。
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+# 源表 → {dim: 行表达式模板（{r} 为 NEW / OLD / 表别名）}
+MECD_SOURCES: dict[str, dict[str, str]] = {
+    "memory_items": {"status": "{r}.status"},
+    "experience_records": {"status": "{r}.status"},
+    "knowledge_relations": {},
+    "decision_traces": {"outcome": "{r}.final_outcome"},
+    "audit_events": {"event": "{r}.event_type || '|' || {r}.object_type"},
+}
+
+_UPSERT = (
+    "INSERT INTO mecd_metrics(table_name, dim, key, value) VALUES ('{table}', '{dim}', {key}, {delta}) "
+    "ON CONFLICT(table_name, dim, key) DO UPDATE SET value = mecd_metrics.value + excluded.value;"
+)
+
+
+def _key_sql(expr: str, r: str) -> str:
+    return f"COALESCE({expr.format(r=r)}, '')"
+
+
+def _trigger_name(table: str, op: str) -> str:
+    return f"trg_{table}_mecd_{op}"
+
+
+def _trigger_sql(table: str, dims: dict[str, str]) -> list[str]:
+    def bumps(r: str, delta: int) -> str:
+        stmts = [_UPSERT.format(table=table, dim="total", key="''", delta=delta)]
+        stmts += [_UPSERT.format(table=table, dim=dim, key=_key_sql(expr, r), delta=delta) for dim, expr in dims.items()]
+        return "\n                ".join(stmts)
+
+    sqls = [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, 'insert')} AFTER INSERT ON {table}
+        BEGIN
+                {bumps('NEW', 1)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, 'delete')} AFTER DELETE ON {table}
+        BEGIN
+                {bumps('OLD', -1)}
+        END
+        """,
+    ]
+    for dim, expr in dims.items():
+        old_key, new_key = _key_sql(expr, "OLD"), _key_sql(expr, "NEW")
+        sqls.append(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS {_trigger_name(table, 'update_' + dim)} AFTER UPDATE ON {table}
+            WHEN {old_key} IS NOT {new_key}
+            BEGIN
+                {_UPSERT.format(table=table, dim=dim, key=old_key, delta=-1)}
+                {_UPSERT.format(table=table, dim=dim, key=new_key, delta=1)}
+            END
+            """
+        )
+    return sqls
+
+
+def _fresh_counts(c: sqlite3.Connection, table: str) -> dict[tuple[str, str], int]:
+    """实时全量聚合（回填与一致性检查用）"""
+    counts = {("total", ""): int(c.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0])}
+    for dim, expr in MECD_SOURCES[table].items():
+        for key, n in c.execute(f"SELECT {_key_sql(expr, 't')}, COUNT(*) FROM {table} t GROUP BY 1"):
+            counts[(dim, key)] = int(n)
+    return counts
+
+
+def _recount(c: sqlite3.Connection, table: str):
+    c.execute("DELETE FROM mecd_metrics WHERE table_name = ?", (table,))
+    c.executemany(
+        "INSERT INTO mecd_metrics(table_name, dim, key, value) VALUES (?, ?, ?, ?)",
+        [(table, dim, key, n) for (dim, key), n in _fresh_counts(c, table).items()],
+    )
+
+
+def _write_txn(c: sqlite3.Connection, fn):
+    """调用方已在事务中则直接并入；否则 BEGIN IMMEDIATE，避免回填与触发器安装之间漏掉写入"""
+    if c.in_transaction:
+        fn()
+        return
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        fn()
+    except BaseException:
+        c.rollback()
+        raise
+    c.commit()
+
+
+def _tables_present(c: sqlite3.Connection) -> set[str]:
+    return {r[0] for r in c.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+def installed_tables(c: sqlite3.Connection) -> list[str]:
+    triggers = {r[0] for r in c.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+    return [t for t in MECD_SOURCES if _trigger_name(t, "insert") in triggers]
+
+
+def ensure_mecd_metrics(c: sqlite3.Connection) -> list[str]:
+    """建表；为新出现的源表挂触发器并回填。返回本次新安装的源表。"""
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS mecd_metrics (
+            table_name TEXT NOT NULL,
+            dim        TEXT NOT NULL,
+            key        TEXT NOT NULL,
+            value      INTEGER NOT NULL,
+            PRIMARY KEY (table_name, dim, key)
+        ) WITHOUT ROWID
+        """
+    )
+    present = _tables_present(c)
+    missing = [t for t in MECD_SOURCES if t in present and t not in installed_tables(c)]
+    if not missing:
+        return []
+
+    def install():
+        for table in missing:
+            for sql in _trigger_sql(table, MECD_SOURCES[table]):
+                c.execute(sql)
+            _recount(c, table)
+
+    _write_txn(c, install)
+    return missing
+
+
+def read_mecd_metrics(c: sqlite3.Connection) -> dict[str, dict]:
+    """
+    返回 {table: {"total": n, dim: {key: n}}}；源表不存在时 total 为 0。
+    分组计数只保留 > 0 的项。
+    """
+    ensure_mecd_metrics(c)
+    out: dict[str, dict] = {t: {"total": 0, **{d: {} for d in dims}} for t, dims in MECD_SOURCES.items()}
+    for table, dim, key, value in c.execute("SELECT table_name, dim, key, value FROM mecd_metrics"):
+        if table not in out:
+            continue
+        if dim == "total":
+            out[table]["total"] = int(value)
+        elif value > 0:
+            out[table].setdefault(dim, {})[key] = int(value)
+    return out
+
+
+def audit_breakdown(stats: dict) -> list[dict]:
+    """mecd_metrics 的 audit event 维度 → [{event_type, object_type, count}]，按计数降序"""
+    rows = []
+    for key, count in stats["audit_events"]["event"].items():
+        event_type, _, object_type = key.partition("|")
+        rows.append({"event_type": event_type, "object_type": object_type, "count": count})
+    rows.sort(key=lambda r: (-r["count"], r["event_type"], r["object_type"]))
+    return rows
+
+
+def rebuild_mecd_metrics(c: sqlite3.Connection) -> list[str]:
+    """从源表全量重建全部已安装源表的计数"""
+    ensure_mecd_metrics(c)
+    tables = installed_tables(c)
+
+    def rebuild():
+        for table in tables:
+            _recount(c, table)
+
+    _write_txn(c, rebuild)
+    return tables
+
+
+def check_mecd_metrics(c: sqlite3.Connection, repair: bool = False) -> dict:
+    """一致性检查：同一读快照内比对物化计数与实时聚合；repair=True 且不一致时重建。"""
+    ensure_mecd_metrics(c)
+    tables: dict[str, dict] = {}
+    own_txn = not c.in_transaction
+    if own_txn:
+        c.execute("BEGIN")
+    try:
+        for table in installed_tables(c):
+            stored = {
+                (dim, key): int(value)
+                for dim, key, value in c.execute(
+                    "SELECT dim, key, value FROM mecd_metrics WHERE table_name = ? AND value != 0", (table,)
+                )
+            }
+            fresh = _fresh_counts(c, table)
+            mismatches = [
+                {"dim": dim, "key": key, "stored": stored.get((dim, key), 0), "actual": fresh.get((dim, key), 0)}
+                for dim, key in sorted(set(stored) | set(fresh))
+                if stored.get((dim, key), 0) != fresh.get((dim, key), 0)
+            ]
+            tables[table] = {"ok": not mismatches, "total": fresh[("total", "")], "mismatches": mismatches}
+    finally:
+        if own_txn:
+            c.rollback()
+
+    ok = all(t["ok"] for t in tables.values())
+    repaired = False
+    if repair and not ok:
+        rebuild_mecd_metrics(c)
+        repaired = True
+    return {"ok": ok, "repaired": repaired, "tables": tables}
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+import base64
 import json
 import sqlite3
 import sys
@@ -34,6 +35,93 @@ def conn(db_path: Path) -> sqlite3.Connection:
     return c
 
 
+# 热点 JSON 字段的反范式列（VIRTUAL 生成列，随 payload_json 自动维护，可建索引）。
+# 读路径直接 SELECT 这些列，避免逐行 json.loads(payload_json)。
+# 带索引的生成列在每次写入时求值：先 json_valid() 判断，坏 JSON 行得 NULL 而不是让写入 / 建索引失败。
+def _json_col(sql_type: str, path: str, default: str | None = None) -> str:
+    expr = f"CASE WHEN json_valid(payload_json) THEN json_extract(payload_json, '{path}') END"
+    if default is not None:
+        expr = f"COALESCE({expr}, {default})"
+    return f"{sql_type} GENERATED ALWAYS AS ({expr}) VIRTUAL"
+
+
+DENORMALIZED_COLUMNS: dict[str, dict[str, str]] = {
+    "memory_items": {
+        "content": _json_col("TEXT", "$.content"),
+        "confidence": _json_col("REAL", "$.confidence"),
+        "risk_tier": _json_col("TEXT", "$.risk_tier"),
+        "access_count": _json_col("INTEGER", "$.metadata.access_count", "0"),
+        "next_action_at": _json_col("TEXT", "$.next_action_at"),
+        "review_due_at": _json_col("TEXT", "$.review_due_at"),
+    },
+    "experience_records": {
+        # experience 无 content 字段，以 episode_summary 作为正文
+        "content": _json_col("TEXT", "$.episode_summary"),
+        "action_taken": _json_col("TEXT", "$.action_taken"),
+        "confidence": _json_col("REAL", "$.confidence"),
+        "risk_tier": _json_col("TEXT", "$.risk_tier"),
+        "access_count": _json_col("INTEGER", "$.metadata.access_count", "0"),
+        "next_action_at": _json_col("TEXT", "$.next_action_at"),
+        "review_due_at": _json_col("TEXT", "$.review_due_at"),
+    },
+}
+
+_DENORMALIZED_INDEXES = {
+    "status_next_action": "(status, next_action_at)",
+    "status_review_due": "(status, review_due_at)",
+    "status_access": "(status, access_count)",
+    "risk_tier": "(risk_tier)",
+    "confidence": "(confidence)",
+}
+
+
+def _table_columns(c: sqlite3.Connection, table: str) -> set[str]:
+    # table_xinfo 才会列出生成列（table_info 不含）
+    rows = c.execute(f"PRAGMA table_xinfo({table})").fetchall()
+    return {str(r[1]) for r in rows}
+
+
+def _ensure_denormalized_columns(c: sqlite3.Connection):
+    """迁移：为已有库补齐反范式生成列与索引（幂等）；早期未做 json_valid 保护的生成列会被重建。"""
+    for table, columns in DENORMALIZED_COLUMNS.items():
+        existing = _table_columns(c, table)
+        table_sql = str(c.execute("SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()[0])
+        stale = [n for n, ddl in columns.items() if n in existing and ddl not in table_sql]
+        if stale:
+            for suffix in _DENORMALIZED_INDEXES:
+                c.execute(f"DROP INDEX IF EXISTS idx_{table}_{suffix}")
+            for name in stale:
+                c.execute(f"ALTER TABLE {table} DROP COLUMN {name}")
+                existing.discard(name)
+        for name, ddl in columns.items():
+            if name not in existing:
+                c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+        for suffix, cols in _DENORMALIZED_INDEXES.items():
+            c.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table}{cols}")
+
+
+def ensure_generation_triggers(c: sqlite3.Connection, table: str):
+    """为 table 建立写代数：任何 INSERT/UPDATE/DELETE 都会使 table_generations 中对应代数 +1。"""
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS table_generations (
+            table_name TEXT PRIMARY KEY,
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    c.execute("INSERT OR IGNORE INTO table_generations(table_name, generation) VALUES (?, 0)", (table,))
+    for op in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_gen_{op.lower()} AFTER {op} ON {table}
+            BEGIN
+                UPDATE table_generations SET generation = generation + 1 WHERE table_name = '{table}';
+            END
+            """
+        )
+
+
 def init_db(c: sqlite3.Connection):
     c.executescript(
         """
@@ -68,13 +156,19 @@ def init_db(c: sqlite3.Connection):
         CREATE INDEX IF NOT EXISTS idx_memory_items_status ON memory_items(status);
         CREATE INDEX IF NOT EXISTS idx_experience_records_status ON experience_records(status);
         CREATE INDEX IF NOT EXISTS idx_audit_events_ts ON audit_events(timestamp DESC);
+        -- keyset 分页：ORDER BY updated_at DESC, id DESC
+        CREATE INDEX IF NOT EXISTS idx_memory_items_updated_id ON memory_items(updated_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS idx_experience_records_updated_id ON experience_records(updated_at DESC, id DESC);
         """
     )
+    # 写代数：供 recall 缓存跨进程失效（retain / TTL prune / temporal governance 均覆盖）
+    for table in ("memory_items", "experience_records"):
+        ensure_generation_triggers(c, table)
+    _ensure_denormalized_columns(c)
     c.commit()
 
 
-def write_audit_event(
-    c: sqlite3.Connection,
+def _audit_event_row(
     *,
     event_type: str,
     actor_type: str,
@@ -87,7 +181,7 @@ def write_audit_event(
     evidence_refs: list[str],
     correlation_id: str | None = None,
     metadata: dict | None = None,
-):
+) -> tuple:
     ts = now_iso()
     event_id = f"aud_{uuid.uuid4().hex[:12]}"
     payload = {
@@ -112,13 +206,44 @@ def write_audit_event(
     except SchemaValidationError as e:
         raise ValueError(f"audit event schema validation failed: {e}") from e
 
-    c.execute(
-        """
-        INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (event_id, event_type, object_type, object_id, correlation_id, ts, json.dumps(payload, ensure_ascii=False)),
+    return (event_id, event_type, object_type, object_id, correlation_id, ts, json.dumps(payload, ensure_ascii=False))
+
+
+_INSERT_AUDIT_SQL = """
+    INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def write_audit_event(
+    c: sqlite3.Connection,
+    *,
+    event_type: str,
+    actor_type: str,
+    actor_id: str,
+    object_type: str,
+    object_id: str,
+    before: dict,
+    after: dict,
+    reason: str,
+    evidence_refs: list[str],
+    correlation_id: str | None = None,
+    metadata: dict | None = None,
+):
+    row = _audit_event_row(
+        event_type=event_type,
+        actor_type=actor_type,
+        actor_id=actor_id,
+        object_type=object_type,
+        object_id=object_id,
+        before=before,
+        after=after,
+        reason=reason,
+        evidence_refs=evidence_refs,
+        correlation_id=correlation_id,
+        metadata=metadata,
     )
+    c.execute(_INSERT_AUDIT_SQL, row)
 
 
 def _coerce_scalar(raw: str):
@@ -263,6 +388,70 @@ def ingest_memory(c: sqlite3.Connection, memory_payload: dict, actor_id: str = "
     return {"memory_id": mem_id, "status": status}
 
 
+# SQLite 默认 SQLITE_MAX_VARIABLE_NUMBER 为 999，IN 查询按此分块
+_IN_CHUNK = 500
+
+
+def ingest_memory_many(c: sqlite3.Connection, memory_payloads: list[dict], actor_id: str = "mk-me-pipeline") -> dict:
+    """批量 ingest：整批校验、插入、审计，在同一事务内提交。
+
+    任一条校验失败或 id 冲突则整批回滚（all-or-nothing），错误信息带上批内序号。
+    """
+    if not memory_payloads:
+        return {"count": 0, "memory_ids": []}
+
+    seen: set[str] = set()
+    for i, payload in enumerate(memory_payloads):
+        try:
+            validate_payload("memory.schema.json", payload)
+        except SchemaValidationError as e:
+            raise ValueError(f"item[{i}] memory schema validation failed: {e}") from e
+        mem_id = payload["id"]
+        if mem_id in seen:
+            raise ValueError(f"item[{i}] duplicate memory id in batch: {mem_id}")
+        seen.add(mem_id)
+
+    ids = [p["id"] for p in memory_payloads]
+    for start in range(0, len(ids), _IN_CHUNK):
+        chunk = ids[start : start + _IN_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        row = c.execute(f"SELECT id FROM memory_items WHERE id IN ({marks}) LIMIT 1", chunk).fetchone()
+        if row:
+            raise ValueError(f"memory already exists: {row['id']}")
+
+    t = now_iso()
+    memory_rows = []
+    audit_rows = []
+    for payload in memory_payloads:
+        memory_rows.append((payload["id"], payload["status"], json.dumps(payload, ensure_ascii=False), t, t))
+        audit_rows.append(
+            _audit_event_row(
+                event_type="state_transition",
+                actor_type="system",
+                actor_id=actor_id,
+                object_type="memory",
+                object_id=payload["id"],
+                before={"status": None},
+                after={"status": payload["status"]},
+                reason="Memory ingested into v0.1 pipeline.",
+                evidence_refs=payload.get("evidence_refs", []),
+            )
+        )
+
+    try:
+        c.executemany(
+            "INSERT INTO memory_items(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            memory_rows,
+        )
+        c.executemany(_INSERT_AUDIT_SQL, audit_rows)
+        c.commit()
+    except Exception:
+        c.rollback()
+        raise
+
+    return {"count": len(ids), "memory_ids": ids}
+
+
 def memory_to_experience(
     c: sqlite3.Connection,
     memory_id: str,
@@ -432,8 +621,11 @@ def _update_opinions_auto(
         pass
 
 
+ITEM_TABLES = {"memory_items", "experience_records"}
+
+
 def list_items(c: sqlite3.Connection, table: str, limit: int = 20):
-    if table not in {"memory_items", "experience_records"}:
+    if table not in ITEM_TABLES:
         raise ValueError("invalid table")
     rows = c.execute(
         f"SELECT id, status, updated_at FROM {table} ORDER BY updated_at DESC LIMIT ?",
@@ -442,6 +634,76 @@ def list_items(c: sqlite3.Connection, table: str, limit: int = 20):
     return [dict(r) for r in rows]
 
 
+def encode_cursor(updated_at: str, item_id: str) -> str:
+    raw = json.dumps([updated_at, item_id], ensure_ascii=False, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, item_id = json.loads(raw)
+        return str(updated_at), str(item_id)
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+
+
+def list_items_page(
+    c: sqlite3.Connection,
+    table: str,
+    limit: int = 20,
+    cursor: str | None = None,
+    include_payload: bool = False,
+    fields: tuple[str, ...] = (),
+) -> dict:
+    """Keyset 分页：按 (updated_at, id) 降序，cursor 为上一页最后一行的位置。
+
+    fields 可附带反范式列（见 DENORMALIZED_COLUMNS）或原始 payload_json 字符串。
+    返回 {"items": [...], "next_cursor": str | None}；next_cursor 为 None 表示已到末页。
+    """
+    if table not in ITEM_TABLES:
+        raise ValueError("invalid table")
+    allowed = set(DENORMALIZED_COLUMNS[table]) | {"payload_json"}
+    bad = [f for f in fields if f not in allowed]
+    if bad:
+        raise ValueError(f"invalid fields for {table}: {bad}")
+    limit = max(1, int(limit))
+    extra = [f for f in fields if f != "payload_json"]
+    if include_payload or "payload_json" in fields:
+        extra.append("payload_json")
+    cols = ", ".join(["id", "status", "updated_at", *extra])
+
+    if cursor:
+        updated_at, item_id = decode_cursor(cursor)
+        rows = c.execute(
+            f"SELECT {cols} FROM {table} WHERE (updated_at, id) < (?, ?) "
+            "ORDER BY updated_at DESC, id DESC LIMIT ?",
+            (updated_at, item_id, limit + 1),
+        ).fetchall()
+    else:
+        rows = c.execute(
+            f"SELECT {cols} FROM {table} ORDER BY updated_at DESC, id DESC LIMIT ?",
+            (limit + 1,),
+        ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = []
+    for r in rows:
+        item = {"id": r["id"], "status": r["status"], "updated_at": r["updated_at"]}
+        for f in fields:
+            item[f] = r[f]
+        if include_payload:
+            try:
+                item["payload"] = json.loads(r["payload_json"])
+            except json.JSONDecodeError:
+                item["payload"] = {}
+        items.append(item)
+
+    next_cursor = encode_cursor(rows[-1]["updated_at"], rows[-1]["id"]) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
 def list_audits(c: sqlite3.Connection, limit: int = 20):
     rows = c.execute(
         "SELECT payload_json FROM audit_events ORDER BY timestamp DESC LIMIT ?",
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import hashlib
 import json
+import os
 import sqlite3
 import sys
 import uuid
@@ -152,11 +153,52 @@ def init_db(c: sqlite3.Connection):
 
         CREATE INDEX IF NOT EXISTS idx_audit_events_ts
         ON audit_events(timestamp DESC);
+
+        CREATE INDEX IF NOT EXISTS idx_pcq_status_updated
+        ON persona_confirmation_events(status, updated_at DESC);
         """
     )
+    _ensure_next_deadline(c)
     c.commit()
 
 
+def _ensure_next_deadline(c: sqlite3.Connection):
+    """
+    next_deadline_at：未关闭事件 = deadline_at，关闭后为 NULL。
+    部分索引只覆盖未关闭事件，timeout 扫描与"下一个截止时间"查询只触及待超时的行。
+    由触发器维护，其他写入方直接改 status/deadline_at 也能保持一致。
+    """
+    cols = {r[1] for r in c.execute("PRAGMA table_xinfo(persona_confirmation_events)").fetchall()}
+    if "next_deadline_at" not in cols:
+        c.execute("ALTER TABLE persona_confirmation_events ADD COLUMN next_deadline_at TEXT")
+        c.execute(
+            "UPDATE persona_confirmation_events SET next_deadline_at = deadline_at WHERE status != 'closed'"
+        )
+    c.executescript(
+        """
+        CREATE INDEX IF NOT EXISTS idx_pcq_next_deadline
+        ON persona_confirmation_events(next_deadline_at)
+        WHERE next_deadline_at IS NOT NULL;
+
+        CREATE TRIGGER IF NOT EXISTS trg_pcq_next_deadline_insert
+        AFTER INSERT ON persona_confirmation_events
+        BEGIN
+            UPDATE persona_confirmation_events
+            SET next_deadline_at = CASE WHEN NEW.status = 'closed' THEN NULL ELSE NEW.deadline_at END
+            WHERE event_id = NEW.event_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_pcq_next_deadline_update
+        AFTER UPDATE OF status, deadline_at ON persona_confirmation_events
+        BEGIN
+            UPDATE persona_confirmation_events
+            SET next_deadline_at = CASE WHEN NEW.status = 'closed' THEN NULL ELSE NEW.deadline_at END
+            WHERE event_id = NEW.event_id;
+        END;
+        """
+    )
+
+
 def _event_id(job_id: str, proposal_id: str, conflict_type: str) -> str:
     h = hashlib.sha1(f"{job_id}|{proposal_id}|{conflict_type}".encode("utf-8")).hexdigest()[:12]
     return f"pcq_{h}"
@@ -170,8 +212,17 @@ def _from_json(v: str):
     return json.loads(v) if v else []
 
 
-def write_audit_event(
-    c: sqlite3.Connection,
+_AUDIT_INSERT_SQL = """
+INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_DECISION_TRACE_INSERT_SQL = (
+    "INSERT INTO decision_traces(id, final_outcome, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)"
+)
+
+
+def _audit_event_row(
     *,
     event_type: str,
     actor_type: str,
@@ -215,35 +266,34 @@ def write_audit_event(
     except SchemaValidationError as e:
         raise ValueError(f"audit event schema validation failed: {e}") from e
 
-    c.execute(
-        """
-        INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            event_id,
-            event_type,
-            object_type,
-            object_id,
-            correlation_id,
-            ts,
-            json.dumps(payload, ensure_ascii=False),
-        ),
+    return (
+        event_id,
+        event_type,
+        object_type,
+        object_id,
+        correlation_id,
+        ts,
+        json.dumps(payload, ensure_ascii=False),
     )
 
 
-def write_decision_trace(c: sqlite3.Connection, payload: dict) -> str:
+def write_audit_event(c: sqlite3.Connection, **kwargs):
+    c.execute(_AUDIT_INSERT_SQL, _audit_event_row(**kwargs))
+
+
+def _decision_trace_row(payload: dict) -> tuple:
     validate_payload("decision-trace.schema.json", payload)
-    c.execute(
-        "INSERT INTO decision_traces(id, final_outcome, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
-        (
-            payload["id"],
-            payload["final_outcome"],
-            json.dumps(payload, ensure_ascii=False),
-            payload["created_at"],
-            payload["updated_at"],
-        ),
+    return (
+        payload["id"],
+        payload["final_outcome"],
+        json.dumps(payload, ensure_ascii=False),
+        payload["created_at"],
+        payload["updated_at"],
     )
+
+
+def write_decision_trace(c: sqlite3.Connection, payload: dict) -> str:
+    c.execute(_DECISION_TRACE_INSERT_SQL, _decision_trace_row(payload))
     return payload["id"]
 
 
@@ -550,33 +600,52 @@ def timeout_scan(c: sqlite3.Connection, now: str | None = None, limit: int = 200
     if limit < 1:
         raise ValueError("limit must be >= 1")
 
+    # 走 idx_pcq_next_deadline 部分索引：只读取已到期的未关闭事件
     rows = c.execute(
         """
         SELECT event_id, fallback_policy
         FROM persona_confirmation_events
-        WHERE status IN ('open','notified','awaiting_human') AND deadline_at <= ?
-        ORDER BY deadline_at ASC
+        WHERE next_deadline_at IS NOT NULL AND next_deadline_at <= ?
+        ORDER BY next_deadline_at ASC
         LIMIT ?
         """,
         (now_v, limit),
     ).fetchall()
 
-    ids = []
-    for r in rows:
-        event_id = r["event_id"]
-        fallback = r["fallback_policy"]
-        c.execute(
-            """
-            UPDATE persona_confirmation_events
-            SET status='closed', decision='timeout', decision_reason=?, resolved_at=?, updated_at=?
-            WHERE event_id=?
-            """,
-            (f"timeout:{fallback}", now_v, now_v, event_id),
-        )
-        ids.append(event_id)
+    ids = [r["event_id"] for r in rows]
+    c.executemany(
+        """
+        UPDATE persona_confirmation_events
+        SET status='closed', decision='timeout', decision_reason=?, resolved_at=?, updated_at=?
+        WHERE event_id=?
+        """,
+        [(f"timeout:{r['fallback_policy']}", now_v, now_v, r["event_id"]) for r in rows],
+    )
 
     c.commit()
-    return {"ok": True, "timed_out": len(ids), "event_ids": ids, "now": now_v}
+    return {
+        "ok": True,
+        "timed_out": len(ids),
+        "event_ids": ids,
+        "now": now_v,
+        "next_deadline_at": next_deadline_at(c),
+    }
+
+
+def next_deadline_at(c: sqlite3.Connection) -> str | None:
+    """最早的未关闭事件截止时间（部分索引上的 MIN，O(log n)）；无未关闭事件时为 None。"""
+    row = c.execute(
+        "SELECT MIN(next_deadline_at) FROM persona_confirmation_events WHERE next_deadline_at IS NOT NULL"
+    ).fetchone()
+    return row[0] if row else None
+
+
+def seconds_until_next_deadline(c: sqlite3.Connection, now: str | None = None) -> float | None:
+    """距最早截止时间的秒数（已到期为 0）；无未关闭事件时为 None。"""
+    nd = next_deadline_at(c)
+    if nd is None:
+        return None
+    return max(0.0, (parse_dt(nd) - parse_dt(now or now_iso())).total_seconds())
 
 
 def build_ask_payload(c: sqlite3.Connection, event_id: str) -> dict:
@@ -701,13 +770,12 @@ def _within_workspace(path: Path, workspace: Path) -> bool:
         return False
 
 
-def _upsert_autogen_block(path: Path, title: str, block_lines: list[str]):
+def _render_autogen_block(content: str | None, title: str, block_lines: list[str]) -> str:
+    """在文档内容中替换/追加 AUTO-GENERATED 区块；content 为 None 表示文件尚不存在。"""
     auto_start = "<!-- AUTO-GENERATED:REFLECT:START -->"
     auto_end = "<!-- AUTO-GENERATED:REFLECT:END -->"
 
-    if path.exists():
-        content = path.read_text(errors="ignore")
-    else:
+    if content is None:
         content = f"# {title}\n\n"
 
     block = "\n".join([auto_start, *block_lines, auto_end])
@@ -715,71 +783,89 @@ def _upsert_autogen_block(path: Path, title: str, block_lines: list[str]):
     if auto_start in content and auto_end in content:
         start = content.index(auto_start)
         end = content.index(auto_end) + len(auto_end)
-        new_content = content[:start] + block + content[end:]
-    else:
-        if not content.endswith("\n"):
-            content += "\n"
-        new_content = content + "\n" + block + "\n"
-
+        return content[:start] + block + content[end:]
+    if not content.endswith("\n"):
+        content += "\n"
+    return content + "\n" + block + "\n"
+
+
+def _apply_write(content: str | None, mode: str, payload: dict) -> str:
+    """在内存中对文件内容应用一次写入，返回新内容。"""
+    if mode == "autogen_block":
+        block_lines = payload.get("block_lines")
+        if not isinstance(block_lines, list):
+            raise ValueError("autogen_block requires payload.block_lines[]")
+        title = str(payload.get("title") or "Opinions")
+        return _render_autogen_block(content, title, [str(x) for x in block_lines])
+    new_content = payload.get("content")
+    if new_content is None:
+        raise ValueError("replace mode requires payload.content")
+    return str(new_content)
+
+
+def _atomic_write_text(path: Path, text: str):
+    """同目录临时文件写入后 rename 替换，读者不会看到写了一半的文件。"""
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(new_content)
-
-
-def _ledger_get(c: sqlite3.Connection, idempotency_key: str) -> dict | None:
-    row = c.execute(
-        "SELECT status, result_json FROM reflect_apply_ledger WHERE idempotency_key=?",
-        (idempotency_key,),
-    ).fetchone()
-    if not row:
-        return None
-    return {"status": row["status"], "result": json.loads(row["result_json"] or "{}")}
-
-
-def _ledger_put(
-    c: sqlite3.Connection,
-    *,
-    idempotency_key: str,
-    job_id: str,
-    proposal_id: str,
-    target_id: str,
-    status: str,
-    result: dict,
-):
-    t = now_iso()
-    c.execute(
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _ledger_get_many(c: sqlite3.Connection, idempotency_keys: list[str]) -> dict[str, dict]:
+    """一次查询预取整批 ledger 记录：{idempotency_key: {"status", "result"}}。"""
+    if not idempotency_keys:
+        return {}
+    rows = c.execute(
         """
-        INSERT INTO reflect_apply_ledger(
-            idempotency_key, job_id, proposal_id, target_id, status,
-            result_json, applied_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(idempotency_key) DO UPDATE SET
-            status=excluded.status,
-            result_json=excluded.result_json,
-            updated_at=excluded.updated_at
+        SELECT idempotency_key, status, result_json FROM reflect_apply_ledger
+        WHERE idempotency_key IN (SELECT value FROM json_each(?))
         """,
-        (
-            idempotency_key,
-            job_id,
-            proposal_id,
-            target_id,
-            status,
-            json.dumps(result, ensure_ascii=False),
-            t,
-            t,
-        ),
-    )
-    c.commit()
-
-
-def _create_compensation(
-    c: sqlite3.Connection,
-    *,
-    idempotency_key: str,
-    cand: dict,
-    res: dict,
-    note: str | None = None,
-) -> dict:
-    t = now_iso()
+        (json.dumps(list(idempotency_keys), ensure_ascii=False),),
+    ).fetchall()
+    return {r["idempotency_key"]: {"status": r["status"], "result": json.loads(r["result_json"] or "{}")} for r in rows}
+
+
+_LEDGER_UPSERT_SQL = """
+INSERT INTO reflect_apply_ledger(
+    idempotency_key, job_id, proposal_id, target_id, status,
+    result_json, applied_at, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(idempotency_key) DO UPDATE SET
+    status=excluded.status,
+    result_json=excluded.result_json,
+    updated_at=excluded.updated_at
+"""
+
+_COMPENSATION_UPSERT_SQL = """
+INSERT INTO reflect_apply_compensations(
+    compensation_id, idempotency_key, job_id, proposal_id, target_id,
+    failure_status, error, payload_json, status, note, created_at, updated_at
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)
+ON CONFLICT(idempotency_key) DO UPDATE SET
+    failure_status=excluded.failure_status,
+    error=excluded.error,
+    payload_json=excluded.payload_json,
+    status='pending',
+    note=excluded.note,
+    updated_at=excluded.updated_at
+"""
+
+# 需要人工补偿的结果状态 → 补偿说明
+_COMPENSATION_NOTES = {
+    "skipped_no_payload_path": "missing payload.path; manual fix required",
+    "failed_path_escape": "payload.path escaped workspace; blocked for safety",
+    "failed": "apply execution failed; manual compensation required",
+}
+
+
+def _compensation_row(*, idempotency_key: str, cand: dict, res: dict, note: str | None, ts: str) -> tuple:
     comp_id = f"cmp_{hashlib.sha1(idempotency_key.encode('utf-8')).hexdigest()[:12]}"
     payload = {
         "candidate": {
@@ -791,37 +877,19 @@ def _create_compensation(
         },
         "result": res,
     }
-
-    c.execute(
-        """
-        INSERT INTO reflect_apply_compensations(
-            compensation_id, idempotency_key, job_id, proposal_id, target_id,
-            failure_status, error, payload_json, status, note, created_at, updated_at
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'pending', ?, ?, ?)
-        ON CONFLICT(idempotency_key) DO UPDATE SET
-            failure_status=excluded.failure_status,
-            error=excluded.error,
-            payload_json=excluded.payload_json,
-            status='pending',
-            note=excluded.note,
-            updated_at=excluded.updated_at
-        """,
-        (
-            comp_id,
-            idempotency_key,
-            payload["candidate"]["job_id"],
-            payload["candidate"]["proposal_id"],
-            payload["candidate"]["target_id"],
-            str(res.get("status") or "failed"),
-            str(res.get("error") or ""),
-            json.dumps(payload, ensure_ascii=False),
-            note,
-            t,
-            t,
-        ),
+    return (
+        comp_id,
+        idempotency_key,
+        payload["candidate"]["job_id"],
+        payload["candidate"]["proposal_id"],
+        payload["candidate"]["target_id"],
+        str(res.get("status") or "failed"),
+        str(res.get("error") or ""),
+        json.dumps(payload, ensure_ascii=False),
+        note,
+        ts,
+        ts,
     )
-    c.commit()
-    return {"compensation_id": comp_id, "status": "pending"}
 
 
 def list_compensations(c: sqlite3.Connection, status: str | None = None, limit: int = 50) -> list[dict]:
@@ -868,16 +936,17 @@ def resolve_compensation(c: sqlite3.Connection, compensation_id: str, note: str
     return out
 
 
-def _record_apply_governance(c: sqlite3.Connection, cand: dict, res: dict) -> dict:
+def _apply_governance_rows(cand: dict, res: dict) -> tuple[tuple, tuple, dict]:
+    """构造一条 apply 结果的 decision trace 与 audit 行（均已做 schema 校验），返回 (trace 行, audit 行, 补全后的结果)。"""
     risk_tier = str(cand.get("risk_level") or "medium")
     if risk_tier not in {"low", "medium", "high"}:
         risk_tier = "medium"
 
     trace = build_apply_decision_trace(cand, status=str(res.get("status") or "unknown"), error=res.get("error"))
-    dt_id = write_decision_trace(c, trace)
+    trace_row = _decision_trace_row(trace)
+    dt_id = trace["id"]
 
-    write_audit_event(
-        c,
+    audit_row = _audit_event_row(
         event_type="decision_gate",
         actor_type="system",
         actor_id="reflect-apply-exec",
@@ -899,13 +968,16 @@ def _record_apply_governance(c: sqlite3.Connection, cand: dict, res: dict) -> di
             "target_id": str(cand.get("target_id") or cand.get("target_type") or ""),
         },
     )
-    c.commit()
 
     out = dict(res)
     out["decision_trace_id"] = dt_id
     out["decision_id"] = trace["decision_id"]
     out["final_outcome"] = trace["final_outcome"]
-    return out
+    return trace_row, audit_row, out
+
+
+def _base_result(meta: dict) -> dict:
+    return {"job_id": meta["job_id"], "proposal_id": meta["proposal_id"], "target_id": meta["target_id"]}
 
 
 def execute_apply_candidates(
@@ -915,8 +987,29 @@ def execute_apply_candidates(
     apply_candidates: list[dict],
     dry_run: bool = False,
 ) -> dict:
+    """
+    批量执行 apply candidates：
+    1. 一次查询预取全部 idempotency key 的 ledger 记录；同批重复的 key 只执行一次
+    2. 写文件按目标路径分组：同一文件在内存中依次应用全部变更，只读写一次（临时文件 + rename 原子替换）
+    3. decision trace / audit / compensation / ledger 以 executemany 在同一事务内写入
+    """
     workspace = workspace.expanduser().resolve()
-    results: list[dict] = []
+    n = len(apply_candidates)
+    results: list[dict | None] = [None] * n
+    metas: list[dict] = []
+    for cand in apply_candidates:
+        job_id = str(cand.get("job_id") or "job_unknown")
+        proposal_id = str(cand.get("proposal_id") or cand.get("id") or uuid.uuid4().hex)
+        target_id = str(cand.get("target_id") or cand.get("target_type") or "unknown_target")
+        metas.append(
+            {
+                "job_id": job_id,
+                "proposal_id": proposal_id,
+                "target_id": target_id,
+                "idem": f"{job_id}:{proposal_id}:{target_id}",
+            }
+        )
+    ledger = _ledger_get_many(c, [m["idem"] for m in metas])
 
     applied = 0
     deduped = 0
@@ -924,25 +1017,23 @@ def execute_apply_candidates(
     failed = 0
     compensation_created = 0
 
-    for cand in apply_candidates:
-        job_id = str(cand.get("job_id") or "job_unknown")
-        proposal_id = str(cand.get("proposal_id") or cand.get("id") or uuid.uuid4().hex)
-        target_id = str(cand.get("target_id") or cand.get("target_type") or "unknown_target")
-        idem = f"{job_id}:{proposal_id}:{target_id}"
+    first_of: dict[str, int] = {}
+    duplicates: list[tuple[int, int]] = []
+    writes: dict[Path, list[tuple[int, str, dict]]] = {}
 
-        existing = _ledger_get(c, idem)
+    for i, cand in enumerate(apply_candidates):
+        m = metas[i]
+        base = _base_result(m)
+
+        existing = ledger.get(m["idem"])
         if existing and existing.get("status") == "succeeded":
             deduped += 1
-            results.append(
-                {
-                    "job_id": job_id,
-                    "proposal_id": proposal_id,
-                    "target_id": target_id,
-                    "status": "deduplicated",
-                    "result": existing.get("result", {}),
-                }
-            )
+            results[i] = {**base, "status": "deduplicated", "result": existing.get("result", {})}
+            continue
+        if m["idem"] in first_of:
+            duplicates.append((i, first_of[m["idem"]]))
             continue
+        first_of[m["idem"]] = i
 
         payload = cand.get("payload") if isinstance(cand.get("payload"), dict) else {}
         op = str(cand.get("operation") or "upsert")
@@ -950,190 +1041,126 @@ def execute_apply_candidates(
 
         if op in {"delete", "merge_conflict"}:
             skipped += 1
-            res = {
-                "job_id": job_id,
-                "proposal_id": proposal_id,
-                "target_id": target_id,
-                "status": "blocked_operation",
-                "operation": op,
-            }
-            res = _record_apply_governance(c, cand, res)
-            _ledger_put(
-                c,
-                idempotency_key=idem,
-                job_id=job_id,
-                proposal_id=proposal_id,
-                target_id=target_id,
-                status="blocked_operation",
-                result=res,
-            )
-            results.append(res)
+            results[i] = {**base, "status": "blocked_operation", "operation": op}
             continue
 
         if not path_raw:
             skipped += 1
-            res = {
-                "job_id": job_id,
-                "proposal_id": proposal_id,
-                "target_id": target_id,
-                "status": "skipped_no_payload_path",
-            }
-            res = _record_apply_governance(c, cand, res)
-            comp = _create_compensation(
-                c,
-                idempotency_key=idem,
-                cand=cand,
-                res=res,
-                note="missing payload.path; manual fix required",
-            )
-            compensation_created += 1
-            res["compensation_id"] = comp["compensation_id"]
-            _ledger_put(
-                c,
-                idempotency_key=idem,
-                job_id=job_id,
-                proposal_id=proposal_id,
-                target_id=target_id,
-                status="skipped_no_payload_path",
-                result=res,
-            )
-            results.append(res)
+            results[i] = {**base, "status": "skipped_no_payload_path"}
             continue
 
         out_path = (workspace / str(path_raw)).resolve()
         if not _within_workspace(out_path, workspace):
             failed += 1
-            res = {
-                "job_id": job_id,
-                "proposal_id": proposal_id,
-                "target_id": target_id,
-                "status": "failed_path_escape",
-                "path": str(out_path),
-            }
-            res = _record_apply_governance(c, cand, res)
-            comp = _create_compensation(
-                c,
-                idempotency_key=idem,
-                cand=cand,
-                res=res,
-                note="payload.path escaped workspace; blocked for safety",
-            )
-            compensation_created += 1
-            res["compensation_id"] = comp["compensation_id"]
-            _ledger_put(
-                c,
-                idempotency_key=idem,
-                job_id=job_id,
-                proposal_id=proposal_id,
-                target_id=target_id,
-                status="failed_path_escape",
-                result=res,
-            )
-            results.append(res)
+            results[i] = {**base, "status": "failed_path_escape", "path": str(out_path)}
             continue
 
         mode = str(payload.get("write_mode") or "replace")
+        if dry_run:
+            skipped += 1
+            results[i] = {**base, "status": "dry_run", "path": str(out_path), "mode": mode}
+            continue
 
+        writes.setdefault(out_path, []).append((i, mode, payload))
+
+    # 按文件分组写入：每个文件读一次、写一次
+    for out_path, ops in writes.items():
+        ok: list[int] = []
         try:
-            if dry_run:
-                res = {
-                    "job_id": job_id,
-                    "proposal_id": proposal_id,
-                    "target_id": target_id,
-                    "status": "dry_run",
+            content = out_path.read_text(encoding="utf-8", errors="ignore") if out_path.exists() else None
+            for i, mode, payload in ops:
+                try:
+                    content = _apply_write(content, mode, payload)
+                    ok.append(i)
+                except Exception as e:
+                    results[i] = {**_base_result(metas[i]), "status": "failed", "error": str(e)}
+            if ok:
+                _atomic_write_text(out_path, content)
+        except Exception as e:
+            # 读/写文件失败：本组尚无结果的条目全部失败
+            for i, _, _ in ops:
+                if results[i] is None:
+                    results[i] = {**_base_result(metas[i]), "status": "failed", "error": str(e)}
+            ok = []
+        for i, mode, _ in ops:
+            if i in ok:
+                applied += 1
+                results[i] = {
+                    **_base_result(metas[i]),
+                    "status": "succeeded",
                     "path": str(out_path),
                     "mode": mode,
+                    "apply_reason": apply_candidates[i].get("apply_reason"),
                 }
-                res = _record_apply_governance(c, cand, res)
-                _ledger_put(
-                    c,
-                    idempotency_key=idem,
-                    job_id=job_id,
-                    proposal_id=proposal_id,
-                    target_id=target_id,
-                    status="dry_run",
-                    result=res,
-                )
-                results.append(res)
-                skipped += 1
-                continue
-
-            if mode == "autogen_block":
-                block_lines = payload.get("block_lines")
-                if not isinstance(block_lines, list):
-                    raise ValueError("autogen_block requires payload.block_lines[]")
-                title = str(payload.get("title") or "Opinions")
-                _upsert_autogen_block(out_path, title, [str(x) for x in block_lines])
             else:
-                content = payload.get("content")
-                if content is None:
-                    raise ValueError("replace mode requires payload.content")
-                out_path.parent.mkdir(parents=True, exist_ok=True)
-                out_path.write_text(str(content))
+                failed += 1
 
-            res = {
-                "job_id": job_id,
-                "proposal_id": proposal_id,
-                "target_id": target_id,
-                "status": "succeeded",
-                "path": str(out_path),
-                "mode": mode,
-                "apply_reason": cand.get("apply_reason"),
-            }
-            res = _record_apply_governance(c, cand, res)
-            _ledger_put(
-                c,
-                idempotency_key=idem,
-                job_id=job_id,
-                proposal_id=proposal_id,
-                target_id=target_id,
-                status="succeeded",
-                result=res,
-            )
-            results.append(res)
-            applied += 1
-        except Exception as e:
-            failed += 1
-            res = {
-                "job_id": job_id,
-                "proposal_id": proposal_id,
-                "target_id": target_id,
-                "status": "failed",
-                "error": str(e),
-            }
-            try:
-                res = _record_apply_governance(c, cand, res)
-            except Exception as gerr:
-                res["governance_error"] = str(gerr)
-            comp = _create_compensation(
-                c,
-                idempotency_key=idem,
-                cand=cand,
-                res=res,
-                note="apply execution failed; manual compensation required",
+    # 治理记录：整批同一事务
+    ts = now_iso()
+    trace_rows: list[tuple] = []
+    audit_rows: list[tuple] = []
+    compensation_rows: list[tuple] = []
+    ledger_rows: list[tuple] = []
+    for i, cand in enumerate(apply_candidates):
+        res = results[i]
+        if res is None or res["status"] == "deduplicated":
+            continue
+        status = res["status"]
+        try:
+            trace_row, audit_row, res = _apply_governance_rows(cand, res)
+            trace_rows.append(trace_row)
+            audit_rows.append(audit_row)
+        except Exception as gerr:
+            res = {**res, "governance_error": str(gerr)}
+        if status in _COMPENSATION_NOTES:
+            comp_row = _compensation_row(
+                idempotency_key=metas[i]["idem"], cand=cand, res=res, note=_COMPENSATION_NOTES[status], ts=ts
             )
+            compensation_rows.append(comp_row)
             compensation_created += 1
-            res["compensation_id"] = comp["compensation_id"]
-            _ledger_put(
-                c,
-                idempotency_key=idem,
-                job_id=job_id,
-                proposal_id=proposal_id,
-                target_id=target_id,
-                status="failed",
-                result=res,
+            res["compensation_id"] = comp_row[0]
+        m = metas[i]
+        ledger_rows.append(
+            (
+                m["idem"],
+                m["job_id"],
+                m["proposal_id"],
+                m["target_id"],
+                status,
+                json.dumps(res, ensure_ascii=False),
+                ts,
+                ts,
             )
-            results.append(res)
+        )
+        results[i] = res
+
+    try:
+        c.executemany(_DECISION_TRACE_INSERT_SQL, trace_rows)
+        c.executemany(_AUDIT_INSERT_SQL, audit_rows)
+        c.executemany(_COMPENSATION_UPSERT_SQL, compensation_rows)
+        c.executemany(_LEDGER_UPSERT_SQL, ledger_rows)
+        c.commit()
+    except Exception:
+        c.rollback()
+        raise
+
+    # 同批重复的 idempotency key：沿用首条的执行结果
+    for i, first in duplicates:
+        deduped += 1
+        results[i] = {**_base_result(metas[i]), "status": "deduplicated", "result": results[first]}
 
     return {
         "ok": True,
         "workspace": str(workspace),
-        "total": len(apply_candidates),
+        "total": n,
         "applied": applied,
         "deduplicated": deduped,
         "skipped": skipped,
         "failed": failed,
         "compensation_created": compensation_created,
+        "files_written": sum(
+            1 for ops in writes.values() if any(results[i]["status"] == "succeeded" for i, _, _ in ops)
+        ),
         "results": results,
     }
 
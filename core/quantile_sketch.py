@@ -0,0 +1,243 @@
+"""
+Quantile Sketch — 可合并的分位数草图（合并式 t-digest，k1 尺度函数）
+
+- add() 先写缓冲区，满后批量压缩，均摊 O(1)；内存只与 compression 相关
+- merge() 合并另一个草图（跨天 / 跨进程汇总），to_dict() / from_dict() 可 JSON 落盘
+- 质心都是单点（小样本）时 quantile() 与按秩线性插值的精确分位数一致
+- update() 批量写入；装了 NumPy 时用它做类型转换与排序，结果与纯 Python 路径相同
+
+持久化：`metric_sketches(metric, day)` 每个指标每个 UTC 自然日一行。record_sketch() 在写事务内
+读出当日草图、合并、写回，多个 worker 进程并发上报不会互相覆盖；load_sketch() 合并区间内各天。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from datetime import date, datetime, timezone
+from typing import Iterable, Optional
+
+try:
+    import numpy as _np
+except ImportError:  # 可选依赖
+    _np = None
+
+DEFAULT_COMPRESSION = 100.0
+
+
+class TDigest:
+    __slots__ = ("compression", "count", "min", "max", "_centroids", "_buffer", "_buffer_limit")
+
+    def __init__(self, compression: float = DEFAULT_COMPRESSION):
+        self.compression = float(compression)
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._centroids: list[tuple[float, float]] = []  # (mean, weight)，按 mean 升序
+        self._buffer: list[tuple[float, float]] = []
+        self._buffer_limit = max(32, int(5 * self.compression))
+
+    def add(self, x: float, w: float = 1.0):
+        x = float(x)
+        if w <= 0 or math.isnan(x):
+            return
+        self._buffer.append((x, float(w)))
+        self.count += w
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def update(self, values: Iterable[float]):
+        if _np is not None:
+            arr = _np.asarray(list(values) if not hasattr(values, "__len__") else values, dtype=float).ravel()
+            arr = _np.sort(arr[~_np.isnan(arr)])
+            self._ingest_sorted(arr.tolist())
+        else:
+            self._ingest_sorted(sorted(x for x in map(float, values) if not math.isnan(x)))
+
+    def _ingest_sorted(self, vals: list[float]):
+        if not vals:
+            return
+        self.count += len(vals)
+        self.min = min(self.min, vals[0])
+        self.max = max(self.max, vals[-1])
+        self._buffer.extend((v, 1.0) for v in vals)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> "TDigest":
+        if other.count <= 0:
+            return self
+        self._buffer.extend(other._centroids)
+        self._buffer.extend(other._buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(self._buffer) >= self._buffer_limit:
+            self._compress()
+        return self
+
+    def _q_limit(self, q0: float) -> float:
+        """k1(q) = δ/2π·asin(2q-1)：从 q0 出发 k 增加 1 所能到达的分位上限"""
+        k = self.compression / (2 * math.pi) * math.asin(2 * q0 - 1) + 1
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(self._centroids + self._buffer)
+        total = self.count
+        out: list[tuple[float, float]] = []
+        cur_m, cur_w = items[0]
+        done = 0.0
+        limit = self._q_limit(0.0)
+        for m, w in items[1:]:
+            if (done + cur_w + w) / total <= limit:
+                cur_w += w
+                cur_m += (m - cur_m) * w / cur_w
+            else:
+                out.append((cur_m, cur_w))
+                done += cur_w
+                limit = self._q_limit(min(1.0, done / total))
+                cur_m, cur_w = m, w
+        out.append((cur_m, cur_w))
+        self._centroids = out
+        self._buffer = []
+
+    def quantile(self, q: float) -> float:
+        """q ∈ [0, 1]；按秩 r = q·(n-1) 在质心中心之间线性插值，两端以 min / max 为锚点"""
+        self._compress()
+        if not self._centroids:
+            return 0.0
+        last = self.count - 1
+        r = min(max(float(q), 0.0), 1.0) * last
+        cum = 0.0
+        prev_c, prev_m = 0.0, self.min
+        for m, w in self._centroids:
+            c = cum + w / 2 - 0.5
+            if r <= c:
+                if c <= prev_c:
+                    return m
+                return prev_m + (m - prev_m) * (r - prev_c) / (c - prev_c)
+            prev_c, prev_m = c, m
+            cum += w
+        if last <= prev_c:
+            return prev_m
+        return prev_m + (self.max - prev_m) * (r - prev_c) / (last - prev_c)
+
+    def percentile(self, p: float) -> float:
+        return self.quantile(p / 100.0)
+
+    def summary(self, percentiles: Iterable[float] = (50, 95), ndigits: int = 3) -> dict:
+        """{"count", "p50", "p95", ..., "max"}，报告输出用"""
+        out: dict = {"count": int(self.count)}
+        for p in percentiles:
+            out[f"p{p:g}"] = round(self.percentile(p), ndigits) if self.count else 0.0
+        out["max"] = round(self.max, ndigits) if self.count else 0.0
+        return out
+
+    def centroid_count(self) -> int:
+        self._compress()
+        return len(self._centroids)
+
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "centroids": [[m, w] for m, w in self._centroids],
+        }
+
+    @classmethod
+    def from_dict(cls, d: Optional[dict]) -> "TDigest":
+        d = d or {}
+        td = cls(d.get("compression") or DEFAULT_COMPRESSION)
+        centroids = [(float(m), float(w)) for m, w in d.get("centroids") or []]
+        if centroids:
+            td._centroids = sorted(centroids)
+            td.count = sum(w for _, w in centroids)
+            td.min = float(d["min"]) if d.get("min") is not None else centroids[0][0]
+            td.max = float(d["max"]) if d.get("max") is not None else centroids[-1][0]
+        return td
+
+
+def init_sketch_db(c: sqlite3.Connection):
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS metric_sketches (
+            metric       TEXT NOT NULL,
+            day          TEXT NOT NULL,
+            payload_json TEXT NOT NULL,
+            updated_at   TEXT NOT NULL,
+            PRIMARY KEY (metric, day)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+def _utc_day(at: Optional[datetime]) -> str:
+    return (at or datetime.now(timezone.utc)).astimezone(timezone.utc).date().isoformat()
+
+
+def record_sketch(c: sqlite3.Connection, metric: str, td: TDigest, at: Optional[datetime] = None):
+    """把 td 合并进 (metric, at 所在 UTC 日) 的持久化草图；调用方已在事务中则直接并入，否则自开写事务"""
+    if not td.count:
+        return
+    day = _utc_day(at)
+    now = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+    def write():
+        init_sketch_db(c)
+        row = c.execute("SELECT payload_json FROM metric_sketches WHERE metric = ? AND day = ?", (metric, day)).fetchone()
+        merged = TDigest.from_dict(json.loads(row[0])) if row else TDigest(td.compression)
+        merged.merge(td)
+        c.execute(
+            """
+            INSERT INTO metric_sketches(metric, day, payload_json, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(metric, day) DO UPDATE SET payload_json = excluded.payload_json, updated_at = excluded.updated_at
+            """,
+            (metric, day, json.dumps(merged.to_dict()), now),
+        )
+
+    if c.in_transaction:
+        write()
+        return
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        write()
+    except BaseException:
+        c.rollback()
+        raise
+    c.commit()
+
+
+def record_samples(c: sqlite3.Connection, metric: str, values: Iterable[float], at: Optional[datetime] = None):
+    td = TDigest()
+    td.update(values)
+    record_sketch(c, metric, td, at)
+
+
+def load_sketch(
+    c: sqlite3.Connection, metric: str, since: Optional[date] = None, until: Optional[date] = None
+) -> TDigest:
+    """合并 [since, until]（UTC 日，含两端）内的草图；表不存在时返回空草图"""
+    sql = "SELECT payload_json FROM metric_sketches WHERE metric = ?"
+    params: list = [metric]
+    if since is not None:
+        sql += " AND day >= ?"
+        params.append(since.isoformat())
+    if until is not None:
+        sql += " AND day <= ?"
+        params.append(until.isoformat())
+    out = TDigest()
+    try:
+        rows = c.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        return out
+    for row in rows:
+        out.merge(TDigest.from_dict(json.loads(row[0])))
+    return out
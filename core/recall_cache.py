@@ -0,0 +1,142 @@
+"""
+Recall Cache — recall 结果的进程内缓存
+
+同一批 recall 查询（REST /recall、MCP recall、dreaming 预处理摘要）会被 agent 高频重复调用。
+本模块提供：
+- key：(query 小写, table, top_k, filters)
+- TTL 过期 + 容量上限 LRU 淘汰
+- 写代数失效：每个 entry 记录写入时 `table_generations` 的代数，
+  代数变化（任何进程对 memory_items / experience_records 的写入，由 init_db 建立的触发器维护）即视为失效
+- hit/miss 等计数，供 /health 暴露
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+DEFAULT_TTL_SEC = 30.0
+DEFAULT_MAX_ENTRIES = 256
+
+
+def normalize_query(query: str | None) -> str:
+    # 只做 lower()，与 recall 的子串匹配（q.lower() in content.lower()）保持同一语义；
+    # 折叠 / 去除空白会让结果不同的查询共用一个 entry
+    return str(query or "").lower()
+
+
+def make_key(query: str | None, table: str, top_k: int, filters: dict | None = None) -> str:
+    return json.dumps(
+        [normalize_query(query), table, int(top_k), filters or {}],
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+
+
+def current_generation(c: sqlite3.Connection, table: str) -> int | None:
+    """读取表的写代数；库未经 init_db 初始化（无代数表）时返回 None，调用方应绕过缓存。"""
+    try:
+        row = c.execute("SELECT generation FROM table_generations WHERE table_name=?", (table,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return int(row[0]) if row else None
+
+
+class RecallCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_sec: float = DEFAULT_TTL_SEC):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_sec = float(ttl_sec)
+        self._entries: OrderedDict[str, tuple[int, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+        self.evicted = 0
+
+    def get(self, key: str, generation: int) -> tuple[bool, Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            gen, expires_at, value = entry
+            if gen != generation:
+                del self._entries[key]
+                self.invalidated += 1
+                self.misses += 1
+                return False, None
+            if now >= expires_at:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: str, generation: int, value: Any):
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl_sec, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evicted += 1
+
+    def get_or_compute(
+        self,
+        c: sqlite3.Connection,
+        *,
+        query: str | None,
+        table: str,
+        top_k: int,
+        compute: Callable[[], Any],
+        filters: dict | None = None,
+    ) -> Any:
+        """命中则返回缓存值，否则调用 compute() 并写入缓存。
+
+        代数在 compute 之前读取：若 compute 期间有并发写入，结果以旧代数入缓存，下次读取即失效。
+        """
+        generation = current_generation(c, table)
+        if generation is None:
+            with self._lock:
+                self.misses += 1
+            return compute()
+
+        key = make_key(query, table, top_k, filters)
+        hit, value = self.get(key, generation)
+        if hit:
+            return value
+        value = compute()
+        self.put(key, generation, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expired": self.expired,
+                "invalidated": self.invalidated,
+                "evicted": self.evicted,
+            }
+
+
+# 进程级共享实例（API server / MCP server / dreaming 各自进程内复用）
+RECALL_CACHE = RecallCache()
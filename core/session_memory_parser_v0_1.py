@@ -9,6 +9,9 @@ import re
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Iterator
+
+from core.transcript_reader import TranscriptCheckpoints, TranscriptLine
 
 DEFAULT_SESSIONS_DIR = Path("~/.openclaw/agents/main/sessions").expanduser()
 
@@ -155,7 +158,8 @@ def resolve_session_file(session_file: str | None, sessions_dir: Path, session_i
 
 def parse_session_id(session_file: Path) -> str:
     try:
-        first = json.loads(session_file.read_text(errors="ignore").splitlines()[0])
+        with session_file.open(errors="ignore") as f:
+            first = json.loads(f.readline())
         if first.get("type") == "session" and first.get("id"):
             return str(first["id"])
     except Exception:
@@ -254,7 +258,24 @@ def extract_tool_call_events(session_id: str, msg_id: str, ts: str | None, line_
     return events
 
 
-def parse_session(session_file: Path, include_tool_calls: bool, max_events: int) -> dict:
+def _iter_lines(session_file: Path) -> Iterator[TranscriptLine]:
+    offset = 0
+    with session_file.open("rb") as f:
+        for line_no, raw in enumerate(f, start=1):
+            start, offset = offset, offset + len(raw)
+            yield TranscriptLine(line_no, start, offset, raw.decode("utf-8", errors="replace"))
+
+
+def parse_session(
+    session_file: Path,
+    include_tool_calls: bool,
+    max_events: int,
+    checkpoint_path: Path | None = None,
+) -> dict:
+    """
+    checkpoint_path 给定时按 (inode, offset) 检查点只解析上次之后追加的完整行，并把进度写回检查点；
+    文件轮转或截断时自动从头解析。
+    """
     if not session_file.exists():
         raise SystemExit(f"session file not found: {session_file}")
 
@@ -262,66 +283,76 @@ def parse_session(session_file: Path, include_tool_calls: bool, max_events: int)
     events: list[dict] = []
     seen_keys = set()
 
-    with session_file.open() as f:
-        for line_no, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-
-            if obj.get("type") != "message":
-                continue
-
-            message = obj.get("message", {})
-            role = message.get("role")
-            msg_id = obj.get("id") or f"line{line_no}"
-            ts = obj.get("timestamp")
-            content_items = message.get("content") or []
-
-            text = "\n".join(c.get("text", "") for c in content_items if c.get("type") == "text" and c.get("text")).strip()
-
-            classified = None
-            if role == "user":
-                classified = classify_user_event(text)
-            elif role == "assistant":
-                classified = classify_assistant_event(text)
-
-            if classified:
-                event_type, content, confidence, impact_tier = classified
-                kind = "fact" if event_type == "format_discovery" else "event"
-                e = build_event(
-                    session_id=session_id,
-                    msg_id=msg_id,
-                    ts=ts,
-                    line_no=line_no,
-                    event_type=event_type,
-                    content=content,
-                    confidence=confidence,
-                    impact_tier=impact_tier,
-                    kind=kind,
-                    role=role or "unknown",
-                )
-                dedupe_key = (e["event_type"], e["source"]["source_ref"])
-                if dedupe_key not in seen_keys:
-                    seen_keys.add(dedupe_key)
-                    events.append(e)
-
-            if include_tool_calls and role == "assistant":
-                for e in extract_tool_call_events(session_id, msg_id, ts, line_no, content_items):
-                    dedupe_key = (e["event_type"], e["source"]["source_ref"], e["content"])
-                    if dedupe_key in seen_keys:
-                        continue
-                    seen_keys.add(dedupe_key)
-                    events.append(e)
-
-            if max_events > 0 and len(events) >= max_events:
-                break
+    checkpoints = TranscriptCheckpoints(checkpoint_path) if checkpoint_path else None
+    if checkpoints:
+        start_offset, _, reset = checkpoints.position(session_file)
+        lines = checkpoints.read_appended(session_file)
+    else:
+        lines = _iter_lines(session_file)
+    last_line: TranscriptLine | None = None
+    lines_read = 0
+
+    for last_line in lines:
+        lines_read += 1
+        line_no = last_line.line_no
+        line = last_line.text.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except Exception:
+            continue
+
+        if obj.get("type") != "message":
+            continue
+
+        message = obj.get("message", {})
+        role = message.get("role")
+        msg_id = obj.get("id") or f"line{line_no}"
+        ts = obj.get("timestamp")
+        content_items = message.get("content") or []
+
+        text = "\n".join(c.get("text", "") for c in content_items if c.get("type") == "text" and c.get("text")).strip()
+
+        classified = None
+        if role == "user":
+            classified = classify_user_event(text)
+        elif role == "assistant":
+            classified = classify_assistant_event(text)
+
+        if classified:
+            event_type, content, confidence, impact_tier = classified
+            kind = "fact" if event_type == "format_discovery" else "event"
+            e = build_event(
+                session_id=session_id,
+                msg_id=msg_id,
+                ts=ts,
+                line_no=line_no,
+                event_type=event_type,
+                content=content,
+                confidence=confidence,
+                impact_tier=impact_tier,
+                kind=kind,
+                role=role or "unknown",
+            )
+            dedupe_key = (e["event_type"], e["source"]["source_ref"])
+            if dedupe_key not in seen_keys:
+                seen_keys.add(dedupe_key)
+                events.append(e)
+
+        if include_tool_calls and role == "assistant":
+            for e in extract_tool_call_events(session_id, msg_id, ts, line_no, content_items):
+                dedupe_key = (e["event_type"], e["source"]["source_ref"], e["content"])
+                if dedupe_key in seen_keys:
+                    continue
+                seen_keys.add(dedupe_key)
+                events.append(e)
+
+        if max_events > 0 and len(events) >= max_events:
+            break
 
     by_type = Counter(e["event_type"] for e in events)
-    return {
+    out = {
         "ok": True,
         "generated_at": now_iso(),
         "session_id": session_id,
@@ -329,3 +360,16 @@ def parse_session(session_file: Path, include_tool_calls: bool, max_events: int)
         "summary": {"count": len(events), "by_type": dict(by_type)},
         "memory_events": events,
     }
+    if checkpoints:
+        # max_events 提前停止时只推进到最后处理的那一行
+        if last_line is not None:
+            checkpoints.advance(session_file, last_line)
+            checkpoints.save()
+        out["checkpoint"] = {
+            "path": str(checkpoints.state_path),
+            "start_offset": start_offset,
+            "end_offset": last_line.end if last_line else start_offset,
+            "lines_read": lines_read,
+            "reset": reset,
+        }
+    return out
@@ -0,0 +1,147 @@
+"""
+Stage Pipeline — 生成器阶段 + 有界队列的流水线执行
+
+每个阶段是一个生成器函数 `fn(inputs: Iterator) -> Iterator`，在独立线程中运行：
+- 相邻阶段之间为有界 queue.Queue（背压：下游慢时上游阻塞在 put 上，内存占用有上限）
+- 第一个阶段收到空迭代器，作为数据源；最后一个阶段的产出由 run_pipeline 收集返回
+- 阶段内需要的资源（如 SQLite 连接）应在生成器内部创建，保证只在本线程使用
+
+每个阶段统计：产出条数、忙碌时间、等待上游时间、吞吐（条/秒忙碌时间）、单条处理延迟 p50/p95。
+任一阶段抛异常时中止整条流水线，其余线程退出后在调用方线程重新抛出首个异常。
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterable, Iterator
+
+from core.quantile_sketch import TDigest
+
+DEFAULT_QUEUE_SIZE = 64
+_POLL_SEC = 0.1
+_END = object()
+
+StageFn = Callable[[Iterator[Any]], Iterable[Any]]
+
+
+class PipelineAborted(Exception):
+    """流水线已中止（其他阶段失败），用于让阻塞中的阶段尽快退出。"""
+
+
+class StageMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_sec = 0.0
+        self.wait_sec = 0.0
+        self.latency = TDigest()  # 单条处理延迟（秒），内存有上限
+        self.error: str | None = None
+
+    def to_dict(self) -> dict:
+        def pct(p: float) -> float:
+            return round(self.latency.percentile(p) * 1000, 3) if self.latency.count else 0.0
+
+        return {
+            "stage": self.name,
+            "items": self.items,
+            "busy_sec": round(self.busy_sec, 4),
+            "wait_sec": round(self.wait_sec, 4),
+            "throughput_per_sec": round(self.items / self.busy_sec, 2) if self.busy_sec > 0 else None,
+            "latency_ms_p50": pct(50),
+            "latency_ms_p95": pct(95),
+            "error": self.error,
+        }
+
+
+def _put(q: queue.Queue, item, abort: threading.Event):
+    while True:
+        if abort.is_set():
+            raise PipelineAborted()
+        try:
+            q.put(item, timeout=_POLL_SEC)
+            return
+        except queue.Full:
+            continue
+
+
+def _drain(q: queue.Queue, abort: threading.Event, metrics: StageMetrics) -> Iterator[Any]:
+    """把上游队列包装成迭代器；阻塞等待的时间计入 wait_sec。"""
+    while True:
+        started = time.perf_counter()
+        while True:
+            if abort.is_set():
+                raise PipelineAborted()
+            try:
+                item = q.get(timeout=_POLL_SEC)
+                break
+            except queue.Empty:
+                continue
+        metrics.wait_sec += time.perf_counter() - started
+        if item is _END:
+            return
+        yield item
+
+
+def run_pipeline(
+    stages: list[tuple[str, StageFn]],
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+) -> tuple[list[Any], list[dict]]:
+    """
+    运行流水线，返回 (最后阶段的全部产出, 各阶段指标)。
+
+    stages: [(阶段名, 生成器函数), ...]，至少一个。
+    """
+    if not stages:
+        raise ValueError("pipeline requires at least one stage")
+    queue_size = max(1, int(queue_size))
+    abort = threading.Event()
+    metrics = [StageMetrics(name) for name, _ in stages]
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    outputs: list[Any] = []
+    errors: list[BaseException] = []
+
+    def run_stage(i: int, fn: StageFn):
+        m = metrics[i]
+        inputs: Iterator[Any] = iter(()) if i == 0 else _drain(queues[i - 1], abort, m)
+        last = i == len(stages) - 1
+        try:
+            it = iter(fn(inputs))
+            while True:
+                wait_before = m.wait_sec
+                started = time.perf_counter()
+                try:
+                    item = next(it)
+                except StopIteration:
+                    m.busy_sec += time.perf_counter() - started - (m.wait_sec - wait_before)
+                    break
+                elapsed = time.perf_counter() - started - (m.wait_sec - wait_before)
+                m.busy_sec += elapsed
+                m.latency.add(elapsed)
+                m.items += 1
+                if last:
+                    outputs.append(item)
+                else:
+                    _put(queues[i], item, abort)
+            if not last:
+                _put(queues[i], _END, abort)
+        except PipelineAborted:
+            pass
+        except BaseException as e:  # noqa: BLE001 - 转交调用方线程重新抛出
+            m.error = f"{type(e).__name__}: {e}"
+            errors.append(e)
+            abort.set()
+
+    threads = [
+        threading.Thread(target=run_stage, args=(i, fn), name=f"pipeline-{name}", daemon=True)
+        for i, (name, fn) in enumerate(stages)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        raise errors[0]
+    return outputs, [m.to_dict() for m in metrics]
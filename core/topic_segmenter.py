@@ -5,6 +5,7 @@ Topic Segmenter — 启发式对话主题分割
 阶段1（当前）：基于语义断点的启发式分割
   - 识别话题边界（用户问新问题、长时间间隔、明确的话题标签）
   - 为每个 segment 生成摘要
+  - StreamingTopicSegmenter：逐条 feed 消息，遇到边界即产出闭合 segment（批量 segment 基于它实现）
 
 阶段2（预留）：LLM-driven 分割
   - 接口已定义（segment_with_llm）
@@ -90,6 +91,20 @@ TELEGRAM_METADATA_PATTERNS = [
     re.compile(r'^```json\s*\{'),
 ]
 
+# 合并为单个交替正则：流式分割每条消息每类只匹配一次
+def _union(patterns: list[re.Pattern]) -> re.Pattern:
+    return re.compile("|".join(f"(?:{p.pattern})" for p in patterns))
+
+
+_USER_BOUNDARY_RE = _union(NEW_TOPIC_PATTERNS + QUESTION_STARTS)
+_QUESTION_RE = _union(QUESTION_STARTS)
+_PROPOSAL_RE = _union(TASK_PROPOSAL_PATTERNS)
+# 带 ^ 锚点的执行动词在拼接全文上只对段内第一条消息生效
+_EXEC_FIRST_RE = _union([p for p in EXECUTION_VERBS if p.pattern.startswith("^")])
+_EXEC_ANY_RE = _union([p for p in EXECUTION_VERBS if not p.pattern.startswith("^")])
+_SYSTEM_RE = _union(SYSTEM_PATTERNS)
+_TELEGRAM_METADATA_RE = _union(TELEGRAM_METADATA_PATTERNS)
+
 
 # ── 数据结构 ──────────────────────────────────────────────────────────────
 
@@ -139,21 +154,18 @@ class TopicSegmenter:
         """
         输入：[{role, content, timestamp, index}, ...]
         输出：[TopicSegment, ...]
+
+        批量接口，内部按消息流逐条喂给 StreamingTopicSegmenter，segment id 在同一实例内连续编号。
         """
         if not messages:
             return []
 
-        # 预处理：去除纯系统消息
-        clean = self._filter_system(messages)
-        if not clean:
-            return []
-
-        # 识别边界
-        boundaries = self._find_boundaries(clean)
-
-        # 构建 segments
-        segments = self._build_segments(clean, boundaries)
-
+        stream = StreamingTopicSegmenter(start_counter=self._counter)
+        segments: list[TopicSegment] = []
+        for m in messages:
+            segments.extend(stream.feed(m))
+        segments.extend(stream.flush())
+        self._counter = stream.counter
         return segments
 
     def _filter_system(self, messages: list[dict]) -> list[dict]:
@@ -161,10 +173,10 @@ class TopicSegmenter:
         result = []
         for m in messages:
             text = self._extract_text(m.get("content", ""))
-            if any(p.search(text) for p in SYSTEM_PATTERNS):
+            if _SYSTEM_RE.search(text):
                 continue
             # Telegram JSON metadata 消息：如果整个内容都是 metadata，尝试提取实际文本
-            if any(p.search(text) for p in TELEGRAM_METADATA_PATTERNS):
+            if _TELEGRAM_METADATA_RE.search(text):
                 cleaned = self._extract_telegram_text(text)
                 if cleaned:
                     # 替换 content 后保留
@@ -232,201 +244,13 @@ class TopicSegmenter:
             )
         return str(content) if content else ""
 
-    def _find_boundaries(self, messages: list[dict]) -> list[int]:
-        """
-        返回 boundary indices（分割点）。
-        """
-        boundaries = [0]
-        last_ts: Optional[datetime] = None
-        last_was_task_proposal = False
-
-        for i, m in enumerate(messages):
-            text = self._extract_text(m.get("content", ""))
-            ts_str = m.get("timestamp", "")
-            role = m.get("role", "")
-
-            # 时间间隔断点
-            if last_ts and ts_str:
-                try:
-                    ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                    ts = ts.astimezone(timezone.utc)
-                    if last_ts.tzinfo is None:
-                        last_ts = last_ts.replace(tzinfo=timezone.utc)
-                    gap = (ts - last_ts).total_seconds()
-                    if gap > self.MAX_GAP_SECONDS:
-                        boundaries.append(i)
-                        last_was_task_proposal = False
-                except Exception:
-                    pass
-
-            last_ts_str = m.get("timestamp", "")
-            if last_ts_str:
-                try:
-                    last_ts = datetime.fromisoformat(last_ts_str.replace("Z", "+00:00"))
-                    last_ts = last_ts.astimezone(timezone.utc)
-                except Exception:
-                    pass
-
-            # 新话题指示词断点（user 消息）
-            if role == "user":
-                for pat in NEW_TOPIC_PATTERNS:
-                    if pat.search(text.strip()):
-                        if i > 0 and i not in boundaries:
-                            boundaries.append(i)
-                            last_was_task_proposal = False
-                            break
-
-            # 问题开头（新 QA topic）
-            if role == "user":
-                for pat in QUESTION_STARTS:
-                    if pat.search(text.strip()):
-                        if i > 0 and i not in boundaries:
-                            boundaries.append(i)
-                            last_was_task_proposal = False
-                            break
-
-            # 任务型提案出现 → 新 topic
-            if role == "assistant":
-                is_proposal = any(p.search(text) for p in TASK_PROPOSAL_PATTERNS)
-                if is_proposal and not last_was_task_proposal:
-                    if i > 0 and i not in boundaries:
-                        boundaries.append(i)
-                        last_was_task_proposal = True
-
-        return sorted(set(boundaries))
-        """
-        返回 boundary indices（分割点）。
-        索引 i 表示 messages[i] 是新 topic 的第一条消息。
-        第一个 segment 从 0 开始。
-        """
-        boundaries = [0]
-        last_ts: Optional[datetime] = None
-        last_role = ""
-        last_was_task_proposal = False
-
-        for i, m in enumerate(messages):
-            text = self._extract_text(m.get("content", ""))
-            ts_str = m.get("timestamp", "")
-            role = m.get("role", "")
-
-            # 时间间隔断点
-            if last_ts and ts_str:
-                try:
-                    ts = datetime.fromisoformat(ts_str.replace("Z", "+00:00"))
-                    ts = ts.astimezone(timezone.utc)
-                    if last_ts.tzinfo is None:
-                        last_ts = last_ts.replace(tzinfo=timezone.utc)
-                    gap = (ts - last_ts).total_seconds()
-                    if gap > self.MAX_GAP_SECONDS:
-                        boundaries.append(i)
-                        last_was_task_proposal = False
-                except Exception:
-                    pass
-
-            last_ts_str = m.get("timestamp", "")
-            if last_ts_str:
-                try:
-                    last_ts = datetime.fromisoformat(last_ts_str.replace("Z", "+00:00"))
-                    last_ts = last_ts.astimezone(timezone.utc)
-                except Exception:
-                    pass
-
-            # 新话题指示词断点（user 消息）
-            if role == "user":
-                for pat in NEW_TOPIC_PATTERNS:
-                    if pat.search(text.strip()):
-                        if i > 0 and i not in boundaries:
-                            boundaries.append(i)
-                            last_was_task_proposal = False
-                            break
-
-            # 问题开头（新 QA topic）
-            if role == "user":
-                for pat in QUESTION_STARTS:
-                    if pat.search(text.strip()):
-                        if i > 0 and i not in boundaries:
-                            boundaries.append(i)
-                            last_was_task_proposal = False
-                            break
-
-            # 任务型提案出现 → 新 topic
-            if role == "assistant":
-                is_proposal = any(p.search(text) for p in TASK_PROPOSAL_PATTERNS)
-                if is_proposal and not last_was_task_proposal:
-                    if i > 0 and i not in boundaries:
-                        boundaries.append(i)
-                        last_was_task_proposal = True
-
-            last_role = role
-
-        return sorted(set(boundaries))
-
-    def _build_segments(self, messages: list[dict], boundaries: list[int]) -> list[TopicSegment]:
-        """根据边界构建 TopicSegment"""
-        segments = []
-        n = len(messages)
-
-        for bi, start_idx in enumerate(boundaries):
-            end_idx = boundaries[bi + 1] if bi + 1 < len(boundaries) else n
-            chunk = messages[start_idx:end_idx]
-
-            if not chunk:
-                continue
-
-            self._counter += 1
-            ts_list = [m.get("timestamp", "") for m in chunk]
-            desc, seg_type = self._classify(chunk)
-            summary = self._summarize(chunk)
-
-            seg = TopicSegment(
-                id=f"seg_{self._counter:03d}",
-                description=desc,
-                type=seg_type,
-                summary=summary,
-                start_ts=min(ts_list),
-                end_ts=max(ts_list),
-                messages=chunk,
-                message_indices=[start_idx + i for i in range(len(chunk))],
-            )
-            segments.append(seg)
-
-        return segments
-
-    def _classify(self, messages: list[dict]) -> tuple[str, str]:
-        """判断 topic type 并生成简短描述"""
-        # 统计角色分布
-        roles = [m.get("role", "") for m in messages]
-        user_count = roles.count("user")
-        assistant_count = roles.count("assistant")
-
-        all_text = " ".join(self._extract_text(m.get("content", "")) for m in messages)
-
-        # 任务型：含提案关键词
-        if any(p.search(all_text) for p in TASK_PROPOSAL_PATTERNS):
-            if "同意" in all_text or "可以" in all_text or "行" in all_text:
-                return "任务执行", "task"
-            return "任务讨论", "task"
-
-        # 执行型：无提案词但含执行动词 → task
-        # （对应 LLM 检测到的"结论式汇报"场景）
-        if any(p.search(all_text) for p in EXECUTION_VERBS):
-            return "任务执行", "task"
-
-        # QA 型：用户多问句
-        question_count = sum(
-            1 for m in messages
-            if m.get("role") == "user"
-            and any(p.search(self._extract_text(m.get("content", "")).strip())
-                    for p in QUESTION_STARTS)
-        )
-        if question_count >= 1 and user_count >= 2:
-            return "问答讨论", "qa"
-
-        # 信息型：assistant 长回复为主
-        if assistant_count > user_count:
-            return "信息分享", "info"
-
-        return "一般对话", "info"
+    def _parse_ts(self, ts_str: str) -> Optional[datetime]:
+        if not ts_str:
+            return None
+        try:
+            return datetime.fromisoformat(ts_str.replace("Z", "+00:00")).astimezone(timezone.utc)
+        except Exception:
+            return None
 
     def _summarize(self, messages: list[dict]) -> str:
         """生成 topic 摘要（取用户消息的核心内容）"""
@@ -457,6 +281,154 @@ class TopicSegmenter:
         return first.strip()[:100]
 
 
+class _OpenSegment:
+    """未闭合 segment 的累计状态：计数与标志位，消息本体只在 keep_messages 时保留。"""
+
+    __slots__ = (
+        "start", "count", "messages", "user_count", "assistant_count", "question_count",
+        "has_proposal", "has_consent", "has_exec", "first_user", "start_ts", "end_ts",
+    )
+
+    def __init__(self, start: int, keep_messages: bool):
+        self.start = start
+        self.count = 0
+        self.messages: Optional[list[dict]] = [] if keep_messages else None
+        self.user_count = 0
+        self.assistant_count = 0
+        self.question_count = 0
+        self.has_proposal = False
+        self.has_consent = False
+        self.has_exec = False
+        self.first_user: Optional[dict] = None
+        self.start_ts: Optional[str] = None
+        self.end_ts: Optional[str] = None
+
+    def add(self, m: dict, role: str, text: str, ts_str: str):
+        if self.count == 0:
+            self.has_exec = bool(_EXEC_FIRST_RE.search(text))
+        self.count += 1
+        if self.messages is not None:
+            self.messages.append(m)
+        if role == "user":
+            self.user_count += 1
+            if _QUESTION_RE.search(text.strip()):
+                self.question_count += 1
+            if self.first_user is None:
+                self.first_user = m
+        elif role == "assistant":
+            self.assistant_count += 1
+        if not self.has_proposal and _PROPOSAL_RE.search(text):
+            self.has_proposal = True
+        if not self.has_consent and ("同意" in text or "可以" in text or "行" in text):
+            self.has_consent = True
+        if not self.has_exec and _EXEC_ANY_RE.search(text):
+            self.has_exec = True
+        # 与批量版 min/max(ts_list) 一致：缺失时间戳按空串参与比较
+        self.start_ts = ts_str if self.start_ts is None else min(self.start_ts, ts_str)
+        self.end_ts = ts_str if self.end_ts is None else max(self.end_ts, ts_str)
+
+    def classify(self) -> tuple[str, str]:
+        """判断 topic type 并生成简短描述"""
+        # 任务型：含提案关键词
+        if self.has_proposal:
+            return ("任务执行", "task") if self.has_consent else ("任务讨论", "task")
+        # 执行型：无提案词但含执行动词 → task（对应 LLM 检测到的"结论式汇报"场景）
+        if self.has_exec:
+            return "任务执行", "task"
+        # QA 型：用户多问句
+        if self.question_count >= 1 and self.user_count >= 2:
+            return "问答讨论", "qa"
+        # 信息型：assistant 长回复为主
+        if self.assistant_count > self.user_count:
+            return "信息分享", "info"
+        return "一般对话", "info"
+
+
+class StreamingTopicSegmenter(TopicSegmenter):
+    """
+    增量版启发式分割器：消息逐条 feed，遇到边界立即产出已闭合的 segment。
+
+    - 只保留当前未闭合 segment 的计数/标志位（keep_messages=False 时不保留消息本体）
+    - 每条消息的时间戳只解析一次，正则按类别合并后各匹配一次
+    - 边界与分类规则与 TopicSegmenter.segment 完全一致，可用于实时会话
+    """
+
+    def __init__(self, keep_messages: bool = True, start_counter: int = 0):
+        super().__init__()
+        self._counter = start_counter
+        self.keep_messages = keep_messages
+        self._index = 0  # 过滤系统消息后的序号
+        self._last_ts: Optional[datetime] = None
+        self._last_was_task_proposal = False
+        self._open: Optional[_OpenSegment] = None
+
+    @property
+    def counter(self) -> int:
+        return self._counter
+
+    @property
+    def pending(self) -> int:
+        """当前未闭合 segment 的消息数"""
+        return self._open.count if self._open else 0
+
+    def feed(self, message: dict) -> list[TopicSegment]:
+        """输入一条消息，返回因本条消息而闭合的 segment（0 或 1 个）"""
+        clean = self._filter_system([message])
+        if not clean:
+            return []
+        m = clean[0]
+        i = self._index
+        self._index += 1
+        text = self._extract_text(m.get("content", ""))
+        ts_str = m.get("timestamp", "")
+        role = m.get("role", "")
+
+        is_boundary = False
+        ts = self._parse_ts(ts_str)
+        if ts is not None:
+            # 时间间隔断点
+            if self._last_ts is not None and (ts - self._last_ts).total_seconds() > self.MAX_GAP_SECONDS:
+                is_boundary = True
+                self._last_was_task_proposal = False
+            self._last_ts = ts
+
+        if i > 0 and not is_boundary:
+            # 新话题指示词 / 问题开头（user 消息）
+            if role == "user" and _USER_BOUNDARY_RE.search(text.strip()):
+                is_boundary = True
+                self._last_was_task_proposal = False
+            # 任务型提案出现 → 新 topic
+            elif role == "assistant" and not self._last_was_task_proposal and _PROPOSAL_RE.search(text):
+                is_boundary = True
+                self._last_was_task_proposal = True
+
+        closed = self.flush() if is_boundary else []
+        if self._open is None:
+            self._open = _OpenSegment(i, self.keep_messages)
+        self._open.add(m, role, text, ts_str)
+        return closed
+
+    def flush(self) -> list[TopicSegment]:
+        """闭合并返回当前未闭合的 segment（会话结束或需要立即落盘时调用）"""
+        seg, self._open = self._open, None
+        if seg is None or seg.count == 0:
+            return []
+        self._counter += 1
+        desc, seg_type = seg.classify()
+        return [
+            TopicSegment(
+                id=f"seg_{self._counter:03d}",
+                description=desc,
+                type=seg_type,
+                summary=self._summarize([seg.first_user] if seg.first_user else []),
+                start_ts=seg.start_ts or "",
+                end_ts=seg.end_ts or "",
+                messages=seg.messages or [],
+                message_indices=list(range(seg.start, seg.start + seg.count)),
+            )
+        ]
+
+
 # ── 入口脚本 ─────────────────────────────────────────────────────────────
 
 if __name__ == "__main__":
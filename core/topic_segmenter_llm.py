@@ -13,12 +13,13 @@ Segmentation 策略：调用外部 LLM API 对话本进行语义切分。
 
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
 import subprocess
 import sys
-import urllib.request
-import urllib.error
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, date, timezone
 from pathlib import Path
@@ -95,7 +96,7 @@ class ComparisonResult:
 def call_llm(messages: list[dict], config: dict) -> str:
     """
     调用 LLM API，返回原始文本响应。
-    支持 OpenAI-compatible 和 Anthropic 格式。
+    支持 OpenAI-compatible 和 Anthropic 格式；经共享 LLMClient 发送（长连接 + 响应缓存）。
     """
     api_base = config.get("api_base", "").rstrip("/")
     api_key = config.get("api_key", "")
@@ -143,34 +144,15 @@ def call_llm(messages: list[dict], config: dict) -> str:
         }
         endpoint = f"{api_base}/messages"
 
-    req = urllib.request.Request(
-        endpoint,
-        data=json.dumps(payload).encode(),
-        headers=headers,
-        method="POST",
-    )
+    from core.llm_client import LLMClientError, get_client, response_text
 
     try:
-        with urllib.request.urlopen(req, timeout=120) as r:
-            data = json.loads(r.read())
-
-            # OpenAI 格式
-            if "/chat/completions" in endpoint:
-                return data["choices"][0]["message"]["content"]
-
-            # Anthropic 格式
-            if "content" in data and isinstance(data["content"], list):
-                for block in data["content"]:
-                    if block.get("type") == "text":
-                        return block["text"]
-
-            return str(data)
-
-    except urllib.error.HTTPError as e:
-        body = e.read().decode()[:500]
-        raise RuntimeError(f"LLM API error {e.code}: {body}")
+        data = get_client().post_json(endpoint, payload, headers=headers, timeout=120)
+    except LLMClientError:
+        raise
     except Exception as e:
         raise RuntimeError(f"LLM call failed: {e}")
+    return response_text(data)
 
 
 def call_llm_curl(messages: list[dict], config: dict, timeout: int = 300) -> str:
@@ -257,11 +239,29 @@ def parse_llm_json_response(text: str) -> list[dict]:
 class TopicSegmenterLLM:
     """
     LLM 驱动的对话主题分割器。
+
+    长对话按滑动窗口（window_size 条、相邻窗口重叠 overlap 条、起点按步长对齐）切块，
+    未缓存的窗口经线程池并发请求；重叠区在中点处划分归属，跨边界的同一话题合并。
+    窗口结果按消息内容 hash 缓存（可选 cache_path 落盘），对话增长时只有尾部窗口需要重新请求。
     """
 
-    def __init__(self, llm_config: Optional[dict] = None):
+    def __init__(
+        self,
+        llm_config: Optional[dict] = None,
+        *,
+        window_size: int = 60,
+        overlap: int = 10,
+        max_workers: int = 4,
+        cache_path: Optional[Path] = None,
+    ):
         self.llm_config = llm_config or {}
         self._counter = 0
+        self.window_size = max(2, int(window_size))
+        self.overlap = min(max(0, int(overlap)), self.window_size - 1)
+        self.max_workers = max(1, int(max_workers))
+        self.cache_path = Path(cache_path) if cache_path else None
+        self._cache: dict[str, list[dict]] = self._load_cache()
+        self.last_stats: dict = {}
 
     def build_conversation_text(self, messages: list[dict]) -> str:
         lines = []
@@ -282,39 +282,144 @@ class TopicSegmenterLLM:
             lines.append(f"[{i}] [{ts}] {role}: {content}")
         return "\n".join(lines)
 
+    # ── 窗口缓存 ──────────────────────────────────────────────────────────
+
+    def _load_cache(self) -> dict[str, list[dict]]:
+        if not self.cache_path:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_name(self.cache_path.name + ".tmp")
+        tmp.write_text(json.dumps(self._cache, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.cache_path)
+
+    def _window_key(self, conv_text: str) -> str:
+        ident = [self.llm_config.get("api_base"), self.llm_config.get("model"), conv_text]
+        return hashlib.sha1(json.dumps(ident, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    # ── 分割 ──────────────────────────────────────────────────────────────
+
+    def _windows(self, n: int) -> list[tuple[int, int]]:
+        if n <= self.window_size:
+            return [(0, n)]
+        stride = self.window_size - self.overlap
+        out = []
+        start = 0
+        while True:
+            end = min(start + self.window_size, n)
+            out.append((start, end))
+            if end >= n:
+                return out
+            start += stride
+
+    def _request_topics(self, conv_text: str) -> list[dict]:
+        prompt = USER_PROMPT_TEMPLATE.format(conversation=conv_text)
+        try:
+            raw = call_llm(prompt, self.llm_config)
+        except Exception:
+            # 某些环境 Python HTTP 会超时，退回 curl
+            raw = call_llm_curl(prompt, self.llm_config, timeout=300)
+        return parse_llm_json_response(raw)
+
     def segment(self, messages: list[dict]) -> list[TopicSegment]:
         if not messages:
             return []
         if not self.llm_config:
             raise RuntimeError("LLM not configured.")
-        conv_text = self.build_conversation_text(messages)
-        prompt = USER_PROMPT_TEMPLATE.format(conversation=conv_text)
-        try:
-            raw = call_llm_curl(prompt, self.llm_config, timeout=300)
-        except Exception:
-            raw = call_llm(prompt, self.llm_config)
-        raw_topics = parse_llm_json_response(raw)
-        segments = []
-        for rt in raw_topics:
-            indices = rt.get("message_indices", [])
-            if not indices:
-                continue
-            self._counter += 1
-            topic_msgs = [messages[idx] for idx in indices if idx < len(messages)]
-            ts_list = [m.get("timestamp", "") for m in topic_msgs]
-            seg = TopicSegment(
-                id=rt.get("id", f"topic_{self._counter}"),
-                description=rt.get("description", "未知主题"),
-                type=rt.get("type", "info"),
-                summary=rt.get("summary", ""),
-                start_ts=min(ts_list) if ts_list else "",
-                end_ts=max(ts_list) if ts_list else "",
-                message_indices=indices,
-                messages=topic_msgs,
-            )
-            segments.append(seg)
-        return segments
 
+        windows = self._windows(len(messages))
+        texts = [self.build_conversation_text(messages[a:b]) for a, b in windows]
+        keys = [self._window_key(t) for t in texts]
+        pending = {k: t for k, t in zip(keys, texts) if k not in self._cache}
+        if pending:
+            if len(pending) == 1:
+                (k, t), = pending.items()
+                self._cache[k] = self._request_topics(t)
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                    for k, topics in zip(pending, pool.map(self._request_topics, pending.values())):
+                        self._cache[k] = topics
+            self._save_cache()
+        self.last_stats = {"windows": len(windows), "requested": len(pending), "cached": len(windows) - len(pending)}
+
+        if len(windows) == 1:
+            return [self._make_segment(messages, rt, rt.get("message_indices", [])) for rt in self._cache[keys[0]]
+                    if rt.get("message_indices")]
+        return self._reconcile(messages, windows, [self._cache[k] for k in keys])
+
+    def _make_segment(self, messages: list[dict], rt: dict, indices: list[int], seg_id: str | None = None) -> TopicSegment:
+        self._counter += 1
+        topic_msgs = [messages[idx] for idx in indices if idx < len(messages)]
+        ts_list = [m.get("timestamp", "") for m in topic_msgs]
+        return TopicSegment(
+            id=seg_id or rt.get("id", f"topic_{self._counter}"),
+            description=rt.get("description", "未知主题"),
+            type=rt.get("type", "info"),
+            summary=rt.get("summary", ""),
+            start_ts=min(ts_list) if ts_list else "",
+            end_ts=max(ts_list) if ts_list else "",
+            message_indices=indices,
+            messages=topic_msgs,
+        )
+
+    def _reconcile(
+        self,
+        messages: list[dict],
+        windows: list[tuple[int, int]],
+        window_topics: list[list[dict]],
+    ) -> list[TopicSegment]:
+        """
+        重叠区在中点切开：窗口 k 只保留 [cut_{k-1}, cut_k) 内的消息。
+        窗口 k 中包含 cut_k - 1 的话题与窗口 k+1 中包含 cut_k 的话题，若任一方在重叠区内把两条消息归入同一话题，
+        视为同一话题跨越切点，合并为一个 segment。
+        """
+        n = len(messages)
+        cuts = [windows[k + 1][0] + (windows[k][1] - windows[k + 1][0]) // 2 for k in range(len(windows) - 1)]
+        bounds = list(zip([0] + cuts, cuts + [n]))
+
+        merged: list[dict] = []  # {"rt", "full": set[int], "own": list[int]}
+        for k, ((start, _), topics, (lo, hi)) in enumerate(zip(windows, window_topics, bounds)):
+            parts = []
+            for rt in topics:
+                full = {start + int(i) for i in rt.get("message_indices", []) if 0 <= int(i) < n - start}
+                own = sorted(i for i in full if lo <= i < hi)
+                if own:
+                    parts.append({"rt": rt, "full": full, "own": own})
+            parts.sort(key=lambda p: p["own"][0])
+            if merged and parts and k > 0:
+                cut = lo
+                prev = next((p for p in reversed(merged) if cut - 1 in p["full"]), None)
+                head = next((p for p in parts if cut in p["full"]), None)
+                if prev is not None and head is not None and (cut in prev["full"] or cut - 1 in head["full"]):
+                    prev["own"] = sorted(set(prev["own"]) | set(head["own"]))
+                    prev["full"] |= head["full"]
+                    if head["rt"].get("type") == "task":
+                        prev["rt"] = {**prev["rt"], "type": "task"}
+                    parts.remove(head)
+            merged.extend(parts)
+
+        merged.sort(key=lambda p: p["own"][0])
+        return [self._make_segment(messages, p["rt"], p["own"], seg_id=f"topic_{i}") for i, p in enumerate(merged, 1)]
+
+
+def segment_and_compare(
+    messages: list[dict],
+    llm_segmenter: "TopicSegmenterLLM",
+    heuristic_segmenter,
+) -> ComparisonResult:
+    """LLM 分割与启发式分割并行执行后对比（启发式在 LLM 请求等待期间完成）。"""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        heuristic_future = pool.submit(heuristic_segmenter.segment, messages)
+        llm_segs = llm_segmenter.segment(messages)
+        return compare_segmentations(llm_segs, heuristic_future.result())
 
 
 def compare_segmentations(
@@ -453,14 +558,12 @@ if __name__ == "__main__":
 
     # LLM 分割
     segmenter = TopicSegmenterLLM(llm_config=llm_config)
-    llm_segs = segmenter.segment(messages)
 
     if args.compare:
-        heuristic = HeuristicSegmenter()
-        h_segs = heuristic.segment(messages)
-        comp = compare_segmentations(llm_segs, h_segs)
+        comp = segment_and_compare(messages, segmenter, HeuristicSegmenter())
         print_comparison(comp)
     else:
+        llm_segs = segmenter.segment(messages)
         print(f"\nLLM Segments: {len(llm_segs)}")
         for s in llm_segs:
             print(f"  [{s.id}] {s.description} ({s.type})")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Transcript Reader — 会话 JSONL 的共享读取工具
+
+- tail_lines()：从 EOF 反向按块读取最后 N 行，成本只与读取的行数相关，与文件总长度无关
+- TranscriptCheckpoints：按文件持久化 (inode, offset, line_no) 检查点，重复解析只处理追加的完整行；
+  inode 变化（轮转/重建）或文件变短（截断）时从头重读
+- LineIndex：基于 mmap 的行偏移索引，支持按行号（含负数）随机访问，文件增长后可增量扩展
+
+未以换行结尾的尾行视为写入中，不被检查点消费，下次读取时再处理。
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def tail_lines(path: str | Path, n: int, block_size: int = DEFAULT_BLOCK_SIZE) -> list[str]:
+    """返回文件最后 n 行（不含换行符），从 EOF 反向按块读取。"""
+    if n <= 0:
+        return []
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        chunks: list[bytes] = []
+        newlines = 0
+        # 需要 n+1 个换行才能保证最前面一行是完整的（末尾换行也占一个）
+        while pos > 0 and newlines <= n:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step)
+            newlines += chunk.count(b"\n")
+            chunks.append(chunk)
+    buf = b"".join(reversed(chunks))
+    lines = buf.split(b"\n")
+    if lines and lines[-1] == b"":
+        lines.pop()
+    if pos > 0:
+        lines = lines[1:]  # 块边界处的残行
+    return [_decode(x) for x in lines[-n:]]
+
+
+class TranscriptLine(NamedTuple):
+    line_no: int  # 从 1 开始
+    start: int  # 行首字节偏移
+    end: int  # 下一行行首字节偏移
+    text: str  # 不含换行符
+
+
+def read_complete_lines(path: str | Path, offset: int = 0, line_no: int = 0) -> Iterator[TranscriptLine]:
+    """从 offset（此前已读 line_no 行）开始逐行产出以换行结尾的完整行，遇到写入中的尾行即停止。"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                return
+            line_no += 1
+            start = offset
+            offset += len(raw)
+            yield TranscriptLine(line_no, start, offset, _decode(raw.rstrip(b"\r\n")))
+
+
+class TranscriptCheckpoints:
+    """
+    按文件记录读取进度的检查点集合，JSON 落盘（临时文件 + os.replace 原子写入）。
+
+    用法：
+        cps = TranscriptCheckpoints(state_path)
+        for line in cps.read_appended(path):
+            ...处理...
+            cps.advance(path, line)
+        cps.save()
+    """
+
+    def __init__(self, state_path: str | Path):
+        self.state_path = Path(state_path).expanduser().resolve()
+        self._state: dict[str, dict] = self._load()
+        self._dirty = False
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            raw = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+        return raw if isinstance(raw, dict) else {}
+
+    @staticmethod
+    def _key(path: str | Path) -> str:
+        return str(Path(path).expanduser().resolve())
+
+    def get(self, path: str | Path) -> Optional[dict]:
+        return self._state.get(self._key(path))
+
+    def position(self, path: str | Path) -> tuple[int, int, bool]:
+        """返回 (起始偏移, 已读行数, 是否因 inode 变化/截断而重置)。"""
+        st = os.stat(path)
+        cp = self.get(path)
+        if not cp:
+            return 0, 0, False
+        if cp.get("inode") != st.st_ino or int(cp.get("offset", 0)) > st.st_size:
+            return 0, 0, True
+        return int(cp.get("offset", 0)), int(cp.get("line_no", 0)), False
+
+    def read_appended(self, path: str | Path) -> Iterator[TranscriptLine]:
+        """从检查点位置开始逐行产出完整的追加行；不修改检查点，由调用方 advance。"""
+        offset, line_no, _ = self.position(path)
+        return read_complete_lines(path, offset, line_no)
+
+    def advance(self, path: str | Path, line: TranscriptLine):
+        self._state[self._key(path)] = {
+            "inode": os.stat(path).st_ino,
+            "offset": line.end,
+            "line_no": line.line_no,
+            "updated_at": now_iso(),
+        }
+        self._dirty = True
+
+    def reset(self, path: str | Path):
+        if self._state.pop(self._key(path), None) is not None:
+            self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.state_path.with_name(f"{self.state_path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(self._state, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.state_path)
+        self._dirty = False
+
+
+class LineIndex:
+    """
+    mmap 行索引：只保存每行的起始偏移，按行号切片读取。
+
+    行号从 0 开始，支持负数（-1 为最后一行）；文件追加后调用 refresh() 只扫描新增部分。
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        self._mm: Optional[mmap.mmap] = None
+        self._size = 0
+        self._starts: list[int] = []
+        self._scanned = 0  # 已扫描到的偏移（最后一个完整换行之后）
+        self.refresh()
+
+    def refresh(self) -> int:
+        """文件增长时重新映射并扩展索引，返回当前行数。"""
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self._size:
+            self._starts, self._scanned = [], 0  # 被截断：重建
+        if size != self._size or self._mm is None:
+            if self._mm is not None:
+                self._mm.close()
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+            self._size = size
+        mm = self._mm
+        if mm is None:
+            return 0
+        pos = self._scanned
+        if self._starts and self._starts[-1] >= pos:
+            self._starts.pop()  # 上次的未完结尾行，重新确认
+        while pos < size:
+            self._starts.append(pos)
+            nl = mm.find(b"\n", pos)
+            if nl < 0:
+                break
+            pos = nl + 1
+            self._scanned = pos
+        return len(self._starts)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def _span(self, i: int) -> tuple[int, int]:
+        n = len(self._starts)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(f"line {i} out of range ({n} lines)")
+        start = self._starts[i]
+        end = self._starts[i + 1] if i + 1 < n else self._size
+        return start, end
+
+    def offset(self, i: int) -> int:
+        return self._span(i)[0]
+
+    def __getitem__(self, i: int) -> str:
+        start, end = self._span(i)
+        return _decode(self._mm[start:end].rstrip(b"\r\n"))
+
+    def lines(self, start: int = 0, stop: Optional[int] = None) -> list[str]:
+        return [self[i] for i in range(*slice(start, stop).indices(len(self)))]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self) -> "LineIndex":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -8,19 +8,28 @@ Score 算法：
   - recency_score = max(0, 1 - age_days/max_age_days)
   - frequency_score = min(access_count/10, 1.0)
   - 低于 prune_threshold（默认0.15）进入淘汰
+
+执行引擎（set-based）：
+  - score 在 SQL 中按固定 now 计算（读 access_count 反范式列，不解析 payload）
+  - 有效访问数 = payload access_count + memory_access_stats 中按 decay_factor 折算到 now 的计数
+  - 按 rowid 分块扫描，只把低于阈值的行取回 Python
+  - experience 每块一条 `UPDATE ... WHERE id IN (...)` 归档并提交
+  - iter_prune() 流式产出结果；limit / time_budget_sec 限制单次运行规模
 """
 
 from __future__ import annotations
 
 import json
 import sys
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
 
-from core.memory_experience_core_v0_1 import conn
+from core.access_tracker import effective_access_sql, init_access_db, read_access_counts
+from core.memory_experience_core_v0_1 import conn, init_db
 
 CONFIG_PATH = ROOT / ".mindkernel" / "config" / "ttl_policy.json"
 DEFAULT_CONFIG = {
@@ -56,9 +65,13 @@ def compute_score(
     created_at: str,
     access_count: int,
     config: dict,
+    now: datetime | None = None,
 ) -> float:
-    """计算一条记忆的 TTL score，0.0~1.0，越高越值得保留。"""
-    now = datetime.now(timezone.utc)
+    """计算一条记忆的 TTL score，0.0~1.0，越高越值得保留。
+
+    与 _SCORE_SQL 保持同一口径；批量场景请传入固定 now。
+    """
+    now = now or datetime.now(timezone.utc)
     created = _parse_ts(created_at)
     age_days = (now - created).days
 
@@ -79,109 +92,220 @@ def compute_score(
     return recency_score * frequency_score
 
 
+# compute_score 的 SQL 版本；:now_jd 为本次运行固定的 julianday(now)。
+# access_count 为有效访问数（见 _SCORED_ROWS_SQL）。
+# 无法解析的 created_at 按 age=0 处理（与 _parse_ts 回落到 now 一致）。
+_AGE_SQL = "CAST(:now_jd - julianday(created_at) AS INTEGER)"
+_SCORE_SQL = f"""
+    CASE
+        WHEN julianday(created_at) IS NULL THEN 1.0
+        WHEN {_AGE_SQL} < :grace THEN 1.0
+        WHEN {_AGE_SQL} > :max_age THEN 0.0
+        ELSE MIN(access_count / 10.0, 1.0)
+             * MAX(0.0, 1.0 - {_AGE_SQL} * 1.0 / :max_age)
+    END
+"""
+
+# 分块内的打分行：LEFT JOIN 访问统计，折算后的计数叠加到 payload access_count 上
+_SCORED_ROWS_SQL = """
+    SELECT id, created_at, score FROM (
+        SELECT id, created_at, {score} AS score FROM (
+            SELECT t.id AS id, t.created_at AS created_at,
+                   COALESCE(t.access_count, 0) + {access} AS access_count
+            FROM {table} t LEFT JOIN memory_access_stats s ON s.id = t.id
+            WHERE t.status = :status AND t.rowid > :lo AND t.rowid <= :hi
+        )
+    ) WHERE score < :threshold ORDER BY score
+"""
+
+PRUNE_TARGETS = (
+    # (kind, table, status, 是否实际归档)
+    ("candidate", "memory_items", "candidate", False),
+    ("experience", "experience_records", "active", True),
+)
+
+DEFAULT_CHUNK_SIZE = 5000
+# 兼容旧版 SQLite 的 999 绑定变量上限
+_IN_CHUNK = 900
+
+
 def should_prune(score: float, threshold: float) -> bool:
     return score < threshold
 
 
-def get_memory_records(c) -> list[dict]:
-    """拉取所有 candidate 状态的记忆记录。"""
-    rows = c.execute(
-        "SELECT id, status, payload_json, created_at FROM memory_items WHERE status = 'candidate'"
-    ).fetchall()
-    result = []
-    for row in rows:
-        try:
-            payload = json.loads(row["payload_json"])
-            result.append({
-                "id": row["id"],
-                "created_at": row["created_at"],
-                "access_count": payload.get("metadata", {}).get("access_count", 0),
-            })
-        except (json.JSONDecodeError, KeyError):
-            continue
-    return result
-
-
-def get_experience_records(c) -> list[dict]:
-    """拉取所有 active 状态的 experience 记录。"""
-    rows = c.execute(
-        "SELECT id, status, payload_json, created_at FROM experience_records WHERE status = 'active'"
-    ).fetchall()
-    result = []
-    for row in rows:
-        try:
-            payload = json.loads(row["payload_json"])
-            result.append({
-                "id": row["id"],
-                "created_at": row["created_at"],
-                "access_count": payload.get("metadata", {}).get("access_count", 0),
-            })
-        except (json.JSONDecodeError, KeyError):
-            continue
-    return result
-
-
-def run_prune(dry_run: bool | None = None) -> dict:
+def _get_records(c, table: str, status: str, decay_factor: float) -> list[dict]:
+    rows = c.execute(f"SELECT id, created_at, access_count FROM {table} WHERE status = ?", (status,)).fetchall()
+    accessed = read_access_counts(c, [r["id"] for r in rows], decay_per_day=decay_factor)
+    return [
+        {
+            "id": r["id"],
+            "created_at": r["created_at"],
+            "access_count": (r["access_count"] or 0) + accessed.get(r["id"], {}).get("count", 0.0),
+        }
+        for r in rows
+    ]
+
+
+def get_memory_records(c, decay_factor: float = DEFAULT_CONFIG["decay_factor"]) -> list[dict]:
+    """拉取所有 candidate 状态的记忆记录（access_count 取反范式列 + 折算后的访问统计，不解析 payload）。"""
+    return _get_records(c, "memory_items", "candidate", decay_factor)
+
+
+def get_experience_records(c, decay_factor: float = DEFAULT_CONFIG["decay_factor"]) -> list[dict]:
+    """拉取所有 active 状态的 experience 记录（access_count 取反范式列 + 折算后的访问统计，不解析 payload）。"""
+    return _get_records(c, "experience_records", "active", decay_factor)
+
+
+def _julianday(dt: datetime) -> float:
+    return dt.timestamp() / 86400.0 + 2440587.5
+
+
+def iter_prune(
+    c,
+    config: dict,
+    *,
+    dry_run: bool = True,
+    now: datetime | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    limit: int | None = None,
+    time_budget_sec: float | None = None,
+    stats: dict | None = None,
+):
+    """流式产出待淘汰记录：{"kind", "id", "score", "created_at", "dry_run"}。
+
+    stats（可选）会被原地更新：<kind>_scanned / <kind>_pruned 与 truncated。
+    达到 limit 且仍有待淘汰记录、或 time_budget_sec 用尽时停止，并置 stats["truncated"]=True。
+    """
+    now = now or datetime.now(timezone.utc)
+    started = time.monotonic()
+    params = {
+        "now_jd": _julianday(now),
+        "grace": config["grace_period_days"],
+        "max_age": config["max_age_days"],
+        "threshold": config["prune_threshold"],
+        "decay": config.get("decay_factor", DEFAULT_CONFIG["decay_factor"]),
+    }
+    init_access_db(c)
+    stats = stats if stats is not None else {}
+    stats.setdefault("truncated", False)
+    emitted = 0
+    updated_at = now.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+    for kind, table, status, archive in PRUNE_TARGETS:
+        stats.setdefault(f"{kind}_scanned", 0)
+        stats.setdefault(f"{kind}_pruned", 0)
+        last_rowid = 0
+        while True:
+            hi, scanned = c.execute(
+                f"""SELECT MAX(rid), COUNT(*) FROM (
+                        SELECT rowid AS rid FROM {table}
+                        WHERE status = ? AND rowid > ? ORDER BY rowid LIMIT ?
+                    )""",
+                (status, last_rowid, chunk_size),
+            ).fetchone()
+            if not scanned:
+                break
+            if time_budget_sec is not None and time.monotonic() - started >= time_budget_sec:
+                stats["truncated"] = True
+                return
+
+            rows = c.execute(
+                _SCORED_ROWS_SQL.format(score=_SCORE_SQL, access=effective_access_sql("s"), table=table),
+                {**params, "status": status, "lo": last_rowid, "hi": hi},
+            ).fetchall()
+            if limit is not None and emitted >= limit:
+                # 已达 limit：只向后探测是否还有待淘汰记录，有才算截断
+                if rows:
+                    stats["truncated"] = True
+                    return
+                stats[f"{kind}_scanned"] += scanned
+                last_rowid = hi
+                continue
+            cut = limit is not None and len(rows) > limit - emitted
+            if cut:
+                rows = rows[: limit - emitted]
+
+            if archive and not dry_run and rows:
+                ids = [r["id"] for r in rows]
+                for start in range(0, len(ids), _IN_CHUNK):
+                    part = ids[start : start + _IN_CHUNK]
+                    marks = ",".join("?" * len(part))
+                    # +status：避免规划器选 status 索引扫描整表，强制按主键逐个命中
+                    c.execute(
+                        f"UPDATE {table} SET status = 'archived', updated_at = ? "
+                        f"WHERE +status = ? AND id IN ({marks})",
+                        (updated_at, status, *part),
+                    )
+                c.commit()
+
+            stats[f"{kind}_scanned"] += scanned
+            stats[f"{kind}_pruned"] += len(rows)
+            emitted += len(rows)
+            for r in rows:
+                yield {
+                    "kind": kind,
+                    "id": r["id"],
+                    "score": round(r["score"], 3),
+                    "created_at": r["created_at"],
+                    "dry_run": dry_run or not archive,
+                }
+            if cut:
+                stats["truncated"] = True
+                return
+            last_rowid = hi
+
+
+def run_prune(
+    dry_run: bool | None = None,
+    *,
+    limit: int | None = None,
+    time_budget_sec: float | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    db_path: Path | None = None,
+    config: dict | None = None,
+) -> dict:
     """
     执行 TTL 淘汰检查。
     返回 {candidates_pruned, experiences_pruned, details}
     """
-    config = load_config()
+    config = config or load_config()
     if dry_run is None:
         dry_run = config["dry_run"]
 
-    db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
-    c = conn(db_path)
+    c = conn(db_path or ROOT / "data" / "mindkernel_v0_1.sqlite")
+    init_db(c)
 
     candidates_pruned = []
     experiences_pruned = []
-    candidates_kept = 0
-    experiences_kept = 0
-
-    for rec in get_memory_records(c):
-        score = compute_score(rec["created_at"], rec.get("access_count", 0), config)
-        if should_prune(score, config["prune_threshold"]):
-            candidates_pruned.append({
-                "id": rec["id"],
-                "score": round(score, 3),
-                "created_at": rec["created_at"],
-                "dry_run": dry_run,
-            })
-        else:
-            candidates_kept += 1
-
-    for rec in get_experience_records(c):
-        score = compute_score(rec["created_at"], rec.get("access_count", 0), config)
-        if should_prune(score, config["prune_threshold"]):
-            if dry_run:
-                experiences_pruned.append({
-                    "id": rec["id"],
-                    "score": round(score, 3),
-                    "dry_run": True,
-                })
+    stats: dict = {}
+    started = time.monotonic()
+    try:
+        for rec in iter_prune(
+            c,
+            config,
+            dry_run=dry_run,
+            chunk_size=chunk_size,
+            limit=limit,
+            time_budget_sec=time_budget_sec,
+            stats=stats,
+        ):
+            kind = rec.pop("kind")
+            if kind == "candidate":
+                candidates_pruned.append(rec)
             else:
-                c.execute(
-                    "UPDATE experience_records SET status = 'archived' WHERE id = ?",
-                    (rec["id"],)
-                )
-                experiences_pruned.append({
-                    "id": rec["id"],
-                    "score": round(score, 3),
-                    "dry_run": False,
-                })
-        else:
-            experiences_kept += 1
-
-    if not dry_run:
-        c.commit()
-    c.close()
+                rec.pop("created_at")
+                experiences_pruned.append(rec)
+    finally:
+        c.close()
 
     return {
         "candidates_pruned": candidates_pruned,
-        "candidates_kept": candidates_kept,
+        "candidates_kept": stats.get("candidate_scanned", 0) - stats.get("candidate_pruned", 0),
         "experiences_pruned": experiences_pruned,
-        "experiences_kept": experiences_kept,
+        "experiences_kept": stats.get("experience_scanned", 0) - stats.get("experience_pruned", 0),
         "dry_run": dry_run,
+        "truncated": stats.get("truncated", False),
+        "elapsed_sec": round(time.monotonic() - started, 3),
         "config": {k: v for k, v in config.items() if k != "dry_run"},
     }
 
@@ -191,7 +315,34 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="MindKernel TTL Prune")
     parser.add_argument("--apply", action="store_true", help="实际执行删除（默认 dry_run）")
+    parser.add_argument("--limit", type=int, default=None, help="单次最多淘汰条数")
+    parser.add_argument("--time-budget-sec", type=float, default=None, help="单次运行时间预算（秒）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="每块扫描行数")
+    parser.add_argument("--ndjson", action="store_true", help="逐条流式输出 NDJSON，最后一行为统计")
     args = parser.parse_args()
 
-    result = run_prune(dry_run=not args.apply)
-    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.ndjson:
+        cfg = load_config()
+        c = conn(ROOT / "data" / "mindkernel_v0_1.sqlite")
+        init_db(c)
+        stats: dict = {}
+        for rec in iter_prune(
+            c,
+            cfg,
+            dry_run=not args.apply,
+            chunk_size=args.chunk_size,
+            limit=args.limit,
+            time_budget_sec=args.time_budget_sec,
+            stats=stats,
+        ):
+            print(json.dumps(rec, ensure_ascii=False))
+        c.close()
+        print(json.dumps({"stats": stats}, ensure_ascii=False))
+    else:
+        result = run_prune(
+            dry_run=not args.apply,
+            limit=args.limit,
+            time_budget_sec=args.time_budget_sec,
+            chunk_size=args.chunk_size,
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import os
 import sys
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 # Ensure core modules are importable
@@ -13,7 +14,9 @@ sys.path.insert(0, str(ROOT))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from plugins.api_server.routers import health, recall, reflect, retain, prune, adapters, knowledge, kg_ops, opinions
+from core.access_tracker import ACCESS_TRACKER
+from core.memory_experience_core_v0_1 import conn
+from plugins.api_server.routers import health, recall, reflect, retain, prune, adapters, knowledge, kg_ops, opinions, items
 
 # ---------------------------------------------------------------------------
 # App
@@ -21,7 +24,20 @@ from plugins.api_server.routers import health, recall, reflect, retain, prune, a
 
 VERSION = "0.3.0"
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    yield
+    # 退出前把进程内未落库的访问计数写入 memory_access_stats
+    c = conn(ROOT / "data" / "mindkernel_v0_1.sqlite")
+    try:
+        ACCESS_TRACKER.flush(c)
+    finally:
+        c.close()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="MindKernel API",
     description="MindKernel v0.3 REST API — 记忆 / 检索 / 反思",
     version=VERSION,
@@ -41,6 +57,7 @@ app.add_middleware(
 app.include_router(health.router, prefix="/api/v1", tags=["health"])
 app.include_router(retain.router, prefix="/api/v1", tags=["retain"])
 app.include_router(recall.router, prefix="/api/v1", tags=["recall"])
+app.include_router(items.router, prefix="/api/v1", tags=["recall"])
 app.include_router(reflect.router, prefix="/api/v1", tags=["reflect"])
 app.include_router(prune.router, prefix="/api/v1", tags=["prune"])
 app.include_router(adapters.router, prefix="/api/v1", tags=["adapters"])
@@ -34,6 +34,19 @@ class RetainResponse(BaseModel):
     detail: str
 
 
+RETAIN_BATCH_MAX = 500
+
+
+class RetainBatchRequest(BaseModel):
+    items: list[RetainRequest] = Field(..., min_length=1, max_length=RETAIN_BATCH_MAX)
+
+
+class RetainBatchResponse(BaseModel):
+    ok: bool
+    count: int
+    memory_ids: list[str]
+
+
 # ---------------------------------------------------------------------------
 # Recall
 # ---------------------------------------------------------------------------
@@ -61,6 +74,19 @@ class RecallResponse(BaseModel):
     query: str
     count: int
     results: list[RecallResultItem]
+    next_cursor: Optional[str] = Field(default=None, description="下一页游标，None 表示已到末页")
+
+
+# ---------------------------------------------------------------------------
+# Items（keyset 分页列表）
+# ---------------------------------------------------------------------------
+
+class ItemsPageResponse(BaseModel):
+    ok: bool
+    table: str
+    count: int
+    items: list[dict]
+    next_cursor: Optional[str] = None
 
 
 # ---------------------------------------------------------------------------
@@ -103,3 +129,5 @@ class HealthResponse(BaseModel):
     db_size_kb: int
     memory_items: int
     experience_records: int
+    recall_cache: dict = Field(default_factory=dict, description="recall 缓存 hit/miss 统计")
+    access_tracker: dict = Field(default_factory=dict, description="访问计数积压/落库统计")
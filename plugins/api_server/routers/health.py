@@ -11,7 +11,9 @@ from fastapi import APIRouter, Depends
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
+from core.access_tracker import ACCESS_TRACKER
 from core.memory_experience_core_v0_1 import conn, init_db
+from core.recall_cache import RECALL_CACHE
 from plugins.api_server.auth import verify_api_key
 from plugins.api_server.models import HealthResponse
 
@@ -43,6 +45,8 @@ async def health(_key: str = Depends(verify_api_key)):
             db_size_kb=db_size_kb,
             memory_items=mem_count,
             experience_records=exp_count,
+            recall_cache=RECALL_CACHE.stats(),
+            access_tracker=ACCESS_TRACKER.stats(),
         )
     finally:
         c.close()
@@ -0,0 +1,98 @@
+"""GET /api/v1/items — keyset 分页列出记忆/经验；/items/export — NDJSON 流式导出."""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+ROOT = Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(ROOT))
+
+from core.access_tracker import ACCESS_TRACKER
+from core.memory_experience_core_v0_1 import ITEM_TABLES, conn, decode_cursor, init_db, list_items_page
+from plugins.api_server.auth import verify_api_key
+from plugins.api_server.models import ItemsPageResponse
+
+router = APIRouter()
+
+DB_PATH = ROOT / "data" / "mindkernel_v0_1.sqlite"
+EXPORT_PAGE_SIZE = 500
+
+
+def _check_args(table: str, cursor: str | None):
+    if table not in ITEM_TABLES:
+        raise HTTPException(status_code=400, detail=f"invalid table: {table}")
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/items", response_model=ItemsPageResponse)
+async def list_items_endpoint(
+    table: str = Query(default="memory_items"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor"),
+    include_payload: bool = Query(default=False),
+    _key: str = Depends(verify_api_key),
+):
+    """按 (updated_at, id) 降序分页；next_cursor 为 None 表示已到末页。"""
+    _check_args(table, cursor)
+    c = conn(DB_PATH)
+    init_db(c)
+
+    try:
+        page = list_items_page(c, table, limit=limit, cursor=cursor, include_payload=include_payload)
+        ACCESS_TRACKER.record(item["id"] for item in page["items"])
+        ACCESS_TRACKER.maybe_flush(c)
+        return ItemsPageResponse(
+            ok=True,
+            table=table,
+            count=len(page["items"]),
+            items=page["items"],
+            next_cursor=page["next_cursor"],
+        )
+    finally:
+        c.close()
+
+
+def _iter_ndjson(table: str, cursor: str | None, include_payload: bool):
+    # 每页单独开关连接：StreamingResponse 可能在不同线程上迭代生成器，
+    # keyset 游标无状态，逐页重开连接的开销可以忽略
+    while True:
+        c = conn(DB_PATH)
+        try:
+            page = list_items_page(c, table, limit=EXPORT_PAGE_SIZE, cursor=cursor, include_payload=include_payload)
+        finally:
+            c.close()
+
+        for item in page["items"]:
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+
+        cursor = page["next_cursor"]
+        if not cursor:
+            return
+
+
+@router.get("/items/export")
+async def export_items(
+    table: str = Query(default="memory_items"),
+    cursor: str | None = Query(default=None, description="从该游标之后继续导出（断点续传）"),
+    include_payload: bool = Query(default=True),
+    _key: str = Depends(verify_api_key),
+):
+    """NDJSON 流式导出整表，每行一个 item，内存占用与表大小无关。"""
+    _check_args(table, cursor)
+    c = conn(DB_PATH)
+    init_db(c)
+    c.close()
+
+    return StreamingResponse(
+        _iter_ndjson(table, cursor, include_payload),
+        media_type="application/x-ndjson",
+    )
@@ -1,18 +1,24 @@
-"""POST /api/v1/knowledge/relations — 添加知识关系；extract — 从文本抽取关系."""
+"""POST /api/v1/knowledge/relations — 添加知识关系；extract — 从文本抽取关系；traverse / neighbors / path — 多跳遍历."""
 
 from __future__ import annotations
 
 import sys
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
 
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
-from core.knowledge_graph import add_relation, auto_extract_and_store, init_graph_db
-from core.memory_experience_core_v0_1 import conn
+from core.knowledge_graph import (
+    DEFAULT_MAX_DEPTH,
+    DEFAULT_MAX_FANOUT,
+    DEFAULT_MIN_PATH_CONFIDENCE,
+    MAX_TRAVERSE_DEPTH,
+    auto_extract_and_store,
+    get_store,
+)
 from plugins.api_server.auth import verify_api_key
 
 router = APIRouter()
@@ -34,30 +40,23 @@ class ExtractRequest(BaseModel):
 
 @router.post("/knowledge/relations")
 async def add_kg_relation(req: AddRelationRequest, _key: str = Depends(verify_api_key)):
-    """手动添加一条知识关系。"""
-    db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
-    c = conn(db_path)
-    init_graph_db(c)
-    c.close()
-
-    rel_id = add_relation(
-        subject=req.subject,
-        predicate=req.predicate,
-        obj=req.object,
-        confidence=req.confidence,
-        source=req.source,
-    )
+    """手动添加一条知识关系（已存在的三元组合并 confidence/来源，返回原 id）。"""
+    try:
+        rel_id = get_store().add_relation(
+            subject=req.subject,
+            predicate=req.predicate,
+            obj=req.object,
+            confidence=req.confidence,
+            source=req.source,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     return {"ok": True, "relation_id": rel_id}
 
 
 @router.post("/knowledge/extract")
 async def extract_relations(req: ExtractRequest, _key: str = Depends(verify_api_key)):
     """从文本内容中 LLM 抽取知识关系并自动写入图谱。"""
-    db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
-    c = conn(db_path)
-    init_graph_db(c)
-    c.close()
-
     stored_ids = auto_extract_and_store(
         content=req.content,
         memory_id=req.memory_id,
@@ -68,3 +67,51 @@ async def extract_relations(req: ExtractRequest, _key: str = Depends(verify_api_
         "extracted_count": len(stored_ids),
         "relation_ids": stored_ids,
     }
+
+
+@router.get("/knowledge/traverse")
+async def traverse_graph(
+    entity: str = Query(..., description="起点实体"),
+    max_depth: int = Query(default=DEFAULT_MAX_DEPTH, ge=1, le=MAX_TRAVERSE_DEPTH),
+    max_fanout: int = Query(default=DEFAULT_MAX_FANOUT, ge=1, le=1000, description="每个实体最多展开的边数"),
+    min_confidence: float = Query(default=DEFAULT_MIN_PATH_CONFIDENCE, ge=0.0, le=1.0, description="路径置信度乘积下限"),
+    limit: int = Query(default=200, ge=1, le=5000),
+    engine: str = Query(default="sql", pattern="^(sql|snapshot)$", description="sql=递归 CTE；snapshot=内存邻接快照"),
+    _key: str = Depends(verify_api_key),
+):
+    """多跳遍历：返回每个可达实体的最高路径置信度与对应路径。"""
+    store = get_store()
+    target = store.snapshot() if engine == "snapshot" else store
+    nodes = target.traverse(
+        entity,
+        max_depth=max_depth,
+        max_fanout=max_fanout,
+        min_path_confidence=min_confidence,
+        limit=limit,
+    )
+    return {"ok": True, "entity": entity, "engine": engine, "count": len(nodes), "nodes": nodes}
+
+
+@router.get("/knowledge/neighbors")
+async def entity_neighbors(
+    entity: str = Query(..., description="实体名称"),
+    limit: int = Query(default=50, ge=1, le=1000),
+    _key: str = Depends(verify_api_key),
+):
+    """邻居（基于内存邻接快照，按 confidence 降序）。"""
+    neighbors = get_store().snapshot().neighbors(entity, limit=limit)
+    return {"ok": True, "entity": entity, "count": len(neighbors), "neighbors": neighbors}
+
+
+@router.get("/knowledge/path")
+async def shortest_path(
+    src: str = Query(..., description="起点实体"),
+    dst: str = Query(..., description="终点实体"),
+    max_depth: int = Query(default=6, ge=1, le=MAX_TRAVERSE_DEPTH),
+    _key: str = Depends(verify_api_key),
+):
+    """最少跳数路径（基于内存邻接快照）；不可达返回 404。"""
+    found = get_store().snapshot().shortest_path(src, dst, max_depth=max_depth)
+    if found is None:
+        raise HTTPException(status_code=404, detail=f"no path within {max_depth} hops: {src} -> {dst}")
+    return {"ok": True, "src": src, "dst": dst, **found}
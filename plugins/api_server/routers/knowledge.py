@@ -10,8 +10,7 @@ from fastapi import APIRouter, Depends, Query
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
-from core.knowledge_graph import get_relations, init_graph_db
-from core.memory_experience_core_v0_1 import conn
+from core.knowledge_graph import get_store
 from plugins.api_server.auth import verify_api_key
 
 router = APIRouter()
@@ -24,12 +23,7 @@ async def get_entity_relations(
     _key: str = Depends(verify_api_key),
 ):
     """查询某实体的知识关系图谱。"""
-    db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
-    c = conn(db_path)
-    init_graph_db(c)
-    c.close()
-
-    relations = get_relations(entity, depth=depth)
+    relations = get_store().get_relations(entity, depth=depth)
     return {
         "ok": True,
         "entity": entity,
@@ -5,7 +5,7 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
@@ -17,12 +17,18 @@ router = APIRouter()
 
 
 @router.post("/prune")
-async def prune(apply: bool = False, _key: str = Depends(verify_api_key)):
+async def prune(
+    apply: bool = False,
+    limit: int | None = Query(default=None, ge=1, description="单次最多淘汰条数"),
+    time_budget_sec: float | None = Query(default=None, gt=0, description="单次运行时间预算（秒）"),
+    _key: str = Depends(verify_api_key),
+):
     """
     触发 TTL 遗忘策略。
 
     apply=false（默认）：干跑模式，只报告会清理哪些，不实际删除
     apply=true：实际执行删除
+    limit / time_budget_sec：限制单次运行规模，超限时返回 truncated=true
     """
-    result = run_prune(dry_run=not apply)
+    result = run_prune(dry_run=not apply, limit=limit, time_budget_sec=time_budget_sec)
     return result
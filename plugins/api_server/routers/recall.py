@@ -7,12 +7,14 @@ import sys
 from datetime import datetime
 from pathlib import Path
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
-from core.memory_experience_core_v0_1 import conn, init_db
+from core.access_tracker import ACCESS_TRACKER
+from core.memory_experience_core_v0_1 import ITEM_TABLES, conn, init_db, list_items_page
+from core.recall_cache import RECALL_CACHE
 from plugins.api_server.auth import verify_api_key
 from plugins.api_server.models import RecallResponse, RecallResultItem
 
@@ -34,29 +36,32 @@ async def recall(
     top_k: int = Query(default=5, ge=1, le=50),
     include_opinions: bool = Query(default=False),
     table: str = Query(default="memory_items"),
+    cursor: str | None = Query(default=None, description="上一页返回的 next_cursor（keyset 分页）"),
     _key: str = Depends(verify_api_key),
 ):
+    """每页扫描 (updated_at, id) 降序的下一段 top_k*10 行并打分；next_cursor 为 None 表示已扫描完。"""
+    if table not in ITEM_TABLES:
+        raise HTTPException(status_code=400, detail=f"invalid table: {table}")
+
     db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
     c = conn(db_path)
     init_db(c)
 
-    try:
+    def _compute() -> tuple[list[RecallResultItem], str | None]:
         # 关键词匹配：content 包含查询词即命中
         # 后续替换为向量检索以提升语义匹配质量
-        rows = c.execute(
-            f"SELECT id, status, updated_at, payload_json FROM {table} ORDER BY updated_at DESC LIMIT ?",
-            (top_k * 10,),
-        ).fetchall()
+        # content 取反范式列过滤，仅对命中行解析 payload_json
+        page = list_items_page(c, table, limit=top_k * 10, cursor=cursor, fields=("content", "payload_json"))
 
         q_lower = q.lower()
         scored = []
-        for row in rows:
-            try:
-                payload = json.loads(row["payload_json"])
-            except (json.JSONDecodeError, KeyError):
-                continue
-            content = payload.get("content", "")
+        for row in page["items"]:
+            content = row["content"] or ""
             if q_lower in content.lower():
+                try:
+                    payload = json.loads(row["payload_json"])
+                except json.JSONDecodeError:
+                    continue
                 item = RecallResultItem(
                     id=row["id"],
                     content=content,
@@ -70,13 +75,31 @@ async def recall(
                 scored.append((content.lower().count(q_lower), item))
 
         scored.sort(key=lambda x: x[0], reverse=True)
-        results = [item for _, item in scored[:top_k]]
+        return [item for _, item in scored[:top_k]], page["next_cursor"]
+
+    try:
+        try:
+            results, next_cursor = RECALL_CACHE.get_or_compute(
+                c,
+                query=q,
+                table=table,
+                top_k=top_k,
+                filters={"include_opinions": include_opinions, "cursor": cursor},
+                compute=_compute,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # 缓存命中同样计为访问；计数只进内存，按间隔批量落库
+        ACCESS_TRACKER.record(r.id for r in results)
+        ACCESS_TRACKER.maybe_flush(c)
 
         return RecallResponse(
             ok=True,
             query=q,
             count=len(results),
             results=results,
+            next_cursor=next_cursor,
         )
     finally:
         c.close()
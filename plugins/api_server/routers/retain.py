@@ -1,4 +1,4 @@
-"""POST /api/v1/retain — 写入一条记忆到 MindKernel."""
+"""POST /api/v1/retain — 写入一条记忆到 MindKernel；/retain/batch — 批量写入."""
 
 from __future__ import annotations
 
@@ -6,14 +6,14 @@ import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 
 ROOT = Path(__file__).resolve().parents[3]
 sys.path.insert(0, str(ROOT))
 
-from core.memory_experience_core_v0_1 import conn, ingest_memory, init_db
+from core.memory_experience_core_v0_1 import conn, ingest_memory, ingest_memory_many, init_db
 from plugins.api_server.auth import verify_api_key
-from plugins.api_server.models import RetainRequest, RetainResponse
+from plugins.api_server.models import RetainBatchRequest, RetainBatchResponse, RetainRequest, RetainResponse
 
 router = APIRouter()
 
@@ -88,3 +88,32 @@ async def retain(req: RetainRequest, _key: str = Depends(verify_api_key)):
         return RetainResponse(ok=True, memory_id=payload["id"], detail=detail)
     finally:
         c.close()
+
+
+@router.post("/retain/batch", response_model=RetainBatchResponse)
+async def retain_batch(req: RetainBatchRequest, _key: str = Depends(verify_api_key)):
+    """批量写入：整批一个事务，任一条失败则整批回滚（返回 422）。"""
+    db_path = ROOT / "data" / "mindkernel_v0_1.sqlite"
+    c = conn(db_path)
+    init_db(c)
+
+    try:
+        payloads = [
+            _build_payload(
+                content=item.content,
+                source=item.source,
+                document_date=item.document_date,
+                event_date=item.event_date,
+                confidence=item.confidence,
+                tags=item.tags,
+                metadata=item.metadata,
+            )
+            for item in req.items
+        ]
+        try:
+            result = ingest_memory_many(c, payloads, actor_id="api")
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        return RetainBatchResponse(ok=True, count=result["count"], memory_ids=result["memory_ids"])
+    finally:
+        c.close()
@@ -26,7 +26,7 @@ ROOT = Path(__file__).resolve().parents[2]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from plugins.mcp_server.tools import TOOLS
+from plugins.mcp_server.tools import TOOLS, flush_access_stats
 
 # ---------------------------------------------------------------------------
 # MCP Protocol Types
@@ -222,6 +222,8 @@ def main():
             sys.stderr.write(tb + "\n")
             sys.stderr.flush()
 
+    flush_access_stats()
+
 
 if __name__ == "__main__":
     main()
@@ -12,13 +12,15 @@ for _p in [str(ROOT), str(TOOLS_DIR)]:
     if _p not in sys.path:
         sys.path.insert(0, _p)
 
+from core.access_tracker import ACCESS_TRACKER
 from core.memory_experience_core_v0_1 import (
     conn,
     ingest_memory,
-    list_items,
+    list_items_page,
     memory_to_experience,
     init_db,
 )
+from core.recall_cache import RECALL_CACHE
 from core.reflect_gate_v0_1 import route_proposal
 
 # ---------------------------------------------------------------------------
@@ -150,6 +152,10 @@ RECALL_SCHEMA = {
             "description": "最多返回条数",
             "default": 20,
         },
+        "cursor": {
+            "type": "string",
+            "description": "上一页返回的 next_cursor，按 (updated_at, id) keyset 翻页",
+        },
     },
 }
 
@@ -158,20 +164,45 @@ def recall_memories(args: dict) -> dict:
     """查询 MindKernel 中的记忆或经验记录。"""
     table = args.get("table", "memory_items")
     limit = args.get("limit", 20)
+    cursor = args.get("cursor")
 
     db_path = Path(__file__).resolve().parents[2] / "data" / "mindkernel_v0_1.sqlite"
     c = conn(db_path)
     init_db(c)
 
     try:
-        rows = list_items(c, table, limit)
-        return {"ok": True, "table": table, "count": len(rows), "items": rows}
+        page = RECALL_CACHE.get_or_compute(
+            c,
+            query=None,
+            table=table,
+            top_k=limit,
+            filters={"cursor": cursor},
+            compute=lambda: list_items_page(c, table, limit=limit, cursor=cursor),
+        )
+        ACCESS_TRACKER.record(item["id"] for item in page["items"])
+        ACCESS_TRACKER.maybe_flush(c)
+        return {
+            "ok": True,
+            "table": table,
+            "count": len(page["items"]),
+            "items": page["items"],
+            "next_cursor": page["next_cursor"],
+        }
     except Exception as e:
         return {"error": str(e)}
     finally:
         c.close()
 
 
+def flush_access_stats():
+    """把进程内未落库的访问计数写入 memory_access_stats（server 退出前调用）。"""
+    c = conn(Path(__file__).resolve().parents[2] / "data" / "mindkernel_v0_1.sqlite")
+    try:
+        ACCESS_TRACKER.flush(c)
+    finally:
+        c.close()
+
+
 # ---------------------------------------------------------------------------
 # Tool: reflect_on_memory
 # ---------------------------------------------------------------------------
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "scheduler"))
+
+from core import ttl_strategy
+from core.access_tracker import AccessTracker, read_access_counts
+from core.memory_experience_core_v0_1 import conn, init_db
+from core.ttl_strategy import DEFAULT_CONFIG, iter_prune
+from temporal_governance_worker_v0_1 import _decide_target_status  # noqa: E402
+
+
+def _iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class AccessTrackerTest(unittest.TestCase):
+    def test_flush_upserts_with_decay(self):
+        t0 = datetime(2026, 6, 1, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            tracker = AccessTracker(flush_interval_sec=3600, decay_per_day=0.95)
+
+            tracker.record(["mem_a", "mem_a", "mem_b"])
+            self.assertEqual(tracker.maybe_flush(c), 0)  # 未到间隔，不落库
+            self.assertEqual(tracker.flush(c, now=t0), 2)
+            self.assertEqual(tracker.pending(), 0)
+
+            tracker.record(["mem_a"])
+            tracker.flush(c, now=t0 + timedelta(days=10))
+
+            got = read_access_counts(c, ["mem_a", "mem_b", "mem_x"], now=t0 + timedelta(days=10))
+            self.assertAlmostEqual(got["mem_a"]["count"], 2 * 0.95**10 + 1, places=6)
+            self.assertAlmostEqual(got["mem_b"]["count"], 0.95**10, places=6)
+            self.assertEqual(got["mem_a"]["last_access_at"], _iso(t0 + timedelta(days=10)))
+            self.assertNotIn("mem_x", got)
+            self.assertEqual(tracker.stats()["flushed"], 3)
+
+    def test_accesses_feed_ttl_and_temporal_decay(self):
+        now = datetime.now(timezone.utc)
+        created = _iso(now - timedelta(days=30))
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            for i in range(2):
+                c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (f"exp_{i}", "active", json.dumps({"id": f"exp_{i}"}), created, created),
+                )
+            c.commit()
+
+            pruned = {r["id"] for r in iter_prune(c, DEFAULT_CONFIG, dry_run=True, now=now)}
+            self.assertEqual(pruned, {"exp_0", "exp_1"})
+
+            tracker = AccessTracker()
+            tracker.record(["exp_1"] * 10)
+            tracker.flush(c, now=now)
+
+            pruned = {r["id"] for r in iter_prune(c, DEFAULT_CONFIG, dry_run=True, now=now)}
+            self.assertEqual(pruned, {"exp_0"})
+
+            access = read_access_counts(c, ["exp_1"]).get("exp_1")
+            target, reason = _decide_target_status("experience", "decay", "active", {}, access)
+            self.assertIsNone(target)
+            self.assertIn("recently accessed", reason)
+            target, _ = _decide_target_status("experience", "decay", "active", {}, None)
+            self.assertEqual(target, "needs_review")
+
+    def test_default_decay_follows_ttl_config(self):
+        t0 = datetime(2026, 6, 1, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as td:
+            cfg_path = Path(td) / "ttl_policy.json"
+            cfg_path.write_text(json.dumps({"decay_factor": 0.5}))
+            c = conn(Path(td) / "mk.sqlite")
+            with mock.patch.object(ttl_strategy, "CONFIG_PATH", cfg_path):
+                tracker = AccessTracker(flush_interval_sec=3600)
+                tracker.record(["mem_a"] * 4)
+                tracker.flush(c, now=t0)
+                tracker.record(["mem_a"])
+                tracker.flush(c, now=t0 + timedelta(days=2))
+
+                # 写侧折算与读侧折算都用配置中的 0.5
+                got = read_access_counts(c, ["mem_a"], now=t0 + timedelta(days=3))
+                self.assertAlmostEqual(got["mem_a"]["count"], (4 * 0.5**2 + 1) * 0.5, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
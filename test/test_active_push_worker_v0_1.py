@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "active_push"))
+
+import active_push_worker_v0_1 as push  # noqa: E402
+from core.memory_experience_core_v0_1 import init_db  # noqa: E402
+
+
+class ActivePushWorkerV01Test(unittest.TestCase):
+    def test_experience_cards_tolerate_malformed_payload(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            c = sqlite3.connect(str(db))
+            init_db(c)
+            rows = [
+                ("exp_1", json.dumps({"episode_summary": "部署回滚", "applicability": ["发布前先灰度"]}, ensure_ascii=False)),
+                ("exp_2", "{broken"),
+                ("exp_3", json.dumps({"episode_summary": "慢查询", "action_taken": "加索引"}, ensure_ascii=False)),
+            ]
+            for i, (exp_id, raw) in enumerate(rows):
+                c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, 'active', ?, ?, ?)",
+                    (exp_id, raw, f"2026-03-0{i + 1}T00:00:00Z", f"2026-03-0{i + 1}T00:00:00Z"),
+                )
+            c.commit()
+            c.close()
+
+            with mock.patch.object(push, "LEDGER_FILE", Path(td) / "ledger.jsonl"):
+                cards = {card["experience_id"]: card["text"] for card in push.scan_experience_cards(db, dry_run=True)}
+
+            self.assertEqual(set(cards), {"exp_1", "exp_2", "exp_3"})
+            self.assertIn("心得：发布前先灰度", cards["exp_1"])
+            self.assertIn("行动：加索引", cards["exp_3"])
+            self.assertNotIn("背景", cards["exp_2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+from core.cognition_engine import (
+    batch_experience_to_cognition,
+    init_cognition_db,
+)
+from core.memory_experience_core_v0_1 import conn, init_db
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class CognitionEngineDedupTest(unittest.TestCase):
+    def _seed(self, c, n: int):
+        t = _now()
+        for i in range(n):
+            payload = {"id": f"exp_{i}", "outcome": "positive", "confidence": 0.8, "episode_summary": f"经验 {i}"}
+            c.execute(
+                "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, 'active', ?, ?, ?)",
+                (f"exp_{i}", json.dumps(payload, ensure_ascii=False), t, t),
+            )
+        c.commit()
+
+    def test_backfill_from_legacy_rows(self):
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            self._seed(c, 3)
+            t = _now()
+            # 旧版引擎写入的 cognition：链接只存在于审计 metadata / evidence_refs 中
+            c.executescript(
+                """
+                CREATE TABLE cognition_rules (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload_json TEXT NOT NULL,
+                    created_at TEXT NOT NULL, updated_at TEXT NOT NULL);
+                """
+            )
+            c.execute(
+                "INSERT INTO cognition_rules VALUES ('cog_old0', 'candidate', ?, ?, ?)",
+                (json.dumps({"evidence_refs": ["mem_x"]}), t, t),
+            )
+            c.execute(
+                "INSERT INTO audit_events VALUES ('aud_0', 'state_transition', 'cognition', 'cog_old0', NULL, ?, ?)",
+                (t, json.dumps({"metadata": {"experience_id": "exp_0"}})),
+            )
+            c.execute(
+                "INSERT INTO cognition_rules VALUES ('cog_old1', 'candidate', ?, ?, ?)",
+                (json.dumps({"evidence_refs": ["exp_1"]}), t, t),
+            )
+            c.commit()
+
+            init_cognition_db(c)
+            self.assertEqual(
+                dict(c.execute("SELECT experience_id, cognition_id FROM cognition_sources").fetchall()),
+                {"exp_0": "cog_old0", "exp_1": "cog_old1"},
+            )
+
+            out = batch_experience_to_cognition(c)
+            self.assertEqual((out["total"], out["applied"], out["skipped"], out["failed"]), (3, 1, 2, 0))
+
+    def test_batch_is_idempotent(self):
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            self._seed(c, 5)
+
+            first = batch_experience_to_cognition(c)
+            self.assertEqual((first["applied"], first["skipped"]), (5, 0))
+            second = batch_experience_to_cognition(c, experience_ids=["exp_0", "exp_3"])
+            self.assertEqual((second["applied"], second["skipped"]), (0, 2))
+            created = {r["experience_id"]: r["cognition_id"] for r in first["results"]}
+            self.assertEqual({r["cognition_id"] for r in second["results"]}, {created["exp_0"], created["exp_3"]})
+
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM cognition_rules").fetchone()[0], 5)
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM cognition_sources").fetchone()[0], 5)
+            plan = " ".join(
+                r[-1]
+                for r in c.execute(
+                    "EXPLAIN QUERY PLAN SELECT cognition_id FROM cognition_sources WHERE experience_id=?", ("exp_0",)
+                )
+            )
+            self.assertNotIn("SCAN", plan)
+
+    def test_chunked_drain_resumes_from_watermark(self):
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            self._seed(c, 250)  # 超过旧版单次 100 条上限
+
+            first = batch_experience_to_cognition(c, chunk_size=40, limit=90)
+            self.assertEqual((first["total"], first["applied"], first["chunks"]), (90, 90, 3))
+            self.assertFalse(first["exhausted"])
+
+            rest = batch_experience_to_cognition(c, chunk_size=40)
+            self.assertIsNotNone(rest["resumed_from"])
+            self.assertEqual((rest["total"], rest["applied"], rest["skipped"]), (160, 160, 0))
+            self.assertTrue(rest["exhausted"])
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM cognition_engine_state").fetchone()[0], 0)
+
+            self.assertEqual(c.execute("SELECT COUNT(DISTINCT experience_id) FROM cognition_sources").fetchone()[0], 250)
+            self.assertEqual(
+                c.execute("SELECT COUNT(*) FROM audit_events WHERE object_type = 'cognition'").fetchone()[0], 250
+            )
+
+            # 水位线清除后重新扫描整个窗口，全部命中链接表去重
+            again = batch_experience_to_cognition(c, chunk_size=100)
+            self.assertIsNone(again["resumed_from"])
+            self.assertEqual((again["total"], again["applied"], again["skipped"]), (250, 0, 250))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.dialogue_context_resolver import (
+    DialogueContextResolver,
+    init_dialogue_state_db,
+    resolve_session_incremental,
+    resolve_transcript_incremental,
+    task_closure_summary,
+)
+
+
+def m(index: int, role: str, text: str, ts: str) -> dict:
+    return {"role": role, "content": text, "timestamp": ts, "index": index}
+
+
+DAY1 = [
+    m(0, "assistant", "方案是把周报 cron 改成每周五 18:00 发送", "2026-03-01T09:00:00Z"),
+    m(1, "user", "可以", "2026-03-01T09:01:00Z"),
+    m(2, "user", "完成了，看到邮件了", "2026-03-01T09:30:00Z"),
+    m(3, "assistant", "要不要顺便把日报也迁过去，按同样的方式处理", "2026-03-01T10:00:00Z"),
+]
+
+
+def _contents(resolved) -> list[str]:
+    return [r.content for r in resolved]
+
+
+class DialogueContextResolverTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.dir = Path(self._td.name)
+        self.db = self.dir / "mk.sqlite"
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def _conn(self) -> sqlite3.Connection:
+        c = sqlite3.connect(str(self.db))
+        init_dialogue_state_db(c)
+        return c
+
+    def test_one_shot_resolve_expires_open_tasks_at_end(self):
+        out = DialogueContextResolver().resolve(DAY1)
+        self.assertEqual(
+            _contents(out),
+            [
+                "[任务提案] 把周报 cron 改成每周五 18:00 发送",
+                "「把周报 cron 改成每周五 18:00 发送」已获批待执行",
+                "「把周报 cron 改成每周五 18:00 发送」已完成",
+                "[任务提案] 顺便把日报也迁过去，按同样的方式处理",
+                "「顺便把日报也迁过去，按同样的方式处理」已批准，状态未知",
+            ],
+        )
+        self.assertEqual([r.sources for r in out[:4]], [[0], [1], [2], [3]])
+
+    def test_incremental_resume_across_calls_matches_one_shot(self):
+        now = "2026-03-01T12:00:00Z"
+        got = []
+        for chunk in (DAY1[:1], DAY1[:2], DAY1):  # 调用方可每次传完整列表，只处理新消息
+            c = self._conn()
+            got.extend(resolve_session_incremental(c, "sess-a", chunk, now=now))
+            c.close()
+        # 当日任务不过期，跨调用保持 active
+        self.assertEqual(_contents(got), _contents(DialogueContextResolver().resolve(DAY1))[:4])
+
+        c = self._conn()
+        rows = c.execute("SELECT status, approved FROM dialogue_tasks WHERE session_id='sess-a' ORDER BY proposal_index").fetchall()
+        self.assertEqual(rows, [("completed", 1), ("active", 0)])
+        self.assertEqual(c.execute("SELECT last_index, task_count FROM dialogue_sessions").fetchone(), (3, 2))
+
+        # 次日消息到达：先按截止时间弹出昨日未完成任务，再处理新消息
+        day2 = DAY1 + [m(4, "user", "可以", "2026-03-02T08:00:00Z")]
+        out = resolve_session_incremental(c, "sess-a", day2, now="2026-03-02T08:05:00Z")
+        self.assertEqual(_contents(out), ["「顺便把日报也迁过去，按同样的方式处理」已批准，状态未知"])
+        self.assertEqual(out[0].timestamp, "2026-03-02T00:00:00Z")
+        self.assertEqual(c.execute("SELECT COUNT(*) FROM dialogue_tasks WHERE status='active'").fetchone()[0], 0)
+
+        summary = task_closure_summary(c, since="2026-01-01T00:00:00Z")
+        self.assertIn("✅ 「把周报 cron 改成每周五 18:00 发送」已完成", summary)
+        self.assertIn("❔ 「顺便把日报也迁过去，按同样的方式处理」已批准，状态未知", summary)
+        c.close()
+
+    def test_completion_needs_prior_task_in_session_even_after_reload(self):
+        c = self._conn()
+        self.assertEqual(resolve_session_incremental(c, "sess-b", [m(0, "user", "好的", "2026-03-01T09:00:00Z")]), [])
+        resolve_session_incremental(c, "sess-b", [DAY1[0]], now="2026-03-01T09:00:30Z")
+        resolve_session_incremental(c, "sess-b", [m(2, "user", "搞定", "2026-03-01T09:05:00Z")], now="2026-03-01T09:06:00Z")
+        out = resolve_session_incremental(c, "sess-b", [m(3, "user", "好的", "2026-03-01T09:10:00Z")], now="2026-03-01T09:11:00Z")
+        # 任务已关闭，但会话内建过任务：完成信号被消费但无 active 任务可关闭
+        self.assertEqual(out, [])
+        self.assertEqual(task_closure_summary(c, since="2099-01-01T00:00:00Z"), "（无活跃任务数据）")
+        c.close()
+
+    def test_transcript_incremental_reads_only_appended_lines(self):
+        path = self.dir / "sess-t.jsonl"
+
+        def line(msg: dict) -> str:
+            row = {"type": "message", "timestamp": msg["timestamp"], "message": {"role": msg["role"], "content": msg["content"]}}
+            return json.dumps(row, ensure_ascii=False) + "\n"
+
+        path.write_text('{"type": "session", "id": "sess-t"}\n' + line(DAY1[0]) + line(DAY1[1])[:10], encoding="utf-8")
+        first = resolve_transcript_incremental(str(path), db_path=self.db, now="2026-03-01T12:00:00Z")
+        self.assertEqual(_contents(first), ["[任务提案] 把周报 cron 改成每周五 18:00 发送"])
+        self.assertEqual(first[0].sources, [1])
+
+        with path.open("a", encoding="utf-8") as f:
+            f.write(line(DAY1[1])[10:] + line(DAY1[2]))
+        second = resolve_transcript_incremental(str(path), db_path=self.db, now="2026-03-01T12:00:00Z")
+        self.assertEqual([r.sources for r in second], [[2], [3]])
+        self.assertTrue(second[-1].content.endswith("已完成"))
+        self.assertEqual(resolve_transcript_incremental(str(path), db_path=self.db, now="2026-03-01T12:00:00Z"), [])
+
+        c = self._conn()
+        offset, last_index = c.execute("SELECT transcript_offset, last_index FROM dialogue_sessions WHERE session_id='sess-t'").fetchone()
+        self.assertEqual((offset, last_index), (path.stat().st_size, 3))
+
+        # 轮转为新文件：从头读取，任务状态保留
+        rotated = self.dir / "rotated.jsonl"
+        rotated.write_text(line(DAY1[3]), encoding="utf-8")
+        os.replace(rotated, path)
+        third = resolve_transcript_incremental(str(path), db_path=self.db, now="2026-03-01T12:00:00Z")
+        self.assertEqual([r.sources for r in third], [[0]])
+        self.assertEqual(c.execute("SELECT task_count FROM dialogue_sessions WHERE session_id='sess-t'").fetchone()[0], 2)
+        c.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from core.dialogue_context_resolver import resolve_session_incremental
+from core.dreaming_preprocessor import (
+    _build_experience_summaries,
+    _build_memory_summaries,
+    build_dreaming_input,
+    conn,
+)
+
+
+def _iso(days_ago: float = 0, seconds: int = 0) -> str:
+    t = datetime.now(timezone.utc) - timedelta(days=days_ago) + timedelta(seconds=seconds)
+    return t.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class DreamingSnapshotTest(unittest.TestCase):
+    def _seed(self, c):
+        for i in range(12):
+            t = _iso(days_ago=i, seconds=i)  # 前 8 条在 7 天窗口内
+            status = "archived" if i == 3 else "active"
+            payload = {"text": f"记忆 {i}", "importance": 0.5 + i / 100, "role": "user"}
+            c.execute(
+                "INSERT INTO memory_items(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (f"mem_{i}", status, json.dumps(payload, ensure_ascii=False), t, t),
+            )
+        for i in range(5):
+            t = _iso(days_ago=i * 9)
+            payload = {"content": f"经验 {i}", "outcome": "positive"}
+            c.execute(
+                "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, 'active', ?, ?, ?)",
+                (f"exp_{i}", json.dumps(payload, ensure_ascii=False), t, t),
+            )
+        c.commit()
+
+    def test_snapshot_matches_full_build_and_is_incremental(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            memo = Path(td) / "memo.json"
+            c = conn(db)
+            self._seed(c)
+
+            first = build_dreaming_input(db_path=db, memo_path=memo)
+            mem_items, mem_summary = _build_memory_summaries(c)
+            exp_items, exp_summary = _build_experience_summaries(c)
+            self.assertEqual(first["memory_items"], mem_items)
+            self.assertEqual(first["memory_summary"], mem_summary)
+            self.assertEqual(first["experience_items"], exp_items)
+            self.assertEqual(first["experience_summary"], exp_summary)
+            self.assertEqual((first["memory_count"], first["experience_count"]), (7, 4))
+            self.assertFalse(first["snapshot_stats"]["topics_cached"])
+            self.assertEqual(first["task_closure_summary"], "（无活跃任务数据）")
+            self.assertTrue(memo.exists())
+
+            # 无写入：按写代数跳过，不读任何行，话题分割命中缓存
+            second = build_dreaming_input(db_path=db, memo_path=memo)
+            stats = second["snapshot_stats"]
+            self.assertEqual((stats["memory_rows_read"], stats["experience_rows_read"]), (0, 0))
+            self.assertTrue(stats["topics_cached"])
+            self.assertEqual(second["memory_summary"], first["memory_summary"])
+            self.assertEqual(second["topic_segments"], first["topic_segments"])
+
+            # 新增一条 + 不改 updated_at 的删除 + 归档
+            t = _iso()
+            c.execute(
+                "INSERT INTO memory_items(id, status, payload_json, created_at, updated_at) VALUES ('mem_new', 'active', ?, ?, ?)",
+                (json.dumps({"text": "新记忆"}, ensure_ascii=False), t, t),
+            )
+            c.execute("DELETE FROM memory_items WHERE id = 'mem_5'")
+            c.execute("UPDATE memory_items SET status = 'archived', updated_at = ? WHERE id = 'mem_1'", (t,))
+            c.commit()
+            proposal = {"role": "assistant", "content": "方案是把周报改到每周五发送", "timestamp": t, "index": 0}
+            resolve_session_incremental(c, "sess", [proposal], now=t)
+
+            third = build_dreaming_input(db_path=db, memo_path=memo)
+            stats = third["snapshot_stats"]
+            self.assertLessEqual(stats["memory_rows_read"], 3)
+            self.assertEqual(stats["experience_rows_read"], 0)
+            self.assertFalse(stats["topics_cached"])
+            mem_items, mem_summary = _build_memory_summaries(c)
+            self.assertEqual(third["memory_items"], mem_items)
+            self.assertEqual(third["memory_summary"], mem_summary)
+            ids = {m["id"] for m in third["memory_items"]}
+            self.assertIn("mem_new", ids)
+            self.assertFalse(ids & {"mem_1", "mem_5"})
+            self.assertEqual(third["task_closure_summary"], "⏳ 活跃任务（1个）:\n  - 把周报改到每周五发送")
+            c.close()
+
+    def test_corrupt_memo_rebuilds(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            memo = Path(td) / "memo.json"
+            c = conn(db)
+            self._seed(c)
+            c.close()
+            memo.write_text("{not json", encoding="utf-8")
+            out = build_dreaming_input(db_path=db, memo_path=memo)
+            self.assertEqual(out["memory_count"], 7)
+            self.assertEqual(json.loads(memo.read_text(encoding="utf-8"))["version"], 1)
+
+    def test_malformed_payload_rows_are_counted(self):
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            c = conn(db)
+            self._seed(c)
+            t = _iso(days_ago=0.5)
+            c.execute(
+                "INSERT INTO memory_items(id, status, payload_json, created_at, updated_at) VALUES ('mem_bad', 'active', '{broken', ?, ?)",
+                (t, t),
+            )
+            c.execute(
+                "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES ('exp_bad', 'active', '[', ?, ?)",
+                (t, t),
+            )
+            c.commit()
+
+            out = build_dreaming_input(db_path=db, memo_path=Path(td) / "memo.json")
+            self.assertEqual((out["memory_count"], out["experience_count"]), (8, 5))
+            self.assertEqual(out["memory_items"], _build_memory_summaries(c)[0])
+            self.assertEqual(out["experience_items"], _build_experience_summaries(c)[0])
+            bad = next(m for m in out["memory_items"] if m["id"] == "mem_bad")
+            self.assertEqual((bad["content"], bad["importance"]), ("", 0.5))
+            c.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "scheduler"))
+sys.path.insert(0, str(ROOT / "tools" / "validation"))
+
+import scheduler_v0_1 as sch  # noqa: E402
+from core.governance_rollups import aggregate_range, build_daily_rollups, rollup_window  # noqa: E402
+from generate_weekly_governance_report_v0_1 import queued_due_lag  # noqa: E402
+
+T0 = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _event(i: int, ts: datetime) -> dict:
+    kind = i % 5
+    payload = {
+        "id": f"aud_{i}",
+        "event_type": ["state_transition", "decision_gate", "scheduler_job", "rollback", "state_transition"][kind],
+        "actor": {"type": "worker", "id": f"w{i % 3}"},
+        "object_type": ["memory", "decision", "scheduler_job", "memory", "experience"][kind],
+        "object_id": f"obj_{i}",
+        "before": {"status": ["candidate", None, "queued", "active", "active"][kind]},
+        "after": {"status": ["active", None, "running", "archived", "archived"][kind]},
+        "timestamp": iso(ts),
+    }
+    if kind == 1:
+        payload["after"] = {"final_outcome": ["blocked", "escalated", "auto_applied"][i % 3]}
+    if kind == 2:
+        payload["before"]["run_at"] = iso(ts - timedelta(seconds=(i * 37) % 900))
+    return payload
+
+
+class GovernanceRollupsTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.c = sch.conn(Path(self._td.name) / "mk.sqlite")
+        sch.init_db(self.c)
+        self.n = 0
+
+    def tearDown(self):
+        self.c.close()
+        self._td.cleanup()
+
+    def _insert(self, ts: datetime, payload: dict | None = None, raw: str | None = None):
+        payload = payload or _event(self.n, ts)
+        self.c.execute(
+            "INSERT INTO audit_events(id, event_type, object_type, object_id, correlation_id, timestamp, payload_json) VALUES (?, ?, ?, ?, NULL, ?, ?)",
+            (f"ae_{self.n}", payload["event_type"], payload["object_type"], payload["object_id"], iso(ts), raw or json.dumps(payload)),
+        )
+        self.n += 1
+
+    def _seed(self):
+        for h in range(0, 9 * 24, 5):
+            self._insert(T0 + timedelta(hours=h, minutes=7))
+        self._insert(T0 + timedelta(days=3), raw="{broken")
+        self.start, self.end = T0 + timedelta(hours=15, minutes=30), T0 + timedelta(days=7, hours=15, minutes=30)
+        for ts in (self.start, self.end, T0 + timedelta(days=4)):
+            self._insert(ts)  # 窗口端点与日边界
+        self.c.commit()
+
+    def assertSameAggregate(self, got: dict, want: dict):
+        g, w = dict(got), dict(want)
+        self.assertEqual(g.pop("pickup_lag").to_dict(), w.pop("pickup_lag").to_dict())
+        self.assertEqual(g, w)
+
+    def test_window_merge_matches_single_scan(self):
+        self._seed()
+        agg, meta = rollup_window(self.c, self.start, self.end)
+        self.assertSameAggregate(agg, aggregate_range(self.c, iso(self.start), iso(self.end), include_hi=True))
+        self.assertEqual((meta["rollup_days"], meta["computed_days"]), (6, 6))
+        self.assertEqual(meta["live_ranges"][0], [iso(self.start), "2026-03-02T00:00:00Z"])
+        self.assertEqual(agg["unparsed"], 1)
+        matrix_total = sum(n for rows in agg["transitions"].values() for cols in rows.values() for n in cols.values())
+        self.assertEqual(matrix_total, agg["counters"]["state_transition"])
+        self.assertEqual(set(agg["transitions"]["experience"]), {"active"})
+
+        stored = self.c.execute("SELECT day FROM governance_daily_rollups ORDER BY day").fetchall()
+        self.assertEqual([r[0] for r in stored], [f"2026-03-0{d}" for d in range(2, 8)])
+        again, meta = rollup_window(self.c, self.start, self.end)
+        self.assertEqual(meta["computed_days"], 0)
+        self.assertSameAggregate(again, agg)
+
+        # 不足一天的窗口只做现场扫描
+        short, meta = rollup_window(self.c, self.start, self.start + timedelta(hours=20))
+        self.assertEqual((meta["rollup_days"], short["events"]), (0, 5))
+
+    def test_only_closed_days_persist_and_verify_refreshes_drift(self):
+        self._seed()
+        days = [(T0 + timedelta(days=i)).date() for i in range(10)]
+        now = T0 + timedelta(days=5, hours=1)
+        status = build_daily_rollups(self.c, days, now=now)
+        self.assertEqual([s["day"] for s in status], [f"2026-03-0{d}" for d in range(1, 6)])
+
+        self._insert(T0 + timedelta(days=2, hours=23))  # 迟到写入
+        self.c.commit()
+        self.assertEqual({s["action"] for s in build_daily_rollups(self.c, days, now=now)}, {"kept"})
+        refreshed = build_daily_rollups(self.c, days, now=now, verify=True)
+        self.assertEqual([s["day"] for s in refreshed if s["action"] == "refreshed"], ["2026-03-03"])
+        self.assertEqual({s["action"] for s in build_daily_rollups(self.c, days[:2], now=now, rebuild=True)}, {"rebuilt"})
+
+    def test_pull_due_records_run_at_for_pickup_lag(self):
+        run_at = iso(datetime.now(timezone.utc) + timedelta(minutes=5))
+        sch.enqueue(self.c, "memory", "mem_1", "verify", run_at, "medium", 3, None, None)
+        sch.pull_due(self.c, "w1", now=run_at, limit=1)
+        payload = json.loads(
+            self.c.execute("SELECT payload_json FROM audit_events WHERE event_type='scheduler_job' ORDER BY rowid DESC").fetchone()[0]
+        )
+        self.assertEqual(payload["before"]["run_at"], run_at)
+        now = datetime.now(timezone.utc)
+        agg, _ = rollup_window(self.c, now - timedelta(hours=1), now + timedelta(hours=1))
+        self.assertEqual((agg["pickup_lag"].count, agg["pickup_lag"].max), (1, 0.0))
+
+    def test_queued_due_lag_matches_full_sort(self):
+        now = datetime(2026, 3, 10, tzinfo=timezone.utc)
+        lags = [float((i * 97) % 5000 + 1) for i in range(41)]
+        rows = [(f"job_{i}", iso(now - timedelta(seconds=lag))) for i, lag in enumerate(lags)]
+        rows.append(("job_future", iso(now + timedelta(hours=1))))
+        for job_id, run_at in rows:
+            self.c.execute(
+                """
+                INSERT INTO scheduler_jobs(job_id, object_type, object_id, action, run_at, priority, priority_rank,
+                    idempotency_key, status, created_at, updated_at)
+                VALUES (?, 'memory', ?, 'verify', ?, 'low', 1, ?, 'queued', ?, ?)
+                """,
+                (job_id, job_id, run_at, job_id, run_at, run_at),
+            )
+
+        def pctl(p: float) -> float:
+            arr = sorted(lags)
+            rank = (len(arr) - 1) * p / 100
+            lo, hi = math.floor(rank), math.ceil(rank)
+            return round(arr[lo] + (arr[hi] - arr[lo]) * (rank - lo), 3)
+
+        self.assertEqual(
+            queued_due_lag(self.c, now),
+            {"count": 41, "p50": pctl(50), "p95": pctl(95), "max": max(lags)},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.kg_analytics import compute_entity_metrics, top_entities
+from core.knowledge_graph import KnowledgeGraphStore
+
+EDGES = [
+    ("A", "B", 0.9),
+    ("B", "C", 0.5),
+    ("C", "A", 1.0),
+    ("A", "C", 0.3),
+    ("D", "C", 0.8),  # D 只有出边
+    ("X", "Y", 0.7),  # 第二个分量，Y 为悬挂节点
+]
+
+
+def _reference_pagerank(edges, damping=0.85, iters=500) -> dict[str, float]:
+    nodes = sorted({n for s, o, _ in edges for n in (s, o)})
+    n = len(nodes)
+    out_w = {v: 0.0 for v in nodes}
+    for s, _, w in edges:
+        out_w[s] += w
+    rank = {v: 1.0 / n for v in nodes}
+    for _ in range(iters):
+        leak = damping * sum(rank[v] for v in nodes if out_w[v] == 0) / n
+        nxt = {v: (1 - damping) / n + leak for v in nodes}
+        for s, o, w in edges:
+            nxt[o] += damping * rank[s] * w / out_w[s]
+        rank = nxt
+    return rank
+
+
+class KGAnalyticsTest(unittest.TestCase):
+    def test_metrics_and_incremental_recompute(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                store.add_relations_bulk(
+                    {"subject": s, "predicate": "关联", "object": o, "confidence": w} for s, o, w in EDGES
+                )
+                c = store.c
+
+                out = compute_entity_metrics(c)
+                self.assertFalse(out["skipped"])
+                self.assertEqual((out["entities"], out["components"], out["largest_component"]), (6, 2, 4))
+
+                want = _reference_pagerank(EDGES)
+                got = {r["entity"]: r for r in top_entities(c, limit=100)}
+                for name, pr in want.items():
+                    self.assertAlmostEqual(got[name]["pagerank"], pr, places=6)
+                self.assertAlmostEqual(sum(r["pagerank"] for r in got.values()), 1.0, places=6)
+                self.assertEqual(got["C"]["component_id"], 0)
+                self.assertEqual(got["Y"]["component_size"], 2)
+                self.assertEqual((got["C"]["in_degree"], got["C"]["out_degree"]), (3, 1))
+                self.assertAlmostEqual(got["A"]["weighted_degree"], 0.9 + 1.0 + 0.3)
+
+                # 图未变化：跳过
+                self.assertTrue(compute_entity_metrics(c)["skipped"])
+
+                # 变化后热启动重算；删除的实体从结果表移除
+                c.execute("DELETE FROM knowledge_relations WHERE subject = 'X'")
+                c.commit()
+                out = compute_entity_metrics(c)
+                self.assertTrue(out["warm_start"])
+                self.assertEqual(out["rows_deleted"], 2)
+                want = _reference_pagerank(EDGES[:-1])
+                got = {r["entity"]: r["pagerank"] for r in top_entities(c, limit=100)}
+                self.assertEqual(set(got), set(want))
+                for name, pr in want.items():
+                    self.assertAlmostEqual(got[name], pr, places=6)
+                self.assertEqual(top_entities(c, limit=1)[0]["entity"], max(want, key=want.get))
+
+    def test_top_entities_without_table(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                self.assertEqual(top_entities(store.c), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.knowledge_graph import KnowledgeGraphStore, auto_extract_and_store
+from core.memory_experience_core_v0_1 import conn, init_db
+
+
+class KnowledgeGraphStoreTest(unittest.TestCase):
+    def test_migration_merges_existing_duplicates(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "kg.sqlite"
+            c = conn(db_path)
+            # 旧版表结构：无 sources_json、无唯一约束
+            c.execute(
+                """CREATE TABLE knowledge_relations (
+                    id TEXT PRIMARY KEY, subject TEXT NOT NULL, predicate TEXT NOT NULL, object TEXT NOT NULL,
+                    confidence REAL DEFAULT 0.8, source TEXT, created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"""
+            )
+            for i, (conf, src) in enumerate([(0.5, "memory:a"), (0.9, "memory:b"), (0.7, "memory:a")]):
+                c.execute(
+                    "INSERT INTO knowledge_relations VALUES (?, 'A', '是', 'B', ?, ?, 't', 't')",
+                    (f"rel_{i}", conf, src),
+                )
+            c.commit()
+            c.close()
+
+            with KnowledgeGraphStore(db_path) as store:
+                rows = store.c.execute("SELECT id, confidence, sources_json FROM knowledge_relations").fetchall()
+                self.assertEqual(len(rows), 1)
+                self.assertEqual(rows[0]["id"], "rel_0")
+                self.assertEqual(rows[0]["confidence"], 0.9)
+                self.assertEqual(json.loads(rows[0]["sources_json"]), ["memory:a", "memory:b"])
+
+    def test_upsert_and_bulk_dedup(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                rel_id = store.add_relation("A", "是", "B", confidence=0.6, source="memory:1")
+                self.assertEqual(store.add_relation("A", "是", "B", confidence=0.4, source="memory:2"), rel_id)
+
+                n = store.add_relations_bulk(
+                    [
+                        {"subject": "A", "predicate": "是", "object": "B", "confidence": 0.9, "source": "memory:1"},
+                        {"subject": "C", "predicate": "属于", "object": "D"},
+                        {"subject": "C", "predicate": "属于", "object": "D", "source": "memory:3"},
+                    ]
+                )
+                self.assertEqual(n, 3)
+                self.assertEqual(store.c.execute("SELECT COUNT(*) FROM knowledge_relations").fetchone()[0], 2)
+
+                rels = {r["object"]: r for r in store.get_relations("A")}
+                self.assertEqual(rels["B"]["id"], rel_id)
+                self.assertEqual(rels["B"]["confidence"], 0.9)
+                self.assertEqual(rels["B"]["sources"], ["memory:1", "memory:2"])
+
+                with self.assertRaises(ValueError):
+                    store.add_relations_bulk([{"subject": "X", "predicate": "", "object": "Y"}])
+
+    def test_extract_corpus(self):
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "kg.sqlite"
+            c = conn(db_path)
+            init_db(c)
+            for i in range(5):
+                payload = {"id": f"mem_{i}", "content": "猫是动物，狗属于宠物"}
+                c.execute(
+                    "INSERT INTO memory_items(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (f"mem_{i}", "candidate", json.dumps(payload, ensure_ascii=False), "t", "t"),
+                )
+            c.commit()
+            c.close()
+
+            with KnowledgeGraphStore(db_path) as store:
+                out = store.extract_corpus(batch_size=2)
+                self.assertEqual(out["scanned"], 5)
+                self.assertEqual(out["relations"], 10)
+                rows = store.c.execute("SELECT subject, object, sources_json FROM knowledge_relations").fetchall()
+                self.assertEqual({(r["subject"], r["object"]) for r in rows}, {("猫", "动物"), ("狗", "宠物")})
+                self.assertEqual(len(json.loads(rows[0]["sources_json"])), 5)
+
+                ids = auto_extract_and_store("猫是动物", memory_id="mem_9", store=store)
+                self.assertEqual(len(ids), 1)
+                self.assertEqual(store.c.execute("SELECT COUNT(*) FROM knowledge_relations").fetchone()[0], 2)
+
+                # experience 语料的来源记为 experience:<id>
+                store.c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    ("exp_1", "active", json.dumps({"id": "exp_1", "episode_summary": "鸟是动物"}, ensure_ascii=False), "t", "t"),
+                )
+                store.c.commit()
+                self.assertEqual(store.extract_corpus("experience_records")["relations"], 1)
+                row = store.c.execute("SELECT sources_json FROM knowledge_relations WHERE subject = '鸟'").fetchone()
+                self.assertEqual(json.loads(row["sources_json"]), ["experience:exp_1"])
+
+    def _graph(self, store: KnowledgeGraphStore):
+        store.add_relations_bulk(
+            {"subject": s, "predicate": "关联", "object": o, "confidence": w}
+            for s, o, w in [
+                ("A", "B", 0.9),
+                ("B", "C", 0.8),
+                ("C", "A", 0.7),  # 环
+                ("C", "D", 0.5),
+                ("D", "E", 0.9),
+                ("A", "F", 0.15),
+                ("X", "A", 0.6),
+            ]
+        )
+
+    def test_traverse_sql_matches_snapshot(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                self._graph(store)
+                snap = store.snapshot()
+                for kwargs in (
+                    {"max_depth": 4},
+                    {"max_depth": 4, "max_fanout": 2},
+                    {"max_depth": 2, "min_path_confidence": 0.5},
+                    {"max_depth": 8, "min_path_confidence": 0.0},
+                ):
+                    sql_nodes = store.traverse("A", **kwargs)
+                    snap_nodes = snap.traverse("A", **kwargs)
+                    self.assertEqual(
+                        [(n["entity"], n["path_confidence"], n["path"]) for n in sql_nodes],
+                        [(n["entity"], n["path_confidence"], n["path"]) for n in snap_nodes],
+                    )
+
+                nodes = {n["entity"]: n for n in store.traverse("A", max_depth=4, min_path_confidence=0.2)}
+                self.assertNotIn("A", nodes)
+                self.assertNotIn("F", nodes)  # 0.15 低于路径置信度下限
+                # 环 A-B-C-A 不重复走；C 取 A-B-C(0.72) 而非 A-C(0.7)
+                self.assertEqual(nodes["C"]["path"], ["A", "B", "C"])
+                self.assertAlmostEqual(nodes["D"]["path_confidence"], 0.36)
+                self.assertEqual(nodes["E"]["path"], ["A", "B", "C", "D", "E"])
+                self.assertNotIn("E", {n["entity"] for n in store.traverse("A", max_depth=2)})
+
+                # fan-out=2：A 只展开 B(0.9) 与 C(0.7)，X/F 不可达
+                self.assertEqual({n["entity"] for n in store.traverse("A", max_depth=1, max_fanout=2)}, {"B", "C"})
+
+    def test_snapshot_neighbors_path_and_rebuild(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                self._graph(store)
+                snap = store.snapshot()
+                self.assertIs(store.snapshot(), snap)
+                self.assertEqual([n["entity"] for n in snap.neighbors("A")], ["B", "C", "X", "F"])
+                self.assertEqual(snap.shortest_path("B", "E")["path"], ["B", "C", "D", "E"])
+                self.assertIsNone(snap.shortest_path("B", "E", max_depth=2))
+                self.assertIsNone(snap.shortest_path("A", "nobody"))
+
+                store.add_relation("B", "关联", "E", confidence=0.4)
+                rebuilt = store.snapshot()
+                self.assertIsNot(rebuilt, snap)
+                self.assertEqual(rebuilt.shortest_path("B", "E")["hops"], 1)
+
+    def test_get_relations_depth_two_single_pass(self):
+        with tempfile.TemporaryDirectory() as td:
+            with KnowledgeGraphStore(Path(td) / "kg.sqlite") as store:
+                self._graph(store)
+                rels = store.get_relations("B", depth=2)
+                direct = [r for r in rels if "via_entity" not in r]
+                second = [r for r in rels if "via_entity" in r]
+                self.assertEqual({(r["subject"], r["object"]) for r in direct}, {("A", "B"), ("B", "C")})
+                self.assertEqual(
+                    {(r["via_entity"], r["subject"], r["object"]) for r in second},
+                    {("A", "C", "A"), ("A", "A", "F"), ("A", "X", "A"), ("C", "C", "A"), ("C", "C", "D")},
+                )
+                self.assertNotIn("rn", second[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from core.llm_client import CircuitOpenError, LLMClient, LLMHTTPError
+from core.llm_resilience_v0_2 import LLMResilienceConfig, LLMResilienceController
+
+
+class _StubServer:
+    """本地 OpenAI-compatible 桩服务：回显最后一条消息，记录请求数 / 客户端端口 / 最大并发。"""
+
+    def __init__(self, delay: float = 0.0, status: int = 200):
+        self.delay = delay
+        self.status = status
+        self.hits = 0
+        self.ports: set[int] = set()
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.hits += 1
+                    stub.ports.add(self.client_address[1])
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                time.sleep(stub.delay)
+                with stub.lock:
+                    stub.active -= 1
+                reply = {"choices": [{"message": {"content": "echo:" + body["messages"][-1]["content"]}}]}
+                raw = json.dumps(reply).encode("utf-8")
+                self.send_response(stub.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _chat(client: LLMClient, url: str, text: str, **kw) -> str:
+    return client.chat(url, model="stub", messages=[{"role": "user", "content": text}], **kw)
+
+
+class LLMClientTest(unittest.TestCase):
+    def setUp(self):
+        self.td = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.td.name) / "cache"
+
+    def tearDown(self):
+        self.td.cleanup()
+
+    def test_keep_alive_and_disk_cache(self):
+        stub = _StubServer()
+        try:
+            client = LLMClient(cache_dir=self.cache_dir)
+            for i in range(3):
+                self.assertEqual(_chat(client, stub.url, f"q{i}", temperature=0.1), f"echo:q{i}")
+            self.assertEqual(len(stub.ports), 1)
+            self.assertEqual((client.pool.opened, client.pool.reused), (1, 2))
+
+            # 新实例（新进程等价）命中磁盘缓存，不访问服务
+            other = LLMClient(cache_dir=self.cache_dir)
+            self.assertEqual(_chat(other, stub.url, "q1", temperature=0.1), "echo:q1")
+            self.assertEqual((stub.hits, other.cache_hits), (3, 1))
+
+            # temperature 不同 → 不同缓存键；高温采样不缓存
+            _chat(client, stub.url, "q1", temperature=0.3)
+            _chat(client, stub.url, "q1", temperature=0.9)
+            _chat(client, stub.url, "q1", temperature=0.9)
+            self.assertEqual(stub.hits, 6)
+            client.close()
+        finally:
+            stub.close()
+
+    def test_coalescing_and_backend_limit(self):
+        stub = _StubServer(delay=0.2)
+        try:
+            client = LLMClient(cache_dir=None, per_backend_concurrency=2)
+            out = []
+            threads = [
+                threading.Thread(target=lambda: out.append(_chat(client, stub.url, "same", temperature=0.7)))
+                for _ in range(5)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(out, ["echo:same"] * 5)
+            self.assertEqual((stub.hits, client.coalesced), (1, 4))
+
+            threads = [
+                threading.Thread(target=_chat, args=(client, stub.url, f"d{i}"), kwargs={"temperature": 0.7})
+                for i in range(6)
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(stub.hits, 7)
+            self.assertEqual(stub.max_active, 2)
+            self.assertLessEqual(client.pool.opened, 2)
+        finally:
+            stub.close()
+
+    def test_resilience_breaker(self):
+        stub = _StubServer(status=500)
+        try:
+            ctrl = LLMResilienceController(
+                LLMResilienceConfig(state_file=str(Path(self.td.name) / "breaker.json"), error_threshold=1, cooldown_sec=60)
+            )
+            client = LLMClient(cache_dir=self.cache_dir, resilience=ctrl)
+            with self.assertRaises(LLMHTTPError) as cm:
+                _chat(client, stub.url, "x", temperature=0.1)
+            self.assertEqual(cm.exception.status, 500)
+            with self.assertRaises(CircuitOpenError):
+                _chat(client, stub.url, "x", temperature=0.1)
+            self.assertEqual(stub.hits, 1)
+            self.assertEqual(list(self.cache_dir.rglob("*.json")), [])
+        finally:
+            stub.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
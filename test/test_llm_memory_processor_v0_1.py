@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "memory"))
+
+from core.llm_client import LLMClient  # noqa: E402
+from llm_memory_processor_v0_1 import LLMMemoryProcessor, LLMProcessorConfig  # noqa: E402
+
+BLOCK_RE = re.compile(r"<<<INPUT id=(\S+)>>>\n(.*?)\n<<<END id=\1>>>", re.S)
+
+
+class _BatchStub:
+    """批量 prompt 中含 POISON 段且不止一段时返回非 JSON；drop_id 指定的段在响应中缺失（仅首次）。"""
+
+    def __init__(self, drop_id: str | None = None):
+        self.prompts: list[list[str]] = []
+        self.max_tokens: list[int] = []
+        self.drop_id = drop_id
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = body["messages"][-1]["content"]
+                blocks = BLOCK_RE.findall(prompt)
+                stub.prompts.append([iid for iid, _ in blocks])
+                stub.max_tokens.append(body.get("max_tokens"))
+                if len(blocks) > 1 and any("POISON" in t for _, t in blocks):
+                    content = "抱歉，我无法处理"
+                elif blocks:
+                    results = [
+                        {"input_id": iid, "memory_items": [{"kind": "fact", "content": f"事实：{t.strip('- ')}"}]}
+                        for iid, t in blocks
+                        if iid != stub.drop_id
+                    ]
+                    stub.drop_id = None
+                    content = json.dumps({"results": results}, ensure_ascii=False)
+                else:
+                    text = prompt.split("输入文本如下：\n", 1)[-1]
+                    content = json.dumps({"memory_items": [{"kind": "fact", "content": f"事实：{text.strip('- ')}"}]})
+                raw = json.dumps({"choices": [{"message": {"content": content}}]}, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class LLMMemoryProcessorBatchTest(unittest.TestCase):
+    def _processor(self, td: str, url: str, **kw) -> LLMMemoryProcessor:
+        os.environ.setdefault("MK_TEST_LLM_KEY", "test")
+        cfg = LLMProcessorConfig(
+            backend="openai_compatible",
+            endpoint=url,
+            model="stub",
+            api_key_env="MK_TEST_LLM_KEY",
+            max_retries=0,
+            resilience_state_file=str(Path(td) / "breaker.json"),
+            breaker_error_threshold=10,
+            **kw,
+        )
+        return LLMMemoryProcessor(cfg, client=LLMClient(cache_dir=None))
+
+    def test_pack_and_demux(self):
+        stub = _BatchStub()
+        try:
+            with tempfile.TemporaryDirectory() as td:
+                proc = self._processor(td, stub.url, batch_max_inputs=4)
+                inputs = [{"source_ref": f"session://t#msg:{i}", "raw_text": f"- 第 {i} 条内容"} for i in range(10)]
+                out = proc.extract_memory_objects_batch(inputs)
+                self.assertEqual([len(p) for p in stub.prompts], [4, 4, 2])
+                self.assertEqual(out["batch_stats"]["batch_requests"], 3)
+                for i, r in enumerate(out["results"]):
+                    self.assertEqual(r["source_ref"], f"session://t#msg:{i}")
+                    self.assertEqual([m["content"] for m in r["memory_items"]], [f"事实：第 {i} 条内容"])
+                    self.assertEqual(r["batch_size"], 4 if i < 8 else 2)
+        finally:
+            stub.close()
+
+    def test_token_budget(self):
+        proc = LLMMemoryProcessor(LLMProcessorConfig(batch_token_budget=120, batch_max_inputs=50))
+        texts = ["短文本"] * 6 + ["长" * 500] + ["短文本"] * 2
+        batches = proc._pack_batches(texts)
+        self.assertEqual(batches, [[0, 1, 2, 3, 4, 5], [6], [7, 8]])
+
+    def test_output_token_budget(self):
+        stub = _BatchStub()
+        try:
+            with tempfile.TemporaryDirectory() as td:
+                # 默认 max_tokens=1200、输出上限 16000 → 每批至多 13 段，请求的 max_tokens 不超过上限
+                proc = self._processor(td, stub.url)
+                inputs = [{"source_ref": f"s{i}", "raw_text": f"内容 {i}"} for i in range(20)]
+                proc.extract_memory_objects_batch(inputs)
+                self.assertEqual([len(p) for p in stub.prompts], [13, 7])
+                self.assertEqual(stub.max_tokens, [15600, 8400])
+
+                stub.prompts.clear()
+                stub.max_tokens.clear()
+                proc = self._processor(td, stub.url, max_tokens=5000, batch_max_output_tokens=4000)
+                proc.extract_memory_objects_batch(inputs[:2])
+                # 单段即超出输出上限 → 每段独占一批，走单条路径
+                self.assertEqual(stub.prompts, [[], []])
+                self.assertEqual(stub.max_tokens, [5000, 5000])
+        finally:
+            stub.close()
+
+    def test_malformed_sub_batch_is_split(self):
+        stub = _BatchStub(drop_id="i1")
+        try:
+            with tempfile.TemporaryDirectory() as td:
+                proc = self._processor(td, stub.url, batch_max_inputs=8)
+                inputs = [{"source_ref": f"s{i}", "raw_text": f"内容 {i}"} for i in range(8)]
+                inputs[6]["raw_text"] = "POISON 内容"
+                out = proc.extract_memory_objects_batch(inputs)
+                # 含 POISON → 整批不可用，对半拆分；前半批响应缺 i1 → 只单独重试 i1；
+                # 含 POISON 的半批继续拆，直到单条
+                self.assertEqual(
+                    stub.prompts,
+                    [
+                        ["i0", "i1", "i2", "i3", "i4", "i5", "i6", "i7"],
+                        ["i0", "i1", "i2", "i3"],
+                        [],
+                        ["i4", "i5", "i6", "i7"],
+                        ["i4", "i5"],
+                        ["i6", "i7"],
+                        [],
+                        [],
+                    ],
+                )
+                self.assertEqual(out["batch_stats"]["split_retries"], 4)
+                self.assertEqual(out["batch_stats"]["single_requests"], 3)
+                self.assertEqual([r["count"] for r in out["results"]], [1] * 8)
+                self.assertEqual(out["results"][6]["memory_items"][0]["content"], "事实：POISON 内容")
+                self.assertFalse(any(r.get("fallback_used") for r in out["results"]))
+        finally:
+            stub.close()
+
+    def test_benchmark_script(self):
+        cmd = ["python3", "tools/validation/benchmark_llm_batch_extraction_v0_1.py", "--n", "40", "--latency-ms", "5"]
+        p = subprocess.run(cmd, cwd=str(ROOT), text=True, capture_output=True)
+        self.assertEqual(p.returncode, 0, msg=f"stderr: {p.stderr}\nstdout: {p.stdout}")
+        out = json.loads(p.stdout)
+        self.assertTrue(out["ok"])
+        self.assertEqual((out["stub"]["single_requests"], out["stub"]["batch_requests"]), (40, 4))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import json
+import sqlite3
+import subprocess
 import tempfile
 import unittest
 from pathlib import Path
@@ -35,6 +38,83 @@ class LLMResilienceV02Test(unittest.TestCase):
             self.assertFalse(ctrl.is_open(s2))
             self.assertEqual(int(s2.get("consecutive_failures", 0)), 0)
 
+    def _ctrl(self, state_file: Path, **kw) -> LLMResilienceController:
+        return LLMResilienceController(LLMResilienceConfig(state_file=str(state_file), refresh_sec=0, **kw))
+
+    def _version(self, ctrl: LLMResilienceController) -> int:
+        with sqlite3.connect(ctrl.db_path) as c:
+            return c.execute("SELECT version FROM llm_breaker_state").fetchone()[0]
+
+    def _expire_cooldown(self, ctrl: LLMResilienceController):
+        with sqlite3.connect(ctrl.db_path) as c:
+            c.execute("UPDATE llm_breaker_state SET open_until = 0")
+
+    def test_failure_rate_window_and_transition_only_writes(self):
+        with tempfile.TemporaryDirectory(prefix="mk-llm-breaker-") as td:
+            ctrl = self._ctrl(Path(td) / "state.json", error_threshold=100, min_window_requests=6, failure_rate_threshold=0.5)
+            for _ in range(20):
+                ctrl.record_success()
+            self.assertEqual(self._version(ctrl), 0)  # closed 状态下的成功不落库
+
+            # 成功 / 失败 / 失败 交替：连续失败数从不超过 2，但窗口失败率逐步超过 50%
+            for i in range(60):
+                st = ctrl.record_failure("boom") if i % 3 else ctrl.record_success()
+                if st["state"] == "open":
+                    break
+            self.assertEqual(st["state"], "open")
+            self.assertLessEqual(st["consecutive_failures"], 2)
+            self.assertGreaterEqual(st["window_failure_rate"], 0.5)
+            self.assertTrue(ctrl.is_open())
+            version = self._version(ctrl)
+            ctrl.record_failure("boom again")
+            self.assertEqual(self._version(ctrl), version)  # 已 open 的失败不再写入
+
+    def test_half_open_single_probe(self):
+        with tempfile.TemporaryDirectory(prefix="mk-llm-breaker-") as td:
+            state_file = Path(td) / "state.json"
+            ctrl = self._ctrl(state_file, error_threshold=1)
+            ctrl.record_failure("boom")
+            self.assertFalse(ctrl.allow_request())
+
+            self._expire_cooldown(ctrl)
+            self.assertTrue(ctrl.allow_request())  # 领取探测名额
+            self.assertFalse(self._ctrl(state_file, error_threshold=1).allow_request())
+            self.assertEqual(ctrl.load_state()["state"], "half_open")
+
+            st = ctrl.record_failure("probe failed")
+            self.assertEqual(st["state"], "open")
+            self.assertFalse(ctrl.allow_request())
+
+            self._expire_cooldown(ctrl)
+            self.assertTrue(ctrl.allow_request())
+            st = ctrl.record_success()
+            self.assertEqual((st["state"], st["consecutive_failures"]), ("closed", 0))
+            self.assertTrue(ctrl.allow_request())
+
+    def test_cross_process_visibility_and_legacy_import(self):
+        with tempfile.TemporaryDirectory(prefix="mk-llm-breaker-") as td:
+            state_file = Path(td) / "state.json"
+            ctrl = self._ctrl(state_file, error_threshold=1)
+            self.assertTrue(ctrl.allow_request())
+
+            script = (
+                "import sys; sys.path.insert(0, sys.argv[1]);"
+                "from core.llm_resilience_v0_2 import LLMResilienceConfig, LLMResilienceController as C;"
+                "C(LLMResilienceConfig(state_file=sys.argv[2], error_threshold=1)).record_failure('other process')"
+            )
+            subprocess.run([sys.executable, "-c", script, str(ROOT), str(state_file)], check=True)
+            self.assertTrue(ctrl.is_open())
+            self.assertEqual(ctrl.load_state()["last_error"], "other process")
+
+            legacy = Path(td) / "legacy.json"
+            legacy.write_text(
+                json.dumps({"consecutive_failures": 3, "circuit_open_until": "2999-01-01T00:00:00Z", "last_error": "old"}),
+                encoding="utf-8",
+            )
+            old = self._ctrl(legacy)
+            self.assertTrue(old.is_open())
+            self.assertEqual(old.load_state()["consecutive_failures"], 3)
+
 
 if __name__ == "__main__":
     unittest.main()
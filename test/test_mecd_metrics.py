@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "pipeline"))
+
+from core.knowledge_graph import init_graph_db  # noqa: E402
+from core.mecd_metrics import check_mecd_metrics, installed_tables, read_mecd_metrics  # noqa: E402
+from core.memory_experience_core_v0_1 import init_db  # noqa: E402
+from mecd_data_exporter import export_data  # noqa: E402
+from mecd_panel import load_audit_summary, load_metrics  # noqa: E402
+
+TS = "2026-03-01T10:00:00Z"
+
+
+def _insert_item(c, table: str, item_id: str, status: str):
+    c.execute(
+        f"INSERT INTO {table}(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+        (item_id, status, json.dumps({"content": item_id}), TS, TS),
+    )
+
+
+def _insert_audit(c, i: int, event_type: str, object_type: str):
+    c.execute(
+        "INSERT INTO audit_events(id, event_type, object_type, object_id, timestamp, payload_json) VALUES (?, ?, ?, ?, ?, '{}')",
+        (f"aud_{i}", event_type, object_type, f"obj_{i}", TS),
+    )
+
+
+class MecdMetricsTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.db = Path(self._td.name) / "mk.sqlite"
+        self.c = sqlite3.connect(str(self.db))
+        init_db(self.c)
+        # 触发器安装前已有的数据由首次读取回填
+        _insert_item(self.c, "memory_items", "mem_0", "candidate")
+        self.c.commit()
+
+    def tearDown(self):
+        self.c.close()
+        self._td.cleanup()
+
+    def test_triggers_track_insert_update_delete(self):
+        self.assertEqual(read_mecd_metrics(self.c)["memory_items"], {"total": 1, "status": {"candidate": 1}})
+        for i, status in enumerate(["active", "active", "archived"], start=1):
+            _insert_item(self.c, "memory_items", f"mem_{i}", status)
+        self.c.execute("UPDATE memory_items SET status = 'active' WHERE id = 'mem_0'")
+        self.c.execute("UPDATE memory_items SET payload_json = '{}' WHERE id = 'mem_1'")  # 状态不变
+        self.c.execute("DELETE FROM memory_items WHERE id = 'mem_3'")
+        _insert_item(self.c, "experience_records", "exp_1", "candidate")
+        for i, (ev, obj) in enumerate([("created", "memory"), ("created", "memory"), ("promoted", "experience")]):
+            _insert_audit(self.c, i, ev, obj)
+        self.c.commit()
+
+        stats = read_mecd_metrics(self.c)
+        self.assertEqual(stats["memory_items"], {"total": 3, "status": {"active": 3}})
+        self.assertEqual(stats["experience_records"], {"total": 1, "status": {"candidate": 1}})
+        self.assertEqual(stats["audit_events"]["event"], {"created|memory": 2, "promoted|experience": 1})
+        self.assertEqual(stats["knowledge_relations"]["total"], 0)
+        self.assertTrue(check_mecd_metrics(self.c)["ok"])
+
+    def test_tables_created_later_are_installed_and_backfilled(self):
+        read_mecd_metrics(self.c)
+        self.assertNotIn("knowledge_relations", installed_tables(self.c))
+        init_graph_db(self.c)
+        self.c.execute(
+            "INSERT INTO knowledge_relations(id, subject, predicate, object, created_at, updated_at) VALUES ('r1', 'a', 'uses', 'b', ?, ?)",
+            (TS, TS),
+        )
+        self.c.commit()
+        self.assertEqual(read_mecd_metrics(self.c)["knowledge_relations"]["total"], 1)
+        self.assertIn("knowledge_relations", installed_tables(self.c))
+        self.c.execute("DELETE FROM knowledge_relations")
+        self.c.commit()
+        self.assertEqual(read_mecd_metrics(self.c)["knowledge_relations"]["total"], 0)
+
+    def test_check_detects_drift_and_repairs(self):
+        read_mecd_metrics(self.c)
+        self.c.execute("UPDATE mecd_metrics SET value = 7 WHERE table_name = 'memory_items' AND dim = 'total'")
+        self.c.execute("DELETE FROM mecd_metrics WHERE table_name = 'memory_items' AND dim = 'status'")
+        self.c.commit()
+
+        report = check_mecd_metrics(self.c)
+        self.assertFalse(report["ok"])
+        self.assertEqual(
+            report["tables"]["memory_items"]["mismatches"],
+            [
+                {"dim": "status", "key": "candidate", "stored": 0, "actual": 1},
+                {"dim": "total", "key": "", "stored": 7, "actual": 1},
+            ],
+        )
+        self.assertTrue(report["tables"]["audit_events"]["ok"])
+
+        cli = ROOT / "tools" / "pipeline" / "mecd_metrics_check.py"
+        run = subprocess.run([sys.executable, str(cli), "--db", str(self.db)], capture_output=True, text=True)
+        self.assertEqual(run.returncode, 1)
+        run = subprocess.run([sys.executable, str(cli), "--db", str(self.db), "--repair"], capture_output=True, text=True)
+        self.assertEqual(run.returncode, 0, run.stderr)
+        self.assertTrue(json.loads(run.stdout)["repaired"])
+        self.assertTrue(check_mecd_metrics(self.c)["ok"])
+
+    def test_panel_and_exporter_match_full_scans(self):
+        c = self.c
+        c.executescript(
+            """
+            CREATE TABLE decision_traces (
+                id TEXT PRIMARY KEY, final_outcome TEXT NOT NULL, payload_json TEXT NOT NULL,
+                created_at TEXT NOT NULL, updated_at TEXT NOT NULL
+            );
+            """
+        )
+        init_graph_db(c)
+        for i in range(25):
+            _insert_item(c, "memory_items", f"mem_{i + 1}", ["candidate", "active", "archived"][i % 3])
+            _insert_item(c, "experience_records", f"exp_{i}", ["candidate", "active"][i % 2])
+            c.execute(
+                "INSERT INTO decision_traces VALUES (?, ?, '{}', ?, ?)",
+                (f"dec_{i}", ["auto_applied", "blocked", "escalated"][i % 3], TS, TS),
+            )
+            _insert_audit(c, i, ["created", "promoted"][i % 2], ["memory", "experience", "decision"][i % 3])
+        c.commit()
+
+        m = load_metrics(self.db)
+        full = lambda sql: c.execute(sql).fetchone()[0]  # noqa: E731
+        self.assertEqual(
+            (m.memory_total, m.memory_candidates, m.memory_active, m.memory_archived),
+            (
+                full("SELECT COUNT(*) FROM memory_items"),
+                full("SELECT COUNT(*) FROM memory_items WHERE status='candidate'"),
+                full("SELECT COUNT(*) FROM memory_items WHERE status='active'"),
+                full("SELECT COUNT(*) FROM memory_items WHERE status='archived'"),
+            ),
+        )
+        self.assertEqual((m.experience_total, m.experience_active), (25, 12))
+        self.assertEqual((m.decisions_total, m.decisions_auto, m.decisions_blocked), (25, 9, 8))
+        self.assertEqual((m.cognition_relations, m.audit_events), (0, 25))
+
+        grouped = c.execute(
+            "SELECT event_type, object_type, COUNT(*) FROM audit_events GROUP BY 1, 2 ORDER BY 3 DESC, 1, 2"
+        ).fetchall()
+        summary = load_audit_summary(self.db)
+        self.assertEqual([(r["event_type"], r["object_type"], r["count"]) for r in summary], grouped)
+
+        data = export_data(self.db)
+        self.assertEqual(data["stages"]["M"], {"total": 26, "candidates": 10, "active": 8, "archived": 8})
+        self.assertEqual(data["stages"]["D"], {"total": 25, "auto_applied": 9, "blocked": 8})
+        self.assertEqual(data["stages"]["audit"], {"total": 25, "breakdown": summary})
+        self.assertEqual(len(data["items"]["memories"]), 20)
+        self.assertEqual(len(data["items"]["experiences"]), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
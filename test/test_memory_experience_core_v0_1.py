@@ -8,8 +8,10 @@ from pathlib import Path
 from core.memory_experience_core_v0_1 import (
     conn,
     ingest_memory,
+    ingest_memory_many,
     init_db,
     list_audits,
+    list_items_page,
     memory_to_experience,
 )
 
@@ -56,6 +58,134 @@ class MemoryExperienceCoreV01Test(unittest.TestCase):
             with self.assertRaises(ValueError):
                 ingest_memory(c, payload, actor_id="test")
 
+    def test_ingest_memory_many_single_transaction(self):
+        root = Path(__file__).resolve().parents[1]
+        fixture_path = root / "data" / "fixtures" / "critical-paths" / "08-memory-experience-path.json"
+        base = json.loads(fixture_path.read_text(encoding="utf-8"))["memory"]
+        payloads = [dict(base, id=f"mem_batch_{i:03d}") for i in range(5)]
+
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "mk.sqlite"
+            c = conn(db_path)
+            init_db(c)
+
+            out = ingest_memory_many(c, payloads, actor_id="test")
+            self.assertEqual(out["count"], 5)
+            self.assertEqual(out["memory_ids"], [p["id"] for p in payloads])
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM memory_items").fetchone()[0], 5)
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM audit_events").fetchone()[0], 5)
+
+            # 批内含已存在 id：整批回滚，不留半截写入
+            again = [dict(base, id="mem_batch_new"), payloads[0]]
+            with self.assertRaises(ValueError):
+                ingest_memory_many(c, again, actor_id="test")
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM memory_items").fetchone()[0], 5)
+
+            bad = [dict(base, id="mem_batch_bad", confidence=2.0)]
+            with self.assertRaises(ValueError):
+                ingest_memory_many(c, bad, actor_id="test")
+
+    def test_list_items_page_keyset_walk(self):
+        root = Path(__file__).resolve().parents[1]
+        fixture_path = root / "data" / "fixtures" / "critical-paths" / "08-memory-experience-path.json"
+        base = json.loads(fixture_path.read_text(encoding="utf-8"))["memory"]
+
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "mk.sqlite"
+            c = conn(db_path)
+            init_db(c)
+            # 同一批写入 updated_at 相同，依赖 id 做二级排序
+            ingest_memory_many(c, [dict(base, id=f"mem_page_{i:03d}") for i in range(7)], actor_id="test")
+
+            seen = []
+            cursor = None
+            pages = 0
+            while True:
+                page = list_items_page(c, "memory_items", limit=3, cursor=cursor)
+                seen.extend(item["id"] for item in page["items"])
+                pages += 1
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+
+            self.assertEqual(pages, 3)
+            self.assertEqual(seen, sorted(seen, reverse=True))
+            self.assertEqual(len(set(seen)), 7)
+
+            with self.assertRaises(ValueError):
+                list_items_page(c, "memory_items", cursor="not-a-cursor")
+
+    def test_denormalized_columns_migrate_existing_db(self):
+        root = Path(__file__).resolve().parents[1]
+        fixture_path = root / "data" / "fixtures" / "critical-paths" / "08-memory-experience-path.json"
+        payload = json.loads(fixture_path.read_text(encoding="utf-8"))["memory"]
+        payload = dict(payload, metadata={"access_count": 4})
+
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "mk.sqlite"
+            c = conn(db_path)
+            # 模拟旧库：只有原始列
+            c.execute(
+                "CREATE TABLE memory_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload_json TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            c.execute(
+                "INSERT INTO memory_items VALUES (?, ?, ?, ?, ?)",
+                (payload["id"], payload["status"], json.dumps(payload), payload["created_at"], payload["created_at"]),
+            )
+            c.commit()
+
+            init_db(c)
+            init_db(c)  # 幂等
+
+            row = c.execute(
+                "SELECT content, confidence, risk_tier, access_count, next_action_at, review_due_at "
+                "FROM memory_items WHERE id=?",
+                (payload["id"],),
+            ).fetchone()
+            self.assertEqual(row["content"], payload["content"])
+            self.assertEqual(row["confidence"], payload["confidence"])
+            self.assertEqual(row["risk_tier"], payload["risk_tier"])
+            self.assertEqual(row["access_count"], 4)
+            self.assertEqual(row["next_action_at"], payload["next_action_at"])
+            self.assertEqual(row["review_due_at"], payload["review_due_at"])
+
+            page = list_items_page(c, "memory_items", fields=("content", "access_count"))
+            self.assertEqual(page["items"][0]["access_count"], 4)
+            with self.assertRaises(ValueError):
+                list_items_page(c, "memory_items", fields=("payload_json; DROP TABLE x",))
+
+    def test_denormalized_columns_tolerate_malformed_payload(self):
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            c.execute(
+                "CREATE TABLE memory_items (id TEXT PRIMARY KEY, status TEXT NOT NULL, payload_json TEXT NOT NULL, "
+                "created_at TEXT NOT NULL, updated_at TEXT NOT NULL)"
+            )
+            c.execute("INSERT INTO memory_items VALUES ('mem_bad', 'candidate', '{broken', 't0', 't0')")
+            c.execute("INSERT INTO memory_items VALUES ('mem_ok', 'candidate', '{\"risk_tier\": \"low\"}', 't0', 't0')")
+            # 早期迁移写入的生成列没有 json_valid 保护
+            c.execute(
+                "ALTER TABLE memory_items ADD COLUMN risk_tier TEXT "
+                "GENERATED ALWAYS AS (json_extract(payload_json, '$.risk_tier')) VIRTUAL"
+            )
+            c.commit()
+
+            init_db(c)
+            init_db(c)
+
+            rows = dict(c.execute("SELECT id, risk_tier FROM memory_items").fetchall())
+            self.assertEqual(rows, {"mem_bad": None, "mem_ok": "low"})
+            self.assertEqual(
+                c.execute("SELECT access_count FROM memory_items WHERE id='mem_bad'").fetchone()[0], 0
+            )
+            c.execute("INSERT INTO memory_items VALUES ('mem_bad2', 'candidate', 'not json', 't1', 't1')")
+            c.execute("INSERT INTO experience_records VALUES ('exp_bad', 'candidate', '[', 't1', 't1')")
+            c.commit()
+            self.assertEqual(
+                c.execute("SELECT COUNT(*) FROM memory_items WHERE risk_tier IS NULL").fetchone()[0], 2
+            )
+
 
 if __name__ == "__main__":
     unittest.main()
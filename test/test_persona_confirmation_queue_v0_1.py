@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import sys
 import tempfile
 import unittest
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "scheduler"))
+
 from core.persona_confirmation_queue_v0_1 import (
     build_apply_plan,
+    execute_apply_candidates,
     build_ask_payload,
     conn,
     enqueue_from_routed,
@@ -14,10 +19,12 @@ from core.persona_confirmation_queue_v0_1 import (
     init_db,
     list_compensations,
     list_events,
+    next_deadline_at,
     resolve_compensation,
     resolve_event,
     timeout_scan,
 )
+from persona_confirmation_queue_v0_1 import watch_timeouts  # noqa: E402
 
 
 class PersonaConfirmationQueueV01Test(unittest.TestCase):
@@ -191,6 +198,51 @@ class PersonaConfirmationQueueV01Test(unittest.TestCase):
             resolved = resolve_compensation(c, cid, note="manual handled")
             self.assertEqual(resolved["status"], "resolved")
 
+    def test_apply_exec_groups_writes_per_file(self):
+        def cand(pid: str, payload: dict, target: str | None = None) -> dict:
+            return {
+                "job_id": "j_group",
+                "proposal_id": pid,
+                "target_id": target or f"t_{pid}",
+                "risk_level": "low",
+                "operation": "upsert",
+                "payload": payload,
+            }
+
+        shared = "bank/demo/opinions.md"
+        candidates = [
+            cand("p1", {"path": shared, "write_mode": "replace", "content": "# Opinions\n\nmanual note\n"}),
+            cand("p2", {"path": shared, "write_mode": "autogen_block", "block_lines": ["- v1"]}),
+            cand("p3", {"path": shared, "write_mode": "autogen_block"}),  # 缺 block_lines：单条失败
+            cand("p4", {"path": shared, "write_mode": "autogen_block", "block_lines": ["- v2"]}),
+            cand("p5", {"path": "bank/demo/other.md", "content": "other\n"}),
+            cand("p5", {"path": "bank/demo/other.md", "content": "other\n"}),  # 同批重复
+        ]
+
+        with tempfile.TemporaryDirectory() as td:
+            base = Path(td)
+            c = conn(base / "q.sqlite")
+            init_db(c)
+
+            out = execute_apply_candidates(c, workspace=base, apply_candidates=candidates)
+            self.assertEqual(
+                (out["applied"], out["failed"], out["deduplicated"], out["files_written"]), (4, 1, 1, 2)
+            )
+            self.assertEqual([r["status"] for r in out["results"]][2], "failed")
+            self.assertEqual(out["compensation_created"], 1)
+
+            text = (base / shared).read_text(encoding="utf-8")
+            self.assertTrue(text.startswith("# Opinions\n\nmanual note\n"))
+            self.assertIn("- v2", text)
+            self.assertNotIn("- v1", text)
+            self.assertEqual(sorted(x.name for x in (base / "bank" / "demo").iterdir()), ["opinions.md", "other.md"])
+
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM decision_traces").fetchone()[0], 5)
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM reflect_apply_ledger").fetchone()[0], 5)
+
+            again = execute_apply_candidates(c, workspace=base, apply_candidates=candidates)
+            self.assertEqual((again["applied"], again["deduplicated"], again["failed"]), (0, 5, 1))
+
     def test_timeout_scan(self):
         routed = {
             "proposals": [
@@ -229,6 +281,74 @@ class PersonaConfirmationQueueV01Test(unittest.TestCase):
             self.assertEqual(closed["status"], "closed")
             self.assertEqual(closed["decision"], "timeout")
 
+    def test_next_deadline_index_and_watch_loop(self):
+        def proposal(pid: str) -> dict:
+            return {
+                "proposal_id": pid,
+                "job_id": "j_wheel",
+                "decision": "pending_review",
+                "risk_level": "high",
+                "target_type": "core_memory",
+                "operation": "overwrite",
+                "reason_codes": ["HARD_RULE_TARGET"],
+            }
+
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "q.sqlite"
+            c = conn(db)
+            init_db(c)
+            # 旧库：无 next_deadline_at 列，迁移时按 status 回填
+            c.execute("DROP TRIGGER trg_pcq_next_deadline_insert")
+            c.execute("DROP TRIGGER trg_pcq_next_deadline_update")
+            c.execute("DROP INDEX idx_pcq_next_deadline")
+            c.execute("ALTER TABLE persona_confirmation_events DROP COLUMN next_deadline_at")
+            ids = enqueue_from_routed(c, {"proposals": [proposal(f"p{i}") for i in range(3)]})["event_ids"]
+            c.executemany(
+                "UPDATE persona_confirmation_events SET deadline_at=? WHERE event_id=?",
+                [("2000-01-01T00:00:00Z", ids[0]), ("2000-01-01T00:10:00Z", ids[1]), ("2000-01-01T00:20:00Z", ids[2])],
+            )
+            c.commit()
+            resolve_event(c, ids[0], "reject")
+            init_db(c)
+
+            self.assertEqual(next_deadline_at(c), "2000-01-01T00:10:00Z")
+            self.assertEqual(
+                c.execute("SELECT COUNT(*) FROM persona_confirmation_events WHERE next_deadline_at IS NULL").fetchone()[0],
+                1,
+            )
+
+            ts = timeout_scan(c, now="2000-01-01T00:15:00Z")
+            self.assertEqual(ts["event_ids"], [ids[1]])
+            self.assertEqual(ts["next_deadline_at"], "2000-01-01T00:20:00Z")
+
+            # 新入队事件由触发器维护；关闭后移出索引
+            new_id = enqueue_from_routed(c, {"proposals": [proposal("p_new")]})["event_ids"][0]
+            self.assertEqual(next_deadline_at(c), "2000-01-01T00:20:00Z")
+            resolve_event(c, new_id, "approve")
+            plan = " ".join(
+                r[-1]
+                for r in c.execute(
+                    "EXPLAIN QUERY PLAN SELECT event_id FROM persona_confirmation_events "
+                    "WHERE next_deadline_at IS NOT NULL AND next_deadline_at <= ? ORDER BY next_deadline_at LIMIT 5",
+                    ("x",),
+                )
+            )
+            self.assertIn("idx_pcq_next_deadline", plan)
+
+            sleeps: list[float] = []
+            out = watch_timeouts(c, max_sleep_sec=30, max_loops=3, sleep=sleeps.append)
+            self.assertEqual(out["timed_out"], 1)  # 剩余的过期事件在第一轮被处理
+            self.assertEqual(sleeps, [30, 30])  # 无未关闭事件：按上限睡眠
+
+            self.assertIsNone(next_deadline_at(c))
+
+            fresh = enqueue_from_routed(c, {"proposals": [proposal("p_late")]}, deadline_minutes=1)
+            self.assertTrue(fresh["event_ids"])
+            sleeps.clear()
+            watch_timeouts(c, max_sleep_sec=300, max_loops=2, sleep=sleeps.append)
+            self.assertEqual(len(sleeps), 1)
+            self.assertTrue(50 <= sleeps[0] <= 60)  # 睡到下一个截止时间，而非上限
+
 
 if __name__ == "__main__":
     unittest.main()
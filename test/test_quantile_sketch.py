@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import math
+import random
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "scheduler"))
+
+import scheduler_v0_1 as sch  # noqa: E402
+from core import quantile_sketch  # noqa: E402
+from core.quantile_sketch import TDigest, load_sketch, record_samples, record_sketch  # noqa: E402
+
+
+def exact(vals: list[float], p: float) -> float:
+    arr = sorted(vals)
+    rank = (len(arr) - 1) * p / 100.0
+    lo, hi = math.floor(rank), math.ceil(rank)
+    return arr[lo] + (arr[hi] - arr[lo]) * (rank - lo)
+
+
+class TDigestTest(unittest.TestCase):
+    def test_small_samples_are_exact(self):
+        rng = random.Random(7)
+        for n in (1, 2, 5, 40):
+            vals = [rng.uniform(0, 100) for _ in range(n)]
+            td = TDigest()
+            td.update(vals)
+            for p in (0, 10, 50, 95, 100):
+                self.assertAlmostEqual(td.percentile(p), exact(vals, p), places=9)
+        self.assertEqual(TDigest().quantile(0.5), 0.0)
+
+    def test_merge_and_round_trip_keep_large_sample_accuracy(self):
+        rng = random.Random(11)
+        vals = [rng.expovariate(1 / 30) for _ in range(50_000)]
+        parts = [TDigest() for _ in range(7)]
+        for i, v in enumerate(vals):
+            parts[i % 7].add(v)
+
+        merged = TDigest()
+        for part in parts:
+            merged.merge(TDigest.from_dict(json.loads(json.dumps(part.to_dict()))))
+
+        self.assertEqual(merged.count, len(vals))
+        self.assertEqual((merged.min, merged.max), (min(vals), max(vals)))
+        self.assertLess(merged.centroid_count(), 200)
+        for p in (50, 95, 99):
+            self.assertLess(abs(merged.percentile(p) - exact(vals, p)) / exact(vals, p), 0.02)
+
+    def test_update_matches_add_and_summary(self):
+        vals = [3.0, float("nan"), 1.0, 2.5, 10.0]
+        a, b = TDigest(), TDigest()
+        a.update(iter(vals))
+        for v in vals:
+            b.add(v)
+        self.assertEqual(a.to_dict(), b.to_dict())
+        self.assertEqual(a.summary(), {"count": 4, "p50": 2.75, "p95": 8.95, "max": 10.0})
+        self.assertEqual(TDigest().summary((50, 99)), {"count": 0, "p50": 0.0, "p99": 0.0, "max": 0.0})
+
+    @unittest.skipIf(quantile_sketch._np is None, "numpy not installed")
+    def test_numpy_update_matches_pure_python(self):
+        rng = random.Random(5)
+        vals = [rng.lognormvariate(0, 1) for _ in range(5000)] + [float("nan")]
+        fast = TDigest()
+        fast.update(quantile_sketch._np.asarray(vals))
+        with mock.patch.object(quantile_sketch, "_np", None):
+            slow = TDigest()
+            slow.update(vals)
+        self.assertEqual(fast.to_dict(), slow.to_dict())
+
+
+class MetricSketchStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.db = Path(self._td.name) / "mk.sqlite"
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_record_merges_across_connections_and_days(self):
+        d1 = datetime(2026, 3, 1, 23, 59, tzinfo=timezone.utc)
+        d2 = d1 + timedelta(minutes=2)
+        c1, c2 = sqlite3.connect(str(self.db)), sqlite3.connect(str(self.db))
+        try:
+            self.assertEqual(load_sketch(c1, "m").count, 0)  # 表尚不存在
+            record_samples(c1, "m", [1, 2, 3], at=d1)
+            record_samples(c2, "m", [4, 5], at=d1)
+            record_samples(c2, "m", [100], at=d2)
+            record_samples(c1, "other", [7], at=d1)
+            record_sketch(c1, "m", TDigest(), at=d1)  # 空草图不落盘
+
+            self.assertEqual(c1.execute("SELECT COUNT(*) FROM metric_sketches").fetchone()[0], 3)
+            day1 = load_sketch(c1, "m", until=date(2026, 3, 1))
+            self.assertEqual(day1.summary(), {"count": 5, "p50": 3.0, "p95": 4.8, "max": 5.0})
+            self.assertEqual(load_sketch(c2, "m", since=date(2026, 3, 2)).summary()["max"], 100.0)
+            self.assertEqual(load_sketch(c2, "m").count, 6)
+        finally:
+            c1.close()
+            c2.close()
+
+    def test_pull_due_records_pickup_lag(self):
+        c = sch.conn(self.db)
+        try:
+            sch.init_db(c)
+            now = datetime.now(timezone.utc).replace(microsecond=0)
+            for i, lag in enumerate((30, 90)):
+                run_at = (now - timedelta(seconds=lag)).isoformat().replace("+00:00", "Z")
+                c.execute(
+                    """
+                    INSERT INTO scheduler_jobs(job_id, object_type, object_id, action, run_at, priority, priority_rank,
+                        idempotency_key, status, created_at, updated_at)
+                    VALUES (?, 'memory', ?, 'verify', ?, 'low', 1, ?, 'queued', ?, ?)
+                    """,
+                    (f"job_{i}", f"mem_{i}", run_at, f"job_{i}", run_at, run_at),
+                )
+            c.commit()
+            pulled = sch.pull_due(c, "w1", now=sch.now_iso(), limit=5)
+            self.assertEqual(len(pulled), 2)
+
+            td = load_sketch(c, sch.PICKUP_LAG_METRIC)
+            self.assertEqual(td.count, 2)
+            self.assertTrue(30.0 <= td.min < 60.0 and 90.0 <= td.max < 120.0)
+            self.assertEqual(sch.stats(c)["pickup_lag_sec_today"]["count"], 2)
+        finally:
+            c.close()
+
+    def test_pull_due_with_naive_now_still_picks_up(self):
+        c = sch.conn(self.db)
+        try:
+            sch.init_db(c)
+            c.execute(
+                """
+                INSERT INTO scheduler_jobs(job_id, object_type, object_id, action, run_at, priority, priority_rank,
+                    idempotency_key, status, created_at, updated_at)
+                VALUES ('job_1', 'memory', 'mem_1', 'verify', '2027-01-01T23:59:00Z', 'low', 1, 'job_1', 'queued',
+                    '2027-01-01T23:59:00Z', '2027-01-01T23:59:00Z')
+                """
+            )
+            c.commit()
+            # CLI `pull --now` 接受无时区时间；无时区按 UTC 计领取延迟
+            self.assertEqual(len(sch.pull_due(c, "w", "2027-01-02T00:00:00", 5)), 1)
+            td = load_sketch(c, sch.PICKUP_LAG_METRIC, since=date(2027, 1, 2))
+            self.assertEqual((td.count, td.max), (1, 60.0))
+        finally:
+            c.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from core.memory_experience_core_v0_1 import conn, ingest_memory, init_db
+from core.recall_cache import RecallCache, current_generation, make_key
+
+
+class RecallCacheTest(unittest.TestCase):
+    def _payload(self, mem_id: str) -> dict:
+        root = Path(__file__).resolve().parents[1]
+        fixture_path = root / "data" / "fixtures" / "critical-paths" / "08-memory-experience-path.json"
+        payload = json.loads(fixture_path.read_text(encoding="utf-8"))["memory"]
+        return dict(payload, id=mem_id)
+
+    def test_key_normalization(self):
+        self.assertEqual(
+            make_key("Hello World", "memory_items", 5, {"b": 1, "a": 2}),
+            make_key("hello world", "memory_items", 5, {"a": 2, "b": 1}),
+        )
+        # recall 按原样做子串匹配，空白不同结果可能不同，不能共用 entry
+        self.assertNotEqual(make_key("a  b", "memory_items", 5), make_key("a b", "memory_items", 5))
+        self.assertNotEqual(make_key(" a", "memory_items", 5), make_key("a", "memory_items", 5))
+        self.assertNotEqual(
+            make_key("hello", "memory_items", 5),
+            make_key("hello", "experience_records", 5),
+        )
+
+    def test_write_invalidates_by_generation(self):
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            cache = RecallCache()
+            calls = []
+
+            def compute():
+                calls.append(1)
+                return c.execute("SELECT COUNT(*) FROM memory_items").fetchone()[0]
+
+            def recall():
+                return cache.get_or_compute(c, query="q", table="memory_items", top_k=5, compute=compute)
+
+            self.assertEqual(recall(), 0)
+            self.assertEqual(recall(), 0)
+            self.assertEqual(len(calls), 1)
+
+            gen_before = current_generation(c, "memory_items")
+            ingest_memory(c, self._payload("mem_cache_1"), actor_id="test")
+            self.assertGreater(current_generation(c, "memory_items"), gen_before)
+
+            self.assertEqual(recall(), 1)
+            self.assertEqual(len(calls), 2)
+
+            # experience 表写入不影响 memory 查询的缓存
+            c.execute(
+                "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                ("exp_x", "active", "{}", "2026-01-01T00:00:00Z", "2026-01-01T00:00:00Z"),
+            )
+            c.commit()
+            self.assertEqual(recall(), 1)
+            self.assertEqual(len(calls), 2)
+
+            st = cache.stats()
+            self.assertEqual(st["hits"], 2)
+            self.assertEqual(st["misses"], 2)
+            self.assertEqual(st["invalidated"], 1)
+
+    def test_ttl_and_lru_eviction(self):
+        cache = RecallCache(max_entries=2, ttl_sec=0.05)
+        cache.put("a", 0, 1)
+        cache.put("b", 0, 2)
+        self.assertEqual(cache.get("a", 0), (True, 1))
+        cache.put("c", 0, 3)  # 淘汰最久未用的 b
+        self.assertEqual(cache.get("b", 0), (False, None))
+        self.assertEqual(cache.stats()["evicted"], 1)
+
+        time.sleep(0.06)
+        self.assertEqual(cache.get("a", 0), (False, None))
+        self.assertEqual(cache.stats()["expired"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
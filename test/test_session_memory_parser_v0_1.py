@@ -40,6 +40,42 @@ class SessionMemoryParserV01Test(unittest.TestCase):
         ids = [e["id"] for e in tool_events]
         self.assertEqual(len(ids), len(set(ids)))
 
+    def test_checkpoint_parses_only_appended_lines(self):
+        def user_line(i: int) -> str:
+            row = {
+                "type": "message",
+                "id": f"u{i}",
+                "timestamp": "2026-02-24T02:00:00Z",
+                "message": {"role": "user", "content": [{"type": "text", "text": f"请看看第 {i} 个问题"}]},
+            }
+            return json.dumps(row, ensure_ascii=False) + "\n"
+
+        with tempfile.TemporaryDirectory() as td:
+            session_path = Path(td) / "sess.jsonl"
+            checkpoint = Path(td) / "checkpoints.json"
+            session_path.write_text(json.dumps({"type": "session", "id": "sess_cp"}) + "\n" + user_line(1) + user_line(2))
+
+            first = parse_session(session_path, include_tool_calls=False, max_events=0, checkpoint_path=checkpoint)
+            self.assertEqual(first["summary"]["count"], 2)
+            self.assertEqual(first["checkpoint"]["lines_read"], 3)
+
+            again = parse_session(session_path, include_tool_calls=False, max_events=0, checkpoint_path=checkpoint)
+            self.assertEqual((again["summary"]["count"], again["checkpoint"]["lines_read"]), (0, 0))
+
+            with session_path.open("a", encoding="utf-8") as f:
+                f.write(user_line(3) + user_line(4) + user_line(5))
+            # max_events 提前停止：检查点只推进到已处理的行
+            part = parse_session(session_path, include_tool_calls=False, max_events=1, checkpoint_path=checkpoint)
+            self.assertEqual([e["migration_meta"]["session_line"] for e in part["memory_events"]], [4])
+            rest = parse_session(session_path, include_tool_calls=False, max_events=0, checkpoint_path=checkpoint)
+            self.assertEqual([e["migration_meta"]["session_line"] for e in rest["memory_events"]], [5, 6])
+            self.assertEqual(rest["session_id"], "sess_cp")
+            self.assertEqual(rest["checkpoint"]["end_offset"], session_path.stat().st_size)
+
+            full = parse_session(session_path, include_tool_calls=False, max_events=0)
+            self.assertEqual(full["summary"]["count"], 5)
+            self.assertNotIn("checkpoint", full)
+
 
 if __name__ == "__main__":
     unittest.main()
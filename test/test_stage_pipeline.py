@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import json
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "tools" / "scheduler"))
+
+from core.memory_experience_core_v0_1 import conn, init_db
+from core.stage_pipeline import run_pipeline
+from reflect_scheduler_worker_v0_1 import cognition_decision_v0_1, run_cognition_decision_pipeline  # noqa: E402
+
+
+class StagePipelineTest(unittest.TestCase):
+    def test_order_backpressure_and_metrics(self):
+        produced = []
+        in_flight = []
+        lock = threading.Lock()
+
+        def source(_inputs):
+            for i in range(50):
+                with lock:
+                    produced.append(i)
+                yield i
+
+        def slow_square(items):
+            for x in items:
+                with lock:
+                    in_flight.append(len(produced) - x)
+                time.sleep(0.001)
+                yield x * x
+
+        out, metrics = run_pipeline([("source", source), ("square", slow_square)], queue_size=4)
+        self.assertEqual(out, [i * i for i in range(50)])
+        # 有界队列：上游领先下游不超过 队列容量 + 各自手里的一条
+        self.assertLessEqual(max(in_flight), 4 + 2)
+        self.assertEqual([m["stage"] for m in metrics], ["source", "square"])
+        self.assertEqual([m["items"] for m in metrics], [50, 50])
+        self.assertGreater(metrics[1]["busy_sec"], 0.04)
+        self.assertGreater(metrics[1]["latency_ms_p95"], 0.5)
+
+    def test_stage_error_aborts_pipeline(self):
+        def source(_inputs):
+            i = 0
+            while True:  # 无限上游：必须被中止而不是卡在满队列上
+                yield i
+                i += 1
+
+        def fail_at_ten(items):
+            for x in items:
+                if x == 10:
+                    raise RuntimeError("boom")
+                yield x
+
+        with self.assertRaisesRegex(RuntimeError, "boom"):
+            run_pipeline([("source", source), ("check", fail_at_ten)], queue_size=2)
+
+    def test_cognition_decision_pipeline(self):
+        t = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            c = conn(db)
+            init_db(c)
+            for i in range(30):
+                payload = {"id": f"exp_{i}", "outcome": "positive", "confidence": 0.8, "episode_summary": f"经验 {i}"}
+                c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, 'active', ?, ?, ?)",
+                    (f"exp_{i}", json.dumps(payload, ensure_ascii=False), t, t),
+                )
+            c.commit()
+            c.close()
+
+            ce, cd, metrics = run_cognition_decision_pipeline(
+                db, since_days=30, actor_id="test", request_ref="reflect-test", queue_size=4
+            )
+            self.assertEqual((ce["applied"], ce["skipped"]), (30, 0))
+            self.assertEqual(len(cd), 30)
+            self.assertFalse([r for r in cd if r.get("error")])
+            self.assertEqual([m["items"] for m in metrics], [30, 30])
+
+            c = conn(db)
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM decision_traces").fetchone()[0], 30)
+
+            ce, cd, _ = run_cognition_decision_pipeline(db, since_days=30, actor_id="test", request_ref="reflect-test")
+            self.assertEqual((ce["applied"], ce["skipped"], len(cd)), (0, 30, 0))
+
+    def test_decide_overlaps_promote_chunks(self):
+        t = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+        with tempfile.TemporaryDirectory() as td:
+            db = Path(td) / "mk.sqlite"
+            c = conn(db)
+            init_db(c)
+            for i in range(100):
+                payload = {"id": f"exp_{i}", "outcome": "positive", "confidence": 0.8, "episode_summary": f"经验 {i}"}
+                c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) VALUES (?, 'active', ?, ?, ?)",
+                    (f"exp_{i}", json.dumps(payload, ensure_ascii=False), t, t),
+                )
+            c.commit()
+            c.close()
+
+            committed_at_decide: list[int] = []
+            real = cognition_decision_v0_1.cognition_to_decision
+
+            def spy(c, **kw):
+                if not committed_at_decide:
+                    committed_at_decide.append(c.execute("SELECT COUNT(*) FROM cognition_rules").fetchone()[0])
+                return real(c, **kw)
+
+            with mock.patch.object(cognition_decision_v0_1, "cognition_to_decision", side_effect=spy):
+                ce, cd, _ = run_cognition_decision_pipeline(
+                    db, since_days=30, actor_id="test", request_ref="reflect-test", queue_size=2, chunk_size=10
+                )
+            self.assertEqual((ce["applied"], ce["chunks"], len(cd)), (100, 10, 100))
+            # 第一条 decision 开始时 promote 最多提交了一个 chunk，其余 cognition 尚在推导
+            self.assertLessEqual(committed_at_decide[0], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
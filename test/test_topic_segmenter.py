@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import unittest
+
+from core.topic_segmenter import StreamingTopicSegmenter, TopicSegmenter
+
+
+def ts(minute: int, sec: int = 0) -> str:
+    return f"2026-03-01T10:{minute:02d}:{sec:02d}Z"
+
+
+MESSAGES = [
+    {"role": "user", "content": "帮我看看周报脚本", "timestamp": ts(0)},
+    {"role": "assistant", "content": "好的，我先看一下", "timestamp": ts(1)},
+    {"role": "assistant", "content": "方案是把 cron 改成每周五", "timestamp": ts(2)},
+    {"role": "user", "content": "可以，就这么办", "timestamp": ts(3)},
+    {"role": "assistant", "content": "要不要顺便加告警", "timestamp": ts(4)},
+    {"role": "user", "content": "System: heartbeat ok", "timestamp": ts(4, 30)},
+    {"role": "user", "content": "另外，recall 延迟有点高", "timestamp": ts(5)},
+    {"role": "assistant", "content": [{"type": "text", "text": "修复了索引，延迟已恢复"}], "timestamp": ts(6)},
+    {"role": "user", "content": "请问 TTL 默认是多少", "timestamp": ts(30)},
+    {"role": "assistant", "content": "默认 30 天", "timestamp": ts(31)},
+    {"role": "user", "content": "谢谢", "timestamp": ts(31, 30)},
+    {"role": "user", "content": "怎么调整", "timestamp": ts(32)},
+    {"role": "assistant", "content": "改配置文件", "timestamp": ""},
+    {"role": "assistant", "content": "然后重启服务", "timestamp": ts(33)},
+    {
+        "role": "user",
+        "content": 'Conversation info (untrusted metadata):\n```json\n{"message_id": "1"}\n```\n\n能不能再说说 TTL 策略',
+        "timestamp": ts(34),
+    },
+    {"role": "assistant", "content": "分三档", "timestamp": ts(35)},
+    {"role": "assistant", "content": "重启服务后生效", "timestamp": ts(50)},
+    {"role": "assistant", "content": "日志里可以看到", "timestamp": ts(51)},
+]
+
+# 重写为流式实现之前的批量版输出
+EXPECTED = [
+    ("seg_001", "一般对话", "info", "帮我看看周报脚本", ts(0), ts(1), [0, 1]),
+    ("seg_002", "任务执行", "task", "可以，就这么办", ts(2), ts(4), [2, 3, 4]),
+    ("seg_003", "任务执行", "task", "另外，recall 延迟有点高", ts(5), ts(6), [5, 6]),
+    ("seg_004", "问答讨论", "qa", "请问 TTL 默认是多少", ts(30), ts(31, 30), [7, 8, 9]),
+    ("seg_005", "信息分享", "info", "怎么调整", "", ts(33), [10, 11, 12]),
+    ("seg_006", "一般对话", "info", "能不能再说说 TTL 策略", ts(34), ts(35), [13, 14]),
+    ("seg_007", "任务执行", "task", "Assistant 回复", ts(50), ts(51), [15, 16]),
+]
+
+
+def _key(seg) -> tuple:
+    return (seg.id, seg.description, seg.type, seg.summary, seg.start_ts, seg.end_ts, seg.message_indices)
+
+
+class TopicSegmenterTest(unittest.TestCase):
+    def test_batch_segments_match_previous_algorithm(self):
+        segmenter = TopicSegmenter()
+        segments = segmenter.segment(MESSAGES)
+        self.assertEqual([_key(s) for s in segments], EXPECTED)
+        self.assertEqual(len(segments[3].messages), 3)
+        self.assertEqual(segments[5].messages[0]["content"], [{"type": "text", "text": "能不能再说说 TTL 策略"}])
+        # 同一实例内 id 连续编号
+        self.assertEqual(segmenter.segment(MESSAGES[:2])[0].id, "seg_008")
+        self.assertEqual(segmenter.segment([]), [])
+
+    def test_stream_emits_segment_as_soon_as_boundary_arrives(self):
+        stream = StreamingTopicSegmenter()
+        emitted_at: dict[str, int] = {}
+        segments = []
+        for i, m in enumerate(MESSAGES):
+            for seg in stream.feed(m):
+                emitted_at[seg.id] = i
+                segments.append(seg)
+        self.assertEqual(stream.pending, 2)
+        segments.extend(stream.flush())
+        self.assertEqual(stream.flush(), [])
+
+        self.assertEqual([_key(s) for s in segments], EXPECTED)
+        # seg_002 在 "另外，…" 到达时闭合（中间的系统消息被过滤、不触发产出）
+        self.assertEqual(emitted_at["seg_001"], 2)
+        self.assertEqual(emitted_at["seg_002"], 6)
+        self.assertEqual(emitted_at["seg_003"], 8)
+        self.assertNotIn("seg_007", emitted_at)
+
+    def test_stream_without_messages_keeps_only_aggregates(self):
+        stream = StreamingTopicSegmenter(keep_messages=False, start_counter=41)
+        segments = [seg for m in MESSAGES for seg in stream.feed(m)] + stream.flush()
+        self.assertEqual([(s.type, s.message_indices) for s in segments], [(e[2], e[6]) for e in EXPECTED])
+        self.assertTrue(all(s.messages == [] for s in segments))
+        self.assertEqual(segments[0].id, "seg_042")
+        self.assertEqual(stream.counter, 48)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import re
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from core.topic_segmenter import TopicSegmenter
+from core.topic_segmenter_llm import TopicSegmenterLLM, segment_and_compare
+
+LINE_RE = re.compile(r"^\[(\d+)\] \[[^\]]*\] \w+: (T\d+)", re.M)
+
+
+class _FakeLLMSegmenter(TopicSegmenterLLM):
+    """用确定性规则代替 LLM：按消息内容里的话题标签把连续消息归为一个 topic（窗口内局部下标）。"""
+
+    def __init__(self, **kw):
+        super().__init__({"api_base": "stub://", "model": "fake"}, **kw)
+        self.requests: list[list[int]] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def _request_topics(self, conv_text: str) -> list[dict]:
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        rows = [(int(i), label) for i, label in LINE_RE.findall(conv_text)]
+        with self._lock:
+            self.active -= 1
+            self.requests.append([i for i, _ in rows])
+        topics: list[dict] = []
+        for i, label in rows:
+            if topics and topics[-1]["description"] == label:
+                topics[-1]["message_indices"].append(i)
+            else:
+                topics.append({"id": f"topic_{len(topics) + 1}", "description": label, "type": "info",
+                               "summary": label, "message_indices": [i]})
+        return topics
+
+
+def _messages(n: int, topic_len: int = 25) -> list[dict]:
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant",
+         "content": f"T{i // topic_len} 第 {i} 条",
+         "timestamp": f"2026-03-01T10:{i // 60:02d}:{i % 60:02d}Z"}
+        for i in range(n)
+    ]
+
+
+def _expected(n: int, topic_len: int = 25) -> list[tuple[str, list[int]]]:
+    return [(f"T{t}", list(range(t * topic_len, min(n, (t + 1) * topic_len)))) for t in range((n + topic_len - 1) // topic_len)]
+
+
+class TopicSegmenterLLMWindowTest(unittest.TestCase):
+    def test_windows_reconcile_to_global_topics(self):
+        seg = _FakeLLMSegmenter(window_size=60, overlap=10, max_workers=4)
+        out = seg.segment(_messages(150))
+        self.assertEqual(seg.last_stats, {"windows": 3, "requested": 3, "cached": 0})
+        self.assertGreaterEqual(seg.max_active, 2)
+        self.assertEqual([(s.description, s.message_indices) for s in out], _expected(150))
+        self.assertEqual([s.id for s in out], [f"topic_{i}" for i in range(1, 7)])
+        self.assertEqual(out[0].messages[0]["content"], "T0 第 0 条")
+
+        # 话题边界正好落在切点（55）上：不合并
+        seg = _FakeLLMSegmenter(window_size=60, overlap=10)
+        out = seg.segment(_messages(150, topic_len=55))
+        self.assertEqual([(s.description, s.message_indices) for s in out], _expected(150, topic_len=55))
+
+    def test_growing_transcript_only_requests_tail(self):
+        with tempfile.TemporaryDirectory() as td:
+            cache = Path(td) / "topics.json"
+            seg = _FakeLLMSegmenter(window_size=60, overlap=10, cache_path=cache)
+            seg.segment(_messages(150))
+
+            # 新实例从磁盘缓存恢复：前两个窗口命中，只请求尾部
+            seg2 = _FakeLLMSegmenter(window_size=60, overlap=10, cache_path=cache)
+            out = seg2.segment(_messages(180))
+            self.assertEqual(seg2.last_stats, {"windows": 4, "requested": 2, "cached": 2})
+            self.assertEqual([(s.description, s.message_indices) for s in out], _expected(180))
+
+            seg2.segment(_messages(180))
+            self.assertEqual(seg2.last_stats["requested"], 0)
+
+    def test_short_transcript_single_window(self):
+        seg = _FakeLLMSegmenter(window_size=60, overlap=10)
+        out = seg.segment(_messages(40))
+        self.assertEqual(seg.last_stats["windows"], 1)
+        self.assertEqual([(s.id, s.message_indices) for s in out], [("topic_1", list(range(25))), ("topic_2", list(range(25, 40)))])
+
+    def test_segment_and_compare(self):
+        msgs = _messages(50)
+        comp = segment_and_compare(msgs, _FakeLLMSegmenter(), TopicSegmenter())
+        self.assertEqual(len(comp.llm_segments), 2)
+        self.assertTrue(comp.heuristic_segments)
+
+
+if __name__ == "__main__":
+    unittest.main()
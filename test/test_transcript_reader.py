@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.dialogue_context_resolver import read_session_messages
+from core.transcript_reader import LineIndex, TranscriptCheckpoints, tail_lines
+
+
+def _msg(i: int, role: str = "user") -> str:
+    row = {
+        "type": "message",
+        "timestamp": f"2026-03-01T10:{i // 60:02d}:{i % 60:02d}Z",
+        "message": {"role": role, "content": [{"type": "text", "text": f"消息 {i}"}]},
+    }
+    return json.dumps(row, ensure_ascii=False) + "\n"
+
+
+class TranscriptReaderTest(unittest.TestCase):
+    def setUp(self):
+        self._td = tempfile.TemporaryDirectory()
+        self.dir = Path(self._td.name)
+        self.path = self.dir / "sess.jsonl"
+
+    def tearDown(self):
+        self._td.cleanup()
+
+    def test_tail_lines_across_block_boundaries(self):
+        lines = [f"第 {i} 行 " + "x" * (i % 7) for i in range(50)]
+        self.path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        for block in (1, 3, 16, 64 * 1024):
+            self.assertEqual(tail_lines(self.path, 5, block_size=block), lines[-5:])
+            self.assertEqual(tail_lines(self.path, 500, block_size=block), lines)
+        self.assertEqual(tail_lines(self.path, 0), [])
+
+        # 无结尾换行 / 空文件
+        self.path.write_text("a\nb\nc", encoding="utf-8")
+        self.assertEqual(tail_lines(self.path, 2, block_size=2), ["b", "c"])
+        self.path.write_text("", encoding="utf-8")
+        self.assertEqual(tail_lines(self.path, 3), [])
+
+    def test_read_session_messages_from_end(self):
+        with self.path.open("w", encoding="utf-8") as f:
+            for i in range(300):
+                f.write(_msg(i, "user" if i % 2 == 0 else "assistant"))
+            f.write('{"type": "custom"}\n')
+
+        head = read_session_messages(str(self.path), limit=10)
+        self.assertEqual([m["index"] for m in head], list(range(10)))
+
+        tail = read_session_messages(str(self.path), limit=10, from_end=True)
+        self.assertEqual([m["content"][0]["text"] for m in tail], [f"消息 {i}" for i in range(291, 300)])
+        self.assertEqual(tail[-1]["index"], -2)
+        self.assertEqual(read_session_messages(str(self.dir / "missing.jsonl"), from_end=True), [])
+
+    def test_checkpoint_reads_only_appended_complete_lines(self):
+        state = self.dir / "checkpoints.json"
+        self.path.write_text("".join(_msg(i) for i in range(3)) + '{"type": "mess', encoding="utf-8")
+
+        cps = TranscriptCheckpoints(state)
+        got = []
+        for line in cps.read_appended(self.path):
+            got.append(line.line_no)
+            cps.advance(self.path, line)
+        cps.save()
+        self.assertEqual(got, [1, 2, 3])
+
+        # 补完半行并追加；新实例从落盘检查点继续
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write('age"}\n' + _msg(3))
+        cps = TranscriptCheckpoints(state)
+        appended = list(cps.read_appended(self.path))
+        self.assertEqual([x.line_no for x in appended], [4, 5])
+        self.assertEqual(appended[0].text, '{"type": "message"}')
+        self.assertEqual(appended[-1].end, self.path.stat().st_size)
+
+        # 截断 → 从头读
+        cps.advance(self.path, appended[-1])
+        self.path.write_text(_msg(9), encoding="utf-8")
+        self.assertEqual(cps.position(self.path), (0, 0, True))
+
+        # 轮转（新 inode）→ 从头读
+        cps.advance(self.path, next(cps.read_appended(self.path)))
+        rotated = self.dir / "sess.new.jsonl"
+        rotated.write_text(_msg(1) + _msg(2), encoding="utf-8")
+        os.replace(rotated, self.path)
+        self.assertEqual([x.line_no for x in cps.read_appended(self.path)], [1, 2])
+
+    def test_line_index_random_access_and_refresh(self):
+        self.path.write_text("zero\none\r\ntwo\nthr", encoding="utf-8")
+        with LineIndex(self.path) as idx:
+            self.assertEqual(len(idx), 4)
+            self.assertEqual((idx[0], idx[1], idx[-1]), ("zero", "one", "thr"))
+            self.assertEqual(idx.lines(1, 3), ["one", "two"])
+            self.assertEqual(idx.offset(2), len("zero\none\r\n"))
+            with self.assertRaises(IndexError):
+                idx[4]
+
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("ee\nfour\n")
+            self.assertEqual(idx.refresh(), 5)
+            self.assertEqual(idx.lines(-2), ["three", "four"])
+
+        self.path.write_text("", encoding="utf-8")
+        with LineIndex(self.path) as idx:
+            self.assertEqual(len(idx), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
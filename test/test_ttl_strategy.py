@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from core.memory_experience_core_v0_1 import conn, init_db
+from core.ttl_strategy import DEFAULT_CONFIG, compute_score, iter_prune, run_prune
+
+
+def _iso(dt: datetime) -> str:
+    return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+class TTLStrategyTest(unittest.TestCase):
+    def _seed(self, c, now: datetime, n: int = 300) -> dict:
+        rng = random.Random(7)
+        expected = {}
+        for i in range(n):
+            table, status, kind = (
+                ("memory_items", "candidate", "candidate") if i % 2 else ("experience_records", "active", "experience")
+            )
+            created = _iso(now - timedelta(days=rng.randint(0, 120), hours=rng.randint(0, 23)))
+            if i % 37 == 0:
+                created = "not-a-date"
+            access = rng.randint(0, 12)
+            item_id = f"{kind}_{i:04d}"
+            payload = {"id": item_id, "metadata": {"access_count": access}}
+            c.execute(
+                f"INSERT INTO {table}(id, status, payload_json, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (item_id, status, json.dumps(payload), created, created),
+            )
+            expected[item_id] = compute_score(created, access, DEFAULT_CONFIG, now=now)
+        c.commit()
+        return expected
+
+    def test_sql_scores_match_python(self):
+        now = datetime(2026, 6, 1, 12, 0, tzinfo=timezone.utc)
+        with tempfile.TemporaryDirectory() as td:
+            c = conn(Path(td) / "mk.sqlite")
+            init_db(c)
+            expected = self._seed(c, now)
+
+            pruned = {r["id"]: r["score"] for r in iter_prune(c, DEFAULT_CONFIG, dry_run=True, now=now, chunk_size=17)}
+            want = {k: round(v, 3) for k, v in expected.items() if v < DEFAULT_CONFIG["prune_threshold"]}
+            self.assertTrue(want)
+            self.assertEqual(set(pruned), set(want))
+            for k, v in want.items():
+                self.assertAlmostEqual(pruned[k], v, places=3)
+
+    def test_apply_archives_experiences_and_limit(self):
+        now = datetime.now(timezone.utc)
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "mk.sqlite"
+            c = conn(db_path)
+            init_db(c)
+            expected = self._seed(c, now)
+            c.close()
+
+            cfg = dict(DEFAULT_CONFIG)
+            limited = run_prune(dry_run=True, limit=5, db_path=db_path, config=cfg)
+            self.assertTrue(limited["truncated"])
+            self.assertEqual(len(limited["candidates_pruned"]) + len(limited["experiences_pruned"]), 5)
+
+            out = run_prune(dry_run=False, chunk_size=50, db_path=db_path, config=cfg)
+            self.assertFalse(out["truncated"])
+            exp_pruned = {r["id"] for r in out["experiences_pruned"]}
+            self.assertEqual(
+                exp_pruned,
+                {k for k, v in expected.items() if k.startswith("experience_") and v < cfg["prune_threshold"]},
+            )
+
+            c = conn(db_path)
+            archived = {r[0] for r in c.execute("SELECT id FROM experience_records WHERE status='archived'")}
+            self.assertEqual(archived, exp_pruned)
+            # memory candidate 只报告不归档
+            self.assertEqual(c.execute("SELECT COUNT(*) FROM memory_items WHERE status!='candidate'").fetchone()[0], 0)
+
+    def test_limit_exactly_at_eligible_count_is_not_truncated(self):
+        now = datetime.now(timezone.utc)
+        with tempfile.TemporaryDirectory() as td:
+            db_path = Path(td) / "mk.sqlite"
+            c = conn(db_path)
+            init_db(c)
+            expected = self._seed(c, now)
+            # 末尾追加一整块新鲜记录：limit 恰好用完时其后只剩不可淘汰的行
+            fresh = _iso(now)
+            for i in range(40):
+                item_id = f"experience_fresh_{i:02d}"
+                payload = {"id": item_id, "metadata": {"access_count": 50}}
+                c.execute(
+                    "INSERT INTO experience_records(id, status, payload_json, created_at, updated_at) "
+                    "VALUES (?, 'active', ?, ?, ?)",
+                    (item_id, json.dumps(payload), fresh, fresh),
+                )
+            c.commit()
+            c.close()
+
+            cfg = dict(DEFAULT_CONFIG)
+            n = sum(1 for v in expected.values() if v < cfg["prune_threshold"])
+            exact = run_prune(dry_run=True, limit=n, chunk_size=17, db_path=db_path, config=cfg)
+            self.assertFalse(exact["truncated"])
+            self.assertEqual(len(exact["candidates_pruned"]) + len(exact["experiences_pruned"]), n)
+
+            short = run_prune(dry_run=True, limit=n - 1, chunk_size=17, db_path=db_path, config=cfg)
+            self.assertTrue(short["truncated"])
+
+
+if __name__ == "__main__":
+    unittest.main()
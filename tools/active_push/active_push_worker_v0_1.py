@@ -26,6 +26,9 @@ from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
 sys.path.insert(0, str(ROOT / "tools"))
+sys.path.insert(0, str(ROOT))
+
+from core.memory_experience_core_v0_1 import init_db as init_me_db  # noqa: E402
 
 DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
 LEDGER_FILE = ROOT / "data" / "governance" / "active_push_ledger.jsonl"
@@ -298,8 +301,14 @@ def scan_experience_cards(db_path: Path, dry_run: bool = True) -> list[dict]:
     pushed = []
 
     try:
+        init_me_db(conn)
+        # episode/action 走反范式列；applicability 为数组，只抽取该字段的 JSON 片段（坏 JSON 行得 NULL）
         rows = conn.execute(
-            "SELECT id, payload_json, created_at FROM experience_records WHERE status='active' ORDER BY created_at DESC LIMIT 50"
+            """SELECT id, content, action_taken,
+                      CASE WHEN json_valid(payload_json) THEN json_extract(payload_json, '$.applicability') END
+                          AS applicability_json,
+                      created_at
+               FROM experience_records WHERE status='active' ORDER BY created_at DESC LIMIT 50"""
         ).fetchall()
     except sqlite3.OperationalError:
         conn.close()
@@ -311,14 +320,12 @@ def scan_experience_cards(db_path: Path, dry_run: bool = True) -> list[dict]:
         if exp_id in ledger:
             continue
 
+        episode = row["content"] or ""
+        action = row["action_taken"] or ""
         try:
-            payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
+            applicability = json.loads(row["applicability_json"]) if row["applicability_json"] else []
         except Exception:
-            payload = {}
-
-        episode = payload.get("episode_summary", "")
-        action = payload.get("action_taken", "")
-        applicability = payload.get("applicability", [])
+            applicability = []
         created = row["created_at"]
 
         # Build readable card text
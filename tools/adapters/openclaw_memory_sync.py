@@ -10,7 +10,7 @@ OpenClaw MEMORY.md → MindKernel 同步适配器
 - memory/YYYY-MM-DD.md：按 ### 三级标题切分，跳过复核相关节
 - 去重：内容前200字符的 MD5 哈希，已同步则跳过
 - Checkpoint：记录每文件 mtime + 已同步内容哈希集合
-- API：POST http://localhost:18793/api/v1/retain
+- API：POST http://localhost:18793/api/v1/retain/batch（客户端缓冲，按批提交）
 
 Usage:
   python3 openclaw_memory_sync.py [--once] [--poll --interval 300]
@@ -48,23 +48,19 @@ PYTHON = "/opt/homebrew/bin/python3"
 # API 调用
 # ---------------------------------------------------------------------------
 
-def api_retain(content: str, source: str, tags: list[str],
-               event_date: str | None = None) -> dict | None:
-    """调用 MindKernel /retain 接口。"""
-    import urllib.request
+# 客户端缓冲：攒够一批再调用 /retain/batch（服务端上限 500）
+RETAIN_BATCH_SIZE = 50
+# 这些状态码说明是批内条目本身有问题（校验失败 / 过大），值得拆批重试
+RETAIN_SPLIT_STATUS = {400, 413, 422}
 
-    payload = {
-        "content": content,
-        "source": source,
-        "confidence": 0.75,
-        "tags": tags,
-    }
-    if event_date:
-        payload["event_date"] = event_date
 
-    body = json.dumps(payload, ensure_ascii=False).encode()
+def api_retain_batch(items: list[dict]) -> dict | None:
+    """调用 MindKernel /retain/batch 接口，整批一个事务。"""
+    import urllib.request
+
+    body = json.dumps({"items": items}, ensure_ascii=False).encode()
     req = urllib.request.Request(
-        f"{API_BASE}/api/v1/retain",
+        f"{API_BASE}/api/v1/retain/batch",
         data=body,
         headers={
             "Authorization": f"Bearer {API_KEY}",
@@ -74,17 +70,48 @@ def api_retain(content: str, source: str, tags: list[str],
         method="POST",
     )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
+        with urllib.request.urlopen(req, timeout=30) as resp:
             return json.loads(resp.read())
     except urllib.error.HTTPError as e:
         body = e.read().decode()[:200]
-        print(f"  [WARN] retain failed {e.code}: {body}")
-        return None
+        print(f"  [WARN] retain batch failed {e.code}: {body}")
+        return {"ok": False, "status": e.code}
     except Exception as e:
-        print(f"  [WARN] retain error: {e}")
+        print(f"  [WARN] retain batch error: {e}")
         return None
 
 
+def retain_bisect(items: list[dict]) -> list[bool]:
+    """
+    提交一批 item，返回逐条是否写入。
+    /retain/batch 整批一个事务：被拒（RETAIN_SPLIT_STATUS）时二分重试，坏条目只让它自己失败；
+    网络错误 / 鉴权失败等与条目无关的错误不拆批，整批留待下次。
+    """
+    if not items:
+        return []
+    result = api_retain_batch(items)
+    if result and result.get("ok"):
+        return [True] * len(items)
+    if len(items) == 1 or not result or result.get("status") not in RETAIN_SPLIT_STATUS:
+        return [False] * len(items)
+    mid = len(items) // 2
+    return retain_bisect(items[:mid]) + retain_bisect(items[mid:])
+
+
+def retain_item(content: str, source: str, tags: list[str],
+                event_date: str | None = None) -> dict:
+    """构建 /retain/batch 单条 item。"""
+    item = {
+        "content": content,
+        "source": source,
+        "confidence": 0.75,
+        "tags": tags,
+    }
+    if event_date:
+        item["event_date"] = event_date
+    return item
+
+
 # ---------------------------------------------------------------------------
 # Checkpoint
 # ---------------------------------------------------------------------------
@@ -226,7 +253,30 @@ def sync_file(
 
     retained = 0
     skipped = 0
+    failed = 0
     new_hashes = []
+    pending: list[tuple[str, str, dict]] = []
+    pending_dups: dict[str, int] = {}  # 缓冲中哈希 → 之后又遇到的重复次数
+
+    def flush():
+        nonlocal retained, skipped, failed
+        if not pending:
+            return
+        oks = retain_bisect([item for _, _, item in pending])
+        for (title, h, _), ok in zip(pending, oks):
+            dups = pending_dups.get(h, 0)
+            if ok:
+                retained += 1
+                skipped += dups
+                new_hashes.extend([h] * (1 + dups))
+                cp["content_hashes"].append(h)
+                print(f"  [RETAINED] {title[:60]}")
+            else:
+                # API 失败则不记哈希，下次重试
+                failed += 1
+                print(f"  [FAIL] {title[:60]}")
+        pending.clear()
+        pending_dups.clear()
 
     for sec in sections:
         if len(sec) == 4:
@@ -241,19 +291,21 @@ def sync_file(
             skipped += 1
             new_hashes.append(h)
             continue
+        if h in pending_dups:
+            # 同一缓冲内的重复节：随首条的结果一起计入
+            pending_dups[h] += 1
+            continue
+        pending_dups[h] = 0
 
-        result = api_retain(content, f"{source_prefix}:{file_path.name}", tags, event_date)
-        if result and result.get("ok"):
-            retained += 1
-            new_hashes.append(h)
-            cp["content_hashes"].append(h)
-            print(f"  [RETAINED] {title[:60]}")
-        else:
-            # API 失败则不记哈希，下次重试
-            print(f"  [FAIL] {title[:60]}")
+        pending.append((title, h, retain_item(content, f"{source_prefix}:{file_path.name}", tags, event_date)))
+        if len(pending) >= RETAIN_BATCH_SIZE:
+            flush()
+
+    flush()
 
-    # 更新文件元数据
-    file_meta["mtime"] = mtime
+    # 更新文件元数据；有失败条目时不记 mtime，下次仍会重读文件重试
+    if not failed:
+        file_meta["mtime"] = mtime
     file_meta["content_hashes"] = new_hashes
 
     return retained, skipped
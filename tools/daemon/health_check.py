@@ -12,11 +12,17 @@ import sys
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.mecd_metrics import read_mecd_metrics  # noqa: E402
+
 DAEMON_PID_FILE = ROOT / "data" / "daemon" / "memory_observer_v0_2.pid"
 DAEMON_LOCK_FILE = ROOT / "data" / "daemon" / "memory_observer_v0_2.lock"
 DAEMON_DB = ROOT / "data" / "daemon" / "memory_observer_v0_2.sqlite"
 SCHEDULER_DB = ROOT / "data" / "scheduler.sqlite"
 EVENTS_FILE = ROOT / "data" / "fixtures" / "daemon_events_openclaw.jsonl"
+MAIN_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
 
 
 def check_pid_file(pid_file: Path) -> dict:
@@ -141,12 +147,36 @@ def check_events_file(events_file: Path) -> dict:
     return result
 
 
+def check_mecd(db_path: Path) -> dict:
+    """M→E→C→D 各阶段行数，读 mecd_metrics 物化计数"""
+    result = {"ok": True, "memory": 0, "experience": 0, "relations": 0, "decisions": 0, "audit_events": 0}
+    if not db_path.exists():
+        result["ok"] = False
+        result["reason"] = "db_missing"
+        return result
+    try:
+        conn = sqlite3.connect(str(db_path))
+        stats = read_mecd_metrics(conn)
+        conn.close()
+    except sqlite3.Error as e:
+        result["ok"] = False
+        result["reason"] = f"sqlite_error: {e}"
+        return result
+    result["memory"] = stats["memory_items"]["total"]
+    result["experience"] = stats["experience_records"]["total"]
+    result["relations"] = stats["knowledge_relations"]["total"]
+    result["decisions"] = stats["decision_traces"]["total"]
+    result["audit_events"] = stats["audit_events"]["total"]
+    return result
+
+
 def main():
     pid_info = check_pid_file(DAEMON_PID_FILE)
     lock_info = check_lock_file(pid_info, DAEMON_LOCK_FILE)
     db_info = check_daemon_db(DAEMON_DB)
     sched_info = check_scheduler(SCHEDULER_DB)
     events_info = check_events_file(EVENTS_FILE)
+    mecd_info = check_mecd(MAIN_DB)  # 仅报告，不参与 overall_ok
 
     overall_ok = (
         pid_info["running"] and
@@ -163,6 +193,7 @@ def main():
         "daemon_db": db_info,
         "scheduler": sched_info,
         "events_file": events_info,
+        "mecd": mecd_info,
     }
     print(json.dumps(out, ensure_ascii=False, indent=2))
     raise SystemExit(0 if overall_ok else 1)
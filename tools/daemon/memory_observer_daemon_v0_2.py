@@ -45,12 +45,14 @@ from core.realtime_memory_candidate_v0_2 import (  # noqa: E402
     is_workflow_ack_text,
     temporal_signature_text,
 )
+from core.quantile_sketch import TDigest, record_sketch  # noqa: E402
 from core.strategies import get_strategy, CandidateScore  # noqa: E402
 
 DEFAULT_EVENTS_FILE = ROOT / "data" / "fixtures" / "daemon_events_v0_2.jsonl"
 DEFAULT_STATE_DB = ROOT / "data" / "daemon" / "memory_observer_v0_2.sqlite"
 DEFAULT_PID_FILE = ROOT / "data" / "daemon" / "memory_observer_v0_2.pid"
 DEFAULT_LOCK_FILE = ROOT / "data" / "daemon" / "memory_observer_v0_2.lock"
+BATCH_LATENCY_METRIC = "daemon.batch_latency_sec"
 
 RISK_RANK = {"low": 1, "medium": 2, "high": 3}
 
@@ -1053,6 +1055,7 @@ def main():
 
     loops = 0
     stopped_by_signal = False
+    batch_latency = TDigest()  # 非空批次的处理耗时（秒）
 
     batch_started = now_iso()
 
@@ -1097,6 +1100,7 @@ def main():
         while True:
             loops += 1
 
+            batch_t0 = time.perf_counter()
             br = process_batch(
                 c,
                 mode=args.mode,
@@ -1120,6 +1124,8 @@ def main():
                 ack_rollup_every=max(1, int(args.ack_rollup_every)),
             )
 
+            if br.processed > 0:
+                batch_latency.add(time.perf_counter() - batch_t0)
             processed_this_run += br.processed
             errors_this_run += br.errors
             normalized_this_run += br.normalized
@@ -1176,6 +1182,7 @@ def main():
                 ack_rollup_candidates_this_run,
             ),
         )
+        record_sketch(c, BATCH_LATENCY_METRIC, batch_latency)
         c.commit()
 
         scheduler_stats = sch.stats(sc) if sc is not None else None
@@ -1203,6 +1210,7 @@ def main():
             "system_repeat_alerts_this_run": system_repeat_alerts_this_run,
             "ack_compressed_this_run": ack_compressed_this_run,
             "ack_rollup_candidates_this_run": ack_rollup_candidates_this_run,
+            "batch_latency_sec": batch_latency.summary(),
             "processed_total": processed_total,
             "offset": offset,
             "last_event_id": last_event_id,
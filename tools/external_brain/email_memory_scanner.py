@@ -56,22 +56,19 @@ HIGH_VALUE_KEYWORDS = [
 ]
 
 
-def api_retain(content: str, source: str, tags: list, event_date: str | None = None) -> dict | None:
-    """调用 MindKernel /retain 接口。"""
-    import urllib.request
+# 客户端缓冲：攒够一批再调用 /retain/batch（服务端上限 500）
+RETAIN_BATCH_SIZE = 50
+# 这些状态码说明是批内条目本身有问题（校验失败 / 过大），值得拆批重试
+RETAIN_SPLIT_STATUS = {400, 413, 422}
 
-    payload = {
-        "content": content,
-        "source": source,
-        "confidence": 0.75,
-        "tags": tags,
-    }
-    if event_date:
-        payload["event_date"] = event_date
 
-    body = json.dumps(payload, ensure_ascii=False).encode()
+def api_retain_batch(items: list[dict]) -> dict | None:
+    """调用 MindKernel /retain/batch 接口，整批一个事务。"""
+    import urllib.request
+
+    body = json.dumps({"items": items}, ensure_ascii=False).encode()
     req = urllib.request.Request(
-        f"{API_BASE}/api/v1/retain",
+        f"{API_BASE}/api/v1/retain/batch",
         data=body,
         headers={
             "Authorization": f"Bearer {API_KEY}",
@@ -81,13 +78,53 @@ def api_retain(content: str, source: str, tags: list, event_date: str | None = N
         method="POST",
     )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
+        with urllib.request.urlopen(req, timeout=30) as resp:
             return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        print(f"  [WARN] retain batch failed {e.code}: {e.read().decode()[:200]}")
+        return {"ok": False, "status": e.code}
     except Exception as e:
-        print(f"  [WARN] retain failed: {e}")
+        print(f"  [WARN] retain batch failed: {e}")
         return None
 
 
+def retain_bisect(items: list[dict]) -> list[bool]:
+    """提交一批 item，返回逐条是否写入；整批被拒时二分重试，坏条目只让它自己失败。"""
+    if not items:
+        return []
+    result = api_retain_batch(items)
+    if result and result.get("ok"):
+        return [True] * len(items)
+    if len(items) == 1 or not result or result.get("status") not in RETAIN_SPLIT_STATUS:
+        return [False] * len(items)
+    mid = len(items) // 2
+    return retain_bisect(items[:mid]) + retain_bisect(items[mid:])
+
+
+def retain_item(content: str, source: str, tags: list, event_date: str | None = None) -> dict:
+    """构建 /retain/batch 单条 item。"""
+    item = {
+        "content": content,
+        "source": source,
+        "confidence": 0.75,
+        "tags": tags,
+    }
+    if event_date:
+        item["event_date"] = event_date
+    return item
+
+
+def flush_pending(pending: list[tuple[str, dict]]) -> int:
+    """提交缓冲区中的 (subject, item)，返回成功条数并清空缓冲。"""
+    if not pending:
+        return 0
+    oks = retain_bisect([item for _, item in pending])
+    for (subject, _), ok in zip(pending, oks):
+        print(f"    [{'RETAINED' if ok else 'FAIL'}] {subject[:50]}")
+    pending.clear()
+    return sum(oks)
+
+
 def list_emails(account: str, days: int = 3, page_size: int = 20) -> list[dict]:
     """通过 himalaya 列出近 N 天的邮件。"""
     cutoff = datetime.now(timezone.utc) - timedelta(days=days)
@@ -221,6 +258,7 @@ def scan_account(account: str, days: int, dry_run: bool = True) -> dict:
 
     retained = 0
     skipped = 0
+    pending: list[tuple[str, dict]] = []
 
     for em in emails:
         em_id = em.get("id", "")
@@ -246,12 +284,11 @@ def scan_account(account: str, days: int, dry_run: bool = True) -> dict:
             retained += 1
             continue
 
-        result = api_retain(content, f"email:{account}:{em_id}", tags, f"{date}T00:00:00Z")
-        if result and result.get("ok"):
-            retained += 1
-            print(f"    [RETAINED] {subject[:50]}")
-        else:
-            print(f"    [FAIL] {subject[:50]}")
+        pending.append((subject, retain_item(content, f"email:{account}:{em_id}", tags, f"{date}T00:00:00Z")))
+        if len(pending) >= RETAIN_BATCH_SIZE:
+            retained += flush_pending(pending)
+
+    retained += flush_pending(pending)
 
     return {"account": account, "retained": retained, "skipped": skipped}
 
@@ -8,7 +8,7 @@ Feishu Document Memory Scanner — B 外部记忆大脑
 - 搜索用户可访问的云文档
 - 获取文档摘要/内容
 - 过滤低价值文档（空文档、模板、系统文档）
-- 调用 MindKernel /retain API
+- 调用 MindKernel /retain/batch API（客户端缓冲，按批提交）
 
 Usage:
   python tools/external_brain/feishu_doc_scanner.py --days 30 --dry
@@ -36,22 +36,19 @@ SKIP_KEYWORDS = [
 ]
 
 
-def api_retain(content: str, source: str, tags: list, event_date: str | None = None) -> dict | None:
-    """调用 MindKernel /retain 接口。"""
-    import urllib.request
+# 客户端缓冲：攒够一批再调用 /retain/batch（服务端上限 500）
+RETAIN_BATCH_SIZE = 50
+# 这些状态码说明是批内条目本身有问题（校验失败 / 过大），值得拆批重试
+RETAIN_SPLIT_STATUS = {400, 413, 422}
 
-    payload = {
-        "content": content,
-        "source": source,
-        "confidence": 0.80,
-        "tags": tags,
-    }
-    if event_date:
-        payload["event_date"] = event_date
 
-    body = json.dumps(payload, ensure_ascii=False).encode()
+def api_retain_batch(items: list[dict]) -> dict | None:
+    """调用 MindKernel /retain/batch 接口，整批一个事务。"""
+    import urllib.request
+
+    body = json.dumps({"items": items}, ensure_ascii=False).encode()
     req = urllib.request.Request(
-        f"{API_BASE}/api/v1/retain",
+        f"{API_BASE}/api/v1/retain/batch",
         data=body,
         headers={
             "Authorization": f"Bearer {API_KEY}",
@@ -61,13 +58,53 @@ def api_retain(content: str, source: str, tags: list, event_date: str | None = N
         method="POST",
     )
     try:
-        with urllib.request.urlopen(req, timeout=15) as resp:
+        with urllib.request.urlopen(req, timeout=30) as resp:
             return json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        print(f"  [WARN] retain batch failed {e.code}: {e.read().decode()[:200]}")
+        return {"ok": False, "status": e.code}
     except Exception as e:
-        print(f"  [WARN] retain failed: {e}")
+        print(f"  [WARN] retain batch failed: {e}")
         return None
 
 
+def retain_bisect(items: list[dict]) -> list[bool]:
+    """提交一批 item，返回逐条是否写入；整批被拒时二分重试，坏条目只让它自己失败。"""
+    if not items:
+        return []
+    result = api_retain_batch(items)
+    if result and result.get("ok"):
+        return [True] * len(items)
+    if len(items) == 1 or not result or result.get("status") not in RETAIN_SPLIT_STATUS:
+        return [False] * len(items)
+    mid = len(items) // 2
+    return retain_bisect(items[:mid]) + retain_bisect(items[mid:])
+
+
+def retain_item(content: str, source: str, tags: list, event_date: str | None = None) -> dict:
+    """构建 /retain/batch 单条 item。"""
+    item = {
+        "content": content,
+        "source": source,
+        "confidence": 0.80,
+        "tags": tags,
+    }
+    if event_date:
+        item["event_date"] = event_date
+    return item
+
+
+def flush_pending(pending: list[tuple[str, dict]]) -> int:
+    """提交缓冲区中的 (title, item)，返回成功条数并清空缓冲。"""
+    if not pending:
+        return 0
+    oks = retain_bisect([item for _, item in pending])
+    for (title, _), ok in zip(pending, oks):
+        print(f"    [{'RETAINED' if ok else 'FAIL'}] {title[:50]}")
+    pending.clear()
+    return sum(oks)
+
+
 def run_lark_cli(args: list) -> dict:
     """执行 lark-cli 命令，返回 JSON 结果。"""
     cmd = ["lark-cli"] + args
@@ -191,6 +228,7 @@ def scan_feishu_docs(days: int = 30, dry_run: bool = True) -> dict:
 
     retained = 0
     skipped = 0
+    pending: list[tuple[str, dict]] = []
 
     for item in results:
         meta = item.get("result_meta", {})
@@ -245,17 +283,19 @@ def scan_feishu_docs(days: int = 30, dry_run: bool = True) -> dict:
             retained += 1
             continue
 
-        result = api_retain(
-            memory_content,
-            f"feishu:doc:{token}",
-            tags,
-            f"{update_date}T00:00:00Z" if update_date else None,
-        )
-        if result and result.get("ok"):
-            retained += 1
-            print(f"    [RETAINED] {title[:50]}")
-        else:
-            print(f"    [FAIL] {title[:50]}")
+        pending.append((
+            title,
+            retain_item(
+                memory_content,
+                f"feishu:doc:{token}",
+                tags,
+                f"{update_date}T00:00:00Z" if update_date else None,
+            ),
+        ))
+        if len(pending) >= RETAIN_BATCH_SIZE:
+            retained += flush_pending(pending)
+
+    retained += flush_pending(pending)
 
     return {"retained": retained, "skipped": skipped}
 
@@ -10,8 +10,6 @@ import os
 import re
 import sys
 import time
-import urllib.error
-import urllib.request
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -24,6 +22,7 @@ if str(TOOLS_ROOT) not in sys.path:
     sys.path.insert(0, str(TOOLS_ROOT))
 
 from schema_runtime import validate_payload
+from core.llm_client import LLMClient, LLMHTTPError, get_client
 from core.llm_resilience_v0_2 import LLMResilienceController, LLMResilienceConfig
 
 
@@ -45,16 +44,42 @@ class LLMProcessorConfig:
     breaker_cooldown_sec: int = 300
     resilience_state_file: str = str(ROOT / "data" / "daemon" / "llm_resilience_v0_2.json")
 
+    # batch mode: pack multiple inputs into one prompt
+    batch_token_budget: int = 3000
+    batch_max_inputs: int = 20
+    # 单次批量请求的输出上限（gpt-4o-mini 输出上限 16384）；每段按 max_tokens 预留，装箱时一并约束
+    batch_max_output_tokens: int = 16000
+
 
 class LLMProcessorError(RuntimeError):
     pass
 
 
+EXTRACT_ITEM_SPEC = (
+    "每个 item 必须包含: kind(event|fact), content, confidence(0-1), risk_tier(low|medium|high), impact_tier(low|medium|high|critical)。"
+    "禁止输出解释性文本。"
+)
+EXTRACT_SYSTEM_PROMPT = (
+    "你是 MindKernel 的记忆抽取引擎。"
+    "把输入文本抽取为结构化 memory_items。"
+    "仅输出 JSON 对象，格式为{\"memory_items\":[...]}。"
+    + EXTRACT_ITEM_SPEC
+)
+BATCH_EXTRACT_SYSTEM_PROMPT = (
+    "你是 MindKernel 的记忆抽取引擎。"
+    "输入包含多段彼此独立的文本，每段以 <<<INPUT id=...>>> 开始、<<<END id=...>>> 结束。"
+    "对每段分别抽取结构化 memory_items，不要跨段合并。"
+    "仅输出 JSON 对象，格式为{\"results\":[{\"input_id\":\"...\",\"memory_items\":[...]}]}，每个 input_id 恰好出现一次。"
+    + EXTRACT_ITEM_SPEC
+)
+
+
 class LLMMemoryProcessor:
     """Core object for memory extraction via external LLM calls."""
 
-    def __init__(self, config: LLMProcessorConfig):
+    def __init__(self, config: LLMProcessorConfig, client: LLMClient | None = None):
         self.config = config
+        self.client = client
 
     @staticmethod
     def now_iso() -> str:
@@ -112,7 +137,10 @@ class LLMMemoryProcessor:
             return "\n".join(out)
         return str(content)
 
-    def _openai_compatible_chat_json(self, system_prompt: str, user_prompt: str) -> dict:
+    def _client(self) -> LLMClient:
+        return self.client or get_client()
+
+    def _openai_compatible_chat_json(self, system_prompt: str, user_prompt: str, max_tokens: int | None = None) -> dict:
         api_key = os.getenv(self.config.api_key_env)
         if not api_key:
             raise LLMProcessorError(f"missing API key in env: {self.config.api_key_env}")
@@ -120,7 +148,7 @@ class LLMMemoryProcessor:
         payload = {
             "model": self.config.model,
             "temperature": self.config.temperature,
-            "max_tokens": self.config.max_tokens,
+            "max_tokens": max_tokens or self.config.max_tokens,
             "response_format": {"type": "json_object"},
             "messages": [
                 {"role": "system", "content": system_prompt},
@@ -128,31 +156,25 @@ class LLMMemoryProcessor:
             ],
         }
 
-        req = urllib.request.Request(
-            self.config.endpoint,
-            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}",
-            },
-            method="POST",
-        )
-
         try:
-            with urllib.request.urlopen(req, timeout=self.config.timeout_sec) as resp:
-                body = resp.read().decode("utf-8")
-        except urllib.error.HTTPError as e:
-            detail = e.read().decode("utf-8", errors="ignore") if hasattr(e, "read") else str(e)
-            raise LLMProcessorError(f"LLM HTTP error: {e.code} {detail}") from e
+            raw = self._client().post_json(
+                self.config.endpoint,
+                payload,
+                headers={"Authorization": f"Bearer {api_key}"},
+                timeout=self.config.timeout_sec,
+            )
+        except LLMHTTPError as e:
+            raise LLMProcessorError(f"LLM HTTP error: {e.status} {e.body}") from e
         except Exception as e:
             raise LLMProcessorError(f"LLM request failed: {e}") from e
 
         try:
-            raw = json.loads(body)
             content = raw["choices"][0]["message"]["content"]
             text = self._normalize_model_content(content)
             return self._parse_json_text(text)
         except Exception as e:
+            # 不可用的响应不留在缓存里，重试时重新请求
+            self._client().invalidate(self.config.endpoint, payload)
             raise LLMProcessorError(f"invalid LLM response: {e}") from e
 
     @staticmethod
@@ -209,13 +231,7 @@ class LLMMemoryProcessor:
         if self.config.backend != "openai_compatible":
             raise LLMProcessorError(f"unsupported backend: {self.config.backend}")
 
-        system_prompt = (
-            "你是 MindKernel 的记忆抽取引擎。"
-            "把输入文本抽取为结构化 memory_items。"
-            "仅输出 JSON 对象，格式为{\"memory_items\":[...]}。"
-            "每个 item 必须包含: kind(event|fact), content, confidence(0-1), risk_tier(low|medium|high), impact_tier(low|medium|high|critical)。"
-            "禁止输出解释性文本。"
-        )
+        system_prompt = EXTRACT_SYSTEM_PROMPT
         user_prompt = (
             f"最大输出条数: {max_items}\n"
             "请抽取最有长期价值且可审计的记忆候选。\n"
@@ -224,10 +240,10 @@ class LLMMemoryProcessor:
         )
 
         ctrl = self._resilience_controller()
-        state_before = ctrl.load_state()
 
-        # circuit breaker open => fallback path
-        if ctrl.is_open(state_before):
+        # circuit breaker open (or half-open probe taken by another caller) => fallback path
+        if not ctrl.allow_request():
+            state_before = ctrl.load_state()
             if self.config.fallback_backend == "mock":
                 out = self._mock_chat_json(raw_text, max_items=max_items)
                 out["_runtime"] = {
@@ -281,6 +297,181 @@ class LLMMemoryProcessor:
 
         raise LLMProcessorError(f"unexpected extract failure: {last_err}")
 
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """粗估 token 数：CJK 字符按 1 token/字，其余按 4 字符/token。"""
+        cjk = sum(1 for ch in text if ch >= "\u2e80")
+        return cjk + (len(text) - cjk) // 4 + 1
+
+    def _batch_output_tokens(self, n: int) -> int:
+        return min(self.config.max_tokens * n, max(1, int(self.config.batch_max_output_tokens)))
+
+    def _pack_batches(self, texts: list[str]) -> list[list[int]]:
+        """按输入 token 预算与输出预算顺序装箱，返回每批的输入下标；单条超预算时独占一批。"""
+        budget = max(1, int(self.config.batch_token_budget))
+        max_inputs = max(
+            1,
+            min(int(self.config.batch_max_inputs), int(self.config.batch_max_output_tokens) // max(1, self.config.max_tokens)),
+        )
+        batches: list[list[int]] = []
+        cur: list[int] = []
+        used = 0
+        for i, text in enumerate(texts):
+            cost = self._estimate_tokens(text) + 16  # 分隔符开销
+            if cur and (used + cost > budget or len(cur) >= max_inputs):
+                batches.append(cur)
+                cur, used = [], 0
+            cur.append(i)
+            used += cost
+        if cur:
+            batches.append(cur)
+        return batches
+
+    @staticmethod
+    def _batch_user_prompt(texts: dict[str, str], max_items: int) -> str:
+        blocks = [f"<<<INPUT id={iid}>>>\n{text}\n<<<END id={iid}>>>" for iid, text in texts.items()]
+        return (
+            f"每段最大输出条数: {max_items}\n"
+            "请对每段分别抽取最有长期价值且可审计的记忆候选。\n"
+            "输入如下：\n"
+            + "\n\n".join(blocks)
+        )
+
+    @staticmethod
+    def _demux_batch(raw: dict, ids: list[str]) -> dict[str, list]:
+        """按 input_id 拆分批量响应；只返回格式完整的输入，缺失 / 重复 / 非法的 id 视为失败。"""
+        results = raw.get("results") if isinstance(raw, dict) else None
+        if not isinstance(results, list):
+            return {}
+        wanted = set(ids)
+        out: dict[str, list] = {}
+        dup: set[str] = set()
+        for r in results:
+            if not isinstance(r, dict):
+                continue
+            iid = str(r.get("input_id", ""))
+            items = r.get("memory_items")
+            if iid not in wanted or not isinstance(items, list):
+                continue
+            if iid in out:
+                dup.add(iid)
+            out[iid] = items
+        for iid in dup:
+            out.pop(iid, None)
+        return out
+
+    def _extract_batch(self, texts: dict[str, str], max_items: int, stats: dict) -> dict[str, dict]:
+        """
+        一次请求抽取多段输入，返回 {input_id: extracted}。
+        响应整体不可用时对半拆分重试；部分缺失时只重试缺失的输入；单条仍失败则走单条路径（含重试 / 熔断降级）。
+        """
+        ids = list(texts)
+        if len(ids) == 1:
+            iid = ids[0]
+            stats["single_requests"] += 1
+            return {iid: self._extract_candidates(texts[iid], max_items=max_items)}
+
+        ctrl = self._resilience_controller()
+        if not ctrl.allow_request():
+            return {iid: self._extract_candidates(texts[iid], max_items=max_items) for iid in ids}
+
+        stats["batch_requests"] += 1
+        got: dict[str, list] = {}
+        try:
+            raw = self._openai_compatible_chat_json(
+                BATCH_EXTRACT_SYSTEM_PROMPT,
+                self._batch_user_prompt(texts, max_items),
+                max_tokens=self._batch_output_tokens(len(ids)),
+            )
+            got = self._demux_batch(raw, ids)
+        except LLMProcessorError as e:
+            ctrl.record_failure(f"{type(e).__name__}: {e}")
+        else:
+            ctrl.record_success()
+
+        out = {
+            iid: {
+                "memory_items": items[:max_items],
+                "_runtime": {
+                    "requested_backend": "openai_compatible",
+                    "runtime_backend": "openai_compatible",
+                    "fallback_used": False,
+                    "attempts": 1,
+                    "batch_size": len(ids),
+                },
+            }
+            for iid, items in got.items()
+        }
+        missing = [iid for iid in ids if iid not in got]
+        if not missing:
+            return out
+
+        stats["split_retries"] += 1
+        if len(missing) == len(ids):
+            half = len(ids) // 2
+            parts = [ids[:half], ids[half:]]
+        else:
+            parts = [missing]
+        for part in parts:
+            out.update(self._extract_batch({iid: texts[iid] for iid in part}, max_items, stats))
+        return out
+
+    def extract_memory_objects_batch(
+        self,
+        inputs: list[dict],
+        *,
+        status: str = "candidate",
+        review_due_days: int = 7,
+        next_action_days: int = 7,
+        max_items: int = 5,
+    ) -> dict:
+        """
+        批量抽取：inputs 为 [{"source_ref", "raw_text"}]，按 token 预算把多段输入装进同一个 prompt，
+        响应按 input_id 拆回各来源。results 与 inputs 一一对应，每项格式同 extract_memory_objects()。
+        """
+        texts = [str(x.get("raw_text") or "") for x in inputs]
+        stats = {"batches": 0, "batch_requests": 0, "single_requests": 0, "split_retries": 0}
+        extracted: dict[str, dict] = {}
+
+        if self.config.backend == "mock":
+            for i, text in enumerate(texts):
+                out = self._mock_chat_json(text, max_items=max_items)
+                out["_runtime"] = {
+                    "requested_backend": "mock",
+                    "runtime_backend": "mock",
+                    "fallback_used": False,
+                    "attempts": 0,
+                }
+                extracted[f"i{i}"] = out
+        elif self.config.backend == "openai_compatible":
+            for batch in self._pack_batches(texts):
+                stats["batches"] += 1
+                extracted.update(
+                    self._extract_batch({f"i{i}": texts[i] for i in batch}, max_items=max_items, stats=stats)
+                )
+        else:
+            raise LLMProcessorError(f"unsupported backend: {self.config.backend}")
+
+        results = [
+            self._build_payload(
+                extracted[f"i{i}"],
+                source_ref=str(x.get("source_ref") or ""),
+                status=status,
+                review_due_days=review_due_days,
+                next_action_days=next_action_days,
+            )
+            for i, x in enumerate(inputs)
+        ]
+        return {
+            "ok": True,
+            "backend": self.config.backend,
+            "model": self.config.model,
+            "inputs": len(inputs),
+            "count": sum(r["count"] for r in results),
+            "batch_stats": stats,
+            "results": results,
+        }
+
     def extract_memory_objects(
         self,
         *,
@@ -292,6 +483,23 @@ class LLMMemoryProcessor:
         max_items: int = 5,
     ) -> dict:
         extracted = self._extract_candidates(raw_text, max_items=max_items)
+        return self._build_payload(
+            extracted,
+            source_ref=source_ref,
+            status=status,
+            review_due_days=review_due_days,
+            next_action_days=next_action_days,
+        )
+
+    def _build_payload(
+        self,
+        extracted: dict,
+        *,
+        source_ref: str,
+        status: str,
+        review_due_days: int,
+        next_action_days: int,
+    ) -> dict:
         items = extracted.get("memory_items")
         if not isinstance(items, list):
             raise LLMProcessorError("LLM output missing `memory_items` list")
@@ -376,6 +584,8 @@ class LLMMemoryProcessor:
                     "last_error": runtime.get("last_error"),
                 }
             )
+            if runtime.get("batch_size"):
+                out_payload["batch_size"] = runtime["batch_size"]
 
         return out_payload
 
@@ -402,11 +612,15 @@ def main():
     p.add_argument("--breaker-error-threshold", type=int, default=3)
     p.add_argument("--breaker-cooldown-sec", type=int, default=300)
     p.add_argument("--resilience-state-file", default=str(ROOT / "data" / "daemon" / "llm_resilience_v0_2.json"))
-    p.add_argument("--source-ref", required=True)
+    p.add_argument("--source-ref")
+    p.add_argument("--batch-token-budget", type=int, default=3000)
+    p.add_argument("--batch-max-inputs", type=int, default=20)
+    p.add_argument("--batch-max-output-tokens", type=int, default=16000)
 
     src = p.add_mutually_exclusive_group(required=True)
     src.add_argument("--text")
     src.add_argument("--text-file")
+    src.add_argument("--batch-file", help="JSONL，每行 {source_ref, text}；多段输入按 token 预算合并请求")
 
     p.add_argument("--status", default="candidate")
     p.add_argument("--review-due-days", type=int, default=7)
@@ -415,6 +629,8 @@ def main():
     p.add_argument("--out")
     p.add_argument("--jsonl-out")
     args = p.parse_args()
+    if not args.batch_file and not args.source_ref:
+        p.error("--source-ref is required unless --batch-file is given")
 
     raw_text = args.text
     if args.text_file:
@@ -434,17 +650,32 @@ def main():
         breaker_error_threshold=max(1, int(args.breaker_error_threshold)),
         breaker_cooldown_sec=max(1, int(args.breaker_cooldown_sec)),
         resilience_state_file=str(Path(args.resilience_state_file).expanduser().resolve()),
+        batch_token_budget=max(1, int(args.batch_token_budget)),
+        batch_max_inputs=max(1, int(args.batch_max_inputs)),
+        batch_max_output_tokens=max(1, int(args.batch_max_output_tokens)),
     )
 
     processor = LLMMemoryProcessor(cfg)
-    out = processor.extract_memory_objects(
-        raw_text=raw_text or "",
-        source_ref=args.source_ref,
-        status=args.status,
-        review_due_days=max(0, int(args.review_due_days)),
-        next_action_days=max(0, int(args.next_action_days)),
-        max_items=max(1, int(args.max_items)),
-    )
+    common = {
+        "status": args.status,
+        "review_due_days": max(0, int(args.review_due_days)),
+        "next_action_days": max(0, int(args.next_action_days)),
+        "max_items": max(1, int(args.max_items)),
+    }
+    if args.batch_file:
+        inputs = [
+            {"source_ref": row.get("source_ref", ""), "raw_text": row.get("text", "")}
+            for row in (
+                json.loads(line)
+                for line in Path(args.batch_file).read_text(errors="ignore").splitlines()
+                if line.strip()
+            )
+        ]
+        out = processor.extract_memory_objects_batch(inputs, **common)
+        rows = [item for r in out["results"] for item in r["memory_items"]]
+    else:
+        out = processor.extract_memory_objects(raw_text=raw_text or "", source_ref=args.source_ref, **common)
+        rows = out.get("memory_items", [])
 
     if args.out:
         pth = Path(args.out).expanduser().resolve()
@@ -452,7 +683,7 @@ def main():
         pth.write_text(json.dumps(out, ensure_ascii=False, indent=2))
 
     if args.jsonl_out:
-        write_jsonl(Path(args.jsonl_out).expanduser().resolve(), out.get("memory_items", []))
+        write_jsonl(Path(args.jsonl_out).expanduser().resolve(), rows)
 
     print(json.dumps(out, ensure_ascii=False, indent=2))
 
@@ -37,6 +37,10 @@ def main():
         help="also emit tool_call memory events from assistant toolCall content",
     )
     p.add_argument("--max-events", type=int, default=0, help="max emitted events (0 = no limit)")
+    p.add_argument(
+        "--checkpoint-file",
+        help="optional (inode, offset) checkpoint json; repeated runs only parse lines appended since the last run",
+    )
     p.add_argument("--out", help="optional output json path")
     p.add_argument("--memory-jsonl-out", help="optional output path for memory.schema-compatible JSONL")
     p.add_argument("--review-due-days", type=int, default=7, help="review_due_at = created_at + N days for memory JSONL")
@@ -56,6 +60,7 @@ def main():
         session_file=session_file,
         include_tool_calls=args.include_tool_calls,
         max_events=max(0, int(args.max_events)),
+        checkpoint_path=Path(args.checkpoint_file).expanduser() if args.checkpoint_file else None,
     )
 
     if args.out:
@@ -13,6 +13,11 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.mecd_metrics import audit_breakdown, read_mecd_metrics  # noqa: E402
+
 DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
 DEFAULT_OUTPUT = ROOT / "data" / "mecd_data.json"
 
@@ -23,9 +28,11 @@ def export_data(db_path: Path) -> dict:
     c = conn.cursor()
 
     result = {"exported_at": datetime.now(timezone.utc).isoformat(), "stages": {}, "items": {}}
+    # 阶段计数取物化表（O(1)），明细只取展示用的最新 N 条
+    stats = read_mecd_metrics(conn)
 
     # ── M: Memory ──────────────────────────────────────────────
-    c.execute("SELECT id, status, payload_json, created_at FROM memory_items ORDER BY created_at DESC")
+    c.execute("SELECT id, status, payload_json, created_at FROM memory_items ORDER BY created_at DESC LIMIT 20")
     memories = []
     for row in c.fetchall():
         payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
@@ -41,15 +48,15 @@ def export_data(db_path: Path) -> dict:
             "created_at": row["created_at"],
         })
     result["stages"]["M"] = {
-        "total": len(memories),
-        "candidates": sum(1 for m in memories if m["status"] == "candidate"),
-        "active": sum(1 for m in memories if m["status"] == "active"),
-        "archived": sum(1 for m in memories if m["status"] == "archived"),
+        "total": stats["memory_items"]["total"],
+        "candidates": stats["memory_items"]["status"].get("candidate", 0),
+        "active": stats["memory_items"]["status"].get("active", 0),
+        "archived": stats["memory_items"]["status"].get("archived", 0),
     }
-    result["items"]["memories"] = memories[:20]  # latest 20
+    result["items"]["memories"] = memories  # latest 20
 
     # ── E: Experience ──────────────────────────────────────────
-    c.execute("SELECT id, status, payload_json, created_at FROM experience_records ORDER BY created_at DESC")
+    c.execute("SELECT id, status, payload_json, created_at FROM experience_records ORDER BY created_at DESC LIMIT 20")
     experiences = []
     for row in c.fetchall():
         payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
@@ -64,14 +71,14 @@ def export_data(db_path: Path) -> dict:
             "created_at": row["created_at"],
         })
     result["stages"]["E"] = {
-        "total": len(experiences),
-        "active": sum(1 for e in experiences if e["status"] == "active"),
-        "candidates": sum(1 for e in experiences if e["status"] == "candidate"),
+        "total": stats["experience_records"]["total"],
+        "active": stats["experience_records"]["status"].get("active", 0),
+        "candidates": stats["experience_records"]["status"].get("candidate", 0),
     }
-    result["items"]["experiences"] = experiences[:20]
+    result["items"]["experiences"] = experiences
 
     # ── C: Knowledge Relations ─────────────────────────────────
-    c.execute("SELECT id, subject, predicate, object, confidence, source, created_at FROM knowledge_relations ORDER BY confidence DESC, created_at DESC")
+    c.execute("SELECT id, subject, predicate, object, confidence, source, created_at FROM knowledge_relations ORDER BY confidence DESC, created_at DESC LIMIT 30")
     relations = []
     for row in c.fetchall():
         relations.append({
@@ -83,11 +90,11 @@ def export_data(db_path: Path) -> dict:
             "source": row["source"] or "derived",
             "created_at": row["created_at"],
         })
-    result["stages"]["C"] = {"total": len(relations)}
-    result["items"]["relations"] = relations[:30]
+    result["stages"]["C"] = {"total": stats["knowledge_relations"]["total"]}
+    result["items"]["relations"] = relations
 
     # ── D: Decision Traces ─────────────────────────────────────
-    c.execute("SELECT id, final_outcome, payload_json, created_at FROM decision_traces ORDER BY created_at DESC")
+    c.execute("SELECT id, final_outcome, payload_json, created_at FROM decision_traces ORDER BY created_at DESC LIMIT 20")
     decisions = []
     for row in c.fetchall():
         payload = json.loads(row["payload_json"]) if row["payload_json"] else {}
@@ -103,20 +110,14 @@ def export_data(db_path: Path) -> dict:
             "created_at": row["created_at"],
         })
     result["stages"]["D"] = {
-        "total": len(decisions),
-        "auto_applied": sum(1 for d in decisions if d["outcome"] == "auto_applied"),
-        "blocked": sum(1 for d in decisions if d["outcome"] == "blocked"),
+        "total": stats["decision_traces"]["total"],
+        "auto_applied": stats["decision_traces"]["outcome"].get("auto_applied", 0),
+        "blocked": stats["decision_traces"]["outcome"].get("blocked", 0),
     }
-    result["items"]["decisions"] = decisions[:20]
+    result["items"]["decisions"] = decisions
 
     # ── Audit Summary ──────────────────────────────────────────
-    c.execute("SELECT event_type, object_type, COUNT(*) as cnt FROM audit_events GROUP BY event_type, object_type ORDER BY cnt DESC")
-    audit_summary = []
-    total_audit = 0
-    for row in c.fetchall():
-        audit_summary.append({"event_type": row["event_type"], "object_type": row["object_type"], "count": row["cnt"]})
-        total_audit += row["cnt"]
-    result["stages"]["audit"] = {"total": total_audit, "breakdown": audit_summary}
+    result["stages"]["audit"] = {"total": stats["audit_events"]["total"], "breakdown": audit_breakdown(stats)}
 
     conn.close()
     return result
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+MECD Metrics Check — 比对 mecd_metrics 物化计数与源表实时聚合
+不一致时以退出码 1 报告；--repair 从头重建计数。
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.mecd_metrics import check_mecd_metrics  # noqa: E402
+
+DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
+
+
+def main():
+    p = argparse.ArgumentParser(description="MECD metrics consistency check")
+    p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite database path")
+    p.add_argument("--repair", action="store_true", help="rebuild counters when mismatched")
+    args = p.parse_args()
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"ERROR: Database not found: {db_path}", file=sys.stderr)
+        sys.exit(1)
+
+    conn = sqlite3.connect(str(db_path))
+    out = check_mecd_metrics(conn, repair=args.repair)
+    conn.close()
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    raise SystemExit(0 if out["ok"] or out["repaired"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,12 +9,18 @@ from __future__ import annotations
 import argparse
 import json
 import sqlite3
+import sys
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.mecd_metrics import audit_breakdown, read_mecd_metrics  # noqa: E402
+
 DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
 OUTPUT_FILE = ROOT / "reports" / "mecd_panel.html"
 
@@ -36,48 +42,26 @@ class MECDMetrics:
 
 
 def load_metrics(db_path: Path) -> MECDMetrics:
+    """读 mecd_metrics 物化计数（触发器维护），不再全表扫描"""
     conn = sqlite3.connect(db_path)
-    c = conn.cursor()
-    m = MECDMetrics()
-
-    # Memory stats
-    c.execute("SELECT COUNT(*), status FROM memory_items GROUP BY status")
-    for count, status in c.fetchall():
-        m.memory_total += count
-        if status == "candidate":
-            m.memory_candidates = count
-        elif status == "active":
-            m.memory_active = count
-        elif status == "archived":
-            m.memory_archived = count
-
-    # Experience stats
-    c.execute("SELECT COUNT(*), status FROM experience_records GROUP BY status")
-    for count, status in c.fetchall():
-        m.experience_total += count
-        if status == "active":
-            m.experience_active = count
-        elif status == "candidate":
-            m.experience_candidates = count
-
-    # Cognition (knowledge relations)
-    c.execute("SELECT COUNT(*) FROM knowledge_relations")
-    m.cognition_relations = c.fetchone()[0]
-
-    # Decision stats
-    c.execute("SELECT COUNT(*) FROM decision_traces")
-    m.decisions_total = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM decision_traces WHERE final_outcome = 'auto_applied'")
-    m.decisions_auto = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM decision_traces WHERE final_outcome = 'blocked'")
-    m.decisions_blocked = c.fetchone()[0]
-
-    # Audit events
-    c.execute("SELECT COUNT(*) FROM audit_events")
-    m.audit_events = c.fetchone()[0]
-
+    stats = read_mecd_metrics(conn)
     conn.close()
-    return m
+
+    mem, exp, dec = stats["memory_items"], stats["experience_records"], stats["decision_traces"]
+    return MECDMetrics(
+        memory_total=mem["total"],
+        memory_candidates=mem["status"].get("candidate", 0),
+        memory_active=mem["status"].get("active", 0),
+        memory_archived=mem["status"].get("archived", 0),
+        experience_total=exp["total"],
+        experience_active=exp["status"].get("active", 0),
+        experience_candidates=exp["status"].get("candidate", 0),
+        cognition_relations=stats["knowledge_relations"]["total"],
+        decisions_total=dec["total"],
+        decisions_auto=dec["outcome"].get("auto_applied", 0),
+        decisions_blocked=dec["outcome"].get("blocked", 0),
+        audit_events=stats["audit_events"]["total"],
+    )
 
 
 def load_memory_items(db_path: Path, limit: int = 10):
@@ -184,18 +168,30 @@ def load_knowledge_relations(db_path: Path, limit: int = 20):
     return rows
 
 
-def load_audit_summary(db_path: Path):
+def load_hub_entities(db_path: Path, limit: int = 10):
+    """读取 kg_analytics 预计算的 PageRank 排名；尚未跑过分析时返回空列表。"""
     conn = sqlite3.connect(db_path)
     c = conn.cursor()
-    c.execute("""
-        SELECT event_type, object_type, COUNT(*) as cnt
-        FROM audit_events
-        GROUP BY event_type, object_type
-        ORDER BY cnt DESC
-    """)
-    rows = []
-    for row in c.fetchall():
-        rows.append({"event_type": row[0], "object_type": row[1], "count": row[2]})
+    try:
+        c.execute("""
+            SELECT entity, pagerank, component_size, out_degree + in_degree
+            FROM kg_entity_metrics
+            ORDER BY pagerank DESC
+            LIMIT ?
+        """, (limit,))
+        rows = [
+            {"entity": r[0], "pagerank": r[1], "component_size": r[2], "degree": r[3]}
+            for r in c.fetchall()
+        ]
+    except sqlite3.OperationalError:
+        rows = []
+    conn.close()
+    return rows
+
+
+def load_audit_summary(db_path: Path):
+    conn = sqlite3.connect(db_path)
+    rows = audit_breakdown(read_mecd_metrics(conn))
     conn.close()
     return rows
 
@@ -238,6 +234,20 @@ def render_knowledge_relation(rel: dict) -> str:
     </div>'''
 
 
+def render_hub_entity(hub: dict) -> str:
+    return f'''
+    <div class="relation-card">
+      <div class="relation-main">
+        <span class="entity">{hub["entity"]}</span>
+      </div>
+      <div class="relation-meta">
+        <span class="confidence">PR {hub["pagerank"]:.4f}</span>
+        <span class="source">degree {hub["degree"]}</span>
+        <span class="date">component {hub["component_size"]}</span>
+      </div>
+    </div>'''
+
+
 def render_decision_card(d: dict) -> str:
     outcome = d["outcome"] or "unknown"
     conf_pct = int((d.get("confidence") or 0) * 100)
@@ -270,6 +280,7 @@ def generate_panel(
     experiences = load_experiences(db_path)
     decisions = load_decisions(db_path)
     relations = load_knowledge_relations(db_path)
+    hubs = load_hub_entities(db_path)
     audit_summary = load_audit_summary(db_path)
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
@@ -510,7 +521,14 @@ def generate_panel(
             html += render_knowledge_relation(rel)
     else:
         html += '<div class="empty">No knowledge relations yet</div>'
-    html += '</div></div>'
+    html += '</div>'
+    if hubs:
+        html += '<h3 style="margin:16px 0 10px;color:#c4b5fd;font-size:0.95em;">Hub entities (PageRank)</h3>'
+        html += '<div class="relations-grid">'
+        for hub in hubs:
+            html += render_hub_entity(hub)
+        html += '</div>'
+    html += '</div>'
 
     # Decision Section
     html += '''
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""Daily governance rollup job: aggregate closed UTC days of audit_events into governance_daily_rollups (v0.1)."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.governance_rollups import build_daily_rollups  # noqa: E402
+
+
+def main():
+    p = argparse.ArgumentParser(description="Governance daily rollup job v0.1")
+    p.add_argument("--db", default=str(ROOT / "data" / "mindkernel_v0_1.sqlite"), help="sqlite path with audit_events")
+    p.add_argument("--days", type=int, default=8, help="backfill the last N closed UTC days")
+    p.add_argument("--rebuild", action="store_true", help="recompute days that already have a rollup")
+    p.add_argument("--verify", action="store_true", help="recompute days whose event count drifted")
+    args = p.parse_args()
+
+    now = datetime.now(timezone.utc)
+    today = now.date()
+    days = [today - timedelta(days=i) for i in range(1, max(1, int(args.days)) + 1)]
+
+    c = sqlite3.connect(str(Path(args.db).expanduser().resolve()))
+    try:
+        result = build_daily_rollups(c, days, now=now, rebuild=args.rebuild, verify=args.verify)
+    finally:
+        c.close()
+
+    print(json.dumps({"ok": True, "generated_at": now.replace(microsecond=0).isoformat(), "days": result}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
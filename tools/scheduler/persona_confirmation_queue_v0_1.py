@@ -6,6 +6,7 @@ from __future__ import annotations
 import argparse
 import json
 import sys
+import time
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
@@ -26,9 +27,13 @@ from core.persona_confirmation_queue_v0_1 import (  # noqa: E402
     mark_status,
     resolve_compensation,
     resolve_event,
+    seconds_until_next_deadline,
     timeout_scan,
 )
 
+# 睡眠下限，避免截止时间恰在当前秒内时空转
+MIN_SLEEP_SEC = 0.1
+
 
 def _load_json(path: str) -> dict:
     return json.loads(Path(path).expanduser().resolve().read_text(encoding="utf-8"))
@@ -43,6 +48,37 @@ def _write_jsonl(path: str, rows: list[dict]):
     return str(p)
 
 
+def watch_timeouts(
+    c,
+    *,
+    max_sleep_sec: float = 60.0,
+    limit: int = 200,
+    max_loops: int = 0,
+    sleep=time.sleep,
+) -> dict:
+    """
+    超时守护循环：处理已到期事件后睡到下一个截止时间，而不是定时全表扫描。
+    max_sleep_sec 限制单次睡眠上限，使其他进程新入队的更早截止事件也能及时处理。
+    """
+    loops = 0
+    timed_out = 0
+    sleeps: list[float] = []
+    while True:
+        loops += 1
+        out = timeout_scan(c, limit=limit)
+        timed_out += out["timed_out"]
+        if max_loops and loops >= max_loops:
+            break
+        if out["timed_out"] >= limit:
+            continue  # 本轮未处理完，立即继续
+        wait = seconds_until_next_deadline(c)
+        wait = max_sleep_sec if wait is None else min(wait, max_sleep_sec)
+        wait = max(MIN_SLEEP_SEC, wait)
+        sleeps.append(round(wait, 3))
+        sleep(wait)
+    return {"ok": True, "loops": loops, "timed_out": timed_out, "sleeps": sleeps[-20:]}
+
+
 def main():
     p = argparse.ArgumentParser(description="MindKernel persona confirmation queue v0.1")
     p.add_argument("--db", default=str(DEFAULT_DB), help="SQLite file path")
@@ -78,6 +114,11 @@ def main():
     ts.add_argument("--now", help="ISO datetime, default now")
     ts.add_argument("--limit", type=int, default=200)
 
+    wt = sub.add_parser("watch-timeouts", help="sleep until the next deadline and close timed-out events")
+    wt.add_argument("--max-sleep-sec", type=float, default=60.0)
+    wt.add_argument("--limit", type=int, default=200)
+    wt.add_argument("--max-loops", type=int, default=0, help="0 means unlimited")
+
     ap = sub.add_parser("apply-plan")
     ap.add_argument("--routed-file", required=True, help="route-proposals output json path")
     ap.add_argument("--output", help="optional full apply-plan output path")
@@ -148,6 +189,16 @@ def main():
         print(json.dumps(timeout_scan(c, now=args.now, limit=max(1, int(args.limit))), ensure_ascii=False, indent=2))
         return
 
+    if args.cmd == "watch-timeouts":
+        out = watch_timeouts(
+            c,
+            max_sleep_sec=max(MIN_SLEEP_SEC, float(args.max_sleep_sec)),
+            limit=max(1, int(args.limit)),
+            max_loops=max(0, int(args.max_loops)),
+        )
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return
+
     if args.cmd == "apply-plan":
         routed = _load_json(args.routed_file)
         out = build_apply_plan(c, routed)
@@ -30,7 +30,13 @@ from core.persona_confirmation_queue_v0_1 import (  # noqa: E402
 )
 from core import cognition_engine  # noqa: E402
 from tools.pipeline import cognition_decision_v0_1  # noqa: E402
+from core.quantile_sketch import TDigest, record_sketch  # noqa: E402
 from core.reflect_gate_v0_1 import route_proposals  # noqa: E402
+from core.stage_pipeline import DEFAULT_QUEUE_SIZE, run_pipeline  # noqa: E402
+
+REFLECT_DURATION_METRIC = "reflect.job_duration_sec"
+# 流水线中 promote 每个事务的 experience 数：小 chunk 让 decide 尽早开始，与后续推导重叠
+DEFAULT_PIPELINE_CHUNK_SIZE = 32
 
 
 def now_iso() -> str:
@@ -143,6 +149,69 @@ def build_reflect_proposals(reflection: dict, job_id: str) -> list[dict]:
     return proposals
 
 
+def _db_path_of(c) -> Path:
+    row = c.execute("PRAGMA database_list").fetchone()
+    return Path(row[2])
+
+
+def run_cognition_decision_pipeline(
+    db_path: Path,
+    *,
+    since_days: int,
+    actor_id: str,
+    request_ref: str,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    chunk_size: int = DEFAULT_PIPELINE_CHUNK_SIZE,
+) -> tuple[dict, list[dict], list[dict]]:
+    """
+    E→C→D 两阶段流水线：promote（experience→cognition，每 chunk_size 条提交后产出）与
+    decide（cognition→decision）各用独立连接、独立线程，经有界队列衔接，
+    已提交 chunk 的 decision 与后续 chunk 的推导重叠执行。
+
+    Returns: (晋升统计, decision 结果列表, 各阶段指标)
+    """
+    # 建表放在启动线程之前，避免两个阶段并发执行 DDL
+    c = cognition_engine.conn(db_path)
+    try:
+        cognition_decision_v0_1.init_db(c)
+        cognition_engine.init_cognition_db(c)
+    finally:
+        c.close()
+
+    ce_stats: dict = {}
+
+    def promote(_inputs):
+        c = cognition_engine.conn(db_path)
+        try:
+            for r in cognition_engine.iter_experience_to_cognition(
+                c, since_days=since_days, actor_id=actor_id, chunk_size=chunk_size, stats=ce_stats
+            ):
+                if r.get("cognition_id") and not r.get("skipped") and not r.get("error"):
+                    yield r["cognition_id"]
+        finally:
+            c.close()
+
+    def decide(cognition_ids):
+        c = cognition_engine.conn(db_path)
+        try:
+            for cog_id in cognition_ids:
+                try:
+                    yield cognition_decision_v0_1.cognition_to_decision(
+                        c,
+                        cognition_id=cog_id,
+                        request_ref=request_ref,
+                        risk_tier=None,
+                        actor_id=actor_id,
+                    )
+                except Exception as e:
+                    yield {"cognition_id": cog_id, "error": str(e)}
+        finally:
+            c.close()
+
+    cd_results, metrics = run_pipeline([("promote", promote), ("decide", decide)], queue_size=queue_size)
+    return ce_stats, cd_results, metrics
+
+
 def process_reflect_job(
     *,
     scheduler_conn,
@@ -157,6 +226,9 @@ def process_reflect_job(
     queue_fallback_policy: str,
     renew_lease_fn=None,
     worker_id: str = "reflect-worker",
+    db_path: Path | None = None,
+    pipeline_queue_size: int = DEFAULT_QUEUE_SIZE,
+    pipeline_chunk_size: int = DEFAULT_PIPELINE_CHUNK_SIZE,
 ):
     job_id = str(job["job_id"])
     job_dir = reports_dir / job_id
@@ -216,35 +288,20 @@ def process_reflect_job(
 
     # ── E→C→D 闭环 ────────────────────────────────────────────────
     try:
-        me_conn = cognition_engine.conn(db)
-        ce_result = cognition_engine.batch_experience_to_cognition(
-            me_conn,
+        ce_result, cd_results, pipeline_metrics = run_cognition_decision_pipeline(
+            db_path or _db_path_of(scheduler_conn),
             since_days=since_days,
             actor_id=f"reflect-worker-{worker_id}",
+            request_ref=f"reflect-{job_id}",
+            queue_size=pipeline_queue_size,
+            chunk_size=pipeline_chunk_size,
         )
-        cd_results = []
-        for r in ce_result.get("results", []):
-            if r.get("skipped") or r.get("error"):
-                continue
-            cog_id = r.get("cognition_id")
-            if not cog_id:
-                continue
-            try:
-                cd_res = cognition_decision_v0_1.cognition_to_decision(
-                    me_conn,
-                    cognition_id=cog_id,
-                    request_ref=f"reflect-{job_id}",
-                    risk_tier=None,
-                    actor_id=f"reflect-worker-{worker_id}",
-                )
-                cd_results.append(cd_res)
-            except Exception as e:
-                cd_results.append({"cognition_id": cog_id, "error": str(e)})
         cognition_decision_ok = sum(1 for x in cd_results if not x.get("error"))
     except Exception as e:
         ce_result = {"applied": 0, "skipped": 0, "failed": 0, "error": str(e)}
         cd_results = []
         cognition_decision_ok = 0
+        pipeline_metrics = []
 
     summary = {
         "ok": True,
@@ -273,6 +330,7 @@ def process_reflect_job(
             "cognitions_applied": ce_result.get("applied", 0) if isinstance(ce_result, dict) else 0,
             "cognitions_skipped": ce_result.get("skipped", 0) if isinstance(ce_result, dict) else 0,
             "decisions_created": cognition_decision_ok,
+            "pipeline": pipeline_metrics,
         },
         "artifacts_dir": str(job_dir),
     }
@@ -301,6 +359,7 @@ def run_loop(args):
     processed = 0
     succeeded = 0
     failed = 0
+    durations = TDigest()  # 本次运行的 reflect 作业耗时（秒）
 
     while True:
         loops += 1
@@ -312,6 +371,7 @@ def run_loop(args):
             lease_sec=max(1, int(args.lease_sec)),
             actions={"reflect"},
         )
+        batch_durations = TDigest()
 
         if not jobs and args.run_once:
             break
@@ -325,6 +385,7 @@ def run_loop(args):
         for job in jobs:
             processed += 1
             job_id = str(job["job_id"])
+            started = time.perf_counter()
             try:
                 if str(job.get("action")) != "reflect" or str(job.get("object_type")) != "reflect_job":
                     raise ValueError(
@@ -357,6 +418,9 @@ def run_loop(args):
                     queue_fallback_policy=args.queue_fallback_policy,
                     renew_lease_fn=_renew_lease,
                     worker_id=args.worker_id,
+                    db_path=db,
+                    pipeline_queue_size=max(1, int(args.pipeline_queue_size)),
+                    pipeline_chunk_size=max(1, int(args.pipeline_chunk_size)),
                 )
                 sch.ack(
                     c,
@@ -375,6 +439,11 @@ def run_loop(args):
                     lease_token=str(job.get("lease_token") or ""),
                 )
                 failed += 1
+            batch_durations.add(time.perf_counter() - started)
+
+        # 每轮合并进按日持久化的草图，多个 worker 进程共享同一份分布
+        record_sketch(c, REFLECT_DURATION_METRIC, batch_durations)
+        durations.merge(batch_durations)
 
         if args.run_once:
             break
@@ -396,6 +465,7 @@ def run_loop(args):
         "processed": processed,
         "succeeded": succeeded,
         "failed": failed,
+        "job_duration_sec": durations.summary(),
     }
     print(json.dumps(out, ensure_ascii=False, indent=2))
 
@@ -415,6 +485,18 @@ def main():
     p.add_argument("--queue-deadline-minutes", type=int, default=60)
     p.add_argument("--queue-fallback-policy", default="defer")
     p.add_argument("--retry-delay-sec", type=int, default=120)
+    p.add_argument(
+        "--pipeline-queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help="E→C→D 阶段间有界队列容量",
+    )
+    p.add_argument(
+        "--pipeline-chunk-size",
+        type=int,
+        default=DEFAULT_PIPELINE_CHUNK_SIZE,
+        help="E→C→D 流水线中 experience→cognition 每个事务的条数",
+    )
     p.add_argument("--interval-sec", type=int, default=5)
     p.add_argument("--max-loops", type=int, default=0, help="0 means unlimited")
     p.add_argument("--run-once", action="store_true", help="run one pull-process cycle and exit")
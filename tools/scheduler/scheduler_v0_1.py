@@ -30,9 +30,11 @@ if str(TOOLS_ROOT) not in sys.path:
     sys.path.insert(0, str(TOOLS_ROOT))
 
 from schema_runtime import SchemaValidationError, validate_payload
+from core.quantile_sketch import TDigest, init_sketch_db, load_sketch, record_sketch
 from core.reflect_gate_v0_1 import route_proposals as core_route_proposals
 
 DEFAULT_DB = ROOT / "data" / "mindkernel_v0_1.sqlite"
+PICKUP_LAG_METRIC = "scheduler.pickup_lag_sec"
 
 ALLOWED_OBJECT_TYPES = {"memory", "experience", "cognition", "reflect_job"}
 ALLOWED_ACTIONS = {"verify", "revalidate", "decay", "archive", "reinstate-check", "reflect"}
@@ -59,6 +61,15 @@ def parse_dt(v: str) -> datetime:
     return datetime.fromisoformat(v)
 
 
+def _as_utc(v) -> datetime | None:
+    """解析为 UTC aware 时间；无时区按 UTC 处理，无法解析返回 None（仅用于指标，不影响调度）。"""
+    try:
+        dt = parse_dt(str(v))
+    except (TypeError, ValueError):
+        return None
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
 def in_seconds_iso(seconds: int, base: str | None = None) -> str:
     base_dt = parse_dt(base) if base else datetime.now(timezone.utc)
     return (base_dt + timedelta(seconds=max(0, int(seconds)))).replace(microsecond=0).isoformat().replace("+00:00", "Z")
@@ -131,6 +142,7 @@ def init_db(c: sqlite3.Connection):
         """
     )
     _ensure_scheduler_lease_columns(c)
+    init_sketch_db(c)
     c.commit()
 
 
@@ -355,6 +367,8 @@ def pull_due(
     action_sql, action_params = _build_action_filter(actions)
 
     out = []
+    now_dt = _as_utc(now)
+    pickup_lag = TDigest()
     try:
         c.execute("BEGIN IMMEDIATE")
         recovered = _recover_expired_running_leases(c, now)
@@ -389,6 +403,9 @@ def pull_due(
             row["lease_token"] = lease_token
             row["lease_expires_at"] = lease_expires_at
             out.append(row)
+            run_at_dt = _as_utc(job["run_at"])
+            if now_dt is not None and run_at_dt is not None:
+                pickup_lag.add(max(0.0, (now_dt - run_at_dt).total_seconds()))
 
             write_audit_event(
                 c,
@@ -397,7 +414,7 @@ def pull_due(
                 actor_id=worker_id,
                 object_type="scheduler_job",
                 object_id=job["job_id"],
-                before={"status": "queued", "attempt": job["attempt"]},
+                before={"status": "queued", "attempt": job["attempt"], "run_at": job["run_at"]},
                 after={
                     "status": "running",
                     "attempt": job["attempt"],
@@ -409,6 +426,7 @@ def pull_due(
                 correlation_id=job["correlation_id"],
             )
 
+        record_sketch(c, PICKUP_LAG_METRIC, pickup_lag, at=now_dt)
         c.commit()
         if recovered > 0:
             # commit already done; keep return payload concise for callers
@@ -618,6 +636,7 @@ def stats(c: sqlite3.Connection):
     )
 
     out["audit_event_count"] = c.execute("SELECT COUNT(*) FROM audit_events").fetchone()[0]
+    out["pickup_lag_sec_today"] = load_sketch(c, PICKUP_LAG_METRIC, since=datetime.now(timezone.utc).date()).summary()
     return out
 
 
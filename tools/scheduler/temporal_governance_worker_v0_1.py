@@ -15,6 +15,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 import scheduler_v0_1 as sch  # noqa: E402
+from core.access_tracker import read_access_counts  # noqa: E402
 from core.memory_experience_core_v0_1 import init_db as init_me_db  # noqa: E402
 
 OBJECT_TABLES = {
@@ -24,6 +25,9 @@ OBJECT_TABLES = {
 
 WORKER_ACTIONS = {"verify", "revalidate", "decay", "archive", "reinstate-check"}
 
+# memory_access_stats 折算后计数达到该值视为近期仍在被访问（0.95/天衰减下单次访问约两周内有效）
+RECENT_ACCESS_MIN_COUNT = 0.5
+
 
 def now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
@@ -61,10 +65,23 @@ def _evidence_refs(object_type: str, payload: dict, object_id: str, job_id: str)
     return [f"{object_type}:{object_id}", f"scheduler_job:{job_id}"]
 
 
-def _has_reinstate_signal(payload: dict) -> bool:
+def _recently_accessed(access: dict | None) -> bool:
+    return bool(access) and float(access.get("count", 0.0)) >= RECENT_ACCESS_MIN_COUNT
+
+
+def _has_reinstate_signal(payload: dict, access: dict | None = None) -> bool:
     if bool(payload.get("reinstate_signal")):
         return True
 
+    # 进入 stale 之后仍被 recall/list 命中，视同强化信号
+    stale_since = payload.get("stale_since")
+    if _recently_accessed(access) and isinstance(stale_since, str):
+        try:
+            if sch.parse_dt(str(access.get("last_access_at"))) >= sch.parse_dt(stale_since):
+                return True
+        except Exception:
+            pass
+
     try:
         if int(payload.get("reinforcement_count", 0)) > 0:
             return True
@@ -88,7 +105,13 @@ def _has_reinstate_signal(payload: dict) -> bool:
     return False
 
 
-def _decide_target_status(object_type: str, action: str, current_status: str, payload: dict) -> tuple[str | None, str]:
+def _decide_target_status(
+    object_type: str,
+    action: str,
+    current_status: str,
+    payload: dict,
+    access: dict | None = None,
+) -> tuple[str | None, str]:
     conf = float(payload.get("confidence", 0.0) or 0.0)
 
     if action == "verify":
@@ -106,7 +129,7 @@ def _decide_target_status(object_type: str, action: str, current_status: str, pa
             return None, f"experience verify noop from status={current_status}"
 
     if action == "revalidate":
-        has_signal = _has_reinstate_signal(payload)
+        has_signal = _has_reinstate_signal(payload, access)
         if object_type == "memory":
             if current_status in {"stale", "stale_uncertain"}:
                 if has_signal:
@@ -128,6 +151,8 @@ def _decide_target_status(object_type: str, action: str, current_status: str, pa
             return None, f"experience revalidate noop from status={current_status}"
 
     if action == "decay":
+        if _recently_accessed(access):
+            return None, f"{object_type} decay deferred: recently accessed (count={float(access['count']):.2f})"
         if object_type == "memory":
             if current_status in {"active", "verified"}:
                 return "stale", "memory decay: activity timeout"
@@ -150,7 +175,7 @@ def _decide_target_status(object_type: str, action: str, current_status: str, pa
             return None, f"experience archive noop from status={current_status}"
 
     if action == "reinstate-check":
-        has_signal = _has_reinstate_signal(payload)
+        has_signal = _has_reinstate_signal(payload, access)
         if not has_signal:
             return None, f"reinstate-check noop: no new evidence signal (status={current_status})"
 
@@ -201,7 +226,9 @@ def process_temporal_job(c, job: dict, worker_id: str, dry_run: bool = False) ->
     payload = _parse_payload(row["payload_json"])
     now = now_iso()
 
-    target_status, reason = _decide_target_status(object_type, action, current_status, payload)
+    access = read_access_counts(c, [object_id]).get(object_id)
+
+    target_status, reason = _decide_target_status(object_type, action, current_status, payload, access)
     transitioned = bool(target_status and target_status != current_status)
 
     before = {
@@ -255,6 +282,7 @@ def process_temporal_job(c, job: dict, worker_id: str, dry_run: bool = False) ->
             "action": action,
             "dry_run": dry_run,
             "table": table,
+            "recent_access": access,
             "worker": "temporal_governance_worker_v0_1",
         },
     )
@@ -6,6 +6,7 @@ from __future__ import annotations
 import json
 import re
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -19,6 +20,11 @@ class SchemaValidationError(ValueError):
 _schema_cache: dict[str, dict] = {}
 
 
+@lru_cache(maxsize=256)
+def _compiled_pattern(pattern: str) -> re.Pattern:
+    return re.compile(pattern)
+
+
 def load_schema(file_name: str) -> dict:
     if file_name in _schema_cache:
         return _schema_cache[file_name]
@@ -95,7 +101,7 @@ def validate(schema: dict, data, path: str = "$"):
 
     if isinstance(data, str):
         pattern = schema.get("pattern")
-        if pattern and re.search(pattern, data) is None:
+        if pattern and _compiled_pattern(pattern).search(data) is None:
             raise SchemaValidationError(f"{path}: string does not match pattern {pattern}")
         if schema.get("format") == "date-time" and not _is_datetime(data):
             raise SchemaValidationError(f"{path}: invalid date-time {data!r}")
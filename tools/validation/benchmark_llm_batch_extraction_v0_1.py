@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Benchmark batched vs per-input LLM memory extraction (mock backend + local stub server)."""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+TOOLS_MEMORY = ROOT / "tools" / "memory"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+if str(TOOLS_MEMORY) not in sys.path:
+    sys.path.insert(0, str(TOOLS_MEMORY))
+
+from core.llm_client import LLMClient  # noqa: E402
+from llm_memory_processor_v0_1 import LLMMemoryProcessor, LLMProcessorConfig  # noqa: E402
+
+BLOCK_RE = re.compile(r"<<<INPUT id=(\S+)>>>\n(.*?)\n<<<END id=\1>>>", re.S)
+SNIPPETS = [
+    "用户请求把周报改成每周五 18:00 发送",
+    "完成了 scheduler lease renew 的回归验证",
+    "P0：线上 recall 延迟超过 2s，需要排查索引",
+    "The user prefers concise answers in Chinese",
+    "开始迁移 memory.md 到结构化对象",
+    "blocked: 等待飞书文档权限开通",
+]
+
+
+def make_inputs(n: int) -> list[dict]:
+    return [
+        {"source_ref": f"session://bench#msg:{i}", "raw_text": f"- {SNIPPETS[i % len(SNIPPETS)]}（#{i}）"}
+        for i in range(n)
+    ]
+
+
+def _stub_items(text: str) -> list[dict]:
+    return LLMMemoryProcessor._mock_chat_json(text, max_items=5)["memory_items"]
+
+
+class StubLLMServer:
+    """OpenAI-compatible 桩：每个请求固定延迟；批量 prompt 按 <<<INPUT>>> 分段回应，单条 prompt 取最后一段文本。"""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000.0
+        self.requests = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+                prompt = body["messages"][-1]["content"]
+                blocks = BLOCK_RE.findall(prompt)
+                if blocks:
+                    content = {"results": [{"input_id": iid, "memory_items": _stub_items(t)} for iid, t in blocks]}
+                else:
+                    content = {"memory_items": _stub_items(prompt.split("输入文本如下：\n", 1)[-1])}
+                raw = json.dumps(
+                    {"choices": [{"message": {"content": json.dumps(content, ensure_ascii=False)}}]},
+                    ensure_ascii=False,
+                ).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                self.wfile.write(raw)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1/chat/completions"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _contents(results: list[dict]) -> list[list[str]]:
+    return [[m["content"] for m in r["memory_items"]] for r in results]
+
+
+def run_mode(processor: LLMMemoryProcessor, inputs: list[dict], batch: bool) -> tuple[list[dict], float]:
+    started = time.perf_counter()
+    if batch:
+        results = processor.extract_memory_objects_batch(inputs)["results"]
+    else:
+        results = [processor.extract_memory_objects(raw_text=x["raw_text"], source_ref=x["source_ref"]) for x in inputs]
+    return results, time.perf_counter() - started
+
+
+def bench(n: int, latency_ms: float, token_budget: int, max_inputs: int) -> dict:
+    inputs = make_inputs(n)
+    tmp = Path(tempfile.mkdtemp(prefix="mk-llm-batch-bench-"))
+    out: dict = {"inputs": n, "stub_latency_ms": latency_ms}
+
+    mock = LLMMemoryProcessor(LLMProcessorConfig(backend="mock", model="mock-v0"))
+    single, t_single = run_mode(mock, inputs, batch=False)
+    batched, t_batch = run_mode(mock, inputs, batch=True)
+    assert _contents(single) == _contents(batched), "mock batch results should match per-input results"
+    out["mock"] = {
+        "single_inputs_per_sec": round(n / t_single, 1),
+        "batch_inputs_per_sec": round(n / t_batch, 1),
+    }
+
+    stub = StubLLMServer(latency_ms)
+    try:
+        os.environ.setdefault("MK_BENCH_LLM_KEY", "bench")
+        cfg = LLMProcessorConfig(
+            backend="openai_compatible",
+            endpoint=stub.url,
+            model="stub",
+            api_key_env="MK_BENCH_LLM_KEY",
+            max_retries=0,
+            resilience_state_file=str(tmp / "breaker.json"),
+            batch_token_budget=token_budget,
+            batch_max_inputs=max_inputs,
+        )
+        processor = LLMMemoryProcessor(cfg, client=LLMClient(cache_dir=None))
+
+        single, t_single = run_mode(processor, inputs, batch=False)
+        single_requests = stub.requests
+        batched, t_batch = run_mode(processor, inputs, batch=True)
+        batch_requests = stub.requests - single_requests
+        assert _contents(single) == _contents(batched), "stub batch results should demux back to their sources"
+        assert all(r["source_ref"] == x["source_ref"] for r, x in zip(batched, inputs))
+    finally:
+        stub.close()
+
+    out["stub"] = {
+        "single_requests": single_requests,
+        "batch_requests": batch_requests,
+        "single_inputs_per_sec": round(n / t_single, 1),
+        "batch_inputs_per_sec": round(n / t_batch, 1),
+        "speedup": round(t_single / t_batch, 2) if t_batch > 0 else None,
+    }
+    out["ok"] = batch_requests < single_requests
+    return out
+
+
+def main():
+    p = argparse.ArgumentParser(description="Benchmark batched LLM memory extraction")
+    p.add_argument("--n", type=int, default=200)
+    p.add_argument("--latency-ms", type=float, default=20.0)
+    p.add_argument("--batch-token-budget", type=int, default=3000)
+    p.add_argument("--batch-max-inputs", type=int, default=20)
+    args = p.parse_args()
+
+    out = bench(max(1, args.n), max(0.0, args.latency_ms), args.batch_token_budget, args.batch_max_inputs)
+    print(json.dumps(out, ensure_ascii=False, indent=2))
+    if not out["ok"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -16,10 +16,13 @@ TOOLS_SCHED = ROOT / "tools" / "scheduler"
 
 import sys
 
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 if str(TOOLS_SCHED) not in sys.path:
     sys.path.insert(0, str(TOOLS_SCHED))
 
 import scheduler_v0_1 as sch  # noqa: E402
+from core.quantile_sketch import TDigest  # noqa: E402
 
 
 def now_iso(offset_sec: int = 0) -> str:
@@ -27,25 +30,12 @@ def now_iso(offset_sec: int = 0) -> str:
     return dt.replace(microsecond=0).isoformat().replace("+00:00", "Z")
 
 
-def percentile(vals: list[float], p: float) -> float:
-    if not vals:
-        return 0.0
-    arr = sorted(vals)
-    if len(arr) == 1:
-        return arr[0]
-    rank = (len(arr) - 1) * (p / 100.0)
-    lo = int(rank)
-    hi = min(lo + 1, len(arr) - 1)
-    frac = rank - lo
-    return arr[lo] * (1 - frac) + arr[hi] * frac
-
-
 def worker_run(db: Path, worker_id: str, batch: int, done_flag: dict, out: dict, lock: threading.Lock):
     c = sch.conn(db)
     sch.init_db(c)
 
     processed = 0
-    lag_samples: list[float] = []
+    lag_sketch = TDigest()
     failures = 0
     idle_rounds = 0
 
@@ -76,7 +66,7 @@ def worker_run(db: Path, worker_id: str, batch: int, done_flag: dict, out: dict,
                 run_at = sch.parse_dt(str(j.get("run_at")))
                 lag = (datetime.now(timezone.utc) - run_at).total_seconds()
                 if lag > 0:
-                    lag_samples.append(lag)
+                    lag_sketch.add(lag)
                 sch.ack(c, jid, worker_id=worker_id, lease_token=lease_token)
                 processed += 1
             except Exception:
@@ -97,7 +87,7 @@ def worker_run(db: Path, worker_id: str, batch: int, done_flag: dict, out: dict,
         out[worker_id] = {
             "processed": processed,
             "failures": failures,
-            "lag_samples": lag_samples,
+            "lag_sketch": lag_sketch,
         }
 
 
@@ -193,18 +183,17 @@ def main():
         duration = max(0.001, time.time() - t0)
         stats = sch.stats(c)
 
-        all_lags = []
+        all_lags = TDigest()  # 各 worker 的草图合并，不汇总原始样本
         total_processed = 0
         total_failures = 0
         by_worker = {}
         for wid, data in sorted(out.items()):
             processed = int(data.get("processed", 0))
             failures = int(data.get("failures", 0))
-            lags = [float(x) for x in data.get("lag_samples", [])]
             by_worker[wid] = {"processed": processed, "failures": failures}
             total_processed += processed
             total_failures += failures
-            all_lags.extend(lags)
+            all_lags.merge(data["lag_sketch"])
 
         throughput = round((total_processed / duration) * 60.0, 3)
         retry_rate = round((total_failures / jobs_n) * 100.0, 3) if jobs_n > 0 else 0.0
@@ -227,12 +216,7 @@ def main():
                 "failures": total_failures,
                 "throughput_jobs_per_min": throughput,
                 "retry_rate_percent": retry_rate,
-                "lag_seconds": {
-                    "count": len(all_lags),
-                    "p50": round(percentile(all_lags, 50), 3),
-                    "p95": round(percentile(all_lags, 95), 3),
-                    "max": round(max(all_lags), 3) if all_lags else 0.0,
-                },
+                "lag_seconds": all_lags.summary(),
                 "workers": by_worker,
             },
             "scheduler": {
@@ -6,10 +6,17 @@ from __future__ import annotations
 import argparse
 import json
 import sqlite3
+import sys
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.quantile_sketch import TDigest, load_sketch  # noqa: E402
+
+BATCH_LATENCY_METRIC = "daemon.batch_latency_sec"
 
 
 def now_iso() -> str:
@@ -55,6 +62,7 @@ def render_md(report: dict) -> str:
         f"- system_repeat_alerts: {m['system_repeat_alerts']}",
         f"- ack_compressed: {m['ack_compressed']}",
         f"- ack_rollup_candidates: {m['ack_rollup_candidates']}",
+        f"- batch_latency_sec(p50/p95/max): {m['batch_latency_sec']['p50']} / {m['batch_latency_sec']['p95']} / {m['batch_latency_sec']['max']}",
         "",
         "## Alerts",
         "",
@@ -99,6 +107,7 @@ def main():
         "dedupe_rate": 0.0,
         "enqueue_rate": 0.0,
         "error_rate": 0.0,
+        "batch_latency_sec": TDigest().summary(),
     }
 
     if db.exists():
@@ -148,6 +157,8 @@ def main():
                 metrics["system_repeat_alerts"] += int(r["system_repeat_alerts"])
                 metrics["ack_compressed"] += int(r["ack_compressed"])
                 metrics["ack_rollup_candidates"] += int(r["ack_rollup_candidates"])
+        # 批次延迟草图按 UTC 日分桶，窗口按天取整
+        metrics["batch_latency_sec"] = load_sketch(c, BATCH_LATENCY_METRIC, since=since.date()).summary()
         c.close()
 
     if metrics["normalized"] > 0:
@@ -7,11 +7,16 @@ import argparse
 import json
 import math
 import sqlite3
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.governance_rollups import rollup_window, transition_totals  # noqa: E402
 
 
 def now_utc() -> datetime:
@@ -48,21 +53,6 @@ def safe_div(n: float, d: float) -> float:
     return n / d
 
 
-def percentile(vals: list[float], p: float) -> float:
-    if not vals:
-        return 0.0
-    arr = sorted(float(v) for v in vals)
-    if len(arr) == 1:
-        return arr[0]
-    rank = (len(arr) - 1) * (p / 100.0)
-    lo = math.floor(rank)
-    hi = math.ceil(rank)
-    if lo == hi:
-        return arr[lo]
-    f = rank - lo
-    return arr[lo] * (1 - f) + arr[hi] * f
-
-
 def table_exists(c: sqlite3.Connection, name: str) -> bool:
     row = c.execute(
         "SELECT 1 FROM sqlite_master WHERE type='table' AND name=? LIMIT 1",
@@ -139,16 +129,7 @@ def collect_scheduler(c: sqlite3.Connection, w: Window) -> dict:
         if status == "succeeded" and action == "reflect":
             reflect_success += 1
 
-    now = now_utc()
-    queued_rows = c.execute("SELECT run_at FROM scheduler_jobs WHERE status='queued'").fetchall()
-    lags = []
-    for q in queued_rows:
-        dt = parse_iso(q["run_at"])
-        if not dt:
-            continue
-        lag = (now - dt).total_seconds()
-        if lag > 0:
-            lags.append(lag)
+    due_lag = queued_due_lag(c, now_utc())
 
     backlog = {
         "queued": int(c.execute("SELECT COUNT(*) FROM scheduler_jobs WHERE status='queued'").fetchone()[0]),
@@ -168,16 +149,38 @@ def collect_scheduler(c: sqlite3.Connection, w: Window) -> dict:
         "avg_attempt": round(safe_div(sum(attempts), len(attempts)), 3) if attempts else 0.0,
         "max_attempt": max(attempts) if attempts else 0,
         "current_backlog": backlog,
-        "due_lag_seconds": {
-            "count": len(lags),
-            "p50": round(percentile(lags, 50), 3),
-            "p95": round(percentile(lags, 95), 3),
-            "max": round(max(lags), 3) if lags else 0.0,
-        },
+        "due_lag_seconds": due_lag,
         "reflect_success_count": reflect_success,
     }
 
 
+def queued_due_lag(c: sqlite3.Connection, now: datetime) -> dict:
+    """
+    已到期 queued 作业的等待时长分位数。按 (status, run_at) 索引倒序定位第 k 个 run_at，
+    只取插值所需的几行，不把整个 backlog 读进内存。
+    """
+    now_s = iso(now)
+    n = int(c.execute("SELECT COUNT(*) FROM scheduler_jobs WHERE status='queued' AND run_at < ?", (now_s,)).fetchone()[0])
+    if n == 0:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+
+    def lag_at(rank: int) -> float:
+        row = c.execute(
+            "SELECT run_at FROM scheduler_jobs WHERE status='queued' AND run_at < ? ORDER BY run_at DESC LIMIT 1 OFFSET ?",
+            (now_s, rank),
+        ).fetchone()
+        dt = parse_iso(row[0]) if row else None
+        return max(0.0, (now - dt).total_seconds()) if dt else 0.0
+
+    def pctl(p: float) -> float:
+        rank = (n - 1) * (p / 100.0)
+        lo, hi = math.floor(rank), math.ceil(rank)
+        v_lo = lag_at(lo)
+        return v_lo if lo == hi else v_lo * (1 - (rank - lo)) + lag_at(hi) * (rank - lo)
+
+    return {"count": n, "p50": round(pctl(50), 3), "p95": round(pctl(95), 3), "max": round(lag_at(n - 1), 3)}
+
+
 def collect_audit(c: sqlite3.Connection, w: Window) -> dict:
     if not table_exists(c, "audit_events"):
         return {
@@ -193,70 +196,39 @@ def collect_audit(c: sqlite3.Connection, w: Window) -> dict:
             "learning_yield_proxy": 0,
             "escalation_rate": 0.0,
             "blocked_rate": 0.0,
+            "object_type_counts": {},
+            "actor_counts": {},
+            "transition_matrix": {},
+            "pickup_lag_seconds": {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0},
+            "rollup": {"rollup_days": 0, "computed_days": 0, "live_ranges": []},
         }
 
-    rows = c.execute(
-        "SELECT payload_json FROM audit_events WHERE timestamp >= ? AND timestamp <= ?",
-        (w.start_iso, w.end_iso),
-    ).fetchall()
-
-    event_type_counts: dict[str, int] = {}
-    rollback_count = 0
-    decision_gate_count = 0
-    blocked_count = 0
-    escalated_count = 0
-    state_transition_count = 0
-    activation_count = 0
-    archive_count = 0
-
-    for r in rows:
-        try:
-            payload = json.loads(r["payload_json"])
-        except Exception:
-            continue
-
-        et = str(payload.get("event_type") or "unknown")
-        event_type_counts[et] = event_type_counts.get(et, 0) + 1
-
-        if et == "rollback":
-            rollback_count += 1
-        if et == "decision_gate":
-            decision_gate_count += 1
-
-        after = payload.get("after") if isinstance(payload.get("after"), dict) else {}
-        outcome = str(after.get("final_outcome") or "").lower()
-        gate = str(after.get("persona_conflict_gate") or "").lower()
-
-        if outcome == "blocked" or gate == "block":
-            blocked_count += 1
-        if outcome == "escalated":
-            escalated_count += 1
-
-        if et == "state_transition":
-            state_transition_count += 1
-            before = payload.get("before") if isinstance(payload.get("before"), dict) else {}
-            b_status = str(before.get("status") or "")
-            a_status = str(after.get("status") or "")
-            if a_status == "active" and b_status != "active":
-                activation_count += 1
-            if a_status == "archived":
-                archive_count += 1
-
-    learning_yield_proxy = activation_count
+    # 整天读 governance_daily_rollups，窗口两端不满一天的部分现场扫描
+    agg, rollup_meta = rollup_window(c, w.start, w.end)
+    counters = agg["counters"]
+    transitions = transition_totals(agg["transitions"])
+    decision_gate_count = counters["decision_gate"]
+    blocked_count = counters["blocked"]
+    escalated_count = counters["escalated"]
 
     return {
-        "window_events": len(rows),
-        "event_type_counts": event_type_counts,
-        "rollback_count": rollback_count,
+        "window_events": agg["events"],
+        "event_type_counts": agg["event_type"],
+        "rollback_count": counters["rollback"],
         "decision_gate_count": decision_gate_count,
         "blocked_count": blocked_count,
         "escalated_count": escalated_count,
-        "state_transition_count": state_transition_count,
-        "activation_count": activation_count,
-        "archive_count": archive_count,
-        "learning_yield_proxy": learning_yield_proxy,
+        "state_transition_count": counters["state_transition"],
+        "activation_count": transitions["activation"],
+        "archive_count": transitions["archive"],
+        "learning_yield_proxy": transitions["activation"],
         "escalation_rate": round(pct(escalated_count, decision_gate_count), 2),
         "blocked_rate": round(pct(blocked_count, max(1, decision_gate_count)), 2) if decision_gate_count else 0.0,
+        "object_type_counts": agg["object_type"],
+        "actor_counts": agg["actor"],
+        "transition_matrix": agg["transitions"],
+        "pickup_lag_seconds": agg["pickup_lag"].summary(),
+        "rollup": rollup_meta,
     }
 
 
@@ -458,6 +430,9 @@ def render_markdown(report: dict) -> str:
     lines.append(f"- blocked_count: {a['blocked_count']}")
     lines.append(f"- escalated_count: {a['escalated_count']}")
     lines.append(f"- learning_yield_proxy: **{a['learning_yield_proxy']}**")
+    lines.append(
+        f"- pickup_lag_seconds(p50/p95/max): {a['pickup_lag_seconds']['p50']} / {a['pickup_lag_seconds']['p95']} / {a['pickup_lag_seconds']['max']}"
+    )
     lines.append("")
 
     lines.append("## Release Gate")
@@ -5,10 +5,16 @@ from __future__ import annotations
 
 import json
 import subprocess
+import sys
 import tempfile
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.llm_resilience_v0_2 import LLMResilienceConfig, LLMResilienceController  # noqa: E402
+
 LLM_TOOL = ROOT / "tools" / "memory" / "llm_memory_processor_v0_1.py"
 FIXTURE = ROOT / "data" / "fixtures" / "llm-memory" / "sample-memory-input.txt"
 
@@ -69,7 +75,7 @@ def main():
         assert first.get("runtime_backend") == "mock"
         assert int(first.get("count", 0)) >= 1
 
-        state = json.loads(state_file.read_text(encoding="utf-8"))
+        state = LLMResilienceController(LLMResilienceConfig(state_file=str(state_file))).load_state()
         assert int(state.get("consecutive_failures", 0)) >= 1
         assert state.get("circuit_open_until")
 
@@ -96,7 +102,7 @@ def main():
                         "fallback_reason": second.get("fallback_reason"),
                         "attempts": second.get("attempts"),
                     },
-                    "state_file": str(state_file),
+                    "state_db": str(state_file.with_suffix(".sqlite")),
                 },
                 ensure_ascii=False,
                 indent=2,